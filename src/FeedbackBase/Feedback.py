@@ -23,13 +23,26 @@ feedbacks.
 
 import logging
 import threading
-import datetime
-import sys
+import time
 import cPickle as pickle
-from threading import Event, Timer
+from threading import Event
 import socket
 import json
 
+from lib import trigger
+from lib.datalog import DataLog
+from lib.markerstream import MarkerStream
+
+
+# Delivery policies for control signals, see Feedback._control_delivery
+CONTROL_DELIVERY_ALL = 'all'
+"""Deliver every control signal (default)."""
+CONTROL_DELIVERY_LATEST = 'latest'
+"""Coalesce control signals which arrived at once, newest value per key wins."""
+CONTROL_DELIVERY_BATCH = 'batch'
+"""Collect control signals and deliver them once per tick."""
+CONTROL_DELIVERY_POLICIES = (CONTROL_DELIVERY_ALL, CONTROL_DELIVERY_LATEST, CONTROL_DELIVERY_BATCH)
+
 
 class Feedback(object):
     """
@@ -49,7 +62,10 @@ class Feedback(object):
 
     This class provides the :func:`send_parallel` method which you can use to
     send arbitrary data to the parallel port. You don't have to override this
-    method in your feedback.
+    method in your feedback. The triggers are written by a
+    :class:`lib.trigger.TriggerDispatcher` thread to ``_trigger_backend``, set
+    it to another :class:`lib.trigger.TriggerBackend` in :func:`on_init` to
+    send them elsewhere.
 
     Example::
 
@@ -84,32 +100,43 @@ class Feedback(object):
 
         self.logger.debug("Loaded my logger.")
         # Setup the parallel port
-        self._pport = None
-        if sys.platform == 'win32':
-            try:
-                from ctypes import windll
-                self._pport = windll.inpout32
-            except:
-                self.logger.warning("Could not load inpout32.dll. Please make sure it is located in the system32 directory")
-        else:
-            try:
-                import parallel
-                self._pport = parallel.Parallel()
-            except:
-                self.logger.warning("Unable to open parallel port! Please install pyparallel to use it.")
         if port_num != None:
             self._port_num = port_num # used in windows only''
         else:
             self._port_num = 0x378
+        self._trigger_backend = trigger.default_backend(self._port_num)
+        # started with the first trigger, see send_parallel
+        self._trigger_dispatcher = None
         self._playEvent = Event()
         self._shouldQuit = False
 
-        # Initialize with dummy values so we cann call safely .cancel
-        self._triggerResetTimer = Timer(0, None)
         self._triggerResetTime = 0.01
 
         self.udp_markers_host = '127.0.0.1'
         self.udp_markers_port = 12344
+        self.udp_markers_flush_interval = 0.01
+        self._udp_markers_socket = None
+        # started with the first marker, see send_marker
+        self._marker_stream = None
+        # see data_log
+        self._data_logs = []
+
+        # Shared memory ring buffer for control signals, see
+        # _attach_control_ringbuffer
+        self._control_ringbuffer = None
+        self._control_ringbuffer_thread = None
+        self._control_ringbuffer_delivery = True
+        self._control_ringbuffer_interval = 0.001
+
+        # How control signals are delivered, see _receive_control_signals
+        self._control_delivery = CONTROL_DELIVERY_ALL
+        self._control_batch = []
+        self._control_batch_size = 1000
+        self._control_batch_lock = threading.Lock()
+        self._control_statistics = {'received' : 0,
+                                    'delivered' : 0,
+                                    'coalesced' : 0,
+                                    'dropped' : 0}
 
         #self.tcp_markers_enable = False
         #self.tcp_markers_host = '127.0.0.1'
@@ -128,6 +155,85 @@ class Feedback(object):
         self._data = data
         self.on_control_event(data)
 
+    def _receive_control_signals(self, samples):
+        """Deliver control signals according to the delivery policy.
+
+        Called with all control signals which arrived at once, the policy in
+        ``_control_delivery`` decides what happens to them:
+
+        ``CONTROL_DELIVERY_ALL``
+            :func:`_on_control_event` is called for every sample.
+        ``CONTROL_DELIVERY_LATEST``
+            the samples are merged, the newest value per key wins, and
+            :func:`_on_control_event` is called once.
+        ``CONTROL_DELIVERY_BATCH``
+            the samples are queued and passed to :func:`on_control_batch` by
+            :func:`_deliver_control_batch`, which MainloopFeedback calls once
+            per tick. If more than ``_control_batch_size`` samples are queued,
+            the oldest ones are dropped.
+
+        You should not override this method.
+
+        :param samples: tuples (timestamp, data)
+        :type samples: list
+
+        """
+        stats = self._control_statistics
+        stats['received'] += len(samples)
+        if self._control_delivery == CONTROL_DELIVERY_LATEST:
+            if len(samples) == 1:
+                data = samples[0][1]
+            else:
+                data = dict()
+                for timestamp, d in samples:
+                    data.update(d)
+                stats['coalesced'] += len(samples) - 1
+            stats['delivered'] += 1
+            self._on_control_event(data)
+        elif self._control_delivery == CONTROL_DELIVERY_BATCH:
+            self._control_batch_lock.acquire()
+            try:
+                self._control_batch.extend(samples)
+                overflow = len(self._control_batch) - self._control_batch_size
+                if overflow > 0:
+                    del self._control_batch[:overflow]
+                    stats['dropped'] += overflow
+            finally:
+                self._control_batch_lock.release()
+        else:
+            for timestamp, data in samples:
+                stats['delivered'] += 1
+                self._on_control_event(data)
+
+    def _deliver_control_batch(self):
+        """Pass the queued control signals to :func:`on_control_batch`.
+
+        Only needed with ``CONTROL_DELIVERY_BATCH``. MainloopFeedback calls
+        this method once per tick, other Feedbacks have to call it themselves.
+        """
+        if not self._control_batch:
+            return
+        self._control_batch_lock.acquire()
+        try:
+            samples = self._control_batch
+            self._control_batch = []
+        finally:
+            self._control_batch_lock.release()
+        self._control_statistics['delivered'] += len(samples)
+        self.on_control_batch(samples)
+
+    def get_control_statistics(self):
+        """Return counters of the control signal delivery.
+
+        :returns: dictionary with the number of ``received``, ``delivered``,
+            ``coalesced`` and ``dropped`` control signals.
+
+        """
+        stats = self._control_statistics.copy()
+        if self._control_ringbuffer is not None:
+            stats['dropped'] += self._control_ringbuffer.dropped
+        return stats
+
     def _on_interaction_event(self, data):
         """
         Store the variable-value pairs in the feedback and call
@@ -164,7 +270,6 @@ class Feedback(object):
 
         You should not override this method, use on_play instead.
         """
-        self._udp_markers_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         #if self.tcp_markers_enable:
         #    self.logger.info("Connecting to " + self.tcp_markers_host + ":" + str(self.tcp_markers_port))
         #    self._tcp_markers_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -189,6 +294,10 @@ class Feedback(object):
         You should not override this method, use on_stop instead.
         """
         self.on_stop()
+        if self._marker_stream is not None:
+            self._marker_stream.flush()
+        for log in self._data_logs:
+            log.flush()
 
     def _on_quit(self):
         """
@@ -199,6 +308,15 @@ class Feedback(object):
         self._shouldQuit = True
         self._playEvent.set()
         self.on_quit()
+        if self._trigger_dispatcher is not None:
+            self._trigger_dispatcher.stop()
+            self.logger.info("Trigger statistics: %s" % str(self._trigger_dispatcher.get_statistics()))
+        if self._marker_stream is not None:
+            self._marker_stream.close()
+            self._marker_stream = None
+        for log in self._data_logs:
+            log.close()
+        self._data_logs = []
 
 
     #
@@ -298,6 +416,23 @@ class Feedback(object):
         self.logger.debug("on_control_event not implemented yet!")
 
 
+    def on_control_batch(self, samples):
+        """
+        This method is called once per tick with all control signals received
+        since the last tick if the Feedback uses the ``CONTROL_DELIVERY_BATCH``
+        delivery policy.
+
+        The default implementation passes the newest sample to
+        :func:`on_control_event`. Override this method if you want to process
+        all samples.
+
+        :param samples: tuples (timestamp, data) in the order of arrival
+        :type samples: list
+
+        """
+        self._on_control_event(samples[-1][1])
+
+
     #
     # Common routines for all feedbacks
     #
@@ -305,24 +440,37 @@ class Feedback(object):
         """Sends the data to the parallel port.
 
         The data is sent to the parallel port. After a short amount of
-        time the parallel port is reset automatically.
+        time (``_triggerResetTime``) the parallel port is reset
+        automatically.
+
+        The data is written by the trigger thread, this method returns
+        immediately.
 
         :param data: Data to be sent to the parallel port
         :type data: int
+        :param reset: reset the parallel port afterwards
+        :type reset: bool
 
         """
-        self.logger.info("Trigger: %s :%s" % (str(datetime.datetime.now()), str(data)))
-        if reset == True:
-            # A new trigger arrived before we could reset the old one
-            self._triggerResetTimer.cancel()
-        if self._pport:
-            if sys.platform == 'win32':
-                self._pport.Out32(self._port_num, data)
-            else:
-                self._pport.setData(data)
-            if reset:
-                self._triggerResetTimer = threading.Timer(self._triggerResetTime, self.send_parallel, (0x0, False))
-                self._triggerResetTimer.start()
+        if self._trigger_dispatcher is None:
+            self._trigger_dispatcher = trigger.TriggerDispatcher(self._trigger_backend,
+                                                                 self._triggerResetTime)
+            self._trigger_dispatcher.start()
+        self._trigger_dispatcher.send(data, reset)
+
+
+    def get_trigger_statistics(self):
+        """Return the statistics of the trigger thread.
+
+        See :func:`lib.trigger.TriggerDispatcher.get_statistics`.
+
+        :returns: dict
+
+        """
+        if self._trigger_dispatcher is None:
+            return {'sent' : 0, 'resets' : 0, 'dropped' : 0, 'latency_mean' : 0.0,
+                    'latency_std' : 0.0, 'latency_max' : 0.0}
+        return self._trigger_dispatcher.get_statistics()
 
 
     def send_udp(self, data):
@@ -337,9 +485,56 @@ class Feedback(object):
             the marker.
 
         """
+        if self._udp_markers_socket is None:
+            self._udp_markers_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self._udp_markers_socket.sendto(data + '\n',
                                         (self.udp_markers_host, self.udp_markers_port))
 
+
+    def send_marker(self, marker):
+        """Sends the marker via the UDP marker stream.
+
+        Unlike :func:`send_udp` this does not send a datagram per marker: the
+        marker is stamped with the wall clock and a monotonic clock and sent
+        together with other markers every ``udp_markers_flush_interval``
+        seconds, see :class:`lib.markerstream.MarkerStream` for the format.
+        Pending markers are flushed when the Feedback is stopped or quit.
+
+        :param marker: the marker, must not contain newlines
+        :type marker: str
+
+        """
+        if self._marker_stream is None:
+            self._marker_stream = MarkerStream(self.udp_markers_host,
+                                               self.udp_markers_port,
+                                               self.udp_markers_flush_interval)
+            self._marker_stream.start()
+        self._marker_stream.send(marker)
+
+    def data_log(self, directory, prefix, suffix='.csv', **kwargs):
+        """Return a new, started :class:`lib.datalog.DataLog`.
+
+        Writing to the log only appends the record to a buffer, a thread
+        writes it to the next free file ``<directory>/<prefix><n><suffix>``.
+        Pending records are flushed when the Feedback is stopped and the log
+        is closed when the Feedback quits. Close it yourself with
+        ``close(wait=False)`` to start a new file with the next log.
+
+        :param directory: directory of the files
+        :type directory: str
+        :param prefix: file name before the number
+        :type prefix: str
+        :param suffix: file name after the number
+        :type suffix: str
+        :param kwargs: further arguments of :class:`lib.datalog.DataLog`
+        :returns: DataLog
+
+        """
+        log = DataLog(directory, prefix, suffix, **kwargs)
+        log.start()
+        self._data_logs.append(log)
+        return log
+
     #def send_tcp(self, data):
     #    """Sends marker via TCP/IP.
     #
@@ -352,6 +547,65 @@ class Feedback(object):
     #    self._tcp_markers_socket.send(data)
 
 
+    def get_latest_control_sample(self):
+        """Return the latest control signal from the shared memory ring buffer.
+
+        All older samples are skipped. Only available if the Feedback
+        Controller uses the ring buffer for control signals and
+        ``_control_ringbuffer_delivery`` was set to ``False`` in ``__init__``.
+
+        :returns: tuple (sequence number, timestamp, data) or None
+
+        """
+        if self._control_ringbuffer is None:
+            return None
+        return self._control_ringbuffer.latest()
+
+    def drain_control_samples(self):
+        """Return all control signals from the shared memory ring buffer which
+        have not been read yet.
+
+        Only available if the Feedback Controller uses the ring buffer for
+        control signals and ``_control_ringbuffer_delivery`` was set to
+        ``False`` in ``__init__``.
+
+        :returns: list of tuples (sequence number, timestamp, data)
+
+        """
+        if self._control_ringbuffer is None:
+            return []
+        return self._control_ringbuffer.drain()
+
+    def _attach_control_ringbuffer(self, ringbuffer):
+        """Receive control signals via the shared memory ring buffer.
+
+        Unless ``_control_ringbuffer_delivery`` is ``False``, a thread polls
+        the ring buffer and delivers the samples just like control signals
+        arriving via IPC (see :func:`_receive_control_signals`). Otherwise the Feedback
+        reads the samples itself with :func:`drain_control_samples` or
+        :func:`get_latest_control_sample`.
+
+        :param ringbuffer: lib.ringbuffer.ControlSignalRingBuffer
+
+        """
+        self._control_ringbuffer = ringbuffer
+        if self._control_ringbuffer_delivery:
+            self._control_ringbuffer_thread = threading.Thread(target=self._control_ringbuffer_loop)
+            self._control_ringbuffer_thread.setDaemon(True)
+            self._control_ringbuffer_thread.start()
+
+    def _control_ringbuffer_loop(self):
+        """Deliver the samples from the ring buffer until the Feedback quits."""
+        while not self._shouldQuit:
+            samples = self._control_ringbuffer.drain()
+            if samples:
+                try:
+                    self._receive_control_signals([(t, data) for s, t, data in samples])
+                except:
+                    self.logger.exception("Handling a control signal caused an exception:")
+            else:
+                time.sleep(self._control_ringbuffer_interval)
+
     def _get_variables(self):
         """Return a dictionary of variables and their values."""
         # try everything from self.__dict__:
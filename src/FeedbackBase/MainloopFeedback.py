@@ -17,6 +17,7 @@
 
 
 from Feedback import Feedback
+from lib.frametiming import FrameTiming
 
 
 class MainloopFeedback(Feedback):
@@ -55,18 +56,35 @@ class MainloopFeedback(Feedback):
     Additionally it calls either :func:`play_tick` or :func:`pause_tick`
     repeatedly afterwards, depending if the Feedback is paused or not.
 
+    If ``_frame_timing_enabled`` is set to ``True`` the duration of every
+    phase (:data:`FRAME_PHASES`) of the last ``_frame_timing_size`` frames
+    is recorded and dropped frames are counted, see
+    :class:`lib.frametiming.FrameTiming`. A summary is logged after
+    :func:`post_mainloop` and the frames are written to
+    ``_frame_timing_file`` if set. :func:`get_frame_timing` returns the
+    summary, also on request via the ``getframetiming`` interaction command.
+
     """
 
+    FRAME_PHASES = ("control", "tick", "play")
+    """Phases of a frame: delivering control signals, :func:`tick` and
+    :func:`play_tick` or :func:`pause_tick`."""
+
     def on_init(self):
         self._running = False
         self._paused = False
         self._inMainloop = False
+        self._frame_timing_enabled = False
+        self._frame_timing_size = 3600
+        self._frame_timing_file = None
+        self._frame_timing = None
         self.init()
 
     def on_play(self):
         self.pre_mainloop()
         self._mainloop()
         self.post_mainloop()
+        self._export_frame_timing()
 
     def on_pause(self):
         self._paused = not self._paused
@@ -84,18 +102,80 @@ class MainloopFeedback(Feedback):
         Calls tick repeatedly.
 
         Additionally it calls either :func:`pause_tick` or :func:`play_tick`,
-        depending if the Feedback is paused or not.
+        depending if the Feedback is paused or not. Control signals queued
+        by the ``'batch'`` delivery policy are delivered before each tick.
         """
         self._running = True
         self._inMainloop = True
+        timing = None
+        if self._frame_timing_enabled:
+            timing = FrameTiming(self.FRAME_PHASES, self._frame_timing_size,
+                                 self.frame_rate())
+        self._frame_timing = timing
         while self._running:
-            self.tick()
-            if self._paused:
-                self.pause_tick()
-            else:
-                self.play_tick()
+            self._run_frame(timing)
         self._inMainloop = False
 
+    def _run_frame(self, timing=None):
+        """Run one iteration of the mainloop.
+
+        Delivers the queued control signals and calls :func:`tick` and
+        :func:`pause_tick` or :func:`play_tick`.
+
+        :param timing: records the phases of the frame
+        :type timing: :class:`lib.frametiming.FrameTiming`
+
+        """
+        if timing:
+            timing.begin()
+        self._deliver_control_batch()
+        if timing:
+            timing.mark("control")
+        self.tick()
+        if timing:
+            timing.mark("tick")
+        if self._paused:
+            self.pause_tick()
+        else:
+            self.play_tick()
+        if timing:
+            timing.mark("play")
+
+    def _export_frame_timing(self):
+        """Log the frame timing summary and write the frames to
+        ``_frame_timing_file``."""
+        if self._frame_timing is None:
+            return
+        self.logger.info("Frame timing: %s" % str(self._frame_timing.summary()))
+        if self._frame_timing_file:
+            try:
+                self._frame_timing.export(self._frame_timing_file)
+            except IOError, e:
+                self.logger.error("Unable to write frame timing: %s" % str(e))
+
+    def get_frame_timing(self, filename=None):
+        """Return the frame timing summary of the current or last run.
+
+        :param filename: also write the recorded frames to this file
+        :type filename: str
+        :returns: dict, see :func:`lib.frametiming.FrameTiming.summary`, or
+            ``None`` if frame timing is not enabled
+
+        """
+        if self._frame_timing is None:
+            return None
+        if filename:
+            self._frame_timing.export(filename)
+        return self._frame_timing.summary()
+
+    def frame_rate(self):
+        """Return the target frame rate used to detect dropped frames.
+
+        :returns: frames per second or ``None`` if unknown
+
+        """
+        return None
+
     def init(self):
         """Called at the beginning of the Feedback's lifecycle.
 
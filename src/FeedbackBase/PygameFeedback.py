@@ -22,6 +22,8 @@ import os
 import pygame
 
 from MainloopFeedback import MainloopFeedback
+from lib import headless
+from lib.transformcache import TransformCache
 
 
 class PygameFeedback(MainloopFeedback):
@@ -34,6 +36,19 @@ class PygameFeedback(MainloopFeedback):
     overwritten by derived classes.  It also takes care of shutting down pygame
     automatically upon stop, quit or crash of the feedback.
 
+    Derived classes can add their sprites to :attr:`sprites` and call
+    :func:`draw_sprites` instead of redrawing the whole screen. If
+    :attr:`dirtyRects` is set, only the areas of the screen which changed are
+    restored from the background and updated.
+
+    Rotated and scaled surfaces should be taken from :attr:`transforms`
+    instead of transforming them every frame, :func:`rotations` renders all
+    rotations of a surface ahead of time.
+
+    With :attr:`headless` set, the screen is a surface in memory and time
+    advances by exactly 1/FPS seconds per :func:`tick`, see
+    :mod:`lib.headless`.
+
     """
 
     def init(self):
@@ -50,6 +65,9 @@ class PygameFeedback(MainloopFeedback):
         self.fullscreen = False
         """Start pygame in fullscreen mode or not."""
 
+        self.headless = False
+        """Render without a display and with a virtual clock."""
+
         self.caption = "PygameFeedback"
         """Pygame window caption."""
 
@@ -59,6 +77,15 @@ class PygameFeedback(MainloopFeedback):
         self.backgroundColor = [0, 0, 0]
         """RGB values for the background color."""
 
+        self.dirtyRects = False
+        """Update only the changed areas of the screen in :func:`draw_sprites`."""
+
+        self.rotationResolution = 1.0
+        """Angle in degrees between two rotations rendered by :func:`rotations`."""
+
+        self._transforms = TransformCache()
+        """Cache of scaled and rotated surfaces."""
+
         # For keys
         self.keypressed = False
         """Was a key pressed?"""
@@ -78,12 +105,24 @@ class PygameFeedback(MainloopFeedback):
         self.quit_pygame()
 
 
+    FRAME_PHASES = ("control", "events", "tick", "play")
+    """Phases of a frame: delivering control signals, processing pygame
+    events, waiting for the next frame and :func:`play_tick` or
+    :func:`pause_tick`."""
+
+
     def tick(self):
         """Process pygame events and advance time for 1/FPS seconds."""
         self.process_pygame_events()
+        if self._frame_timing:
+            self._frame_timing.mark("events")
         self.elapsed = self.clock.tick(self.FPS)
 
 
+    def frame_rate(self):
+        return self.FPS
+
+
     def pause_tick(self):
         pass
 
@@ -98,9 +137,15 @@ class PygameFeedback(MainloopFeedback):
         """
         os.environ['SDL_VIDEO_WINDOW_POS'] = "%d,%d" % (self.screenPos[0],
                                                         self.screenPos[1])
+        if self.headless:
+            drivers = headless.set_dummy_drivers()
         pygame.init()
         pygame.display.set_caption(self.caption)
-        if self.fullscreen:
+        if self.headless:
+            self.screen = pygame.display.set_mode((self.screenSize[0],
+                                                   self.screenSize[1]),
+                                                   0, headless.DEPTH)
+        elif self.fullscreen:
             self.screen = pygame.display.set_mode((self.screenSize[0],
                                                    self.screenSize[1]),
                                                    pygame.FULLSCREEN)
@@ -108,14 +153,80 @@ class PygameFeedback(MainloopFeedback):
             self.screen = pygame.display.set_mode((self.screenSize[0],
                                                    self.screenSize[1]),
                                                    pygame.RESIZABLE)
-        self.clock = pygame.time.Clock()
+        if self.headless:
+            headless.restore_drivers(drivers)
+            self.clock = headless.install(headless.VirtualClock(self.FPS))
+        else:
+            self.clock = pygame.time.Clock()
+        self.sprites = pygame.sprite.LayeredDirty()
+        self.set_background()
 
 
     def quit_pygame(self):
         """Quit Pygame."""
+        if self.headless:
+            headless.uninstall()
         pygame.quit()
 
 
+    def set_background(self, background=None):
+        """Set the background the sprites are drawn upon.
+
+        The whole screen is drawn again by the next :func:`draw_sprites`.
+
+        :param background: surface of the size of the screen, ``None`` for
+            a background of :attr:`backgroundColor`
+        :type background: pygame.Surface
+
+        """
+        if background is None:
+            background = pygame.Surface(self.screen.get_size()).convert()
+            background.fill(self.backgroundColor)
+        self.sprites.clear(self.screen, background)
+        self.sprites.repaint_rect(self.screen.get_rect())
+
+
+    def draw_sprites(self):
+        """Draw the sprites and update the display.
+
+        With :attr:`dirtyRects` set, only the sprites whose ``dirty`` flag
+        is set are drawn again, and only the areas they covered before and
+        cover now are restored from the background and passed to
+        ``pygame.display.update``. Otherwise the background and all sprites
+        are drawn and the display is flipped.
+
+        :returns: list of the updated rectangles
+
+        """
+        # LayeredDirty chooses the mode by the time the last frame took,
+        # we decide ourselves
+        self.sprites._use_update = self.dirtyRects
+        rects = self.sprites.draw(self.screen)
+        if self.dirtyRects:
+            pygame.display.update(rects)
+        else:
+            pygame.display.flip()
+        return rects
+
+
+    def rotations(self, surface, scales=(1.0,), background=False):
+        """Render the rotations of a surface at :attr:`rotationResolution`.
+
+        Call this in :func:`init_graphics` and get the rotations during the
+        trials, see :class:`lib.transformcache.RotationCache`.
+
+        :param surface: the surface to rotate around its center
+        :type surface: pygame.Surface
+        :param scales: scale factors to render the rotations at
+        :type scales: sequence of float
+        :param background: render the rotations in a background thread
+        :type background: bool
+        :returns: RotationCache
+
+        """
+        return self._transforms.rotations(surface, self.rotationResolution, scales, background)
+
+
     def init_graphics(self):
         """
         Called after init_pygame.
@@ -144,6 +255,7 @@ class PygameFeedback(MainloopFeedback):
             self.screen = pygame.display.set_mode((e, event.h), pygame.RESIZABLE)
             self.resized = True
             self.screenSize = [self.screen.get_width(), self.screen.get_height()]
+            self.set_background()
             self.init_graphics()
         elif event.type == pygame.QUIT:
             self.on_stop()
@@ -76,6 +76,9 @@ class VisionEggFeedback(MainloopFeedback):
         of the display device
         framecount_stimulus_transition: Whether to use vsync-determined
         frame counts to assess the stimulus display time
+        texture_cache_size: Memory for the images of L{preload_images}
+        and set_file in MB, RAM and VRAM together. The least recently
+        used images are dropped if they need more.
         """
         self.wait_style_fixed = True
         self.fullscreen = False
@@ -91,12 +94,14 @@ class VisionEggFeedback(MainloopFeedback):
         self.print_frames = False
         self.adapt_times_to_refresh_rate = True
         self.framecount_stimulus_transition = False
+        self.texture_cache_size = 256
         self._view_parameters = ['fullscreen', 'geometry', 'bg_color',
                                  'font_color_name', 'font_size',
                                  'fixation_cross_time',
                                  'fixation_cross_symbol',
                                  'countdown_symbol_duration',
-                                 'countdown_start', 'fullscreen_resolution']
+                                 'countdown_start', 'fullscreen_resolution',
+                                 'texture_cache_size']
 
     def init_parameters(self):
         pass
@@ -278,6 +283,16 @@ class VisionEggFeedback(MainloopFeedback):
         """
         return self._view.add_image_stimulus(**kw)
 
+    def preload_images(self, filenames, upload=True):
+        """ Read and decode the given image files in the background, so
+        that set_file on image stimuli doesn't read them during a
+        stimulus sequence. If upload is True, wait until they are read
+        and upload them to the graphics card; this requires the screen,
+        so only do it in run(). Call it with upload=False earlier, e.g.
+        in pre_mainloop, to read them while the screen is set up.
+        """
+        self._view.preload_images(filenames, upload)
+
     @property
     def screen_size(self):
         """ Convenience property for obtaining the effective size of the
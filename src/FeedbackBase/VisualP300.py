@@ -23,6 +23,7 @@ VisualP300 provides a framework for running P300 experiments within pyff.
 import sys,os,random
 import pygame
 from MainloopFeedback import MainloopFeedback
+from lib import headless
 from lib.P300VisualElement.Textbox import Textbox
 from lib.P300Aux.P300Functions import wait_for_key,show_message
 
@@ -105,6 +106,12 @@ class VisualP300(MainloopFeedback):
 
     To prepare your own experiment, you could first have a look at the examples
     such as P300Matrix.py and P300Hex.py
+
+    **Headless mode**
+
+    If headless is set, the screen is a surface in memory, the frames take
+    exactly 1/fps seconds of virtual time and the pygame info screen is not
+    shown, see lib.headless.
     """
 
 
@@ -153,6 +160,7 @@ class VisualP300(MainloopFeedback):
         """
         self.canvasWidth,self.canvasHeight = 600,600
         self.fullscreen = self.DEFAULT_FULLSCREEN
+        self.headless = False           # No display, virtual clock
         self.bgcolor = self.DEFAULT_BGCOLOR
         self.textsize = self.DEFAULT_TEXTSIZE
         self.textcolor = self.DEFAULT_TEXTCOLOR
@@ -214,8 +222,12 @@ class VisualP300(MainloopFeedback):
     def _init_pygame(self):
         # Initialize pygame, open screen and fill screen with background color
         #os.environ['SDL_VIDEODRIVER'] = self.video_driver   # Set video driver
+        if self.headless:
+            drivers = headless.set_dummy_drivers()
         pygame.init()
-        if self.fullscreen:
+        if self.headless:
+            self.screen = pygame.display.set_mode((self.screenWidth,self.screenHeight),0,headless.DEPTH)
+        elif self.fullscreen:
             #use opts = pygame.HWSURFACE|pygame.DOUBLEBUF|pygame.FULLSCREEN to use doublebuffer and vertical sync
             opts = pygame.FULLSCREEN
             self.screen = pygame.display.set_mode((self.screenWidth,self.screenHeight),opts)
@@ -231,11 +243,15 @@ class VisualP300(MainloopFeedback):
         self.screen.blit(self.all_background,self.all_background_rect)
         pygame.display.flip()
         self.screen.blit(self.all_background,self.all_background_rect)
-        self.clock = pygame.time.Clock()
         pygame.mouse.set_visible(False)
         # init sound engine
         pygame.mixer.init()
-        if self.pygame_info:        # If true, give some information
+        if self.headless:
+            headless.restore_drivers(drivers)
+            self.clock = headless.install(headless.VirtualClock(self.fps))
+        else:
+            self.clock = pygame.time.Clock()
+        if self.pygame_info and not self.headless:        # If true, give some information
             inf = pygame.display.Info()
             driver = pygame.display.get_driver()
             text = "PYGAME SYSTEM INFO\n\n"
@@ -265,6 +281,8 @@ class VisualP300(MainloopFeedback):
         self.deco = None
         self.elements = None
         self.screen = None
+        if self.headless:
+            headless.uninstall()
         pygame.quit()
         # Close datafile
         if self.datafile is not None:
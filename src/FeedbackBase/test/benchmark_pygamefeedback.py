@@ -0,0 +1,140 @@
+# benchmark_pygamefeedback.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Benchmark of the dirty rectangle mode of PygameFeedback.
+
+Runs the play ticks of TrivialPong and of scenes modelled after the moving
+and static parts of FeedbackCursorArrow, BrainPong and GoalKeeper on a
+1920x1080 screen, once redrawing and flipping the whole screen and once with
+:attr:`PygameFeedback.dirtyRects` set. Reports the time per frame. Without a
+display, the Feedbacks run headless (see :mod:`lib.headless`), so the
+numbers include the drawing but not the transfer to the graphics card. Run
+from the src directory::
+
+    python -m FeedbackBase.test.benchmark_pygamefeedback
+
+"""
+
+
+import math
+import os
+import time
+
+import pygame
+
+from FeedbackBase.PygameFeedback import PygameFeedback
+from Feedbacks.TrivialPong.TrivialPong import TrivialPong
+
+
+SIZE = [1920, 1080]
+FRAMES = 300
+
+
+class Scene(PygameFeedback):
+    """A static background with static and moving sprites."""
+
+    def __init__(self, static, moving, textured=False):
+        """
+        :param static: sizes of the static sprites
+        :param moving: sizes of the moving sprites
+        :param textured: use a noisy background image instead of a color
+
+        """
+        PygameFeedback.__init__(self)
+        self.static = static
+        self.moving = moving
+        self.textured = textured
+        self.frame = 0
+
+    def init_graphics(self):
+        if self.textured:
+            background = pygame.Surface(self.screen.get_size()).convert()
+            for x in range(0, self.screen.get_width(), 16):
+                for y in range(0, self.screen.get_height(), 16):
+                    background.fill(((x * 7) % 256, (y * 5) % 256, 128), (x, y, 16, 16))
+            self.set_background(background)
+        self.movingSprites = []
+        for i, size in enumerate(self.static + self.moving):
+            sprite = pygame.sprite.DirtySprite()
+            sprite.image = pygame.Surface(size).convert()
+            sprite.image.fill((255, 255, 255))
+            sprite.rect = sprite.image.get_rect(center=(200 + 300 * i, 200 + 100 * i))
+            self.sprites.add(sprite)
+            if i >= len(self.static):
+                self.movingSprites.append(sprite)
+
+    def play_tick(self):
+        self.frame += 1
+        width, height = self.screen.get_size()
+        for i, sprite in enumerate(self.movingSprites):
+            phase = self.frame / 30.0 + i
+            sprite.rect.center = (width / 2 + width / 3 * math.sin(phase),
+                                  height / 2 + height / 3 * math.cos(phase))
+            sprite.dirty = 1
+        self.draw_sprites()
+
+
+def trivial_pong():
+    fb = TrivialPong()
+    def play_tick(play_tick=fb.play_tick):
+        fb.val = math.sin(time.time())
+        play_tick()
+    fb.play_tick = play_tick
+    return fb
+
+
+def cursor_arrow():
+    # arrow, target fields and fixation cross; cursor
+    return Scene([(300, 300), (200, 1080), (200, 1080), (40, 40)], [(50, 50)])
+
+
+def brain_pong():
+    # walls; bar and bowl on a background image
+    return Scene([(400, 1080), (400, 1080)], [(224, 72), (45, 45)], True)
+
+
+def goal_keeper():
+    # goal; keeper and ball
+    return Scene([(600, 100)], [(180, 60), (60, 60)])
+
+
+def main():
+    print "%-20s %12s %12s" % ("", "flip [ms]", "dirty [ms]")
+    for name, create in (("TrivialPong", trivial_pong),
+                         ("FeedbackCursorArrow", cursor_arrow),
+                         ("BrainPong", brain_pong),
+                         ("GoalKeeper", goal_keeper)):
+        times = []
+        for dirty in False, True:
+            fb = create()
+            fb.on_init()
+            fb.screenSize = SIZE
+            fb.dirtyRects = dirty
+            fb.headless = not os.environ.get("DISPLAY")
+            fb.init_pygame()
+            fb.init_graphics()
+            t = time.time()
+            for i in xrange(FRAMES):
+                fb.play_tick()
+            times.append(1000 * (time.time() - t) / FRAMES)
+            fb.quit_pygame()
+        print "%-20s %12.2f %12.2f" % (name, times[0], times[1])
+
+
+if __name__ == "__main__":
+    main()
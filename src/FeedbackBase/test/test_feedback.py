@@ -17,8 +17,13 @@
 
 
 import unittest
+import socket
+import time
 
+from FeedbackBase import Feedback as FeedbackModule
 from FeedbackBase.Feedback import Feedback
+from lib.ringbuffer import ControlSignalRingBuffer
+from lib.test.test_trigger import RecordingBackend
 
 
 class FeedbackTestCase(unittest.TestCase):
@@ -48,6 +53,117 @@ class FeedbackTestCase(unittest.TestCase):
         except:
             self.fail()
 
+    def testSendParallel(self):
+        """Should write triggers with the trigger thread."""
+        fb = Feedback()
+        fb._trigger_backend = RecordingBackend()
+        fb.send_parallel(1)
+        fb.send_parallel(2, False)
+        fb._on_quit()
+        self.assertEqual(fb._trigger_backend.values(), [1, 2, 0])
+        self.assertEqual(fb.get_trigger_statistics()['sent'], 2)
+
+    def testSendMarker(self):
+        """Should flush the markers when the Feedback quits."""
+        recorder = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        recorder.bind(("127.0.0.1", 0))
+        recorder.settimeout(1)
+        fb = Feedback()
+        fb.udp_markers_host, fb.udp_markers_port = recorder.getsockname()
+        fb.udp_markers_flush_interval = 10
+        fb.send_marker("foo")
+        fb._on_quit()
+        lines = recorder.recv(65536).splitlines()
+        recorder.close()
+        self.assertEqual(lines[1].split()[2], "foo")
+
+    def testControlRingbuffer(self):
+        """Should deliver control signals from the ring buffer."""
+        rb = ControlSignalRingBuffer.create()
+        fb = Feedback()
+        received = []
+        fb.on_control_event = received.append
+        fb._attach_control_ringbuffer(ControlSignalRingBuffer(rb.filename))
+        try:
+            rb.write([1.0, 2.0])
+            rb.write(3.0)
+            for i in range(100):
+                if len(received) == 2:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(received, [{"cl_output" : [1.0, 2.0]},
+                                        {"cl_output" : 3.0}])
+            self.assertEqual(fb._data, {"cl_output" : 3.0})
+        finally:
+            fb._on_quit()
+            fb._control_ringbuffer_thread.join()
+            rb.remove()
+
+    def testControlRingbufferWithoutDelivery(self):
+        """Should let the feedback read the ring buffer itself."""
+        rb = ControlSignalRingBuffer.create()
+        fb = Feedback()
+        fb._control_ringbuffer_delivery = False
+        self.assertEqual(fb.drain_control_samples(), [])
+        self.assertEqual(fb.get_latest_control_sample(), None)
+        fb._attach_control_ringbuffer(ControlSignalRingBuffer(rb.filename))
+        rb.write(1.0)
+        rb.write(2.0)
+        self.assertEqual([d for s, t, d in fb.drain_control_samples()],
+                         [{"cl_output" : 1.0}, {"cl_output" : 2.0}])
+        rb.write(3.0)
+        self.assertEqual(fb.get_latest_control_sample()[2], {"cl_output" : 3.0})
+        rb.remove()
+
+    def testControlDeliveryAll(self):
+        """Should deliver every control signal by default."""
+        fb = Feedback()
+        received = []
+        fb.on_control_event = received.append
+        fb._receive_control_signals([(1.0, {"a" : 1}), (2.0, {"a" : 2})])
+        self.assertEqual(received, [{"a" : 1}, {"a" : 2}])
+        stats = fb.get_control_statistics()
+        self.assertEqual((stats["received"], stats["delivered"]), (2, 2))
+
+    def testControlDeliveryLatest(self):
+        """Should coalesce control signals, newest value per key wins."""
+        fb = Feedback()
+        fb._control_delivery = FeedbackModule.CONTROL_DELIVERY_LATEST
+        received = []
+        fb.on_control_event = received.append
+        fb._receive_control_signals([(1.0, {"a" : 1, "b" : 1}),
+                                     (2.0, {"a" : 2}),
+                                     (3.0, {"a" : 3})])
+        self.assertEqual(received, [{"a" : 3, "b" : 1}])
+        stats = fb.get_control_statistics()
+        self.assertEqual((stats["received"], stats["delivered"], stats["coalesced"]),
+                         (3, 1, 2))
+
+    def testControlDeliveryBatch(self):
+        """Should queue control signals and deliver them at once."""
+        fb = Feedback()
+        fb._control_delivery = FeedbackModule.CONTROL_DELIVERY_BATCH
+        fb._control_batch_size = 3
+        batches = []
+        fb.on_control_batch = batches.append
+        fb._deliver_control_batch()
+        self.assertEqual(batches, [])
+        for i in range(5):
+            fb._receive_control_signals([(float(i), {"a" : i})])
+        fb._deliver_control_batch()
+        self.assertEqual(batches, [[(2.0, {"a" : 2}), (3.0, {"a" : 3}), (4.0, {"a" : 4})]])
+        self.assertEqual(fb.get_control_statistics()["dropped"], 2)
+
+    def testControlBatchDefault(self):
+        """Should pass the newest sample of a batch to on_control_event."""
+        fb = Feedback()
+        fb._control_delivery = FeedbackModule.CONTROL_DELIVERY_BATCH
+        received = []
+        fb.on_control_event = received.append
+        fb._receive_control_signals([(1.0, {"a" : 1}), (2.0, {"a" : 2})])
+        fb._deliver_control_batch()
+        self.assertEqual(received, [{"a" : 2}])
+
 def suite():
     testSuite = unittest.makeSuite(FeedbacksTestCase)
     return testSuite
@@ -65,6 +65,20 @@ class MainloopFeedbackTestCase(unittest.TestCase):
         self.stop()
         self.assertTrue(self.quit())
 
+    def testFrameTiming(self):
+        """Mainloop Feedback should record the frame timing if enabled."""
+        self.fb._frame_timing_enabled = True
+        ticks = []
+        def play_tick():
+            ticks.append(1)
+            if len(ticks) == 10:
+                self.fb._running = False
+        self.fb.play_tick = play_tick
+        self.assertTrue(self.play(5))
+        timing = self.fb.get_frame_timing()
+        self.assertEqual(timing['frames'], 10)
+        self.assertTrue('play_mean' in timing)
+
 
     def init(self, timeout=None):
         return self.call_async(self.fb.on_init, timeout)
@@ -0,0 +1,103 @@
+# test_pygamefeedback.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import os
+import unittest
+
+# render without a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from FeedbackBase.PygameFeedback import PygameFeedback
+
+
+RED = (255, 0, 0, 255)
+BLACK = (0, 0, 0, 255)
+
+
+class PygameFeedbackTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.fb = PygameFeedback()
+        self.fb.on_init()
+        self.fb.screenSize = [200, 100]
+        self.fb.init_pygame()
+        # the dummy driver defaults to an 8 bit palette without red
+        self.fb.screen = pygame.display.set_mode(self.fb.screenSize, 0, 32)
+        self.fb.set_background()
+        self.sprite = pygame.sprite.DirtySprite()
+        self.sprite.image = pygame.Surface((10, 10))
+        self.sprite.image.fill(RED)
+        self.sprite.rect = self.sprite.image.get_rect(topleft=(20, 20))
+        self.fb.sprites.add(self.sprite)
+
+    def tearDown(self):
+        self.fb.quit_pygame()
+
+    def testDirtyRects(self):
+        """Should update only the changed areas in dirty rect mode."""
+        self.fb.dirtyRects = True
+        screen = self.fb.screen.get_rect()
+        rects = self.fb.draw_sprites()
+        self.assertEqual(rects[0].unionall(rects), screen)
+        self.assertEqual(self.fb.draw_sprites(), [])
+        self.sprite.rect.x += 5
+        self.sprite.dirty = 1
+        rects = self.fb.draw_sprites()
+        self.assertEqual(rects[0].unionall(rects), pygame.Rect(20, 20, 15, 10))
+        self.assertEqual(self.fb.screen.get_at((22, 25)), BLACK)
+        self.assertEqual(self.fb.screen.get_at((30, 25)), RED)
+
+    def testFlip(self):
+        """Should redraw the whole screen without dirty rect mode."""
+        screen = self.fb.screen.get_rect()
+        self.assertEqual(self.fb.draw_sprites(), [screen])
+        self.sprite.rect.x += 5
+        self.assertEqual(self.fb.draw_sprites(), [screen])
+        self.assertEqual(self.fb.screen.get_at((22, 25)), BLACK)
+        self.assertEqual(self.fb.screen.get_at((30, 25)), RED)
+
+    def testBackground(self):
+        """Should restore the areas from the background."""
+        background = pygame.Surface(self.fb.screen.get_size())
+        background.fill((0, 0, 255))
+        self.fb.dirtyRects = True
+        self.fb.set_background(background)
+        self.fb.draw_sprites()
+        self.sprite.rect.x += 5
+        self.sprite.dirty = 1
+        self.fb.draw_sprites()
+        self.assertEqual(self.fb.screen.get_at((22, 25)), (0, 0, 255, 255))
+
+    def testVariables(self):
+        """Should not offer the transform cache as a variable."""
+        self.fb.rotations(self.sprite.image)
+        self.assertFalse('transforms' in self.fb._get_variables())
+
+
+def suite():
+    testSuite = unittest.makeSuite(PygameFeedbackTestCase)
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,7 @@
 """Main Module for Feedback Controller executable."""
 
 
+import os
 import logging
 import logging.handlers
 from optparse import OptionParser
@@ -70,8 +71,27 @@ the Free Software Foundation; either version 2 of the License, or
     parser.add_option("--nogui", action="store_true", default=False,
                       help="Start without GUI.")
     parser.add_option("--protocol", dest='protocol', type='choice',
-                      help="Set the protocol to which Pyff listens to. Options are: json, bcixml and tobixml.",
-                        choices=['bcixml', 'json', 'tobixml'], default='bcixml')
+                      help="Set the protocol to which Pyff listens to. Options are: json, bcixml, tobixml and binary.",
+                        choices=['bcixml', 'json', 'tobixml', 'binary'], default='bcixml')
+    parser.add_option("--control-ringbuffer", dest='ringbuffer', type='int',
+                      help="Pass control signals consisting of cl_output only to the Feedback via a shared memory ring buffer with SLOTS slots instead of the IPC socket. [default: 0 (disabled)]",
+                      default=0, metavar="SLOTS")
+    parser.add_option("--control-delivery", dest='control_delivery', type='choice',
+                      help="Set how control signals are delivered to the Feedback. Options are: all (every signal), latest (coalesce signals arriving at once, newest value wins) and batch (once per tick). [default: all]",
+                      choices=['all', 'latest', 'batch'], default='all')
+    parser.add_option("--process-pool", dest='poolsize', type='int',
+                      help="Keep N processes with the Feedback base classes and their dependencies already imported, to start Feedbacks faster. [default: 0 (disabled)]",
+                      default=0, metavar="N")
+    parser.add_option("--plugin-index", dest='plugin_index',
+                      help="File to cache the list of available Feedbacks in, so unchanged Feedback directories do not have to be searched again. Use an empty string to disable the cache. [default: %default]",
+                      default=os.path.join(os.path.expanduser("~"), ".pyff-plugin-index.json"),
+                      metavar="FILE")
+    parser.add_option("--plugin-rescan", dest='plugin_rescan', type='float',
+                      help="Search the Feedback directories for new or changed Feedbacks every SECONDS seconds. [default: 0 (disabled)]",
+                      default=0, metavar="SECONDS")
+    parser.add_option("--event-loop", dest='eventloop', type='choice',
+                      help="Set the event loop of the Feedback Controller. Options are: epoll, poll, select and asyncore (the old asyncore.loop). [default: the best one available]",
+                      choices=['epoll', 'poll', 'select', 'asyncore'], default=None)
 
     options, args = parser.parse_args()
 
@@ -109,7 +129,10 @@ the Free Software Foundation; either version 2 of the License, or
     if options.port != None:
         port = int(options.port, 16)
     try:
-        fc = FeedbackController(fbpath, port, options.protocol)
+        fc = FeedbackController(fbpath, port, options.protocol, options.ringbuffer,
+                                options.control_delivery, options.poolsize,
+                                options.plugin_index, options.plugin_rescan,
+                                options.eventloop)
     except:
         logging.exception("Could not start Feedback Controller, is another instance already running?")
         return
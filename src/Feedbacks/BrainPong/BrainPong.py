@@ -29,6 +29,7 @@ import os
 import pygame
 
 from FeedbackBase.PygameFeedback import PygameFeedback
+from lib import textcache
 
 
 class BrainPong(PygameFeedback):
@@ -342,10 +343,9 @@ class BrainPong(PygameFeedback):
         if not center:
             center = self.screen.get_rect().center
 
-        font = pygame.font.Font(None, size)
         if not superimpose:
             self.screen.blit(self.background, self.backgroundRect)
-        surface = font.render(text, 1, color)
+        surface = textcache.render(text, size, color)
         self.screen.blit(surface, surface.get_rect(center=center))
         
 
@@ -267,7 +267,7 @@ class FeedbackCursorArrow(PygameFeedback):
         """
         if self.indicateGoalElapsed==0:
             self.targetDirection = self.targetDirections[self.completedTrials % self.pauseAfter]
-            self.myarrow = pygame.transform.rotate(self.arrow, self.directions[self.availableDirections[self.targetDirection]])
+            self.myarrow = self._transforms.rotate(self.arrow, self.directions[self.availableDirections[self.targetDirection]])
             self.myarrowRect = self.myarrow.get_rect(center=self.screen.get_rect().center)
             self.cursorRect.center = self.screen.get_rect().center
             self.reset_punchline_color()
@@ -517,6 +517,9 @@ class FeedbackCursorArrow(PygameFeedback):
         self.arrowRect = self.arrow.get_rect(center=self.screen.get_rect().center)
         self.arrow.fill(self.backgroundColor)
         pygame.draw.polygon(self.arrow, self.arrowColor, scaledArrow)
+        # render the rotations now, indicate_goal_tick takes them from the cache
+        for angle in self.directions.values():
+            self._transforms.rotate(self.arrow, angle)
 
         # cursor
         scale = self.size / 5
@@ -562,7 +565,7 @@ class FeedbackCursorArrow(PygameFeedback):
             self.update_cursor()
             self.punchline1Rect = self.update_punchline(self.punchline1, self.sign[self.availableDirections[0]]*(self.innerRect.width/2+self.punchlinePos1*self.borderWidth), self.availableDirections[0])
             self.punchline2Rect = self.update_punchline(self.punchline2, self.sign[self.availableDirections[1]]*(self.innerRect.width/2+self.punchlinePos2*self.borderWidth), self.availableDirections[1])
-            self.myarrow = pygame.transform.rotate(self.arrow, self.directions[target])
+            self.myarrow = self._transforms.rotate(self.arrow, self.directions[target])
             self.myarrowRect = self.myarrow.get_rect(center=self.screen.get_rect().center)
             self.draw_all()
 
@@ -26,7 +26,7 @@ Requires VisionEgg and Pygame.
 
 '''
 from VisualSpellerVE import VisualSpellerVE, animate, animate_sigmoid #,animate_sinusoid
-from VEShapes import FilledTriangle
+from VEShapes import FilledTriangle, ShapeBatch
 from VisionEgg.MoreStimuli import Target2D, FilledCircle
 from VisionEgg.Text import Text
 from lib.P300Layout.CircularLayout import CircularLayout
@@ -163,8 +163,8 @@ class CakeSpellerVE(VisualSpellerVE):
                                               on=False))
         
         ## put all in elements container:
-        self._ve_elements.extend(self._ve_edges)
-        self._ve_elements.extend(self._ve_shapes)
+        self._ve_elements.append(ShapeBatch(stimuli=self._ve_edges))
+        self._ve_elements.append(ShapeBatch(stimuli=self._ve_shapes))
         self._ve_elements.extend(self._ve_letters)
         self._ve_elements.append(self._ve_feedback_box)
         self._ve_elements.extend(self._ve_feedback_letters)
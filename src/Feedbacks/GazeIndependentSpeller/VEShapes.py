@@ -22,6 +22,12 @@ Created on Mar 11, 2010
 log:
 2010-05-13: Added Hourglass and some other things (Matthias Treder)
 2011-02-18: Added FilledCross stimulus (Priska Herger)
+
+The geometry of a stimulus is built once into vertex arrays and only rebuilt
+when one of its shape parameters (radius, size, ...) changes, position and
+orientation are applied by the modelview matrix. Every part of a stimulus is
+drawn with a single glDrawArrays call. ShapeBatch draws many shapes with one
+call per color.
 '''
 
 import math
@@ -30,12 +36,275 @@ import logging
 #import VisionEgg
 import VisionEgg.Core
 import VisionEgg.ParameterTypes as ve_types
+import numpy
 from numpy import sqrt
 #import numpy.oldnumeric as Numeric
 #import math
 import VisionEgg.GL as gl # get all OpenGL stuff in one namespace
 
-class FilledHexagon(VisionEgg.Core.Stimulus):
+
+def _vertices(points):
+    """Return the points as contiguous float32 array for glVertexPointer."""
+    return numpy.ascontiguousarray(points, dtype=numpy.float32).reshape(-1, 2)
+
+def _hexagon_points(radius):
+    a = radius/2.0
+    r2 = radius**2
+    b = sqrt(r2 - r2/4.0)
+    return ((a, b), (radius, 0.), (a, -b), (-a, -b), (-radius, 0.), (-a, b))
+
+def _hexagon(radius):
+    """Triangles of a hexagon."""
+    out = _hexagon_points(radius)
+    points = []
+    for i in xrange(6):
+        points.extend(((0., 0.), out[i], out[(i+1) % 6]))
+    return _vertices(points)
+
+def _hexagon_opening(radius, opening_radius):
+    """Triangles of a hexagon with a hexagonal opening and the lines between
+    the corners of the opening and the outer corners."""
+    out = _hexagon_points(radius)
+    inn = _hexagon_points(opening_radius)
+    triangles = []
+    lines = []
+    for i in xrange(6):
+        j = (i+1) % 6
+        triangles.extend((inn[i], out[i], inn[j], out[i], inn[j], out[j]))
+        lines.extend((inn[i], out[i]))
+    return _vertices(triangles), _vertices(lines)
+
+def _triangle(size):
+    """Equilateral triangle, pointing up."""
+    a = size/2.0
+    b = a/3.0 * sqrt(3.0)
+    r = b*2.0
+    return _vertices(((a, -b), (-a, -b), (0.0, r)))
+
+def _triangles(size, inner_size, watermark_size):
+    """Triangle, inner triangle and watermark of FilledTriangle."""
+    return (_triangle(size),
+            _triangle(inner_size) if inner_size != 0.0 else None,
+            _triangle(watermark_size) if watermark_size != 0.0 else None)
+
+def _hourglass(size, watermark_size):
+    """Triangles and watermark of FilledHourglass."""
+    a = size/2.0
+    b = a/3.0 * sqrt(3.0)
+    r = b*2.0
+    triangles = _vertices(((a, -(r+b)), (-a, -(r+b)), (0.0, 0.0),
+                           (a, r+b), (-a, r+b), (0.0, 0.0)))
+    w = watermark_size/2.0
+    watermark = None
+    if watermark_size != 0.0:
+        watermark = _vertices(((-w, -w), (w, -w), (w, w), (-w, w)))
+    return triangles, watermark
+
+def _cross(square_size, size, watermark_size):
+    """Square, arms and watermark of FilledCross."""
+    w = square_size/2.0
+    h = (size - w)/2.0
+    square = _vertices(((-w, -w), (w, -w), (w, w), (-w, w)))
+    arms = _vertices(((w, w), (w, -w), (w+h, -w), (w+h, w),
+                      (-w, w), (w, w), (w, w+h), (-w, w+h),
+                      (-w, -w), (-w, w), (-(w+h), w), (-(w+h), -w),
+                      (w, -w), (-w, -w), (-w, -(w+h)), (w, -(w+h))))
+    w2 = watermark_size/2.0
+    watermark = None
+    if watermark_size != 0.0:
+        watermark = _vertices(((-w2, 0), (0, -w2), (w2, 0), (0, w2)))
+    return square, arms, watermark
+
+def _stripes(width, angle, dist_stripes, num_stripes):
+    """Lines of StripeField."""
+    arrow_offset = width * angle
+    points = []
+    for i in xrange(- num_stripes / 2 - 1, num_stripes / 2 - 2):
+        offset = i * dist_stripes
+        tip = (0., offset + arrow_offset)
+        points.extend(((-width / 2., offset), tip, tip, (width / 2., offset)))
+    return _vertices(points)
+
+def _dots(width, height, dot_size, dot_distance, circle_steps):
+    """Triangles of DotField."""
+    r = dot_size / 2.
+    circle_coords = []
+    for i in xrange(circle_steps):
+        alpha = (float(i) / float(circle_steps)) * 2 * math.pi
+        circle_coords.append((r * math.cos(alpha), r * math.sin(alpha)))
+    points = []
+    y = - height / 2
+    while y < height / 2:
+        x = - width / 2
+        while x < width / 2:
+            for i in xrange(circle_steps):
+                p, q = circle_coords[i], circle_coords[(i+1) % circle_steps]
+                points.extend(((x, y), (x + p[0], y + p[1]), (x + q[0], y + q[1])))
+            x += dot_distance
+        y += dot_distance
+    return _vertices(points)
+
+def _set_color(color):
+    if len(color)==3:
+        gl.glColor3f(*color)
+    elif len(color)==4:
+        gl.glColor4f(*color)
+
+def _begin_shapes():
+    """Set the state for drawing flat shapes from vertex arrays."""
+    gl.glDisable(gl.GL_DEPTH_TEST)
+    gl.glDisable(gl.GL_TEXTURE_2D)
+    gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA)
+    gl.glEnable(gl.GL_BLEND)
+    gl.glEnableClientState(gl.GL_VERTEX_ARRAY)
+
+def _end_shapes():
+    gl.glDisableClientState(gl.GL_VERTEX_ARRAY)
+
+def _draw_vertices(mode, vertices):
+    gl.glVertexPointer(2, gl.GL_FLOAT, 0, vertices)
+    gl.glDrawArrays(mode, 0, len(vertices))
+
+def _draw_part(mode, color, vertices, smooth):
+    """Draw one part of a shape.
+
+    If ``smooth`` is set, lines are anti-aliased and polygons are drawn as
+    anti-aliased outlines. (Using GL_POLYGON_SMOOTH results in artifactual
+    lines where triangles were joined to create quad, at least on some
+    OpenGL implementations.)
+    """
+    _set_color(color)
+    if smooth:
+        gl.glEnable(gl.GL_LINE_SMOOTH)
+        if mode != gl.GL_LINES:
+            gl.glPolygonMode(gl.GL_FRONT_AND_BACK,gl.GL_LINE)
+    _draw_vertices(mode, vertices)
+    if smooth:
+        gl.glPolygonMode(gl.GL_FRONT_AND_BACK,gl.GL_FILL)
+        gl.glDisable(gl.GL_LINE_SMOOTH)
+
+
+class _VertexArrayStimulus(VisionEgg.Core.Stimulus):
+    """Stimulus keeping its geometry in vertex arrays."""
+
+    __slots__ = (
+        '_gave_alpha_warning',
+        '_vertices',
+        '_vertices_key',
+        )
+
+    def __init__(self,**kw):
+        VisionEgg.Core.Stimulus.__init__(self,**kw)
+        self._gave_alpha_warning = 0
+        self._vertices = None
+        self._vertices_key = None
+
+    def _get_vertices(self, build, *key):
+        """Return the vertices built by ``build(*key)``, they are only built
+        again if ``key`` changed since the last call."""
+        if key != self._vertices_key:
+            self._vertices = build(*key)
+            self._vertices_key = key
+        return self._vertices
+
+
+class _VertexArrayShape(_VertexArrayStimulus):
+    """Filled shape consisting of parts, each drawn with a single call.
+
+    Subclasses implement _get_center and _get_parts.
+    """
+
+    __slots__ = (
+        '_world_vertices',
+        '_world_key',
+        )
+
+    def __init__(self,**kw):
+        _VertexArrayStimulus.__init__(self,**kw)
+        self._world_vertices = {}
+        self._world_key = None
+
+    def _get_center(self, p):
+        raise NotImplementedError
+
+    def _get_parts(self, p):
+        """Return the parts of the shape in drawing order as list of tuples
+        (mode, color, vertices, smooth), see _draw_part."""
+        raise NotImplementedError
+
+    def _outline(self, p, mode, vertices):
+        """Return the anti-aliased outline part of a filled polygon."""
+        if not self._gave_alpha_warning:
+            if len(p.color) > 3 and p.color[3] != 1.0:
+                logger = logging.getLogger('VisionEgg.MoreStimuli')
+                logger.warning("The parameter anti_aliasing is "
+                               "set to true in the %s "
+                               "stimulus class, but the color "
+                               "parameter specifies an alpha "
+                               "value other than 1.0.  To "
+                               "acheive anti-aliasing, ensure "
+                               "that the alpha value for the "
+                               "color parameter is 1.0." % self.__class__.__name__)
+                self._gave_alpha_warning = 1
+        return (mode, p.color, vertices, True)
+
+    def _check_center(self, p):
+        if p.center is not None:
+            if not hasattr(VisionEgg.config,"_GAVE_CENTER_DEPRECATION"):
+                logger = logging.getLogger('VisionEgg.MoreStimuli')
+                logger.warning("Specifying %s by deprecated "
+                               "'center' parameter deprecated.  Use "
+                               "'position' parameter instead.  (Allows "
+                               "use of 'anchor' parameter to set to "
+                               "other values.)" % self.__class__.__name__)
+                VisionEgg.config._GAVE_CENTER_DEPRECATION = 1
+            p.anchor = 'center'
+            p.position = p.center[0], p.center[1] # copy values (don't copy ref to tuple)
+
+    def _get_world_parts(self):
+        """Return the parts with the vertices moved to the position and
+        orientation of the shape, for ShapeBatch."""
+        p = self.parameters # shorthand
+        self._check_center(p)
+        if not p.on:
+            return []
+        center = self._get_center(p)
+        parts = self._get_parts(p)
+        key = (self._vertices_key, center[0], center[1], p.orientation)
+        if key != self._world_key:
+            self._world_vertices = {}
+            self._world_key = key
+        angle = math.radians(p.orientation)
+        c, s = math.cos(angle), math.sin(angle)
+        rotation = numpy.array(((c, s), (-s, c)), dtype=numpy.float32)
+        offset = numpy.array((center[0], center[1]), dtype=numpy.float32)
+        world = []
+        for mode, color, vertices, smooth in parts:
+            moved = self._world_vertices.get(id(vertices))
+            if moved is None:
+                moved = numpy.dot(vertices, rotation) + offset
+                self._world_vertices[id(vertices)] = moved
+            world.append((mode, color, moved, smooth))
+        return world
+
+    def draw(self):
+        p = self.parameters # shorthand
+        self._check_center(p)
+        if p.on:
+            # calculate center
+            center = self._get_center(p)
+            gl.glMatrixMode(gl.GL_MODELVIEW)
+            gl.glPushMatrix()
+            gl.glTranslate(center[0],center[1],0.0)
+            gl.glRotate(p.orientation,0.0,0.0,1.0)
+            _begin_shapes()
+            for part in self._get_parts(p):
+                _draw_part(*part)
+            _end_shapes()
+            gl.glPopMatrix()
+
+
+class FilledHexagon(_VertexArrayShape):
     """Hexagonal stimulus. Adapted from http://www.visionegg.org
     
     Parameters 
@@ -85,106 +354,20 @@ class FilledHexagon(VisionEgg.Core.Stimulus):
                     "DEPRECATED: don't use"), 
         } 
     
-    __slots__ = ( 
-        '_gave_alpha_warning', 
-        ) 
-   
-    def __init__(self,**kw):
-        VisionEgg.Core.Stimulus.__init__(self,**kw)
-        self._gave_alpha_warning = 0
-    
-    def draw(self):
-        p = self.parameters # shorthand 
-        if p.center is not None: 
-            if not hasattr(VisionEgg.config,"_GAVE_CENTER_DEPRECATION"): 
-                logger = logging.getLogger('VisionEgg.MoreStimuli') 
-                logger.warning("Specifying FilledHexagon by deprecated " 
-                               "'center' parameter deprecated.  Use " 
-                               "'position' parameter instead.  (Allows " 
-                               "use of 'anchor' parameter to set to " 
-                               "other values.)") 
-                VisionEgg.config._GAVE_CENTER_DEPRECATION = 1 
-            p.anchor = 'center' 
-            p.position = p.center[0], p.center[1] # copy values (don't copy ref to tuple) 
-        if p.on: 
-            # calculate center 
-            center = VisionEgg._get_center(p.position,p.anchor,(p.radius*2.0, p.radius*2.0)) 
-            gl.glMatrixMode(gl.GL_MODELVIEW) 
-            gl.glPushMatrix() 
-            gl.glTranslate(center[0],center[1],0.0) 
-            gl.glRotate(p.orientation,0.0,0.0,1.0) 
-        
-            if len(p.color)==3: 
-                gl.glColor3f(*p.color) 
-            elif len(p.color)==4: 
-                gl.glColor4f(*p.color) 
-            gl.glDisable(gl.GL_DEPTH_TEST) 
-            gl.glDisable(gl.GL_TEXTURE_2D) 
-            gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA) 
-            gl.glEnable(gl.GL_BLEND) 
-        
-            a = p.radius/2.0
-            r2 = p.radius**2
-            b = sqrt(r2 - r2/4.0)
-        
-            gl.glBegin(gl.GL_TRIANGLE_FAN) 
-            gl.glVertex3f(0.0, 0.0, 0.0)
-            gl.glVertex3f( a, b, 0.0)
-            gl.glVertex3f( p.radius, 0.0, 0.0)
-            gl.glVertex3f( a,-b, 0.0)
-            gl.glVertex3f(-a,-b, 0.0)
-            gl.glVertex3f(-p.radius, 0.0, 0.0)
-            gl.glVertex3f(-a, b, 0.0)
-            gl.glVertex3f( a, b, 0.0)
-            gl.glEnd() # GL_TRIANGLE_FAN 
-        
-            if p.anti_aliasing: 
-                if not self._gave_alpha_warning: 
-                    if len(p.color) > 3 and p.color[3] != 1.0: 
-                        logger = logging.getLogger('VisionEgg.MoreStimuli') 
-                        logger.warning("The parameter anti_aliasing is " 
-                                       "set to true in the Target2D " 
-                                       "stimulus class, but the color " 
-                                       "parameter specifies an alpha " 
-                                       "value other than 1.0.  To " 
-                                       "acheive anti-aliasing, ensure " 
-                                       "that the alpha value for the " 
-                                       "color parameter is 1.0.") 
-                        self._gave_alpha_warning = 1 
-        
-                # We've already drawn a filled polygon (aliased), now 
-                # redraw the outline of the polygon (with 
-                # anti-aliasing).  (Using GL_POLYGON_SMOOTH results in 
-                # artifactual lines where triangles were joined to 
-                # create quad, at least on some OpenGL 
-                # implementations.) 
-        
-                # Calculate coverage value for each pixel of outline 
-                # and store as alpha 
-                gl.glEnable(gl.GL_LINE_SMOOTH) 
-                # Now specify how to use the alpha value 
-                gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA) 
-                gl.glEnable(gl.GL_BLEND) 
-        
-                # Draw a second polygon in line mode, so the edges are anti-aliased 
-                gl.glPolygonMode(gl.GL_FRONT_AND_BACK,gl.GL_LINE) 
-                gl.glBegin(gl.GL_TRIANGLE_FAN) 
-                gl.glVertex3f(0.0, 0.0, 0.0)
-                gl.glVertex3f( a, b, 0.0)
-                gl.glVertex3f( p.radius, 0.0, 0.0)
-                gl.glVertex3f( a,-b, 0.0)
-                gl.glVertex3f(-a,-b, 0.0)
-                gl.glVertex3f(-p.radius, 0.0, 0.0)
-                gl.glVertex3f(-a, b, 0.0)
-                gl.glVertex3f( a, b, 0.0)
-                gl.glEnd() # GL_TRIANGLE_FAN
-        
-                # Set the polygon mode back to fill mode 
-                gl.glPolygonMode(gl.GL_FRONT_AND_BACK,gl.GL_FILL) 
-                gl.glDisable(gl.GL_LINE_SMOOTH) 
-            gl.glPopMatrix()
+    __slots__ = ()
+
+    def _get_center(self, p):
+        return VisionEgg._get_center(p.position,p.anchor,(p.radius*2.0, p.radius*2.0))
 
-class HexagonOpening(VisionEgg.Core.Stimulus):
+    def _get_parts(self, p):
+        triangles = self._get_vertices(_hexagon, p.radius)
+        parts = [(gl.GL_TRIANGLES, p.color, triangles, False)]
+        if p.anti_aliasing:
+            # Draw a second polygon in line mode, so the edges are anti-aliased
+            parts.append(self._outline(p, gl.GL_TRIANGLES, triangles))
+        return parts
+
+class HexagonOpening(_VertexArrayShape):
     """Hexagonal stimulus with opening. Adapted from http://www.visionegg.org
     
     Parameters 
@@ -240,102 +423,17 @@ class HexagonOpening(VisionEgg.Core.Stimulus):
                     "DEPRECATED: don't use"), 
         } 
     
-    __slots__ = ( 
-        '_gave_alpha_warning', 
-        ) 
-   
-    def __init__(self,**kw):
-        VisionEgg.Core.Stimulus.__init__(self,**kw)
-        self._gave_alpha_warning = 0
-    
-    def draw(self):
-        p = self.parameters # shorthand 
-        if p.center is not None: 
-            if not hasattr(VisionEgg.config,"_GAVE_CENTER_DEPRECATION"): 
-                logger = logging.getLogger('VisionEgg.MoreStimuli') 
-                logger.warning("Specifying FilledHexagon by deprecated " 
-                               "'center' parameter deprecated.  Use " 
-                               "'position' parameter instead.  (Allows " 
-                               "use of 'anchor' parameter to set to " 
-                               "other values.)") 
-                VisionEgg.config._GAVE_CENTER_DEPRECATION = 1 
-            p.anchor = 'center' 
-            p.position = p.center[0], p.center[1] # copy values (don't copy ref to tuple) 
-        if p.on: 
-            # calculate center 
-            center = VisionEgg._get_center(p.position,p.anchor,(p.radius*2.0, p.radius*2.0)) 
-            gl.glMatrixMode(gl.GL_MODELVIEW) 
-            gl.glPushMatrix() 
-            gl.glTranslate(center[0],center[1],0.0) 
-            gl.glRotate(p.orientation,0.0,0.0,1.0) 
-        
-            if len(p.color)==3: 
-                gl.glColor3f(*p.color) 
-            elif len(p.color)==4: 
-                gl.glColor4f(*p.color) 
-            gl.glDisable(gl.GL_DEPTH_TEST) 
-            gl.glDisable(gl.GL_TEXTURE_2D) 
-            gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA) 
-            gl.glEnable(gl.GL_BLEND) 
-            gl.glEnable(gl.GL_LINE_SMOOTH) 
-        
-            a = p.radius/2.0
-            r2 = p.radius**2
-            b = sqrt(r2 - r2/4.0)
-            out = (
-                (a, b),
-                (p.radius, 0.),
-                (a, -b),
-                (-a, -b),
-                (-p.radius, 0.),
-                (-a, b),
-                (a, b)
-                )
-            a = p.opening_radius/2.0
-            r2 = p.opening_radius**2
-            b = sqrt(r2 - r2/4.0)
-            inn = (
-                (a, b),
-                (p.opening_radius, 0.),
-                (a, -b),
-                (-a, -b),
-                (-p.opening_radius, 0.),
-                (-a, b),
-                (a, b)
-                )
-        
-            gl.glBegin(gl.GL_TRIANGLE_STRIP) 
-            for i in xrange(7):
-                j = i % 6
-                gl.glVertex3f(inn[j][0], inn[j][1], 0.0)
-                gl.glVertex3f(out[j][0], out[j][1], 0.0)
-            gl.glEnd()
-
-            if len(p.edge_color)==3: 
-                gl.glColor3f(*p.edge_color) 
-            elif len(p.edge_color)==4: 
-                gl.glColor4f(*p.edge_color) 
- 
-            gl.glBegin(gl.GL_LINES)
-            for i in xrange(6):
-                gl.glVertex3f(inn[i][0], inn[i][1], 0.0)
-                gl.glVertex3f(out[i][0], out[i][1], 0.0)
-            gl.glEnd()
-            gl.glDisable(gl.GL_LINE_SMOOTH)
-##            for i in (0, 2, 3, 5):
-##                gl.glBegin(gl.GL_LINE)
-##                gl.glVertex3f(inn[i][0], inn[i][1], 0.0)
-##                gl.glVertex3f(out[i][0], out[i][1], 0.0)
-##                gl.glEnd()
-##            for i in (1, 4):
-##                gl.glBegin(gl.GL_LINE)
-##                gl.glVertex3f(inn[i][0], inn[i][1], 0.0)
-##                gl.glVertex3f(out[i][0], out[i][1], 0.0)
-##                gl.glEnd()
+    __slots__ = ()
 
-            gl.glPopMatrix()
+    def _get_center(self, p):
+        return VisionEgg._get_center(p.position,p.anchor,(p.radius*2.0, p.radius*2.0))
+
+    def _get_parts(self, p):
+        triangles, lines = self._get_vertices(_hexagon_opening, p.radius, p.opening_radius)
+        return [(gl.GL_TRIANGLES, p.color, triangles, False),
+                (gl.GL_LINES, p.edge_color, lines, True)]
 
-class StripeField(VisionEgg.Core.Stimulus):
+class StripeField(_VertexArrayStimulus):
     """Field of arrow-shaped stripes. Adapted from http://www.visionegg.org
     
     Parameters 
@@ -404,14 +502,8 @@ class StripeField(VisionEgg.Core.Stimulus):
                     "Line width"),
         } 
     
-    __slots__ = ( 
-        '_gave_alpha_warning', 
-        ) 
-   
-    def __init__(self,**kw):
-        VisionEgg.Core.Stimulus.__init__(self,**kw)
-        self._gave_alpha_warning = 0
-    
+    __slots__ = ()
+
     def draw(self):
         p = self.parameters # shorthand 
         if p.on: 
@@ -420,14 +512,8 @@ class StripeField(VisionEgg.Core.Stimulus):
             gl.glTranslate(p.center[0],p.center[1],0.0) 
             gl.glRotate(p.orientation,0.0,0.0,1.0) 
         
-            if len(p.color)==3: 
-                gl.glColor3f(*p.color) 
-            elif len(p.color)==4: 
-                gl.glColor4f(*p.color) 
-            gl.glDisable(gl.GL_DEPTH_TEST)
-            gl.glDisable(gl.GL_TEXTURE_2D)
-            gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA)
-            gl.glEnable(gl.GL_BLEND)
+            _set_color(p.color)
+            _begin_shapes()
             if p.anti_aliasing:
                 gl.glEnable(gl.GL_LINE_SMOOTH)
             else:
@@ -435,21 +521,17 @@ class StripeField(VisionEgg.Core.Stimulus):
             old_width = gl.glGetFloatv(gl.GL_LINE_WIDTH)
             gl.glLineWidth(p.line_width)
 
-            arrow_offset = p.width * p.angle
-            for i in xrange(- p.num_stripes / 2 - 1, p.num_stripes / 2 - 2):
-                offset = i * p.dist_stripes
-                gl.glBegin(gl.GL_LINE_STRIP)
-                gl.glVertex3f(-p.width / 2., offset, 0.)
-                gl.glVertex3f(0., offset + arrow_offset, 0.)
-                gl.glVertex3f(p.width / 2., offset, 0.)
-                gl.glEnd()
+            lines = self._get_vertices(_stripes, p.width, p.angle,
+                                       p.dist_stripes, p.num_stripes)
+            _draw_vertices(gl.GL_LINES, lines)
 
             gl.glLineWidth(old_width)
+            _end_shapes()
 
             gl.glPopMatrix()
 
 
-class DotField(VisionEgg.Core.Stimulus):
+class DotField(_VertexArrayStimulus):
     """Field of dots. Adapted from http://www.visionegg.org
 
     Parameters
@@ -523,13 +605,7 @@ class DotField(VisionEgg.Core.Stimulus):
                     "Circle approximation precision"),
         }
 
-    __slots__ = (
-        '_gave_alpha_warning',
-        )
-
-    def __init__(self,**kw):
-        VisionEgg.Core.Stimulus.__init__(self,**kw)
-        self._gave_alpha_warning = 0
+    __slots__ = ()
 
     def draw(self):
         p = self.parameters # shorthand
@@ -539,14 +615,8 @@ class DotField(VisionEgg.Core.Stimulus):
             gl.glTranslate(p.center[0],p.center[1],0.0)
             gl.glRotate(p.orientation,0.0,0.0,1.0)
 
-            if len(p.color)==3:
-                gl.glColor3f(*p.color)
-            elif len(p.color)==4:
-                gl.glColor4f(*p.color)
-            gl.glDisable(gl.GL_DEPTH_TEST)
-            gl.glDisable(gl.GL_TEXTURE_2D)
-            gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA)
-            gl.glEnable(gl.GL_BLEND)
+            _set_color(p.color)
+            _begin_shapes()
             if p.anti_aliasing:
                 gl.glEnable(gl.GL_LINE_SMOOTH)
             else:
@@ -554,36 +624,18 @@ class DotField(VisionEgg.Core.Stimulus):
             old_width = gl.glGetFloatv(gl.GL_LINE_WIDTH)
             gl.glLineWidth(p.line_width)
 
-            def circle(x, y, coords):
-                gl.glBegin(gl.GL_TRIANGLE_FAN)
-                gl.glVertex3f(x, y, 0.)
-                for p in coords:
-                    gl.glVertex3f(x + p[0], y + p[1], 0.)
-                gl.glVertex3f(x + coords[0][0], y + coords[0][1], 0.)
-                gl.glEnd()
-
-            # calculate dot dimensions
-            r = p.dot_size / 2.
-            circle_coords = []
-            for i in xrange(p.circle_steps):
-                alpha = (float(i) / float(p.circle_steps)) * 2 * math.pi
-                circle_coords.append((r * math.cos(alpha), r * math.sin(alpha)))
-
             # draw dot field
-            y = - p.height / 2
-            while y < p.height / 2:
-                x = - p.width / 2
-                while x < p.width / 2:
-                    circle(x, y, circle_coords)
-                    x += p.dot_distance
-                y += p.dot_distance
+            triangles = self._get_vertices(_dots, p.width, p.height, p.dot_size,
+                                           p.dot_distance, p.circle_steps)
+            _draw_vertices(gl.GL_TRIANGLES, triangles)
 
             gl.glLineWidth(old_width)
+            _end_shapes()
 
             gl.glPopMatrix()
 
 
-class FilledTriangle(VisionEgg.Core.Stimulus):
+class FilledTriangle(_VertexArrayShape):
     """Triangle stimulus. Adapted from http://www.visionegg.org
     
     Parameters 
@@ -646,134 +698,25 @@ class FilledTriangle(VisionEgg.Core.Stimulus):
                     "DEPRECATED: don't use")
         } 
     
-    __slots__ = ( 
-        '_gave_alpha_warning', 
-        ) 
-   
-    def __init__(self,**kw):
-        VisionEgg.Core.Stimulus.__init__(self,**kw)
-        self._gave_alpha_warning = 0
-    
-    def draw(self):
-        p = self.parameters # shorthand 
-        if p.center is not None: 
-            if not hasattr(VisionEgg.config,"_GAVE_CENTER_DEPRECATION"): 
-                logger = logging.getLogger('VisionEgg.MoreStimuli') 
-                logger.warning("Specifying FilledTriangle by deprecated " 
-                               "'center' parameter deprecated.  Use " 
-                               "'position' parameter instead.  (Allows " 
-                               "use of 'anchor' parameter to set to " 
-                               "other values.)") 
-                VisionEgg.config._GAVE_CENTER_DEPRECATION = 1 
-            p.anchor = 'center' 
-            p.position = p.center[0], p.center[1] # copy values (don't copy ref to tuple) 
-        if p.on: 
-            # calculate center 
-            center = self._my_get_center(p.position,p.anchor,p.size) 
-            gl.glMatrixMode(gl.GL_MODELVIEW) 
-            gl.glPushMatrix() 
-            gl.glTranslate(center[0],center[1],0.0) 
-            gl.glRotate(p.orientation,0.0,0.0,1.0) 
-        
-            if len(p.color)==3: 
-                gl.glColor3f(*p.color) 
-            elif len(p.color)==4: 
-                gl.glColor4f(*p.color) 
-            gl.glDisable(gl.GL_DEPTH_TEST) 
-            gl.glDisable(gl.GL_TEXTURE_2D) 
-            gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA) 
-            gl.glEnable(gl.GL_BLEND) 
-            
-            a = p.size/2.0
-            b = a/3.0 * sqrt(3.0)
-            r = b*2.0
-                    
-            gl.glBegin(gl.GL_TRIANGLES)
-            gl.glVertex3f( a, -b, 0.0)
-            gl.glVertex3f(-a, -b, 0.0)
-            gl.glVertex3f(0.0, r, 0.0)
-            gl.glEnd() # GL_TRIANGLE_FAN     
-
-            if not (p.innerSize == 0.0):
-                # Cut out inner part
-                if len(p.innerColor)==3: 
-                    gl.glColor3f(*p.innerColor) 
-                elif len(p.innerColor)==4: 
-                    gl.glColor4f(*p.innerColor) 
-                gl.glDisable(gl.GL_DEPTH_TEST) 
-                gl.glDisable(gl.GL_TEXTURE_2D) 
-                gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA) 
-                gl.glEnable(gl.GL_BLEND) 
-                
-                a2 = p.innerSize/2.0
-                b2 = a2/3.0 * sqrt(3.0)
-                r2 = b2*2.0
-                        
-                gl.glBegin(gl.GL_TRIANGLES)
-                gl.glVertex3f( a2, -b2, 0.0)
-                gl.glVertex3f(-a2, -b2, 0.0)
-                gl.glVertex3f(0.0, r2, 0.0)
-                gl.glEnd() # GL_TRIANGLE_FAN 
-                
-        	if not (p.watermark_size == 0.0):
-        	    # place and paint watermark
-        	    gl.glColor4f(*p.watermark_color) 
-                
-                gl.glDisable(gl.GL_DEPTH_TEST) 
-                gl.glDisable(gl.GL_TEXTURE_2D) 
-                gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA)
-                gl.glEnable(gl.GL_BLEND)
-                
-                a3 = p.watermark_size/2.0
-                b3 = a3/3.0 * sqrt(3.0)
-                r3 = b3*2.0
-                        
-                gl.glBegin(gl.GL_TRIANGLES)
-                gl.glVertex3f( a3, -b3, 0.0)
-                gl.glVertex3f(-a3, -b3, 0.0)
-                gl.glVertex3f(0.0, r3, 0.0)
-                gl.glEnd() # GL_TRIANGLE_FAN
-        
-            if p.anti_aliasing: 
-                if not self._gave_alpha_warning: 
-                    if len(p.color) > 3 and p.color[3] != 1.0: 
-                        logger = logging.getLogger('VisionEgg.MoreStimuli') 
-                        logger.warning("The parameter anti_aliasing is " 
-                                       "set to true in the Target2D " 
-                                       "stimulus class, but the color " 
-                                       "parameter specifies an alpha " 
-                                       "value other than 1.0.  To " 
-                                       "acheive anti-aliasing, ensure " 
-                                       "that the alpha value for the " 
-                                       "color parameter is 1.0.") 
-                        self._gave_alpha_warning = 1 
-        
-                # We've already drawn a filled polygon (aliased), now 
-                # redraw the outline of the polygon (with 
-                # anti-aliasing).  (Using GL_POLYGON_SMOOTH results in 
-                # artifactual lines where triangles were joined to 
-                # create quad, at least on some OpenGL 
-                # implementations.) 
-        
-                # Calculate coverage value for each pixel of outline 
-                # and store as alpha 
-                gl.glEnable(gl.GL_LINE_SMOOTH) 
-                # Now specify how to use the alpha value 
-                gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA) 
-                gl.glEnable(gl.GL_BLEND) 
-        
-                # Draw a second polygon in line mode, so the edges are anti-aliased 
-                gl.glPolygonMode(gl.GL_FRONT_AND_BACK,gl.GL_LINE)
-                gl.glBegin(gl.GL_TRIANGLES)
-                gl.glVertex3f( a, -b, 0.0)
-                gl.glVertex3f(-a, -b, 0.0)
-                gl.glVertex3f(0.0, r, 0.0)
-                gl.glEnd() # GL_TRIANGLE_FAN
-        
-                # Set the polygon mode back to fill mode 
-                gl.glPolygonMode(gl.GL_FRONT_AND_BACK,gl.GL_FILL) 
-                gl.glDisable(gl.GL_LINE_SMOOTH) 
-            gl.glPopMatrix()
+    __slots__ = ()
+
+    def _get_center(self, p):
+        return self._my_get_center(p.position,p.anchor,p.size)
+
+    def _get_parts(self, p):
+        triangle, inner, watermark = self._get_vertices(_triangles, p.size,
+                                                        p.innerSize, p.watermark_size)
+        parts = [(gl.GL_TRIANGLES, p.color, triangle, False)]
+        if inner is not None:
+            # Cut out inner part
+            parts.append((gl.GL_TRIANGLES, p.innerColor, inner, False))
+        if watermark is not None:
+            # place and paint watermark
+            parts.append((gl.GL_TRIANGLES, p.watermark_color, watermark, False))
+        if p.anti_aliasing:
+            # Draw a second polygon in line mode, so the edges are anti-aliased
+            parts.append(self._outline(p, gl.GL_TRIANGLES, triangle))
+        return parts
 
 
     def _my_get_center(self, position, anchor, size):
@@ -805,7 +748,7 @@ class FilledTriangle(VisionEgg.Core.Stimulus):
         return center
 
 
-class FilledHourglass(VisionEgg.Core.Stimulus):
+class FilledHourglass(_VertexArrayShape):
     """Hourglass stimulus, consisting of two triangles pointed to each other.
        Adapted from http://www.visionegg.org
        
@@ -862,137 +805,21 @@ class FilledHourglass(VisionEgg.Core.Stimulus):
                     "DEPRECATED: don't use"), 
         } 
     
-    __slots__ = ( 
-        '_gave_alpha_warning', 
-        ) 
-   
-    def __init__(self,**kw):
-        VisionEgg.Core.Stimulus.__init__(self,**kw)
-        self._gave_alpha_warning = 0
-    
-    def draw(self):
-        p = self.parameters # shorthand 
-        if p.center is not None: 
-            if not hasattr(VisionEgg.config,"_GAVE_CENTER_DEPRECATION"): 
-                logger = logging.getLogger('VisionEgg.MoreStimuli') 
-                logger.warning("Specifying FilledTriangle by deprecated " 
-                               "'center' parameter deprecated.  Use " 
-                               "'position' parameter instead.  (Allows " 
-                               "use of 'anchor' parameter to set to " 
-                               "other values.)") 
-                VisionEgg.config._GAVE_CENTER_DEPRECATION = 1 
-            p.anchor = 'center' 
-            p.position = p.center[0], p.center[1] # copy values (don't copy ref to tuple) 
-        if p.on: 
-            # calculate center 
-            center = self._my_get_center(p.position,p.anchor,p.size) 
-            gl.glMatrixMode(gl.GL_MODELVIEW) 
-            gl.glPushMatrix() 
-            gl.glTranslate(center[0],center[1],0.0) 
-            gl.glRotate(p.orientation,0.0,0.0,1.0) 
+    __slots__ = ()
 
-            # Upper triangle
-            if len(p.color)==3: 
-                gl.glColor3f(*p.color) 
-            elif len(p.color)==4: 
-                gl.glColor4f(*p.color) 
-            gl.glDisable(gl.GL_DEPTH_TEST) 
-            gl.glDisable(gl.GL_TEXTURE_2D) 
-            gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA) 
-            gl.glEnable(gl.GL_BLEND) 
-            
-            a = p.size/2.0
-            b = a/3.0 * sqrt(3.0)
-            r = b*2.0
-                    
-            gl.glBegin(gl.GL_TRIANGLES)
-            #gl.glVertex3f( a, -b, 0.0)
-            #gl.glVertex3f(-a, -b, 0.0)
-            #gl.glVertex3f(0.0, r, 0.0)
-            gl.glVertex3f( a, -(r+b), 0.0)
-            gl.glVertex3f(-a, -(r+b), 0.0)
-            gl.glVertex3f(0.0, 0.0, 0.0)
-            
-            gl.glEnd() # GL_TRIANGLE_FAN   
-            gl.glBegin(gl.GL_TRIANGLES)
-            gl.glVertex3f( a, r+b, 0.0)
-            gl.glVertex3f(-a, r+b, 0.0)
-            gl.glVertex3f(0.0, 0.0, 0.0)
-            gl.glEnd() # GL_TRIANGLE_FAN                
-
-            # Lower triangle
-            #gl.glMatrixMode(gl.GL_MODELVIEW) 
-            #gl.glPushMatrix() 
-            #gl.glTranslate(center[0],center[1],0.0) 
-        
-            #if len(p.color)==3: 
-            #    gl.glColor3f(*p.color) 
-            #elif len(p.color)==4: 
-            #    gl.glColor4f(*p.color) 
-            #gl.glDisable(gl.GL_DEPTH_TEST) 
-            #gl.glDisable(gl.GL_TEXTURE_2D) 
-            #gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA) 
-            #gl.glEnable(gl.GL_BLEND) 
-            #        
-
-            if not (p.watermark_size == 0.0):
-                # paint and place watermark
-                gl.glColor4f(*p.watermark_color)
-
-                gl.glDisable(gl.GL_DEPTH_TEST) 
-                gl.glDisable(gl.GL_TEXTURE_2D) 
-                gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA) 
-                gl.glEnable(gl.GL_BLEND)
-
-                w = p.watermark_size/2
-        
-                gl.glBegin(gl.GL_QUADS)
-                gl.glVertex3f(-w,-w, 0.0)
-                gl.glVertex3f( w,-w, 0.0)
-                gl.glVertex3f( w, w, 0.0)
-                gl.glVertex3f(-w, w, 0.0)
-                gl.glEnd() # GL_QUADS            
-        
-            if p.anti_aliasing: 
-                if not self._gave_alpha_warning: 
-                    if len(p.color) > 3 and p.color[3] != 1.0: 
-                        logger = logging.getLogger('VisionEgg.MoreStimuli') 
-                        logger.warning("The parameter anti_aliasing is " 
-                                       "set to true in the Target2D " 
-                                       "stimulus class, but the color " 
-                                       "parameter specifies an alpha " 
-                                       "value other than 1.0.  To " 
-                                       "acheive anti-aliasing, ensure " 
-                                       "that the alpha value for the " 
-                                       "color parameter is 1.0.") 
-                        self._gave_alpha_warning = 1 
-        
-                # We've already drawn a filled polygon (aliased), now 
-                # redraw the outline of the polygon (with 
-                # anti-aliasing).  (Using GL_POLYGON_SMOOTH results in 
-                # artifactual lines where triangles were joined to 
-                # create quad, at least on some OpenGL 
-                # implementations.) 
-        
-                # Calculate coverage value for each pixel of outline 
-                # and store as alpha 
-                gl.glEnable(gl.GL_LINE_SMOOTH) 
-                # Now specify how to use the alpha value 
-                gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA) 
-                gl.glEnable(gl.GL_BLEND) 
-        
-                # Draw a second polygon in line mode, so the edges are anti-aliased 
-                gl.glPolygonMode(gl.GL_FRONT_AND_BACK,gl.GL_LINE)
-                gl.glBegin(gl.GL_TRIANGLES)
-                gl.glVertex3f( a, -b, 0.0)
-                gl.glVertex3f(-a, -b, 0.0)
-                gl.glVertex3f(0.0, r, 0.0)
-                gl.glEnd() # GL_TRIANGLE_FAN
-      
-                # Set the polygon mode back to fill mode 
-                gl.glPolygonMode(gl.GL_FRONT_AND_BACK,gl.GL_FILL) 
-                gl.glDisable(gl.GL_LINE_SMOOTH) 
-            gl.glPopMatrix()
+    def _get_center(self, p):
+        return self._my_get_center(p.position,p.anchor,p.size)
+
+    def _get_parts(self, p):
+        triangles, watermark = self._get_vertices(_hourglass, p.size, p.watermark_size)
+        parts = [(gl.GL_TRIANGLES, p.color, triangles, False)]
+        if watermark is not None:
+            # paint and place watermark
+            parts.append((gl.GL_QUADS, p.watermark_color, watermark, False))
+        if p.anti_aliasing:
+            # Draw a second polygon in line mode, so the edges are anti-aliased
+            parts.append(self._outline(p, gl.GL_TRIANGLES, triangles))
+        return parts
 
 
     def _my_get_center(self, position, anchor, size):
@@ -1024,7 +851,7 @@ class FilledHourglass(VisionEgg.Core.Stimulus):
         return center
 
 
-class FilledCross(VisionEgg.Core.Stimulus):
+class FilledCross(_VertexArrayShape):
     """Cross stimulus, consisting of a square with a rectangle aligned at each edge.
        Adapted from http://www.visionegg.org
 
@@ -1086,173 +913,100 @@ class FilledCross(VisionEgg.Core.Stimulus):
                     "DEPRECATED: don't use"), 
         } 
 
-    __slots__ = ( 
-        '_gave_alpha_warning', 
-        ) 
+    __slots__ = ()
+
+    def _get_center(self, p):
+        return p.position #self._my_get_center(p.position,p.anchor,p.size)
+
+    def _get_parts(self, p):
+        square, arms, watermark = self._get_vertices(_cross, p.size[0], p.size[1],
+                                                     p.watermark_size)
+        # paint and place square and rectangles
+        parts = [(gl.GL_QUADS, p.innerColor, square, False),
+                 (gl.GL_QUADS, p.color, arms, False)]
+        if watermark is not None:
+            # paint and place watermark
+            parts.append((gl.GL_QUADS, p.watermark_color, watermark, False))
+        if p.anti_aliasing:
+            # Draw a second polygon in line mode, so the edges are anti-aliased
+            parts.append(self._outline(p, gl.GL_QUADS, arms))
+        return parts
+
+
+class ShapeBatch(VisionEgg.Core.Stimulus):
+    """Draws many shapes of this module in one pass.
+
+    The state is set up once and the parts of all shapes with the same
+    position within their shape, drawing mode and color are drawn with a
+    single glDrawArrays call. The parts are drawn in their order within
+    the shapes, so every fill comes before the inner parts, watermarks and
+    outlines drawn on top of it. The shapes keep their parameters and can
+    be changed as usual, only shapes of different colors are not
+    guaranteed to be drawn in order, so overlapping shapes should go into
+    different batches.
+
+    Parameters
+    ==========
+    on            -- draw stimulus? (Boolean) (Boolean)
+                     Default: True
+    stimuli       -- the shapes (Sequence of FilledHexagon, HexagonOpening,
+                     FilledTriangle, FilledHourglass or FilledCross)
+                     Default: []
+    """
+
+    parameters_and_defaults = {
+        'on' : (True,
+                ve_types.Boolean,
+                "draw stimulus? (Boolean)"),
+        'stimuli' : ([],
+                     ve_types.Sequence(ve_types.Instance(_VertexArrayShape)),
+                     "shapes to draw"),
+        }
+
+    __slots__ = (
+        '_parts',
+        '_groups',
+        )
 
     def __init__(self,**kw):
         VisionEgg.Core.Stimulus.__init__(self,**kw)
-        self._gave_alpha_warning = 0
+        self._parts = None
+        self._groups = []
+
+    def _update_groups(self, parts):
+        """Concatenate the vertices of the parts with the same key, unless
+        the parts are the same as in the last frame."""
+        last = self._parts
+        if (last is not None and len(last) == len(parts) and
+            all(a[0] == b[0] and a[1] is b[1] for a, b in zip(last, parts))):
+            return
+        groups = []
+        index = {}
+        for key, vertices in parts:
+            if key not in index:
+                index[key] = len(groups)
+                groups.append((key, []))
+            groups[index[key]][1].append(vertices)
+        # stable, keeps the order of the shapes within a part
+        groups.sort(key=lambda group: group[0][0])
+        # the parts keep the member arrays alive, so they are compared by
+        # identity
+        self._parts = parts
+        self._groups = [(key, _vertices(numpy.concatenate(vertices)))
+                        for key, vertices in groups]
 
     def draw(self):
-        p = self.parameters # shorthand 
-        if p.center is not None: 
-            if not hasattr(VisionEgg.config,"_GAVE_CENTER_DEPRECATION"): 
-                logger = logging.getLogger('VisionEgg.MoreStimuli') 
-                logger.warning("Specifying FilledTriangle by deprecated " 
-                               "'center' parameter deprecated.  Use " 
-                               "'position' parameter instead.  (Allows " 
-                               "use of 'anchor' parameter to set to " 
-                               "other values.)") 
-                VisionEgg.config._GAVE_CENTER_DEPRECATION = 1 
-            p.anchor = 'center' 
-            p.position = p.center[0], p.center[1] # copy values (don't copy ref to tuple) 
-        if p.on: 
-            # calculate center 
-            center = p.position #self._my_get_center(p.position,p.anchor,p.size) 
-            gl.glMatrixMode(gl.GL_MODELVIEW) 
-            gl.glPushMatrix() 
-            gl.glTranslate(center[0],center[1],0.0) 
-            gl.glRotate(p.orientation,0.0,0.0,1.0) 
-
-            w = p.size[0]/2.0
-            h = (p.size[1] - w)/2.0
-
-            # paint and place square
-            if len(p.innerColor)==3: 
-                gl.glColor3f(*p.innerColor) 
-            elif len(p.innerColor)==4: 
-                gl.glColor4f(*p.innerColor)
-
-            gl.glDisable(gl.GL_DEPTH_TEST) 
-            gl.glDisable(gl.GL_TEXTURE_2D) 
-            gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA) 
-            gl.glEnable(gl.GL_BLEND)
-
-            gl.glBegin(gl.GL_QUADS)
-            gl.glVertex3f(-w,-w, 0.0)
-            gl.glVertex3f( w,-w, 0.0)
-            gl.glVertex3f( w, w, 0.0)
-            gl.glVertex3f(-w, w, 0.0)
-            gl.glEnd() # GL_QUADS
-
-            # paint and place rectangles
-            if len(p.color)==3: 
-                gl.glColor3f(*p.color) 
-            elif len(p.color)==4: 
-                gl.glColor4f(*p.color)
-
-            gl.glDisable(gl.GL_DEPTH_TEST) 
-            gl.glDisable(gl.GL_TEXTURE_2D) 
-            gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA) 
-            gl.glEnable(gl.GL_BLEND)
-
-            gl.glBegin(gl.GL_QUADS)
-            gl.glVertex3f(w, w, 0.0)
-            gl.glVertex3f(w, -w, 0.0)
-            gl.glVertex3f(w+h, -w, 0.0)
-            gl.glVertex3f(w+h, w, 0.0)
-            gl.glEnd() # GL_QUADS
-
-            gl.glBegin(gl.GL_QUADS)
-            gl.glVertex3f(-w, w, 0.0)
-            gl.glVertex3f(w, w, 0.0)
-            gl.glVertex3f(w, w+h, 0.0)
-            gl.glVertex3f(-w, w+h, 0.0)
-            gl.glEnd() # GL_QUADS
-
-            gl.glBegin(gl.GL_QUADS)
-            gl.glVertex3f(-w, -w, 0.0)
-            gl.glVertex3f(-w, w, 0.0)
-            gl.glVertex3f(-(w+h), w, 0.0)
-            gl.glVertex3f(-(w+h), -w, 0.0)
-            gl.glEnd() # GL_QUADS
-
-            gl.glBegin(gl.GL_QUADS)
-            gl.glVertex3f(w, -w, 0.0)
-            gl.glVertex3f(-w, -w, 0.0)
-            gl.glVertex3f(-w, -(w+h), 0.0)
-            gl.glVertex3f(w, -(w+h), 0.0)
-            gl.glEnd() # GL_QUADS
-
-            if not (p.watermark_size == 0.0):
-                # paint and place watermark
-                gl.glColor4f(*p.watermark_color)
-
-                gl.glDisable(gl.GL_DEPTH_TEST) 
-                gl.glDisable(gl.GL_TEXTURE_2D) 
-                gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA) 
-                gl.glEnable(gl.GL_BLEND)
-
-                w2 = p.watermark_size/2
-        
-                gl.glBegin(gl.GL_QUADS)
-                gl.glVertex3f(-w2, 0, 0.0)
-                gl.glVertex3f(0, -w2, 0.0)
-                gl.glVertex3f(w2, 0, 0.0)
-                gl.glVertex3f(0, w2, 0.0)
-                gl.glEnd() # GL_QUADS
-
-            if p.anti_aliasing: 
-                if not self._gave_alpha_warning: 
-                    if len(p.color) > 3 and p.color[3] != 1.0: 
-                        logger = logging.getLogger('VisionEgg.MoreStimuli') 
-                        logger.warning("The parameter anti_aliasing is " 
-                                       "set to true in the Target2D " 
-                                       "stimulus class, but the color " 
-                                       "parameter specifies an alpha " 
-                                       "value other than 1.0.  To " 
-                                       "acheive anti-aliasing, ensure " 
-                                       "that the alpha value for the " 
-                                       "color parameter is 1.0.") 
-                        self._gave_alpha_warning = 1 
-
-                # We've already drawn a filled polygon (aliased), now 
-                # redraw the outline of the polygon (with 
-                # anti-aliasing).  (Using GL_POLYGON_SMOOTH results in 
-                # artifactual lines where triangles were joined to 
-                # create quad, at least on some OpenGL 
-                # implementations.) 
-
-                # Calculate coverage value for each pixel of outline 
-                # and store as alpha 
-                gl.glEnable(gl.GL_LINE_SMOOTH) 
-                # Now specify how to use the alpha value 
-                gl.glBlendFunc(gl.GL_SRC_ALPHA,gl.GL_ONE_MINUS_SRC_ALPHA) 
-                gl.glEnable(gl.GL_BLEND) 
-
-                # Draw a second polygon in line mode, so the edges are anti-aliased 
-                gl.glPolygonMode(gl.GL_FRONT_AND_BACK,gl.GL_LINE)
-
-                gl.glBegin(gl.GL_QUADS)
-                gl.glVertex3f(w, w, 0.0)
-                gl.glVertex3f(w, -w, 0.0)
-                gl.glVertex3f(w+h, -w, 0.0)
-                gl.glVertex3f(w+h, w, 0.0)
-                gl.glEnd() # GL_QUADS
-
-                gl.glBegin(gl.GL_QUADS)
-                gl.glVertex3f(-w, w, 0.0)
-                gl.glVertex3f(w, w, 0.0)
-                gl.glVertex3f(w, w+h, 0.0)
-                gl.glVertex3f(-w, w+h, 0.0)
-                gl.glEnd() # GL_QUADS
-
-                gl.glBegin(gl.GL_QUADS)
-                gl.glVertex3f(-w, -w, 0.0)
-                gl.glVertex3f(-w, w, 0.0)
-                gl.glVertex3f(-(w+h), w, 0.0)
-                gl.glVertex3f(-(w+h), -w, 0.0)
-                gl.glEnd() # GL_QUADS
-
-                gl.glBegin(gl.GL_QUADS)
-                gl.glVertex3f(w, -w, 0.0)
-                gl.glVertex3f(-w, -w, 0.0)
-                gl.glVertex3f(-w, -(w+h), 0.0)
-                gl.glVertex3f(w, -(w+h), 0.0)
-                gl.glEnd() # GL_QUADS
-
-                # Set the polygon mode back to fill mode 
-                gl.glPolygonMode(gl.GL_FRONT_AND_BACK,gl.GL_FILL) 
-                gl.glDisable(gl.GL_LINE_SMOOTH) 
-            gl.glPopMatrix()
+        p = self.parameters # shorthand
+        if p.on:
+            parts = []
+            for stimulus in p.stimuli:
+                world = stimulus._get_world_parts()
+                for part, (mode, color, vertices, smooth) in enumerate(world):
+                    parts.append(((part, mode, tuple(color), smooth), vertices))
+            self._update_groups(parts)
+            if not self._groups:
+                return
+            _begin_shapes()
+            for (part, mode, color, smooth), vertices in self._groups:
+                _draw_part(mode, color, vertices, smooth)
+            _end_shapes()
@@ -27,7 +27,8 @@ Serves as base class for spellers such as CakeSpeller and CenterSpeller.
 
 from time import time, clock
 from FeedbackBase.MainloopFeedback import MainloopFeedback
-from lib.P300Aux.P300Functions import random_flash_sequence
+from lib.sequence import SequenceBuffer, flash_sequence
+from lib.accumulator import ScoreAccumulator, TTestRule, never_stop
 
 from VisionEgg.Core import Screen
 from VisionEgg.Core import Viewport
@@ -42,7 +43,7 @@ import numpy as NP
 import random, pygame, os, math, pygame.sndarray
 import logging
 
-from sys import platform, maxint
+from sys import platform
 
 from lib import marker
 from lib import serialport
@@ -100,6 +101,8 @@ class VisualSpellerVE(MainloopFeedback):
         self.nr_sequences = 6
         self.randomize_sequence = True # set to False to present a fixed stimulus sequence
         self.min_dist = 2 # Min number of intermediate flashes bef. a flash is repeated twice
+        self.random_seed = None # seed of the stimulus sequences, None for a random seed
+        self.pregenerated_trials = 20 # number of trial sequences generated ahead of time
 
 
         self.stimulus_duration = 0.083   # 5 frames @60 Hz = 83ms flash
@@ -130,6 +133,8 @@ class VisualSpellerVE(MainloopFeedback):
 
 
         self.wait_after_early_stopping=3 #sec
+        self.early_stopping_threshold = None # t statistic to stop a trial early if output_per_stimulus is False, None to never stop early
+        self.early_stopping_min_sequences = 2
         self.abort_trial=False
         self.output_per_stimulus=True
         self.use_ErrP_detection = False
@@ -187,6 +192,8 @@ class VisualSpellerVE(MainloopFeedback):
         self._current_stimulus = 0       # Index of current stimlus
         self._current_countdown = self.nCountdown
         self.random = random.Random(clock())
+        self._sequences = None
+        self._sequences_key = None
         self._debug_classified = None
 
         ## init states:
@@ -259,6 +266,10 @@ class VisualSpellerVE(MainloopFeedback):
            '''
            pass
 
+        if self._sequences is not None:
+            self._sequences.stop()
+            self._sequences = None
+
         pygame.time.wait(500)
         self.send_parallel(marker.RUN_END)
         self.logger.info("[TRIGGER] %d" % marker.RUN_END)
@@ -480,12 +491,7 @@ class VisualSpellerVE(MainloopFeedback):
                  self.set_standard_screen()
             # generate random sequences:
             if self.randomize_sequence:
-                self.flash_sequence = []
-                for _ in range(self.nr_sequences):
-                    random_flash_sequence(self,
-                                      set=range(self._nr_elements),
-                                      min_dist=self.min_dist,
-                                      seq_len=self._nr_elements)
+                self.flash_sequence = self._next_flash_sequence()
             # or else use fixed sequence:
             else:
                 self.flash_sequence = range(self._nr_elements)
@@ -589,19 +595,12 @@ class VisualSpellerVE(MainloopFeedback):
                 self._state_classify = True
 
     def check_classification(self,nr):
-        #print self._classifier_output
-        means = [None]*self._nr_elements
-        minimum = maxint
-        classified = None
-        for ii in range(self._nr_elements):
-            means[ii] = sum(self._classifier_output[ii]) /nr
-            if means[ii]<minimum:
-               minimum = means[ii]
-               classified = ii+1
-
-        print "\n**** Class: %d (mean=%f)\n" % (classified,means[classified-1])
-        return classified
-
+        """Return whether the trial can be stopped after nr sequences."""
+        stop = self._classifier_output.should_stop()
+        if stop:
+            classified, mean = self._classifier_output.decide()
+            self.logger.info("Early stopping after %d sequences: class %d (mean=%f)" % (nr, classified+1, mean))
+        return stop
 
 
 
@@ -620,32 +619,18 @@ class VisualSpellerVE(MainloopFeedback):
             self._debug_classified = None
         else:
             if self.output_per_stimulus:
-                nClassified = sum([len(self._classifier_output[i]) for i in xrange(self._nr_elements)])
+                nClassified = self._classifier_output.total()
                 if nClassified < self._nr_elements * self.nr_sequences:
                     pygame.time.wait(20)
-                    print 'not enough classifier-outputs received! (something may be wrong)'
+                    self.logger.warning('not enough classifier-outputs received! (something may be wrong)')
                     return
 
-                ## classify and set output:
-                means = [None]*self._nr_elements
-                minimum = maxint
-                classified = None
-                for ii in range(self._nr_elements):
-                    means[ii] = sum(self._classifier_output[ii]) / self.nr_sequences
-                    if means[ii]<minimum:
-                        minimum = means[ii]
-                        classified = ii
-                print "\n**** Class: %d (mean=%f)\n" % (classified+1,means[classified])
-            else:
-                means = [None]*self._nr_elements
-                minimum = maxint
-                classified = None
-                for ii in range(self._nr_elements):
-                    means[ii] = sum(self._classifier_output[ii]) /self.nr_sequences
-                    if means[ii]<minimum:
-                        minimum = means[ii]
-                        classified = ii
-                print "\n**** Class: %d (mean=%f)\n" % (classified+1,means[classified])
+            ## classify and set output:
+            classified, mean = self._classifier_output.decide()
+            if classified is None:
+                self.logger.warning('no classifier-outputs received!')
+                classified, mean = 0, 0.0
+            self.logger.info("Class: %d (mean=%f)" % (classified+1, mean))
 
             ## Reset classifier output to empty lists
             self._init_classifier_output()
@@ -817,9 +802,25 @@ class VisualSpellerVE(MainloopFeedback):
 
 
 
+    def _next_flash_sequence(self):
+        """Return the flash sequence of the next trial.
+
+        The sequences are generated ahead of time in a background thread,
+        the buffer is restarted if the parameters of the sequences change.
+        """
+        key = (self._nr_elements, self.nr_sequences, self.min_dist, self.random_seed)
+        if self._sequences is None or key != self._sequences_key:
+            if self._sequences is not None:
+                self._sequences.stop()
+            nr_elements, nr_sequences, min_dist = key[:3]
+            generate = lambda rng: flash_sequence(range(nr_elements), nr_sequences, min_dist, rng=rng)
+            self._sequences = SequenceBuffer(generate, self.pregenerated_trials, self.random_seed)
+            self._sequences_key = key
+        return self._sequences.get()
+
     def _init_classifier_output(self):
-        ## Empty lists
-        self._classifier_output = [list() for _ in xrange(self._nr_elements)]
+        ## Empty accumulator
+        self._classifier_output = ScoreAccumulator(self._nr_elements, self.nr_sequences, self.stopping_rule())
 
     def abort_trial_check(self):
         '''
@@ -873,8 +874,8 @@ class VisualSpellerVE(MainloopFeedback):
             score_data = data[u'cl_output']
             cl_out = score_data[0]
             iSubstim = int(score_data[1]) # evt auch "Subtrial"
-            if iSubstim in range(1,7):
-                self._classifier_output[iSubstim-1].append(cl_out)
+            if 1 <= iSubstim <= self._nr_elements:
+                self._classifier_output.add(iSubstim-1, cl_out)
             elif self.use_ErrP_detection:
                 self._ErrP_classifier = cl_out
         elif data.has_key('new_letter'):
@@ -909,6 +910,15 @@ class VisualSpellerVE(MainloopFeedback):
         '''
         pass
 
+    def stopping_rule(self):
+        '''
+        return the early stopping rule of the trials, see lib.accumulator.
+        overwrite this function in subclass for other rules.
+        '''
+        if self.early_stopping_threshold is None:
+            return never_stop
+        return TTestRule(self.early_stopping_threshold, self.early_stopping_min_sequences)
+
     def set_countdown_screen(self):
         '''
         set screen how it should look during countdown.
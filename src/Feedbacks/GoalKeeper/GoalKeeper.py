@@ -33,6 +33,8 @@ from PIL import Image
 import pygame
 
 from FeedbackBase.PygameFeedback import PygameFeedback
+from lib import datalog
+from lib import textcache
 
 
 class GoalKeeper(PygameFeedback):
@@ -62,6 +64,7 @@ class GoalKeeper(PygameFeedback):
         ### TESTING
         PygameFeedback.init(self)
         self.caption = 'Goal Keeper'
+        self._images = None
         self.keyboard = 1
         if __name__ == '__main__':
             self.testing = 1
@@ -176,6 +179,8 @@ class GoalKeeper(PygameFeedback):
 
     def pre_mainloop(self):
         #self.logger.debug("on_play")
+        # the images are converted for the display of this run
+        self._images = None
         PygameFeedback.pre_mainloop(self)
         #self.load_images()  # this is done in init_graphics
         self.init_run()
@@ -330,10 +335,9 @@ class GoalKeeper(PygameFeedback):
         if self.totalTrialTicks == self.nt:
             self.ballMoveRect = self.ball.get_rect(midbottom=(self.ballX, self.keeperSurface))
             if self.init_time != 0:
-                print 'Optimal trial time: ' + str(self.trialDuration)
-                print "Actual trial time: " + str(int((time.clock()-self.init_time)*1000)) + ' ms'
-                print "Ticks: " + str(self.nt)
-                print "*************************************"
+                self.logger.debug('Optimal trial time: %s', self.trialDuration)
+                self.logger.debug('Actual trial time: %i ms', (time.clock()-self.init_time)*1000)
+                self.logger.debug('Ticks: %s', self.nt)
                 self.init_time = 0
             if self.keeperMoveRect.left - self.ballX > self.tol or self.ballX - self.keeperMoveRect.right > self.tol:
                 if self.keeperPos == 'middle' or self.keeperPos == self.direction:
@@ -345,7 +349,7 @@ class GoalKeeper(PygameFeedback):
                         self.send_parallel(self.MISS_KL_TR)
                     else:
                         self.send_parallel(self.MISS_KR_TL)
-                    self.ball = pygame.transform.scale(self.ball_miss, self.ballSize)
+                    self.ball = self.ball_missScaled
                     self.false = True; return
             else:
                 if self.direction == 'left':
@@ -356,7 +360,7 @@ class GoalKeeper(PygameFeedback):
 
         elif self.continueAfterMiss and self.nt > self.totalTrialTicks:
             if self.continueAfterMissElapsed == 0:
-                self.ball = pygame.transform.scale(self.ball_missCircle, self.ballSize)
+                self.ball = self.ball_missCircleScaled
             self.continueAfterMissElapsed += self.elapsed
 
             if not self.markerSent:
@@ -371,7 +375,7 @@ class GoalKeeper(PygameFeedback):
                         self.send_parallel(self.TOO_LATE_INCORRECT_KR_TL)
                     else:
                         self.send_parallel(self.TOO_LATE_INCORRECT_KL_TR)
-                    self.ball = pygame.transform.scale(self.ball_miss, self.ballSize)
+                    self.ball = self.ball_missScaled
                     self.markerSent = True
 
             if self.continueAfterMissElapsed > self.playTimeAfterMiss:
@@ -445,24 +449,19 @@ class GoalKeeper(PygameFeedback):
     def write_log(self):
         self.set_trial_time()
         self.endtimes.append(self.trialDuration)
-        file = open(self.logfilename, 'w')
-        for n in range(len(self.endtimes)):
-            file.write(str(int(self.endtimes[n]))+'\n')
+        log = self.data_log(self.TODAY_DIR + '/adaptive_trial_times/',
+                            'gk_block', '.txt')
+        log.write_rows([int(t)] for t in self.endtimes)
+        log.close(wait=False)
         self.log_written = 1
 
     def read_log(self):
-        subdir = '/adaptive_trial_times/'
-        file = 'gk_block'
-        file_no = 1
-        if not os.access(self.TODAY_DIR + subdir, os.F_OK):
-            os.mkdir(self.TODAY_DIR + subdir)
-        elif os.listdir(self.TODAY_DIR + subdir):  # if not empty
-            while os.access(self.TODAY_DIR+subdir+file+str(file_no)+'.txt', os.F_OK):
-                file_no += 1
-            f = open(self.TODAY_DIR+subdir+file+str(file_no-1)+'.txt')
-            endtimes = f.readlines()
-            self.durationPerTrial = [int(endtimes[-1][:]) * 1.2]
-        self.logfilename = self.TODAY_DIR + subdir + file + str(file_no) + '.txt'
+        filename = datalog.latest(self.TODAY_DIR + '/adaptive_trial_times/',
+                                  'gk_block', '.txt')
+        if filename is not None:
+            endtimes = datalog.read(filename)
+            if endtimes:
+                self.durationPerTrial = [endtimes[-1][0] * 1.2]
 
     def hit_miss_tick(self):
         """
@@ -485,7 +484,7 @@ class GoalKeeper(PygameFeedback):
                 self.lastTrial = 'late'
                 self.hitMissFalse[1] += 1
 
-            print "Score: " + str(self.hitMissFalse[0]) + ":" + str(self.hitMissFalse[1]) + ":" + str(self.hitMissFalse[2])
+            self.logger.info('Score: %i:%i:%i', *self.hitMissFalse)
 
         self.hitMissElapsed += self.elapsed
 
@@ -608,10 +607,9 @@ class GoalKeeper(PygameFeedback):
         if not center:
             center = self.screen.get_rect().center
 
-        font = pygame.font.Font(None, size)
         if not superimpose:
             self.screen.blit(self.background, self.backgroundRect)
-        surface = font.render(text, 1, color, self.backgroundColor)
+        surface = textcache.render(text, size, color, self.backgroundColor)
         self.screen.blit(surface, surface.get_rect(center=center))
         if superimpose:
             pygame.display.update(surface.get_rect(center=center))
@@ -646,16 +644,22 @@ class GoalKeeper(PygameFeedback):
         pygame.draw.polygon(self.fixl, self.fixcrossColor, self.pointlistl)
         pygame.draw.polygon(self.fixr, self.fixcrossColor, self.pointlistr)
 
+    IMAGES = {'keeper' : 'keeper.png', 'frame' : 'frame_blue_grad.bmp',
+              'bar' : 'classifierbar.png', 'ball' : 'ball.png',
+              'ball_miss' : 'ball_miss.png',
+              'ball_missCircle' : 'ball_missCircle3.png',
+              'hbLeft' : 'halfball_left.png', 'hbRight' : 'halfball_right.png'}
+
     def load_images(self):
-        path = os.path.dirname(globals()["__file__"])
-        self.keeper = pygame.image.load(os.path.join(path, 'keeper.png')).convert()
-        self.frame = pygame.image.load(os.path.join(path, 'frame_blue_grad.bmp')).convert()
-        self.bar = pygame.image.load(os.path.join(path, 'classifierbar.png')).convert()
-        self.ball = pygame.image.load(os.path.join(path, 'ball.png')).convert()
-        self.ball_miss = pygame.image.load(os.path.join(path, 'ball_miss.png')).convert()
-        self.ball_missCircle = pygame.image.load(os.path.join(path, 'ball_missCircle3.png')).convert()
-        self.hbLeft = pygame.image.load(os.path.join(path, 'halfball_left.png')).convert()
-        self.hbRight = pygame.image.load(os.path.join(path, 'halfball_right.png')).convert()
+        # the images are loaded once, init_graphics gets fresh copies of the
+        # originals since it scales them in place
+        if self._images is None:
+            path = os.path.dirname(globals()["__file__"])
+            self._images = {}
+            for name, filename in self.IMAGES.iteritems():
+                self._images[name] = pygame.image.load(os.path.join(path, filename)).convert()
+        for name, image in self._images.iteritems():
+            setattr(self, name, image.copy())
         self.ballMemo = self.ball
 
     def init_graphics(self):
@@ -670,7 +674,7 @@ class GoalKeeper(PygameFeedback):
             self.oldBallY = self.ballY
         except:
             pass
-        self.load_images() #sadly, this has to be done everytime, otherwise the images look crappy when resizing
+        self.load_images() # copies of the originals, otherwise the images look crappy when resizing
         self.screen = pygame.display.get_surface()
         self.size = min(self.screen.get_height(), self.screen.get_width())
         #barWidth = int(self.screenSize[0] * 0.7)
@@ -749,6 +753,9 @@ class GoalKeeper(PygameFeedback):
         ballOffsetY = int(0.05 * self.screenSize[1])
         self.ball = pygame.transform.scale(self.ball, self.ballSize)
         self.ball_miss = pygame.transform.scale(self.ball_miss, self.ballSize)
+        # the balls shown after a trial, scaled now instead of in trial_tick
+        self.ball_missScaled = self._transforms.scale(self._images['ball_miss'], self.ballSize)
+        self.ball_missCircleScaled = self._transforms.scale(self._images['ball_missCircle'], self.ballSize)
         self.ballRect = self.ball.get_rect(midtop=(self.screenSize[0] / 2, ballOffsetY))
         self.ballX, self.ballY = self.ballRect.centerx, self.ballRect.bottom
         self.distBallKeeper = self.keeperRect.top - self.ballRect.bottom
@@ -203,9 +203,9 @@ class LibetClock(PygameFeedback):
             if self.completedTrials == 0:
                 self.send_parallel(self.GAME_START)  # sending this in pre_mainloop is too early for bbci_bet_apply
                                                 # (cf. variable start_marker_received in bbci_bet_apply)
-            print 'showClassifier: ' + str(self.showClassifier)
-            print 'cls_ival: ' + str(self.cls_ival)
-            print 'threshold: ' + str(self.threshold)
+            self.logger.debug('showClassifier: %s', self.showClassifier)
+            self.logger.debug('cls_ival: %s', self.cls_ival)
+            self.logger.debug('threshold: %s', self.threshold)
             self.send_parallel(self.TRIAL_START)
             self.classifier_log.append(list())
             self.cls_evolution_log.append(list())
@@ -285,8 +285,8 @@ class LibetClock(PygameFeedback):
                         else:
                             f = self.threshold+1
                     elif self.showClassifier == 'feedback':
-                        print 'self.f: ' + str(self.f)
-                        print 'self.f-threshold: ' + str(self.f-self.threshold)
+                        self.logger.debug('self.f: %s', self.f)
+                        self.logger.debug('self.f-threshold: %s', self.f-self.threshold)
                         f = self.f
                     else:
                         raise Exception('String option given by ''self.showClassifier'' unknown.')
@@ -302,9 +302,8 @@ class LibetClock(PygameFeedback):
         # calculate new position of the clock hand
         angle_t0 = -self.clockhandAngle-self.currTargetAngle[self.target]
         self.clockhandAngle = self.nRev * max(-360, -360 * (1.0*self.trialElapsed/(self.nRev*self.revolutionTime)))
-        self.clockhand_rotated = pygame.transform.rotate(self.clockhand, self.clockhandAngle)
-        self.clockhandRect_rotated = self.clockhand_rotated.get_rect(center=self.screencenter)
-        self.clockhandRect_rotated.center = self.clockhandRect.center
+        self.clockhand_rotated, (dx, dy) = self.clockhandRotations.get(self.clockhandAngle)
+        self.clockhandRect_rotated = self.clockhand_rotated.get_rect(topleft=(self.clockhandRect.centerx + dx, self.clockhandRect.centery + dy))
         angle_t1 = -self.clockhandAngle-self.currTargetAngle[self.target]
 
         # check when the clockhand target transition actually occurs
@@ -326,8 +325,8 @@ class LibetClock(PygameFeedback):
     def end_of_trial_tick(self):
         if self.endOfTrialElapsed == 0:
             #print 'self.targetTransitionTimes: ' + str(self.targetTransitionTimes)
-            print 'trial ' + str(self.completedTrials)
-            print 'valid trial ' + str(self.validTrials)
+            self.logger.debug('trial %s', self.completedTrials)
+            self.logger.debug('valid trial %s', self.validTrials)
             self.time_accuracy()
             endTrialTime =  [self.intertrialInterval[0]-self.SADuration, self.intertrialInterval[0]-self.SADuration]
             nu = random.random()
@@ -409,52 +408,29 @@ class LibetClock(PygameFeedback):
             self.classifier_log[self.completedTrials].append(0.3)
 
     def write_classifier_log(self):
-        print 'Writing classifier log.'
-        subdir = '/python_classifier_logs/'
-        if not os.access(self.TODAY_DIR + subdir, os.F_OK):
-            os.mkdir(self.TODAY_DIR + subdir)
-        if self.showClassifier == 'feedback':
-            file = self.TODAY_DIR + subdir + 'fb'
-        else:
-            file = self.TODAY_DIR + subdir + 'train'
-        file_number = 1
-        while os.access(file+str(file_number) + '.csv', os.F_OK):
-            file_number += 1
-        f = open(file + str(file_number) + '.csv', 'w')
+        self.logger.info('Writing classifier log.')
         for trial in range(len(self.classifier_log)):
-            l =len(self.classifier_log[trial])
-            if l!=6:
-                print 'write_classifier_log: list length in trial %i not as expected (actual length: %i, expected length: %i).', (trial, l, 6)
-            for target in range(l):
-                if target == l-1:
-                    f.write(str(self.classifier_log[trial][target]))
-                else:
-                    f.write(str(self.classifier_log[trial][target]) + ',')
-            f.write('\n')
-        f.close()
+            l = len(self.classifier_log[trial])
+            if l != 6:
+                self.logger.warning('write_classifier_log: list length in trial %i not as expected (actual length: %i, expected length: %i).' % (trial, l, 6))
+        self.write_data_log('/python_classifier_logs/', self.classifier_log)
 
     def write_clsev_log(self):
-        print 'Writing classifier evolution log.'
-        subdir = '/python_clsev_logs/'
-        if not os.access(self.TODAY_DIR + subdir, os.F_OK):
-            os.mkdir(self.TODAY_DIR + subdir)
+        self.logger.info('Writing classifier evolution log.')
+        self.write_data_log('/python_clsev_logs/', self.cls_evolution_log)
+
+    def write_data_log(self, subdir, rows):
+        """
+        Write one line per trial into the next free file of the subdir, in
+        the background.
+        """
         if self.showClassifier == 'feedback':
-            file = self.TODAY_DIR + subdir + 'fb'
+            prefix = 'fb'
         else:
-            file = self.TODAY_DIR + subdir + 'train'
-        file_number = 1
-        while os.access(file+str(file_number) + '.csv', os.F_OK):
-            file_number += 1
-        f = open(file + str(file_number) + '.csv', 'w')
-        for trial in range(len(self.cls_evolution_log)):
-            l =len(self.cls_evolution_log[trial])
-            for target in range(l):
-                if target == l-1:
-                    f.write(str(self.cls_evolution_log[trial][target]))
-                else:
-                    f.write(str(self.cls_evolution_log[trial][target]) + ',')
-            f.write('\n')
-        f.close()
+            prefix = 'train'
+        log = self.data_log(self.TODAY_DIR + subdir, prefix)
+        log.write_rows(rows)
+        log.close(wait=False)
 
 
     def set_classification_time(self):
@@ -617,6 +593,7 @@ class LibetClock(PygameFeedback):
         self.clockhand.set_colorkey(self.backgroundColor)
         pygame.draw.line(self.clockhand, (200,200,200), (self.diameter/2,0), (self.diameter/2, self.diameter/2), dialThickness*2)
         self.clockhandRect = self.clockhand.get_rect(center=self.screencenter)
+        self.clockhandRotations = self.rotations(self.clockhand)
         #self.hideRect = pygame.Rect(self.clockhandRect.midleft,(self.clockhandRect.width, self.clockhandRect.height/2))
         self.drawRect = pygame.Rect(self.clockhandRect.topleft,(self.clockhandRect.width,self.clockhandRect.height/2))
 
@@ -44,13 +44,14 @@ import sys
 import math
 import os
 import warnings
-from scipy import *
 
 import pygame
 
 from FeedbackBase.MainloopFeedback import MainloopFeedback
 from lib import marker
 from lib import serialport
+from lib import textcache
+from lib import sequence
 
 class Oddball(MainloopFeedback):
     
@@ -72,6 +73,8 @@ class Oddball(MainloopFeedback):
         self.give_feedback = True
         self.group_stim_markers = False
         self.dd_dist = 2    # no contraint if deviant-deviant distance is 0 (cf. oddball sequence)            
+        self.random_seed = None # seed of the stimulus sequences, None for a random seed
+        self._sequence_random = None
         
         self.DIR_DEV = ''
         self.DIR_STD= ''
@@ -201,6 +204,7 @@ class Oddball(MainloopFeedback):
         self.get_stimuli()
         self.error_checking()
         self.init_graphics()
+        self._sequence_random = None
         #self.init_run()
         self.gameover = False
 
@@ -471,10 +475,9 @@ class Oddball(MainloopFeedback):
         if not center:
             center = self.screen.get_rect().center
 
-        font = pygame.font.Font(None, size)
         if not superimpose:
             self.screen.blit(self.background, self.backgroundRect)            
-        surface = font.render(text, 1, color,self.backgroundColor)    
+        surface = textcache.render(text, size, color, self.backgroundColor)
         self.screen.blit(surface, surface.get_rect(center=center))
         pygame.display.update()
                 
@@ -540,30 +543,18 @@ class Oddball(MainloopFeedback):
         perc_dev:   percentage of deviants
         dd_dist:    constraint variable: minimal number of standards between two deviants 
                    (default: no contraint (=0))
-        """
-    
-        devs_to_be_placed= round(N*dev_perc)
-        if devs_to_be_placed+(devs_to_be_placed-1)*dd_dist>N:
+        Returns a list with 1 for deviants and 0 for standards, see
+        lib.sequence.oddball_sequence.
+        """
+        if self._sequence_random is None:
+            self._sequence_random = random.Random(self.random_seed)
+        devs = int(round(N*dev_perc))
+        try:
+            return sequence.oddball_sequence(N, devs, dd_dist, self._sequence_random)
+        except ValueError:
             solve_prob = 'Increase the number of trials, or decrease the percentage of deviants or the minimal dev-to-dev-distance.' 
             raise Exception('Oddball sequence constraints cannot be fullfilled. ' + solve_prob)
     
-        devs = -1
-        while round(N*dev_perc) != devs:
-            sequence= zeros((N,1));
-            devs_to_be_placed= round(N*dev_perc)
-            ptr = 0
-            while ptr < N:        
-                togo= N-ptr
-                prob= devs_to_be_placed/floor(togo/2)        
-                if random.random() < prob:
-                    sequence[ptr] = 1
-                    devs_to_be_placed = devs_to_be_placed - 1
-                    ptr = ptr + dd_dist
-                ptr= ptr +  1
-            devs = sum(sequence)
-        #print sequence
-        return sequence
-    
     def create_list(self, nStim, stim_perc):
         """ 
         Creates a randomly shuffled list with numbers ranging from 0-(nStim-1)
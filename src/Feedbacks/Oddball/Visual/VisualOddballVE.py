@@ -32,8 +32,9 @@ import pygame
 import os
 import sys
 
-from scipy import *
+import math
 import time
+import warnings
 import VisionEgg
 import random
 
@@ -44,6 +45,7 @@ from VisionEgg.MoreStimuli import FilledCircle
 from FeedbackBase.VisionEggFeedback import VisionEggFeedback
     
 from lib import marker
+from lib import sequence
     
 # TODO: 
 # - EVTL: hit-miss-counter
@@ -79,6 +81,8 @@ class VisualOddballVE(VisionEggFeedback):
         self.give_feedback = True   # will be ignored if self.response=='none'
         self.group_stim_markers = False
         self.dd_dist = 0    # no constraint if deviant-deviant distance is 0 (cf. constraint_stim_sequence() )            
+        self.random_seed = None # seed of the stimulus sequences, None for a random seed
+        self._sequence_random = None
         
         self.DIR_DEV = 'C:\img_oddball\dev'
         self.DIR_STD= 'C:\img_oddball\std'
@@ -118,11 +122,19 @@ class VisualOddballVE(VisionEggFeedback):
         self.error_check()
         
         
+    def pre_mainloop(self):
+        VisionEggFeedback.pre_mainloop(self)
+        # every run starts a new stream of random sequences
+        self._sequence_random = None
+        
         
     def run(self):
 
-        nBlocks = int(ceil(1.0*self.nTrials/self.nTrials_per_block))
+        nBlocks = int(math.ceil(1.0*self.nTrials/self.nTrials_per_block))
         self.create_log() 
+        if not self.VEstimuli:
+            # read the images now, not during the stimulus sequence
+            self.preload_images(self.std + self.dev)
          
         for n in range(nBlocks):
             
@@ -326,28 +338,18 @@ class VisualOddballVE(VisionEggFeedback):
         perc_dev:   percentage of deviants
         dd_dist:    constraint variable: minimal number of standards between two deviants 
                    (default: no constraint (=0))
+        Returns a list with 1 for deviants and 0 for standards, see
+        lib.sequence.oddball_sequence.
         """    
-        devs_to_be_placed= round(N*dev_perc)
-        if devs_to_be_placed+(devs_to_be_placed-1)*dd_dist>N:
+        # subclasses may override init_parameters, so create it on demand
+        if self._sequence_random is None:
+            self._sequence_random = random.Random(self.random_seed)
+        devs = int(round(N*dev_perc))
+        try:
+            return sequence.oddball_sequence(N, devs, dd_dist, self._sequence_random)
+        except ValueError:
             solve_prob = 'Increase the number of trials, or decrease the percentage of deviants or the minimal dev-to-dev-distance.' 
             raise Exception('Oddball sequence constraints cannot be fulfilled. ' + solve_prob)
-        
-        devs = -1
-        while round(N*dev_perc) != devs:
-            sequence= zeros((N,1));
-            devs_to_be_placed= round(N*dev_perc)
-            ptr = 0
-            while ptr < N:        
-                togo= N-ptr
-                prob= devs_to_be_placed/floor(togo/2)        
-                if random.random() < prob:
-                    sequence[ptr] = 1
-                    devs_to_be_placed = devs_to_be_placed - 1
-                    ptr = ptr + dd_dist
-                ptr= ptr +  1
-            devs = sum(sequence)
-        #print sequence
-        return sequence
     
     
     def stim_sequence(self, nStim, stim_perc):
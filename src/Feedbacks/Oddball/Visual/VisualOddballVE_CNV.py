@@ -100,6 +100,8 @@ class VisualOddballVE_CNV(VisualOddballVE.VisualOddballVE):
         
         nBlocks = int(ceil(1.0*self.nTrials/self.nTrials_per_block))
         self.create_log()
+        # read the images now, not during the stimulus sequence
+        self.preload_images(self.std + self.dev)
                  
         for n in range(nBlocks):
             
@@ -40,14 +40,20 @@ class TrivialPong(PygameFeedback):
         self.speed = [2, 2]
         # set initial value for cl output
         self.val = 0.0
+        # only ball and bar move
+        self.dirtyRects = True
 
     def init_graphics(self):
         # load graphics
         path = os.path.dirname( globals()["__file__"] )
-        self.ball = pygame.image.load(os.path.join(path, "ball.png"))
-        self.ballrect = self.ball.get_rect()
-        self.bar = pygame.image.load(os.path.join(path, "bar.png"))
-        self.barrect = self.bar.get_rect()
+        self.ball = pygame.sprite.DirtySprite()
+        self.ball.image = pygame.image.load(os.path.join(path, "ball.png"))
+        self.ballrect = self.ball.image.get_rect()
+        self.bar = pygame.sprite.DirtySprite()
+        self.bar.image = pygame.image.load(os.path.join(path, "bar.png"))
+        self.barrect = self.bar.image.get_rect()
+        self.sprites.empty()
+        self.sprites.add(self.ball, self.bar)
 
     def play_tick(self):
         width, height = self.screenSize
@@ -70,10 +76,9 @@ class TrivialPong(PygameFeedback):
             self.speed[0] = -self.speed[0]
             self.speed[1] = -self.speed[1]
         # update the screen
-        self.screen.fill(self.backgroundColor)
-        self.screen.blit(self.ball, self.ballrect)
-        self.screen.blit(self.bar, self.barrect)
-        pygame.display.flip()
+        self.ball.rect, self.ball.dirty = self.ballrect, 1
+        self.bar.rect, self.bar.dirty = self.barrect, 1
+        self.draw_sprites()
 
 
 if __name__ == "__main__":
@@ -24,6 +24,7 @@ import cmd
 import threading
 import math
 import time
+from optparse import OptionParser
 
 from lib import bcinetwork
 from lib.bcinetwork import BciNetwork
@@ -36,9 +37,10 @@ class Emulator(cmd.Cmd):
     prompt = "> "
     intro = "Welcome to the BCI emulator. Type help to see a list of available commands."
 
-    def __init__(self):
+    def __init__(self, protocol='bcixml'):
         cmd.Cmd.__init__(self)
         self.stopping = True
+        self.protocol = protocol
 
     def do_quit(self, line):
         """Quit the Emulator."""
@@ -73,7 +75,7 @@ class Emulator(cmd.Cmd):
 
 
     def _do_generate_cs(self, line, numbers):
-        self.net = BciNetwork("localhost", bcinetwork.FC_PORT)
+        self.net = BciNetwork("localhost", bcinetwork.FC_PORT, protocol=self.protocol)
         self.signal = BciSignal(None, None, bcixml.CONTROL_SIGNAL)
         self.stopping = False
         self.t = threading.Thread(target=self._cs_loop, args=(numbers,))
@@ -118,5 +120,14 @@ class Emulator(cmd.Cmd):
 
 
 
+def main():
+    parser = OptionParser(usage="%prog [Options]", description="BCI emulator")
+    parser.add_option("--protocol", dest='protocol', type='choice',
+                      help="Set the protocol used to talk to the Feedback Controller. Options are: json, bcixml and binary.",
+                      choices=['bcixml', 'json', 'binary'], default='bcixml')
+    options, args = parser.parse_args()
+    Emulator(options.protocol).cmdloop()
+
+
 if __name__ == "__main__":
-    Emulator().cmdloop()
+    main()
@@ -34,6 +34,8 @@ Many of these functions use pygame
 import pygame
 
 from lib.P300VisualElement.Textbox import Textbox
+from lib import textcache
+from lib import sequence
 
 
 " *** Interfacing with the keyboard *** "
@@ -71,10 +73,9 @@ def countdown(self, centerxy, screen, start_time=3):
     If a centerxy is not provided, the object will be centered 
     on the screen center.
     """
-    font = pygame.font.Font(None, self.textsize)
     for i in range(start_time):
         # Get number and back background
-        nr = font.render(str(start_time - i), True, self.textcolor)
+        nr = textcache.render(str(start_time - i), self.textsize, self.textcolor)
         rect = nr.get_rect(center=centerxy)
         back = pygame.Surface((rect.width, rect.height))
         # Paint background and number 
@@ -109,8 +110,7 @@ def show_message(self, text, box=False):
     """
     if not box:
         self.screen.blit(self.background, self.background_rect)
-        font = pygame.font.Font(None, self.textsize)
-        textimage = font.render(text, True, self.textcolor);
+        textimage = textcache.render(text, self.textsize, self.textcolor)
         textrect = textimage.get_rect(center=(self.screenWidth / 2, self.screenHeight / 2))
         self.screen.blit(textimage, textrect)
         pygame.display.flip()
@@ -145,8 +145,7 @@ def fadeout_message(self, text, box=False, opts=None):
         if opts.has_key("textcolor"): textcolor = opts["textcolor"]
     textimage, textrect = None, None
     if not box:
-        font = pygame.font.Font(None, textsize)
-        textimage = font.render(text, True, textcolor);
+        textimage = textcache.render(text, textsize, textcolor)
         textrect = textimage.get_rect(center=(self.screenWidth / 2, self.screenHeight / 2))
     else:
         edgecolor = 100, 100, 255
@@ -301,25 +300,16 @@ def random_flash_sequence(self, set=None, min_dist=0, seq_len=None, repetition=F
         of the same element
     * repetition
         if true, groups are drawn with repetition (ie, indices can be repeated) 
+    See :mod:`lib.sequence`, raises ValueError if the constraints cannot be met.
     """
     if set is None:
         set = range(len(self.groups))       # Take all groups
     if seq_len is None:
         seq_len = len(set)                  # If no argument provided, take length of sequence
-
-    for i in range(seq_len):
-        subset = set[:]         # Give a copy of set (otherwise they both reference the same list)
-        # Find the no go's (indices which were used in the 
-        # previous sequence and can't be used now) and remove them
-        for j in range(min_dist):
-            if len(self.flash_sequence) > j:           
-                try:        # if element is not in the subset, an exception is cast 
-                    subset.remove(self.flash_sequence[ - 1 - j])
-                except:
-                    pass
-        # From the remaining subset, randomly chose element and append to sequence
-        e = self.random.sample(subset, 1)
-        e = e[0]                # Element is a list, use [0] to unpack it
-        self.flash_sequence.append(e)
-        # If no repetitions, remove this element from sets
-        if not repetition: set.remove(e)
\ No newline at end of file
+    # only the last min_dist flashes constrain the new ones
+    previous = self.flash_sequence[max(0, len(self.flash_sequence) - min_dist):]
+    if repetition:
+        flashes = sequence.random_sequence(set, seq_len, min_dist, previous, self.random)
+    else:
+        flashes = sequence.flash_sequence(set, 1, min_dist, previous, self.random, seq_len)
+    self.flash_sequence.extend(flashes)
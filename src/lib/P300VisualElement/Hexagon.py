@@ -49,6 +49,7 @@ import math
 import pygame
 
 from VisualElement import VisualElement
+from lib import textcache
 
 
 class Hexagon(VisualElement):
@@ -106,9 +107,8 @@ class Hexagon(VisualElement):
             else: circular_offset = self.circular_offset # Take standard value
             
             # Get the text image
-            font = pygame.font.Font(None, textsize)
             if not self.circular_layout:  # Just normal text
-                textimage = font.render(text, self.antialias, textcolor);
+                textimage = textcache.render(text, textsize, textcolor, antialias=self.antialias)
                 textrect = textimage.get_rect()
                 w2, h2 = textrect.width / 2, textrect.height / 2
             else:
@@ -122,7 +122,7 @@ class Hexagon(VisualElement):
                     theta = angDistance * j + circular_offset
                     x = (radius - textsize / 2) * math.cos(theta) + radius
                     y = (radius - textsize / 2) * math.sin(theta) + radius
-                    self.textimages[j] = font.render(text[j], self.antialias, color_now)
+                    self.textimages[j] = textcache.render(text[j], textsize, color_now, antialias=self.antialias)
                     self.textrects[j] = self.textimages[j].get_rect(center=(x, y))
 
             # Draw hexagon fill
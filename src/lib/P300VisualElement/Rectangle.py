@@ -32,6 +32,7 @@ Rectangle objects have the following features:
 import pygame
 
 from VisualElement import VisualElement
+from lib import textcache
 
 
 class Rectangle(VisualElement):
@@ -74,8 +75,7 @@ class Rectangle(VisualElement):
 
             width, height = size
             # Get the text image
-            font = pygame.font.Font(None, textsize)
-            textimage = font.render(text, self.textantialias, textcolor);
+            textimage = textcache.render(text, textsize, textcolor, antialias=self.textantialias)
             if self.antialias is not None:
                 textimage = pygame.transform.rotate(textimage, rotate)
             textrect = textimage.get_rect()
@@ -32,9 +32,8 @@ t = P300Text(text="A",size=30)
 """
 
     
-import pygame
-
 from VisualElement import VisualElement
+from lib import textcache
 
 
 class Text(VisualElement):
@@ -60,6 +59,5 @@ class Text(VisualElement):
             else: color = self.color          # Take standard value
             if self.states[i].has_key("size"):    size = self.states[i]["size"]
             else: size = self.size            # Take standard value
-            font = pygame.font.Font(None, size)
-            self.images[i] = font.render(text, True, color);
+            self.images[i] = textcache.render(text, size, color)
             self.rects[i] = self.images[i].get_rect(center=self.pos)
\ No newline at end of file
@@ -18,7 +18,34 @@
 
 import sys
 import os
+import re
+import json
 import logging
+import time
+from threading import Thread, Event
+
+from lib.RollbackImporter import RollbackImporter
+
+
+INDEX_VERSION = 1
+
+SHARED_MODULES = ["FeedbackBase",
+                  "lib",
+                  "numpy",
+                  "scipy",
+                  "pygame",
+                  "VisionEgg",
+                  "OpenGL",
+                  "panda3d",
+                  "direct",
+                  "pandac",
+                  # imported by pygame for its default font, unloading it
+                  # crashes the next pygame.font.Font(None, size)
+                  "pkg_resources"]
+"""Libraries shared by Feedbacks, they are not unloaded with a Feedback."""
+
+# class definitions in a Feedback module
+_CLASS_DEF = re.compile(r"^[ \t]*class[ \t]+(\w+)", re.MULTILINE)
 
 
 def import_module_and_get_class(modname, classname):
@@ -35,15 +62,41 @@ def import_module_and_get_class(modname, classname):
 
 
 class PluginController(object):
-    """Finds, loads and unloads plugins."""
+    """Finds, loads and unloads plugins.
 
+    If an index file is given, the results of the last scan are stored there:
+    the modification times and contents of all directories below the plugin
+    directories, the Feedbacks of all ``feedbacks.list`` files and the classes
+    defined in the Feedback modules. The next scan only lists directories and
+    reads files whose modification time changed.
 
-    def __init__(self, plugindirs, baseclass):
+    """
+
+
+    def __init__(self, plugindirs, baseclass, indexfile=None, shared=SHARED_MODULES):
+        """Initialize the Plugin Controller.
+
+        :param plugindirs: directories to search for Feedbacks
+        :type plugindirs: list
+        :param baseclass: base class of the plugins
+        :param indexfile: file to store the plugin index in, if None the
+            index is only kept in memory.
+        :type indexfile: str
+        :param shared: modules which are kept loaded by :func:`unload_plugin`
+        :type shared: list
+
+        """
         self.logger = logging.getLogger("PluginController")
         self.plugindirs = map(os.path.normpath, map(os.path.abspath, plugindirs))
         self.baseclass = baseclass
         self.availablePlugins = dict()
-        self.oldModules = None
+        self.invalidPlugins = dict()
+        """Feedbacks which will probably fail to load: name -> reason."""
+        self.shared = shared
+        self.rollbackImporter = None
+        self.indexfile = indexfile
+        self.index = self.load_index()
+        self._stopWatching = None
 
         for dir in plugindirs:
             if os.path.exists(dir):
@@ -55,18 +108,166 @@ class PluginController(object):
     def find_plugins(self):
         """Find Plugins.
 
-        :returns: list of available plugins.
+        Updates ``availablePlugins`` and ``invalidPlugins``. Unchanged
+        directories and files are taken from the index.
 
         """
+        plugins, invalid = dict(), dict()
+        index = {"version" : INDEX_VERSION, "dirs" : {}, "lists" : {}, "modules" : {}}
         for plugindir in self.plugindirs:
-            for root, dirs, files in os.walk(plugindir):
-                if 'feedbacks.list' in files:
-                    self.logger.info("Found feedbacks.list in %s" % root)
-                    del dirs[:]
-                    fbdict = self.load_feedback_list(root+os.path.sep+'feedbacks.list', plugindir)
-                    for fb, module in fbdict.iteritems():
-                        self.availablePlugins[fb] = module
-                    continue
+            self._scan_dir(plugindir, plugindir, plugins, invalid, index)
+        for fb, error in invalid.iteritems():
+            if self.invalidPlugins.get(fb) != error:
+                self.logger.warning("Feedback %s will probably fail to load: %s" % (fb, error))
+        self.availablePlugins = plugins
+        self.invalidPlugins = invalid
+        self.index = index
+        self.save_index()
+
+
+    def _scan_dir(self, path, plugindir, plugins, invalid, index):
+        """Search path and its subdirectories for feedbacks.list files."""
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return
+        entry = self.index["dirs"].get(path)
+        if entry is None or entry["mtime"] != mtime:
+            subdirs, haslist = [], False
+            for name in os.listdir(path):
+                fullname = os.path.join(path, name)
+                if name == 'feedbacks.list':
+                    haslist = True
+                elif os.path.isdir(fullname) and not os.path.islink(fullname):
+                    subdirs.append(name)
+            entry = {"mtime" : mtime, "subdirs" : subdirs, "list" : haslist}
+        index["dirs"][path] = entry
+        if entry["list"]:
+            self.logger.info("Found feedbacks.list in %s" % path)
+            fbdict = self._read_feedback_list(path+os.path.sep+'feedbacks.list', plugindir, index)
+            for fb, module in fbdict.iteritems():
+                plugins[fb] = module
+                error = self._validate(fb, module, plugindir, index)
+                if error:
+                    invalid[fb] = error
+                else:
+                    invalid.pop(fb, None)
+            return
+        for name in entry["subdirs"]:
+            self._scan_dir(os.path.join(path, name), plugindir, plugins, invalid, index)
+
+
+    def _read_feedback_list(self, filename, plugindir, index):
+        """Return the Feedbacks of the feedbacks.list file, using the index
+        if the file did not change.
+        """
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return dict()
+        entry = self.index["lists"].get(filename)
+        if entry is None or entry["mtime"] != st.st_mtime or entry["size"] != st.st_size:
+            entry = {"mtime" : st.st_mtime,
+                     "size" : st.st_size,
+                     "feedbacks" : self.load_feedback_list(filename, plugindir)}
+        index["lists"][filename] = entry
+        return entry["feedbacks"]
+
+
+    def _validate(self, classname, modname, plugindir, index):
+        """Check if the Feedback's module exists and defines the class.
+
+        :returns: None or a description of the problem
+
+        """
+        base = os.path.join(plugindir, *modname.split("."))
+        for modfile in base + ".py", os.path.join(base, "__init__.py"):
+            try:
+                mtime = os.stat(modfile).st_mtime
+            except OSError:
+                continue
+            entry = self.index["modules"].get(modfile)
+            if entry is None or entry["mtime"] != mtime:
+                try:
+                    fh = open(modfile, "r")
+                    classes = _CLASS_DEF.findall(fh.read())
+                    fh.close()
+                except IOError, e:
+                    return "could not read %s: %s" % (modfile, e)
+                entry = {"mtime" : mtime, "classes" : classes}
+            index["modules"][modfile] = entry
+            if classname not in entry["classes"]:
+                return "%s does not define class %s" % (modfile, classname)
+            return None
+        return "module %s not found in %s" % (modname, plugindir)
+
+
+    def load_index(self):
+        """Load the plugin index from the index file.
+
+        :returns: the index, an empty one if the file does not exist or is
+            invalid.
+
+        """
+        index = {"version" : INDEX_VERSION, "dirs" : {}, "lists" : {}, "modules" : {}}
+        if not self.indexfile or not os.path.exists(self.indexfile):
+            return index
+        try:
+            fh = open(self.indexfile, "r")
+            loaded = json.load(fh)
+            fh.close()
+        except (IOError, ValueError), e:
+            self.logger.warning("Could not load plugin index %s: %s" % (self.indexfile, e))
+            return index
+        if not isinstance(loaded, dict) or loaded.get("version") != INDEX_VERSION:
+            return index
+        for key in "dirs", "lists", "modules":
+            index[key] = loaded.get(key, {})
+        # json returns unicode strings, Feedback and module names should be str
+        for entry in index["lists"].itervalues():
+            entry["feedbacks"] = dict((str(fb), str(mod)) for fb, mod in entry["feedbacks"].iteritems())
+        return index
+
+
+    def save_index(self):
+        """Write the plugin index to the index file."""
+        if not self.indexfile:
+            return
+        try:
+            fh = open(self.indexfile, "w")
+            json.dump(self.index, fh)
+            fh.close()
+        except IOError, e:
+            self.logger.warning("Could not save plugin index %s: %s" % (self.indexfile, e))
+
+
+    def watch(self, interval):
+        """Rescan the plugin directories periodically in a background thread.
+
+        :param interval: seconds between two scans
+        :type interval: float
+
+        """
+        self.stop_watching()
+        self._stopWatching = Event()
+        thread = Thread(target=self._watch, args=(interval, self._stopWatching))
+        thread.daemon = True
+        thread.start()
+
+
+    def stop_watching(self):
+        """Stop rescanning the plugin directories."""
+        if self._stopWatching:
+            self._stopWatching.set()
+            self._stopWatching = None
+
+
+    def _watch(self, interval, stop):
+        while not stop.wait(interval):
+            try:
+                self.find_plugins()
+            except:
+                self.logger.exception("Rescanning the plugin directories failed:")
 
 
     def load_feedback_list(self, filename, plugindir):
@@ -102,13 +303,32 @@ class PluginController(object):
         return fbdict
 
 
+    def load_plugin(self, name):
+        """Import the plugin's module and return the plugin's class.
+
+        Modules imported on the way are unloaded again by
+        :func:`unload_plugin`, except the shared ones.
+
+        :param name: name of the plugin
+        :type name: str
+        :returns: the plugin's class
+
+        """
+        self.unload_plugin()
+        self.rollbackImporter = RollbackImporter(self.shared)
+        start = time.time()
+        cls = import_module_and_get_class(self.availablePlugins[name], name)
+        self.logger.info("Imported %s in %.3fs." % (name, time.time() - start))
+        for modname, seconds in self.rollbackImporter.report(10):
+            self.logger.debug("  %-40s %.3fs" % (modname, seconds))
+        return cls
+
+
     def unload_plugin(self):
-        """Unload currently loaded plugin."""
-        if self.oldModules:
-            for mod in sys.modules.keys():
-                if not self.oldModules.has_key(mod):
-                    del sys.modules[mod]
-            self.oldModules = None
+        """Unload currently loaded plugin, keeping the shared modules."""
+        if self.rollbackImporter:
+            self.rollbackImporter.uninstall()
+            self.rollbackImporter = None
 
 
 def main():
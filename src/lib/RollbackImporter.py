@@ -18,6 +18,7 @@
 
 import __builtin__
 import sys
+import time
 
 
 class RollbackImporter(object):
@@ -30,29 +31,80 @@ class RollbackImporter(object):
     delete those modules from the system module list; this ensures that the
     modules will be freshly loaded from their source code when next imported.
 
+    Modules in the list of shared modules (and their submodules) are not
+    deleted, so heavy libraries like numpy or pygame do not have to be
+    imported again. The time needed to import each new module is recorded in
+    ``import_times``.
+
     Usage::
 
         if self.rollbackImporter:
             self.rollbackImporter.uninstall()
-        self.rollbackImporter = RollbackImporter()
+        self.rollbackImporter = RollbackImporter(["numpy", "pygame"])
         # import some modules
 
     """
 
-    def __init__(self):
-        """Init the RollbackImporter and setup the import proxy."""
+    def __init__(self, shared=None):
+        """Init the RollbackImporter and setup the import proxy.
+
+        :param shared: names of modules which should never be unloaded
+        :type shared: list
+
+        """
         self.oldmodules = sys.modules.copy()
+        self.shared = tuple(shared) if shared else ()
+        self.import_times = dict()
+        """Module name -> seconds needed to import it, including its imports."""
         self.realimport = __builtin__.__import__
         __builtin__.__import__ = self._import
 
-    def uninstall(self):
-        """Unload all modules since __init__ and restore the original import."""
-        for module in sys.modules.keys():
-            if not self.oldmodules.has_key(module):
-                del sys.modules[module]
+    def is_shared(self, modname):
+        """Return True if the module should never be unloaded."""
+        for name in self.shared:
+            if modname == name or modname.startswith(name + "."):
+                return True
+        return False
+
+    def uninstall(self, rollback=True):
+        """Unload all modules since __init__ and restore the original import.
+
+        :param rollback: if False, only restore the original import and keep
+            the modules loaded.
+
+        """
+        if rollback:
+            for module in sys.modules.keys():
+                if not self.oldmodules.has_key(module) and not self.is_shared(module):
+                    del sys.modules[module]
         __builtin__.__import__ = self.realimport
 
+    def report(self, n=None):
+        """Return the most expensive imports.
+
+        :param n: maximum number of entries
+        :returns: list of tuples (module name, seconds), most expensive first
+
+        """
+        times = sorted(self.import_times.iteritems(), key=lambda x: x[1], reverse=True)
+        return times[:n]
+
     def _import(self, name, globals={}, locals={}, fromlist=[], level=-1):
         """Our import method."""
-        return apply(self.realimport, (name, globals, locals, fromlist, level))
-
+        nmodules = len(sys.modules)
+        start = time.time()
+        module = apply(self.realimport, (name, globals, locals, fromlist, level))
+        if len(sys.modules) > nmodules:
+            # Something new was loaded, find out what was asked for
+            elapsed = time.time() - start
+            candidates = [name]
+            if fromlist:
+                candidates = ["%s.%s" % (name, f) for f in fromlist if f != "*"] + candidates
+            for fullname in candidates:
+                if fullname in sys.modules:
+                    break
+            else:
+                # relative import
+                fullname = module.__name__
+            self.import_times[fullname] = elapsed
+        return module
@@ -0,0 +1,256 @@
+# accumulator.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Accumulation of classifier outputs in ERP spellers.
+
+An ERP speller gets one classifier output (score) per flash and selects the
+element with the best mean score after some sequences. :class:`ScoreAccumulator`
+stores the scores in a preallocated array indexed by element and sequence
+and keeps the running mean and variance of every element, so adding a score
+and deciding after a sequence do not depend on the number of scores
+received.
+
+Whether to stop the trial before the last sequence is decided by a stopping
+rule, a callable which gets the accumulator and returns ``True`` to stop.
+:func:`never_stop`, :class:`MarginRule` and :class:`TTestRule` are provided.
+:func:`simulate` replays recorded scores to evaluate a rule offline::
+
+    acc = ScoreAccumulator(6, 10, rule=TTestRule(3.0, min_sequences=3))
+    acc.add(element, score)
+    ...
+    if acc.should_stop():
+        element, mean = acc.decide()
+
+By default lower scores are better, as with the classifiers of the BBCI
+toolbox where targets get negative scores.
+
+"""
+
+
+import numpy as np
+
+
+def never_stop(accumulator):
+    """Stopping rule which never stops early."""
+    return False
+
+
+class MarginRule(object):
+    """Stop if the best mean is better than all others by a margin."""
+
+    def __init__(self, margin, min_sequences=1):
+        """Initialize the rule.
+
+        :param margin: minimum difference between the best and the second
+            best mean score
+        :type margin: float
+        :param min_sequences: minimum number of complete sequences
+        :type min_sequences: int
+
+        """
+        self.margin = margin
+        self.min_sequences = min_sequences
+
+    def __call__(self, accumulator):
+        if accumulator.sequences() < self.min_sequences:
+            return False
+        best, second = accumulator.ranking()[:2]
+        means = accumulator.means()
+        return abs(means[second] - means[best]) >= self.margin
+
+
+class TTestRule(object):
+    """Stop if the best element is better than the second best one
+    according to Welch's t statistic."""
+
+    def __init__(self, threshold, min_sequences=2):
+        """Initialize the rule.
+
+        :param threshold: minimum t statistic
+        :type threshold: float
+        :param min_sequences: minimum number of complete sequences, at
+            least 2
+        :type min_sequences: int
+
+        """
+        self.threshold = threshold
+        self.min_sequences = max(2, min_sequences)
+
+    def __call__(self, accumulator):
+        if accumulator.sequences() < self.min_sequences:
+            return False
+        best, second = accumulator.ranking()[:2]
+        means = accumulator.means()
+        variances = accumulator.variances()
+        counts = accumulator.counts
+        error = np.sqrt(variances[best] / counts[best] + variances[second] / counts[second])
+        diff = abs(means[second] - means[best])
+        if error == 0:
+            return diff > 0
+        return diff / error >= self.threshold
+
+
+class ScoreAccumulator(object):
+    """Scores of the elements of a trial with running statistics."""
+
+    def __init__(self, elements, max_sequences, rule=never_stop, lower_is_better=True):
+        """Initialize the arrays.
+
+        :param elements: number of elements
+        :type elements: int
+        :param max_sequences: expected number of sequences of a trial, more
+            scores per element are accepted but grow the array
+        :type max_sequences: int
+        :param rule: stopping rule, gets the accumulator and returns
+            ``True`` to stop the trial
+        :type rule: callable
+        :param lower_is_better: whether the element with the lowest mean
+            score is selected
+        :type lower_is_better: bool
+
+        """
+        self.elements = elements
+        self.rule = rule
+        self.lower_is_better = lower_is_better
+        self._scores = np.zeros((elements, max(1, max_sequences)))
+        self.counts = np.zeros(elements, dtype=int)
+        """Number of scores of every element."""
+        self._means = np.zeros(elements)
+        # sum of the squared differences to the mean (Welford)
+        self._m2 = np.zeros(elements)
+
+
+    def add(self, element, score):
+        """Add the score of a flash.
+
+        :param element: index of the element
+        :type element: int
+        :param score: classifier output
+        :type score: float
+
+        """
+        n = self.counts[element]
+        if n == self._scores.shape[1]:
+            self._scores = np.hstack((self._scores, np.zeros_like(self._scores)))
+        self._scores[element, n] = score
+        n += 1
+        self.counts[element] = n
+        delta = score - self._means[element]
+        self._means[element] += delta / n
+        self._m2[element] += delta * (score - self._means[element])
+
+
+    def reset(self):
+        """Remove all scores."""
+        self.counts[:] = 0
+        self._means[:] = 0
+        self._m2[:] = 0
+
+
+    def total(self):
+        """Return the number of scores of all elements."""
+        return int(self.counts.sum())
+
+
+    def sequences(self):
+        """Return the number of complete sequences, in which every element
+        got a score."""
+        return int(self.counts.min())
+
+
+    def scores(self, element):
+        """Return the scores of an element in the order received.
+
+        :param element: index of the element
+        :type element: int
+        :returns: numpy.ndarray, a view which is overwritten after
+            :meth:`reset`
+
+        """
+        return self._scores[element, :self.counts[element]]
+
+
+    def means(self):
+        """Return the mean score of every element, ``nan`` for elements
+        without scores."""
+        return np.where(self.counts > 0, self._means, np.nan)
+
+
+    def variances(self):
+        """Return the sample variance of the scores of every element,
+        ``nan`` for elements with less than two scores."""
+        n = self.counts
+        return np.where(n > 1, self._m2 / np.maximum(n - 1, 1), np.nan)
+
+
+    def ranking(self):
+        """Return the elements from the best to the worst mean score,
+        elements without scores last."""
+        means = self.means()
+        if not self.lower_is_better:
+            means = -means
+        # argsort puts nan last
+        return np.argsort(means, kind='mergesort')
+
+
+    def decide(self):
+        """Return the element with the best mean score.
+
+        :returns: tuple (element, mean score), element is ``None`` if no
+            scores were received
+
+        """
+        if self.total() == 0:
+            return None, None
+        best = int(self.ranking()[0])
+        return best, float(self._means[best])
+
+
+    def should_stop(self):
+        """Return whether the stopping rule stops the trial."""
+        return bool(self.rule(self))
+
+
+def simulate(stream, elements, max_sequences, rule=never_stop, lower_is_better=True):
+    """Replay the scores of a trial and apply a stopping rule.
+
+    The rule is asked after every complete sequence.
+
+    :param stream: the scores in the order received
+    :type stream: iterable of (element, score) tuples
+    :param elements: number of elements
+    :type elements: int
+    :param max_sequences: number of sequences of the trial
+    :type max_sequences: int
+    :param rule: stopping rule
+    :type rule: callable
+    :param lower_is_better: whether the element with the lowest mean
+        score is selected
+    :type lower_is_better: bool
+    :returns: tuple (selected element, number of sequences used)
+
+    """
+    acc = ScoreAccumulator(elements, max_sequences, rule, lower_is_better)
+    sequences = 0
+    for element, score in stream:
+        acc.add(element, score)
+        if acc.sequences() > sequences:
+            sequences = acc.sequences()
+            if sequences >= max_sequences or acc.should_stop():
+                break
+    return acc.decide()[0], sequences
@@ -61,10 +61,13 @@ class BciNetwork(object):
         if protocol == 'json':
             self.xmlencoder = bcixml.JsonEncoder()
             self.xmldecoder = bcixml.JsonDecoder()
+        elif protocol == 'binary':
+            self.xmlencoder = bcixml.BinaryEncoder()
+            self.xmldecoder = bcixml.BinaryDecoder()
         else:
             # tobi and bcixml share the same encoder
-            self.xmlencoder = bcixml.XmlEncoder()
-            self.xmldecoder = bcixml.XmlDecoder()
+            self.xmlencoder = bcixml.CachedXmlEncoder()
+            self.xmldecoder = bcixml.StreamingXmlDecoder()
 
 
     def getAvailableFeedbacks(self):
@@ -134,6 +137,31 @@ class BciNetwork(object):
         answer = self.xmldecoder.decode_packet(data)
         return answer.data.get("variables")
 
+    def get_frame_timing(self, filename=None):
+        """Get the frame timing summary of the currently running Feedback.
+
+        Only Feedbacks derived from MainloopFeedback with
+        ``_frame_timing_enabled`` record the frame timing.
+
+        :param filename: tell the Feedback to write the recorded frames to
+            this file
+        :type filename: str
+        :returns: frame timing summary or None
+
+        """
+        params = dict()
+        if filename:
+            params['filename'] = filename
+        signal = bcixml.BciSignal(None, [(bcixml.CMD_GET_FRAME_TIMING, params)], bcixml.INTERACTION_SIGNAL)
+        self.send_signal(signal)
+
+        data, addr = self.receive(TIMEOUT)
+        if not data:
+            self.logger.info("Did not receive answer on get_frame_timing")
+            return None
+        answer = self.xmldecoder.decode_packet(data)
+        return answer.data.get("frametiming")
+
     def save_configuration(self, filename):
         """Tell the Feedback to store it's variables to the given file.
 
@@ -20,7 +20,12 @@
 
 import logging
 import sys
+import re
+import struct
+import array
+import numbers
 from xml.dom import minidom, Node
+from xml.parsers import expat
 import json
 
 from lib import pylibtobiic
@@ -70,6 +75,7 @@ CMD_GET_VARIABLES = 'getvariables'
 CMD_SAVE_VARIABLES = 'savevariables'
 CMD_LOAD_VARIABLES = 'loadvariables'
 CMD_QUIT_FEEDBACK_CONTROLLER = 'quitfeedbackcontroller'
+CMD_GET_FRAME_TIMING = 'getframetiming'
 
 
 class XmlDecoder(object):
@@ -217,15 +223,232 @@ class XmlDecoder(object):
 
         return None
 
-class TobiXmlDecoder(XmlDecoder):
+class StreamingXmlDecoder(XmlDecoder):
+    """Parses XML strings with expat and returns BciSignal containing the data
+    of the signal.
+
+    This decoder produces exactly the same BciSignal as :class:`XmlDecoder`,
+    but it does not build a DOM tree for every packet. Instead the packet is
+    fed through a streaming expat parser and the values are built up while the
+    elements are closed. Control signals which consist of a single float or a
+    single list of floats (the typical classifier output) are decoded by a
+    fast path without invoking the XML parser at all.
+
+    Usage::
+
+        decoder = StreamingXmlDecoder()
+        try:
+            bcisignal = decoder.decode_packet(xml)
+        except DecodingError:
+            ...
+
+    """
+
+    def __init__(self):
+        XmlDecoder.__init__(self)
+        self.logger = logging.getLogger("StreamingXmlDecoder")
+
+
+    def decode_packet(self, packet):
+        """Parse the XML string and return a BciSignal.
+
+        :param packet: XML Packet
+        :type packet: str
+        :returns: BciSignal
+        :raises: A DecodingError is raised when the parsing of the packet failed.
+
+        """
+        signal = self.decode_flat_control_signal(packet)
+        if signal is not None:
+            return signal
+        return _ExpatSignalBuilder(self.logger).parse(packet)
+
+
+    def decode_flat_control_signal(self, packet):
+        """Decode a control signal containing a single float or list of floats.
+
+        :param packet: XML Packet
+        :type packet: str
+        :returns: BciSignal or None if the packet has a different shape.
+
+        """
+        m = _FLAT_CONTROL_SIGNAL.match(packet)
+        if m is None:
+            return None
+        name, value, listname, listbody = m.groups()
+        if name is not None:
+            return BciSignal({unicode(name) : float(value)}, None, CONTROL_SIGNAL)
+        values = [float(v) for v in _FLAT_FLOAT_VALUE.findall(listbody)]
+        return BciSignal({unicode(listname) : values}, None, CONTROL_SIGNAL)
+
+
+# Control signals consisting of exactly one float or one list of floats, as
+# written by XmlEncoder and most BCI systems. Names and values containing
+# entities are left to the full parser.
+_FLAT_FLOAT_TAG = r'<(?:%s)\s+value="[\w.+\-]*"\s*/>' % "|".join(FLOAT_TYPE)
+_FLAT_CONTROL_SIGNAL = re.compile(
+    r'(?:<\?xml[^>]*\?>)?\s*<%(root)s(?:\s[^>/]*)?>\s*<%(cs)s>\s*'
+    r'(?:<(?:%(float)s)\s+name="([\w.\-]+)"\s+value="([\w.+\-]*)"\s*/>'
+    r'|<(?:%(list)s)\s+name="([\w.\-]+)"\s*>((?:\s*%(item)s)*)\s*</(?:%(list)s)>)'
+    r'\s*</%(cs)s>\s*</%(root)s>\s*$' % {"root" : XML_ROOT,
+                                        "cs" : CONTROL_SIGNAL,
+                                        "float" : "|".join(FLOAT_TYPE),
+                                        "list" : "|".join(LIST_TYPE),
+                                        "item" : _FLAT_FLOAT_TAG})
+_FLAT_FLOAT_VALUE = re.compile(r'value="([\w.+\-]*)"')
+
+
+def _decode_boolean(value):
+    if value in TRUE_VALUE:
+        return True
+    elif value in FALSE_VALUE:
+        return False
+    raise DecodingError("Unknown boolean value: %s" % str(value))
+
+
+def _decode_complex(value):
+    if value.startswith("(") and value.endswith(")"):
+        value = value[1:-1]
+    return complex(value)
+
+
+# type name -> function converting the value attribute into a python object
+_SCALAR_DECODERS = {}
+for _types, _decode in ((BOOLEAN_TYPE, _decode_boolean),
+                        (INTEGER_TYPE, int),
+                        (FLOAT_TYPE, float),
+                        (LONG_TYPE, long),
+                        (COMPLEX_TYPE, _decode_complex),
+                        (STRING_TYPE, str),
+                        (UNICODE_TYPE, unicode),
+                        (NONE_TYPE, lambda value: None),
+                        (UNSUPPORTED_TYPE, lambda value: value)):
+    for _type in _types:
+        _SCALAR_DECODERS[_type] = _decode
+
+# type name -> constructor for the container built from the child values
+_CONTAINER_DECODERS = {}
+for _types, _decode in ((LIST_TYPE, list),
+                        (TUPLE_TYPE, tuple),
+                        (SET_TYPE, set),
+                        (FROZENSET_TYPE, frozenset),
+                        (DICT_TYPE, dict)):
+    for _type in _types:
+        _CONTAINER_DECODERS[_type] = _decode
+del _types, _decode, _type
+
+# child elements which may carry the name or value instead of an attribute,
+# mapped to their index in the element stack
+_FIELDS = {NAME : 1, VALUE : 2}
+
+
+class _ExpatSignalBuilder(object):
+    """State machine which builds a BciSignal from expat parser events.
+
+    An instance is good for exactly one packet.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.variables = []
+        self.commands = []
+        self.type = None
+        self.depth = 0
+        # open value elements: [type, name, value, children]
+        self.stack = []
+        # name or value child element we're currently reading text from
+        self.field = None
+        self.text = []
+        # depth inside an element whose content is ignored
+        self.skip = 0
+
+    def parse(self, packet):
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = self.start_element
+        parser.EndElementHandler = self.end_element
+        parser.CharacterDataHandler = self.character_data
+        try:
+            parser.Parse(packet, True)
+        except expat.ExpatError:
+            raise DecodingError("Not XML at all! (%s)" % repr(packet))
+        return BciSignal(dict(self.variables), self.commands, self.type)
+
+    def start_element(self, tag, attrs):
+        self.depth += 1
+        if self.skip:
+            self.skip += 1
+        elif self.depth == 1:
+            pass
+        elif self.depth == 2:
+            if tag not in (INTERACTION_SIGNAL, CONTROL_SIGNAL, REPLY_SIGNAL):
+                self.logger.warning("Received a signal which contains neither an interaction- nor a control-signal. (%s)" % str(tag))
+                raise DecodingError("Received a signal which contains neither an interaction- nor a control-signal. (%s)" % str(tag))
+            self.type = tag
+        elif self.stack and tag in _FIELDS and self.stack[-1][_FIELDS[tag]] is None:
+            # <foo><name>bar</name></foo> instead of <foo name="bar"/>
+            self.field = tag
+            self.text = []
+            self.skip = 1
+        elif self.stack and self.stack[-1][0] in _SCALAR_DECODERS:
+            # child elements of scalar values are ignored
+            self.skip = 1
+        else:
+            self.stack.append([tag, attrs.get(NAME), attrs.get(VALUE), []])
+
+    def end_element(self, tag):
+        self.depth -= 1
+        if self.skip:
+            self.skip -= 1
+            if self.skip == 0 and self.field is not None:
+                self.stack[-1][_FIELDS[self.field]] = u"".join(self.text)
+                self.field = None
+        elif self.depth >= 2:
+            type, result = self.finish_element(*self.stack.pop())
+            if self.stack:
+                self.stack[-1][3].append(result[-1])
+            elif type == VARIABLE:
+                self.variables.append(result)
+            else:
+                self.commands.append(result)
+
+    def character_data(self, data):
+        if self.field is not None and self.skip == 1:
+            self.text.append(data)
+
+    def finish_element(self, type, name, value, children):
+        decode = _SCALAR_DECODERS.get(type)
+        if decode is not None:
+            return VARIABLE, (name, decode(value))
+        decode = _CONTAINER_DECODERS.get(type)
+        if decode is not None:
+            return VARIABLE, (name, decode(children))
+        if type in COMMAND_TYPE:
+            # should only be one child node, since we allow only 1 kwargs-dict
+            # per command
+            return COMMAND, (value, children[-1] if children else dict())
+        raise DecodingError("Unknown type: %s" % str(type))
+
+
+class TobiXmlDecoder(StreamingXmlDecoder):
     """TobiXmlDecoder.
 
     Decode packets in TOBI format.
 
+    TOBI interface C packets (root element ``messagec``) are parsed once with
+    expat. Their classifiers and classes are kept in a persistent
+    :class:`lib.pylibtobiic.ICMessage` (``icmessage``): the first packet
+    creates them, the following packets only update the values, like
+    ``ICSerializer.Deserialize`` does. The class values of the first
+    classifier are returned as ``cl_output`` control signal, in the order they
+    appear in the packet. All other packets are decoded as bcixml.
+
     """
 
     def __init__(self):
-        XmlDecoder.__init__(self)
+        StreamingXmlDecoder.__init__(self)
+        self.logger = logging.getLogger("TobiXmlDecoder")
+        self.icmessage = pylibtobiic.ICMessage()
 
     def decode_packet(self, packet):
         """Parse the XML string and return a BciSignal.
@@ -234,45 +457,115 @@ class TobiXmlDecoder(XmlDecoder):
         :returns: decoded packet
         :raises: A DecodingError is raised when the parsing of the packet failed.
         """
-        dom = None
-        try:
-            dom = minidom.parseString(packet)
-        except:
-            raise DecodingError("Not XML at all! (%s)" % str(packet))
-
         # the root element name will be "messagec" for TOBI interface C packets,
         # if it is anything else, pass it on to the normal pyff decoder
-        if dom.documentElement.nodeName == "messagec":
+        m = _ROOT_ELEMENT.match(packet)
+        if m is not None and m.group(1) == pylibtobiic.ICMESSAGE_ROOTNODE:
             return self.__decode_tobiic_packet(packet)
-        return XmlDecoder.decode_packet(self, packet)
+        return StreamingXmlDecoder.decode_packet(self, packet)
 
     def __decode_tobiic_packet(self, data):
-        l = []    # for the variables
-        c = []    # for the commands
-        t = None  # for the type
+        try:
+            values = _ICMessageUpdater(self.icmessage).parse(data)
+        except _ICStructureChanged:
+            # classifiers or classes changed, start over
+            self.logger.info("TOBI iC message structure changed.")
+            self.icmessage.classifiers.Clear()
+            values = _ICMessageUpdater(self.icmessage).parse(data)
+        return BciSignal({u'cl_output' : values}, [], CONTROL_SIGNAL)
+
+
+# name of the root element of an XML document
+_ROOT_ELEMENT = re.compile(r'\s*(?:<\?xml[^>]*\?>\s*)?<([^\s/>]+)')
+
+
+class _ICStructureChanged(Exception):
+    """A TOBI iC packet contains classifiers or classes the ICMessage does not
+    know yet."""
+    pass
+
+
+class _ICMessageUpdater(object):
+    """Updates an ICMessage from the expat parser events of a TOBI iC packet.
+
+    If the ICMessage is empty, its classifiers and classes are created,
+    otherwise only the values of the existing classes are updated. An instance
+    is good for exactly one packet.
+    """
+
+    def __init__(self, icmessage):
+        self.classifiers = icmessage.classifiers
+        self.initialize = self.classifiers.Empty()
+        self.classifier = None
+        # label of the class we're currently reading the value of
+        self.label = None
+        self.text = []
+        self.values = None
+        # values of the first classifier
+        self.first = None
+
+    def parse(self, packet):
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = self.start_element
+        parser.EndElementHandler = self.end_element
+        parser.CharacterDataHandler = self.character_data
+        try:
+            parser.Parse(packet, True)
+        except expat.ExpatError:
+            raise DecodingError("Not XML at all! (%s)" % repr(packet))
+        return self.first if self.first is not None else []
+
+    def start_element(self, tag, attrs):
+        if tag == pylibtobiic.ICMESSAGE_CLASSNODE and self.classifier is not None:
+            self.label = attrs.get(pylibtobiic.ICMESSAGE_LABELNODE)
+            self.text = []
+        elif tag == pylibtobiic.ICMESSAGE_CLASSISIFERNODE:
+            name = attrs.get(pylibtobiic.ICMESSAGE_NAMENODE)
+            if self.initialize:
+                if self.classifiers.Has(name):
+                    raise DecodingError("Duplicate TOBI iC classifier: %s" % name)
+                self.classifier = pylibtobiic.ICClassifier(name,
+                    attrs.get(pylibtobiic.ICMESSAGE_DESCNODE, u""),
+                    pylibtobiic.ICClassifier.ValueType(attrs.get(pylibtobiic.ICMESSAGE_VTYPENODE)),
+                    pylibtobiic.ICClassifier.LabelType(attrs.get(pylibtobiic.ICMESSAGE_LTYPENODE)))
+                self.classifiers.Add(self.classifier)
+            else:
+                self.classifier = self.classifiers.Get(name)
+                if self.classifier is None:
+                    raise _ICStructureChanged()
+            self.values = []
+        elif tag == pylibtobiic.ICMESSAGE_ROOTNODE:
+            if attrs.get(pylibtobiic.ICMESSAGE_VERSIONNODE) != pylibtobiic.ICMESSAGE_VERSION:
+                raise DecodingError("Unsupported TOBI iC version: %s" % attrs.get(pylibtobiic.ICMESSAGE_VERSIONNODE))
+
+    def end_element(self, tag):
+        if tag == pylibtobiic.ICMESSAGE_CLASSNODE and self.label is not None:
+            try:
+                value = float(u"".join(self.text))
+            except ValueError:
+                raise DecodingError("Invalid TOBI iC class value: %s" % u"".join(self.text))
+            classes = self.classifier.classes
+            if self.initialize:
+                if classes.Has(self.label):
+                    raise DecodingError("Duplicate TOBI iC class: %s" % self.label)
+                classes.Add(pylibtobiic.ICClass(self.label, value))
+            else:
+                iclass = classes.Get(self.label)
+                if iclass is None:
+                    raise _ICStructureChanged()
+                iclass.SetValue(value)
+            self.values.append(value)
+            self.label = None
+        elif tag == pylibtobiic.ICMESSAGE_CLASSISIFERNODE:
+            if self.first is None:
+                self.first = self.values
+            self.classifier = None
+
+    def character_data(self, data):
+        if self.label is not None:
+            self.text.append(data)
 
-        # deserialize the packet
-        icmessage = pylibtobiic.ICMessage()
-        icsr = pylibtobiic.ICSerializer(icmessage, True)
-        icsr.Deserialize(data)
-
-        # now extract the data from icmessage
-        # go through all the classifiers...
-        for classifier_name in icmessage.classifiers.map.keys():
-            classifier_data = icmessage.classifiers.map[classifier_name]
-            print "[TOBI-IC] %s" % classifier_name
-            # and all the classes inside the classifier...
-            values = []
-            for class_name in classifier_data.classes.map.keys():
-                class_data = classifier_data.classes.map[class_name]
-                print "[TOBI-IC] %s/%s: %.3f" % (classifier_name, class_name, class_data.GetValue())
-                # is this the correct way to pass the data value on to pyff??
-                values.append(class_data.GetValue())
-            l.append((u'cl_output', values))
-            break
-
-        t = CONTROL_SIGNAL
-        return BciSignal(dict(l), c, t)
 
 class XmlEncoder(object):
     """Generates an XML string from a BciSignal object.
@@ -385,6 +678,228 @@ class XmlEncoder(object):
         root.appendChild(e)
 
 
+class CachedXmlEncoder(XmlEncoder):
+    """Generates an XML string from a BciSignal object without building a DOM.
+
+    The output is identical to the one of :class:`XmlEncoder`. Signals which
+    consist only of numbers, booleans, None and flat lists or tuples of those
+    (e.g. control signals) are serialized via a string template, which is
+    compiled once per signal shape (signal type, keys and value types) and
+    cached. All other signals are written straight into a string buffer.
+    Signals containing values of unsupported types are handed to the DOM
+    based :class:`XmlEncoder`.
+
+    Usage::
+
+        enc = CachedXmlEncoder()
+        try:
+            xml = enc.encode_packet(bcisignal)
+        except EncodingError:
+            ...
+
+    """
+
+    def __init__(self, cachesize=128):
+        """Initialize the encoder.
+
+        :param cachesize: maximum number of cached signal shapes
+        :type cachesize: int
+
+        """
+        XmlEncoder.__init__(self)
+        self.logger = logging.getLogger("CachedXmlEncoder")
+        self.cachesize = cachesize
+        self.templates = {}
+
+
+    def encode_packet(self, signal):
+        """Generates an XML packet from a BciSignal object.
+
+        :param signal: Signal
+        :type signal: BciSignal
+        :raises: An EncodingError is raised if the encoding failed.
+        """
+        if signal.type not in [CONTROL_SIGNAL, INTERACTION_SIGNAL, REPLY_SIGNAL]:
+            raise EncodingError("Unknown signal type: %s" % str(signal.type))
+        if not signal.commands:
+            shape, values = self.__get_shape(signal)
+            if shape is not None:
+                template = self.templates.get(shape)
+                if template is None:
+                    template = self.__compile_template(shape)
+                return template % values
+        try:
+            return self.__write_signal(signal)
+        except _UnsupportedValue:
+            return XmlEncoder.encode_packet(self, signal)
+
+
+    def __get_shape(self, signal):
+        """Return the shape of the signal and the values for the template.
+
+        If the signal cannot be written with a template (None, None) is
+        returned.
+        """
+        shape = [signal.type]
+        values = []
+        for name, value in signal.data.iteritems():
+            if type(name) not in (str, unicode):
+                return None, None
+            t = type(value)
+            if t in _TEMPLATE_SCALAR_TYPES:
+                shape.append((name, t))
+                if value is not None:
+                    values.append(value)
+            elif t is list or t is tuple:
+                types = tuple(map(type, value))
+                for t2 in types:
+                    if t2 not in _TEMPLATE_SCALAR_TYPES:
+                        return None, None
+                shape.append((name, t, types))
+                values.extend([v for v in value if v is not None])
+            else:
+                return None, None
+        return tuple(shape), tuple(values)
+
+
+    def __compile_template(self, shape):
+        """Compile the string template for the given signal shape."""
+        out = [u'<?xml version="1.0" encoding="utf-8"?><%s %s="%s"><%s' % (XML_ROOT, VERSION, CURRENT_VERSION, shape[0])]
+        if len(shape) == 1:
+            out.append(u"/>")
+        else:
+            out.append(u">")
+            for item in shape[1:]:
+                name = _escape(item[0]).replace(u"%", u"%%")
+                tag = _TAGS[item[1]]
+                if name:
+                    out.append(u'<%s %s="%s"' % (tag, NAME, name))
+                else:
+                    out.append(u"<" + tag)
+                if len(item) == 2:
+                    out.append(item[1] is NoneType and u"/>" or u' %s="%%s"/>' % VALUE)
+                elif item[2]:
+                    out.append(u">")
+                    for t in item[2]:
+                        if t is NoneType:
+                            out.append(u"<%s/>" % _TAGS[t])
+                        else:
+                            out.append(u'<%s %s="%%s"/>' % (_TAGS[t], VALUE))
+                    out.append(u"</%s>" % tag)
+                else:
+                    out.append(u"/>")
+            out.append(u"</%s>" % shape[0])
+        out.append(u"</%s>" % XML_ROOT)
+        template = u"".join(out).encode("utf-8")
+        if len(self.templates) >= self.cachesize:
+            self.templates.clear()
+        self.templates[shape] = template
+        return template
+
+
+    def __write_signal(self, signal):
+        """Write the signal into a string buffer and return the XML string."""
+        out = [u'<?xml version="1.0" encoding="utf-8"?><%s %s="%s"><%s' % (XML_ROOT, VERSION, CURRENT_VERSION, signal.type)]
+        if not (signal.commands or signal.data):
+            out.append(u"/>")
+        else:
+            out.append(u">")
+            # each element of the command list is a tuple (command, **kwargs)
+            for command, args in signal.commands:
+                out.append(u'<%s %s="%s"' % (COMMAND_TYPE[0], VALUE, _escape(unicode(str(command)))))
+                if args:
+                    out.append(u">")
+                    self.__write_element(None, args, out)
+                    out.append(u"</%s>" % COMMAND_TYPE[0])
+                else:
+                    out.append(u"/>")
+            for name, value in signal.data.iteritems():
+                self.__write_element(name, value, out)
+            out.append(u"</%s>" % signal.type)
+        out.append(u"</%s>" % XML_ROOT)
+        return u"".join(out).encode("utf-8")
+
+
+    def __get_tag(self, value):
+        tag = _TAGS.get(type(value))
+        if tag is None:
+            # subclasses of the supported types
+            tag = self._XmlEncoder__get_type(value)[0]
+        return tag
+
+
+    def __write_element(self, name, value, out):
+        tag = self.__get_tag(value)
+        if tag == UNSUPPORTED_TYPE[0]:
+            raise _UnsupportedValue()
+        if name:
+            out.append(u'<%s %s="%s"' % (tag, NAME, _escape(name)))
+        else:
+            out.append(u"<" + tag)
+        if tag in _SEQUENCE_TAGS:
+            if value:
+                out.append(u">")
+                for v in value:
+                    self.__write_element(None, v, out)
+                out.append(u"</%s>" % tag)
+            else:
+                out.append(u"/>")
+        elif tag == DICT_TYPE[0]:
+            # each key-value pair is stored as a tuple, pairs with unsupported
+            # values are skipped
+            items = [i for i in value.items() if self.__get_tag(i[1]) != UNSUPPORTED_TYPE[0]]
+            if items:
+                out.append(u">")
+                for i in items:
+                    self.__write_element(None, i, out)
+                out.append(u"</%s>" % tag)
+            else:
+                out.append(u"/>")
+        elif value is not None:
+            out.append(u' %s="%s"/>' % (VALUE, _escape(unicode(value))))
+        else:
+            out.append(u"/>")
+
+
+class _UnsupportedValue(Exception):
+    """Raised by CachedXmlEncoder if a value needs the DOM based encoder."""
+    pass
+
+
+def _escape(data):
+    """Escape data like minidom does for attribute values."""
+    if u"&" in data:
+        data = data.replace(u"&", u"&amp;")
+    if u"<" in data:
+        data = data.replace(u"<", u"&lt;")
+    if u'"' in data:
+        data = data.replace(u'"', u"&quot;")
+    if u">" in data:
+        data = data.replace(u">", u"&gt;")
+    return data
+
+
+NoneType = type(None)
+
+# python type -> tag used by XmlEncoder
+_TAGS = {bool : BOOLEAN_TYPE[0],
+         int : INTEGER_TYPE[0],
+         float : FLOAT_TYPE[0],
+         long : LONG_TYPE[0],
+         complex : COMPLEX_TYPE[0],
+         str : STRING_TYPE[0],
+         unicode : UNICODE_TYPE[0],
+         list : LIST_TYPE[0],
+         tuple : TUPLE_TYPE[0],
+         set : SET_TYPE[0],
+         frozenset : FROZENSET_TYPE[0],
+         dict : DICT_TYPE[0],
+         NoneType : NONE_TYPE[0]}
+_SEQUENCE_TAGS = (LIST_TYPE[0], TUPLE_TYPE[0], SET_TYPE[0], FROZENSET_TYPE[0])
+# types whose values can be put into a template without escaping
+_TEMPLATE_SCALAR_TYPES = (bool, int, float, long, complex, NoneType)
+
+
 class JsonDecoder(object):
     """Decode JSON strings into BciSignal objects."""
 
@@ -486,6 +1001,356 @@ class JsonEncoder(object):
         return json.dumps(signaldict)
 
 
+# Binary protocol.
+#
+# A packet consists of a header (magic, protocol version, signal type and
+# length of the body) followed by the body: the number of commands, each
+# command as (name, kwargs), the number of variables and each variable as
+# (name, value). Every value is prefixed with a one byte type code, all
+# numbers are little endian. Lists of floats or integers are stored as packed
+# arrays.
+BINARY_MAGIC = "PF"
+BINARY_VERSION = 1
+
+_BINARY_SIGNAL_TYPES = (CONTROL_SIGNAL, INTERACTION_SIGNAL, REPLY_SIGNAL)
+
+_HEADER = struct.Struct("<2sBBI")
+_COUNT = struct.Struct("<I")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_COMPLEX = struct.Struct("<dd")
+_ARRAY = struct.Struct("<cI")
+
+_NONE_CODE = "N"
+_TRUE_CODE = "T"
+_FALSE_CODE = "F"
+_INT_CODE = "i"
+_LONG_CODE = "l"
+_FLOAT_CODE = "f"
+_COMPLEX_CODE = "c"
+_STRING_CODE = "s"
+_UNICODE_CODE = "u"
+_LIST_CODE = "["
+_TUPLE_CODE = "("
+_SET_CODE = "{"
+_FROZENSET_CODE = "}"
+_DICT_CODE = "D"
+_ARRAY_CODE = "A"
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+class BinaryEncoder(object):
+    """Encode BciSignal objects into the compact binary format.
+
+    Lists which contain only floats or only integers are written as packed
+    arrays of 8 byte values. Subclasses of the supported types, like
+    ``numpy.float64``, are written as their base type, other objects with a
+    ``tolist`` method, like numpy scalars and arrays, as the result of
+    ``tolist``. Values of unsupported types are ignored.
+
+    Usage::
+
+        enc = BinaryEncoder()
+        try:
+            packet = enc.encode_packet(bcisignal)
+        except EncodingError:
+            ...
+
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("BinaryEncoder")
+
+
+    def encode_packet(self, signal):
+        """Encode a BciSignal object.
+
+        :param signal: Signal
+        :type signal: BciSignal
+        :returns: str
+        :raises: An EncodingError is raised if the encoding failed.
+
+        """
+        if signal.type not in _BINARY_SIGNAL_TYPES:
+            raise EncodingError("Unknown signal type: %s" % str(signal.type))
+        out = [_COUNT.pack(len(signal.commands))]
+        # each element of the command list is a tuple (command, **kwargs)
+        for command, args in signal.commands:
+            self.__write_value(str(command), out)
+            self.__write_value(args if args else dict(), out)
+        items = []
+        for name, value in signal.data.iteritems():
+            item = []
+            try:
+                self.__write_value(name, item)
+                self.__write_value(value, item)
+            except EncodingError, e:
+                # Ignore elements which are unkknown, just print a warning
+                self.logger.warning("Unable to write element (%s)" % str(e))
+            else:
+                items.append("".join(item))
+        out.append(_COUNT.pack(len(items)))
+        out.extend(items)
+        body = "".join(out)
+        return _HEADER.pack(BINARY_MAGIC, BINARY_VERSION,
+                            _BINARY_SIGNAL_TYPES.index(signal.type),
+                            len(body)) + body
+
+
+    def __write_value(self, value, out):
+        t = type(value)
+        if value is None:
+            out.append(_NONE_CODE)
+        elif t is bool:
+            out.append(_TRUE_CODE if value else _FALSE_CODE)
+        elif t is int:
+            out.append(_INT_CODE + _INT.pack(value))
+        elif t is long:
+            s = str(value)
+            out.append(_LONG_CODE + _COUNT.pack(len(s)) + s)
+        elif t is float:
+            out.append(_FLOAT_CODE + _FLOAT.pack(value))
+        elif t is complex:
+            out.append(_COMPLEX_CODE + _COMPLEX.pack(value.real, value.imag))
+        elif t is str:
+            out.append(_STRING_CODE + _COUNT.pack(len(value)) + value)
+        elif t is unicode:
+            s = value.encode("utf-8")
+            out.append(_UNICODE_CODE + _COUNT.pack(len(s)) + s)
+        elif t is list:
+            if not self.__write_array(value, out):
+                self.__write_sequence(_LIST_CODE, value, out)
+        elif t is tuple:
+            self.__write_sequence(_TUPLE_CODE, value, out)
+        elif t is set:
+            self.__write_sequence(_SET_CODE, value, out)
+        elif t is frozenset:
+            self.__write_sequence(_FROZENSET_CODE, value, out)
+        elif t is dict:
+            out.append(_DICT_CODE + _COUNT.pack(len(value)))
+            for i in value.iteritems():
+                self.__write_value(i[0], out)
+                self.__write_value(i[1], out)
+        else:
+            self.__write_other(value, out)
+
+
+    def __write_other(self, value, out):
+        """Write values whose type is not exactly one of the supported
+        types, checked in the order of :func:`XmlEncoder.__get_type`."""
+        if isinstance(value, bool):
+            self.__write_value(bool(value), out)
+        elif isinstance(value, int):
+            self.__write_value(int(value), out)
+        elif isinstance(value, float):
+            self.__write_value(float(value), out)
+        elif isinstance(value, long):
+            self.__write_value(long(value), out)
+        elif isinstance(value, complex):
+            self.__write_value(complex(value), out)
+        elif isinstance(value, str):
+            self.__write_value(str(value), out)
+        elif isinstance(value, unicode):
+            self.__write_value(unicode(value), out)
+        elif isinstance(value, list):
+            self.__write_value(list(value), out)
+        elif isinstance(value, tuple):
+            self.__write_value(tuple(value), out)
+        elif isinstance(value, set):
+            self.__write_value(set(value), out)
+        elif isinstance(value, frozenset):
+            self.__write_value(frozenset(value), out)
+        elif isinstance(value, dict):
+            self.__write_value(dict(value), out)
+        elif hasattr(value, "tolist"):
+            # numpy scalars and arrays
+            self.__write_value(value.tolist(), out)
+        else:
+            raise EncodingError("Unsupported type: %s" % str(type(value)))
+
+
+    def __write_sequence(self, code, value, out):
+        out.append(code + _COUNT.pack(len(value)))
+        for v in value:
+            self.__write_value(v, out)
+
+
+    def __write_array(self, value, out):
+        """Write a list of floats or integers as packed array.
+
+        :returns: False if the list cannot be written as array.
+        """
+        if not value:
+            return False
+        t = _array_type(value[0])
+        if t is None:
+            return False
+        exact = True
+        for v in value:
+            if type(v) is not t:
+                if _array_type(v) is not t:
+                    return False
+                exact = False
+        if not exact:
+            value = map(t, value)
+        out.append(_ARRAY.pack(_ARRAY_CODE, len(value)))
+        if t is float:
+            a = array.array("d", value)
+            if _BIG_ENDIAN:
+                a.byteswap()
+            out.append(_FLOAT_CODE + a.tostring())
+        else:
+            out.append(_INT_CODE + struct.pack("<%iq" % len(value), *value))
+        return True
+
+
+def _array_type(value):
+    """Return float or int if the value can be written into a packed array
+    of that type, None otherwise."""
+    t = type(value)
+    if t is float or t is int:
+        return t
+    if isinstance(value, (bool, long)) or not isinstance(value, numbers.Real):
+        return None
+    if isinstance(value, numbers.Integral):
+        return int if -2**63 <= value < 2**63 else None
+    return float
+
+
+class BinaryDecoder(object):
+    """Decode packets in the compact binary format into BciSignal objects.
+
+    Usage::
+
+        decoder = BinaryDecoder()
+        try:
+            bcisignal = decoder.decode_packet(packet)
+        except DecodingError:
+            ...
+
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("BinaryDecoder")
+
+
+    def decode_packet(self, packet):
+        """Decode the packet and return a BciSignal.
+
+        :param packet: Packet in binary format
+        :type packet: str
+        :returns: BciSignal
+        :raises: A DecodingError is raised when the decoding of the packet failed.
+
+        """
+        try:
+            magic, version, type, length = _HEADER.unpack_from(packet)
+        except struct.error:
+            raise DecodingError("Packet too short for a header (%i bytes)" % len(packet))
+        if magic != BINARY_MAGIC:
+            raise DecodingError("Not a binary packet (%s)" % repr(magic))
+        if version != BINARY_VERSION:
+            raise DecodingError("Unsupported binary protocol version: %i" % version)
+        if type >= len(_BINARY_SIGNAL_TYPES):
+            raise DecodingError("Unknown signal type: %i" % type)
+        if len(packet) - _HEADER.size != length:
+            raise DecodingError("Packet length does not match header (%i != %i)" % (len(packet) - _HEADER.size, length))
+        try:
+            offset = _HEADER.size
+            commands = []
+            n, = _COUNT.unpack_from(packet, offset)
+            offset += _COUNT.size
+            for i in xrange(n):
+                command, offset = self.__read_value(packet, offset)
+                args, offset = self.__read_value(packet, offset)
+                commands.append((command, args))
+            data = dict()
+            n, = _COUNT.unpack_from(packet, offset)
+            offset += _COUNT.size
+            for i in xrange(n):
+                name, offset = self.__read_value(packet, offset)
+                data[name], offset = self.__read_value(packet, offset)
+        except (struct.error, IndexError, ValueError, TypeError), e:
+            raise DecodingError("Malformed packet (%s)" % str(e))
+        if offset != len(packet):
+            raise DecodingError("Trailing data in packet")
+        return BciSignal(data, commands, _BINARY_SIGNAL_TYPES[type])
+
+
+    def __read_value(self, packet, offset):
+        """Read a value starting at offset.
+
+        :returns: tuple (value, new offset)
+        """
+        code = packet[offset]
+        offset += 1
+        if code == _FLOAT_CODE:
+            return _FLOAT.unpack_from(packet, offset)[0], offset + _FLOAT.size
+        elif code == _ARRAY_CODE:
+            n, = _COUNT.unpack_from(packet, offset)
+            offset += _COUNT.size
+            typecode = packet[offset]
+            offset += 1
+            end = offset + 8 * n
+            if end > len(packet):
+                raise ValueError("array exceeds packet")
+            if typecode == _INT_CODE:
+                return list(struct.unpack_from("<%iq" % n, packet, offset)), end
+            elif typecode != _FLOAT_CODE:
+                raise DecodingError("Unknown array type code: %s" % repr(typecode))
+            a = array.array("d")
+            a.fromstring(packet[offset:end])
+            if _BIG_ENDIAN:
+                a.byteswap()
+            return a.tolist(), end
+        elif code == _INT_CODE:
+            return int(_INT.unpack_from(packet, offset)[0]), offset + _INT.size
+        elif code == _STRING_CODE or code == _UNICODE_CODE or code == _LONG_CODE:
+            n, = _COUNT.unpack_from(packet, offset)
+            offset += _COUNT.size
+            if offset + n > len(packet):
+                raise ValueError("string exceeds packet")
+            s = packet[offset:offset+n]
+            if code == _UNICODE_CODE:
+                s = s.decode("utf-8")
+            elif code == _LONG_CODE:
+                s = long(s)
+            return s, offset + n
+        elif code == _NONE_CODE:
+            return None, offset
+        elif code == _TRUE_CODE:
+            return True, offset
+        elif code == _FALSE_CODE:
+            return False, offset
+        elif code == _COMPLEX_CODE:
+            real, imag = _COMPLEX.unpack_from(packet, offset)
+            return complex(real, imag), offset + _COMPLEX.size
+        elif code in _SEQUENCE_CODES:
+            n, = _COUNT.unpack_from(packet, offset)
+            offset += _COUNT.size
+            l = []
+            for i in xrange(n):
+                value, offset = self.__read_value(packet, offset)
+                l.append(value)
+            return _SEQUENCE_CODES[code](l), offset
+        elif code == _DICT_CODE:
+            n, = _COUNT.unpack_from(packet, offset)
+            offset += _COUNT.size
+            d = dict()
+            for i in xrange(n):
+                key, offset = self.__read_value(packet, offset)
+                d[key], offset = self.__read_value(packet, offset)
+            return d, offset
+        raise DecodingError("Unknown type code: %s" % repr(code))
+
+
+_SEQUENCE_CODES = {_LIST_CODE : list,
+                   _TUPLE_CODE : tuple,
+                   _SET_CODE : set,
+                   _FROZENSET_CODE : frozenset}
+
+
 class BciSignal(object):
     """Represents a signal from the BCI network.
 
@@ -0,0 +1,80 @@
+# clock.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Monotonic high resolution clock and precise waiting."""
+
+
+import ctypes
+import ctypes.util
+import sys
+import time
+
+
+def _monotonic_function():
+    """Return a function returning the time of a monotonic clock."""
+    if sys.platform == 'win32':
+        # high resolution performance counter
+        return time.clock
+    if not sys.platform.startswith('linux'):
+        return time.time
+
+    class timespec(ctypes.Structure):
+        _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+    try:
+        librt = ctypes.CDLL(ctypes.util.find_library('rt') or ctypes.util.find_library('c'))
+        clock_gettime = librt.clock_gettime
+    except (OSError, AttributeError):
+        return time.time
+    CLOCK_MONOTONIC = 1
+
+    def monotonic():
+        ts = timespec()
+        if clock_gettime(CLOCK_MONOTONIC, ctypes.byref(ts)) != 0:
+            return time.time()
+        return ts.tv_sec + ts.tv_nsec * 1e-9
+    return monotonic
+
+
+monotonic = _monotonic_function()
+"""Return the time of a monotonic clock in seconds, falls back to
+:func:`time.time` if the platform has none."""
+
+
+def sleep_until(deadline, spin=0.0005):
+    """Wait until the :func:`monotonic` clock reaches the deadline.
+
+    Sleeps until ``spin`` seconds before the deadline and busy-waits for the
+    rest, since sleeping is not precise enough for the last fraction of a
+    millisecond.
+
+    :param deadline: time of the :func:`monotonic` clock
+    :type deadline: float
+    :param spin: time in seconds to busy-wait at most
+    :type spin: float
+    :returns: the time of the :func:`monotonic` clock after waiting
+
+    """
+    now = monotonic()
+    remaining = deadline - now
+    if remaining > spin:
+        time.sleep(remaining - spin)
+        now = monotonic()
+    while now < deadline:
+        now = monotonic()
+    return now
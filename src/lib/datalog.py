@@ -0,0 +1,322 @@
+# datalog.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Asynchronous CSV logs of session data.
+
+:func:`DataLog.write` appends a record (a row of values) to a buffer, it
+neither formats the values nor makes a system call, so Feedbacks can log
+from the presentation loop. A thread writes the buffered records every
+``flush_interval`` seconds as one chunk of CSV lines and flushes the file.
+
+The files are numbered: a log with the prefix ``fb`` in ``directory`` writes
+``fb1.csv``, or ``fb2.csv`` if ``fb1.csv`` exists, and so on, like the logs
+the Feedbacks used to write themselves. If ``max_bytes`` is given, the log
+continues in the next free file once a file gets larger. Files are only
+appended to and never overwritten, and only created for records, so a log
+without records leaves no file.
+
+The values are written with the csv module, so strings may contain commas.
+Floats are formatted with ``str`` like in the old logs, not with ``repr``.
+:func:`read` returns the records of a file with ints and floats converted
+back, :func:`latest` the last file of a log::
+
+    log = DataLog("/data/today/classifier", "fb")
+    log.start()
+    log.write(trial, target, score)
+    ...
+    log.close()
+
+    for trial, target, score in read(latest("/data/today/classifier", "fb")):
+        ...
+
+``Feedback.data_log`` creates logs which are flushed when the Feedback is
+stopped and closed when it quits.
+
+"""
+
+
+import csv
+import errno
+import logging
+import os
+import re
+import threading
+from collections import deque
+
+
+class DataLog(object):
+    """Writes records to numbered CSV files in a thread."""
+
+    def __init__(self, directory, prefix, suffix='.csv', flush_interval=1.0, max_bytes=None, header=None):
+        """Initialize the log, the file is created with the first flush.
+
+        :param directory: directory of the files, created if necessary
+        :type directory: str
+        :param prefix: file name before the number
+        :type prefix: str
+        :param suffix: file name after the number
+        :type suffix: str
+        :param flush_interval: time in seconds between two flushes, if 0
+            every record is written right away
+        :type flush_interval: float
+        :param max_bytes: size in bytes after which the log continues in a
+            new file, ``None`` for one file
+        :type max_bytes: int
+        :param header: names of the values, written as the first line of
+            every file, ``None`` for no header
+        :type header: sequence of str
+
+        """
+        self.logger = logging.getLogger("DataLog")
+        self.directory = directory
+        self.prefix = prefix
+        self.suffix = suffix
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.header = header
+        self.filenames = []
+        """The files written so far, the current one last."""
+        # deque.append and deque.popleft are atomic, writers need no lock
+        self._buffer = deque()
+        self._flushLock = threading.Lock()
+        self._file = None
+        self._writer = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._closed = False
+        self._statistics = {'records' : 0, 'chunks' : 0, 'files' : 0, 'errors' : 0}
+
+
+    def start(self):
+        """Start the thread writing the buffer."""
+        if self.flush_interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._flush_loop, name="DataLog")
+            self._thread.setDaemon(True)
+            self._thread.start()
+
+
+    def write(self, *values):
+        """Add a record to the buffer. May be called from any thread.
+
+        :param values: the values of the record, numbers and strings
+
+        """
+        self._buffer.append(values)
+        if self.flush_interval <= 0:
+            self.flush()
+
+
+    def write_rows(self, rows):
+        """Add several records to the buffer.
+
+        :param rows: the records
+        :type rows: iterable of sequences
+
+        """
+        self._buffer.extend(tuple(row) for row in rows)
+        if self.flush_interval <= 0:
+            self.flush()
+
+
+    def flush(self):
+        """Write all records in the buffer to the file."""
+        self._flushLock.acquire()
+        try:
+            if self._closed:
+                return
+            if self._file is None:
+                if not self._buffer:
+                    return
+                self._open()
+            rows = []
+            while self._buffer:
+                rows.append(_format(self._buffer.popleft()))
+            if rows:
+                self._writer.writerows(rows)
+                self._statistics['records'] += len(rows)
+                self._statistics['chunks'] += 1
+            self._file.flush()
+            if self.max_bytes is not None and self._file.tell() >= self.max_bytes:
+                # the next file is opened with the next records
+                self._file.close()
+                self._file = None
+                self._writer = None
+        finally:
+            self._flushLock.release()
+
+
+    def close(self, wait=True):
+        """Write the remaining records and close the file.
+
+        :param wait: wait until the file is closed, otherwise the thread
+            closes it
+        :type wait: bool
+
+        """
+        self._stopped.set()
+        if self._thread is None:
+            self._close()
+        elif wait:
+            self._thread.join()
+            self._thread = None
+
+
+    def get_filename(self):
+        """Return the name of the current file, ``None`` before the first
+        flush."""
+        return self.filenames[-1] if self.filenames else None
+
+
+    def get_statistics(self):
+        """Return the number of ``records``, ``chunks`` and ``files``
+        written and the number of failed flushes (``errors``).
+
+        :returns: dict
+
+        """
+        return self._statistics.copy()
+
+
+    def _open(self):
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError, e:
+                if e.errno != errno.EEXIST:
+                    raise
+        number = _last_number(self.directory, self.prefix, self.suffix) + 1
+        # claim the number, another log may have taken it meanwhile
+        while True:
+            filename = os.path.join(self.directory, "%s%i%s" % (self.prefix, number, self.suffix))
+            try:
+                fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+                break
+            except OSError, e:
+                if e.errno != errno.EEXIST:
+                    raise
+                number += 1
+        self._file = os.fdopen(fd, 'wb')
+        self._writer = csv.writer(self._file, lineterminator='\n')
+        if self.header is not None:
+            self._writer.writerow(self.header)
+        self.filenames.append(filename)
+        self._statistics['files'] += 1
+        self.logger.debug("Writing %s." % filename)
+
+
+    def _close(self):
+        try:
+            self.flush()
+        finally:
+            self._flushLock.acquire()
+            try:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._closed = True
+            finally:
+                self._flushLock.release()
+
+
+    def _flush_loop(self):
+        while not self._stopped.isSet():
+            self._stopped.wait(self.flush_interval)
+            try:
+                self.flush()
+            except:
+                self._statistics['errors'] += 1
+                self.logger.exception("Writing the data log failed:")
+        try:
+            self._close()
+        except:
+            self._statistics['errors'] += 1
+            self.logger.exception("Closing the data log failed:")
+
+
+def _format(row):
+    """Return the values of a record with the floats formatted by ``str``,
+    the csv module formats them with ``repr``."""
+    return [str(value) if isinstance(value, float) else value for value in row]
+
+
+def _last_number(directory, prefix, suffix):
+    """Return the highest number of the files of a log, 0 if there are
+    none."""
+    pattern = re.compile(re.escape(prefix) + r"(\d+)" + re.escape(suffix) + "$")
+    last = 0
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            last = max(last, int(match.group(1)))
+    return last
+
+
+def latest(directory, prefix, suffix='.csv'):
+    """Return the file of a log with the highest number.
+
+    :param directory: directory of the files
+    :type directory: str
+    :param prefix: file name before the number
+    :type prefix: str
+    :param suffix: file name after the number
+    :type suffix: str
+    :returns: the file name, ``None`` if there is no file
+
+    """
+    number = _last_number(directory, prefix, suffix)
+    if number == 0:
+        return None
+    return os.path.join(directory, "%s%i%s" % (prefix, number, suffix))
+
+
+def read(filename, header=False):
+    """Return the records of a file.
+
+    Values which look like ints or floats are converted, the others are
+    returned as strings.
+
+    :param filename: the file
+    :type filename: str
+    :param header: whether the first line is a header, which is skipped
+    :type header: bool
+    :returns: list of lists
+
+    """
+    f = open(filename, 'rb')
+    try:
+        reader = csv.reader(f)
+        if header:
+            next(reader, None)
+        return [[_convert(value) for value in row] for row in reader]
+    finally:
+        f.close()
+
+
+def _convert(value):
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
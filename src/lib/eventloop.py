@@ -0,0 +1,361 @@
+# eventloop.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Event loop for the asyncore based channels of Pyff.
+
+:func:`asyncore.loop` calls ``select`` with a fixed timeout, has no timers and
+cannot be woken up from another thread. :class:`EventLoop` services the same
+asyncore dispatchers, but
+
+* uses ``epoll`` or ``poll`` if available, so the cost of an iteration does
+  not grow with the number of idle connections,
+* sleeps until the next event or timer, see :func:`EventLoop.call_later`,
+* can be woken up immediately from other threads, see
+  :func:`EventLoop.call_soon_threadsafe` and :func:`EventLoop.stop`.
+
+Usage::
+
+    loop = EventLoop()
+    loop.call_later(1.0, logging.info, "one second later")
+    loop.run()
+
+"""
+
+
+import asyncore
+import errno
+import heapq
+import itertools
+import logging
+import select
+import socket
+import threading
+import time
+from collections import deque
+
+
+POLLERS = ("epoll", "poll", "select")
+"""Available poller names, best first."""
+
+# poll event masks (not defined by the select module on Windows), epoll uses
+# the same values
+_READ = 0x001 | 0x002            # POLLIN | POLLPRI
+_WRITE = 0x004                   # POLLOUT
+_ERROR = 0x008 | 0x010 | 0x020   # POLLERR | POLLHUP | POLLNVAL
+
+
+def best_poller():
+    """Return the name of the best poller available on this platform."""
+    for name in POLLERS:
+        if hasattr(select, name):
+            return name
+
+
+def _wakeup_pair():
+    """Return a pair of connected sockets used to wake up the loop."""
+    if hasattr(socket, "socketpair"):
+        return socket.socketpair()
+    # Windows
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    writer = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    writer.connect(server.getsockname())
+    reader, addr = server.accept()
+    server.close()
+    return reader, writer
+
+
+class Timer(object):
+    """Handle of a callback scheduled with :func:`EventLoop.call_later`."""
+
+    def __init__(self, when, callback, args):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """Do not run the callback."""
+        self.cancelled = True
+
+
+class EventLoop(object):
+    """Event loop for asyncore dispatchers.
+
+    Runs until :func:`stop` is called or no dispatchers are left, just like
+    :func:`asyncore.loop`.
+
+    """
+
+    def __init__(self, map=None, poller=None, timeout=30.0):
+        """Initialize the event loop.
+
+        :param map: asyncore socket map, defaults to ``asyncore.socket_map``
+        :type map: dict
+        :param poller: one of :data:`POLLERS`, defaults to the best available
+        :type poller: str
+        :param timeout: maximum time in seconds to wait for events, so
+            dispatchers which became readable or writable in another thread
+            are not missed forever
+        :type timeout: float
+
+        """
+        self.logger = logging.getLogger("EventLoop")
+        self.map = asyncore.socket_map if map is None else map
+        self.poller = poller or best_poller()
+        if self.poller not in POLLERS or not hasattr(select, self.poller):
+            raise ValueError("Poller %s not available." % self.poller)
+        self.timeout = timeout
+        self.running = False
+        self._timers = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._callbacks = deque()
+        self._wakeupReader, self._wakeupWriter = _wakeup_pair()
+        self._wakeupReader.setblocking(False)
+        self._wakeupWriter.setblocking(False)
+        # fd -> (dispatcher, event mask) as registered at the poll object
+        self._registered = dict()
+        self._pollobj = None
+        if self.poller == "epoll":
+            self._pollobj = select.epoll()
+        elif self.poller == "poll":
+            self._pollobj = select.poll()
+        if self._pollobj:
+            self._pollobj.register(self._wakeupReader.fileno(), _READ)
+
+
+    def call_later(self, delay, callback, *args):
+        """Run ``callback(*args)`` in the loop after ``delay`` seconds.
+
+        :returns: :class:`Timer`
+
+        """
+        timer = Timer(time.time() + delay, callback, args)
+        self._lock.acquire()
+        try:
+            heapq.heappush(self._timers, (timer.when, self._counter.next(), timer))
+        finally:
+            self._lock.release()
+        self.wakeup()
+        return timer
+
+
+    def call_soon_threadsafe(self, callback, *args):
+        """Run ``callback(*args)`` in the loop as soon as possible.
+
+        May be called from any thread.
+
+        """
+        self._callbacks.append((callback, args))
+        self.wakeup()
+
+
+    def wakeup(self):
+        """Interrupt the loop if it is waiting for events."""
+        try:
+            self._wakeupWriter.send("x")
+        except socket.error:
+            # the buffer is full, the loop will wake up anyway
+            pass
+
+
+    def stop(self):
+        """Stop the loop. May be called from any thread."""
+        self.running = False
+        self.wakeup()
+
+
+    def close(self):
+        """Release the resources of the loop."""
+        if self._pollobj and self.poller == "epoll":
+            self._pollobj.close()
+        self._wakeupReader.close()
+        self._wakeupWriter.close()
+
+
+    def run(self):
+        """Run the loop until :func:`stop` is called or the socket map is
+        empty.
+        """
+        self.running = True
+        while self.running and self.map:
+            self._run_once()
+
+
+    def _run_once(self):
+        """Wait for events and handle them, then run due timers and
+        callbacks."""
+        timeout = self.timeout
+        if self._callbacks:
+            timeout = 0
+        elif self._timers:
+            timeout = max(0, min(timeout, self._timers[0][0] - time.time()))
+        try:
+            if self._pollobj:
+                self._poll(timeout)
+            else:
+                self._select(timeout)
+        except (select.error, IOError, OSError), e:
+            if e.args[0] != errno.EINTR:
+                raise
+        self._run_timers()
+        while self._callbacks:
+            callback, args = self._callbacks.popleft()
+            self._run(callback, args)
+
+
+    def _poll(self, timeout):
+        """Wait for events using epoll or poll."""
+        self._update_registrations()
+        if self.poller == "epoll":
+            events = self._pollobj.poll(timeout)
+        else:
+            events = self._pollobj.poll(timeout * 1000)
+        wakeup = self._wakeupReader.fileno()
+        for fd, flags in events:
+            if fd == wakeup:
+                self._drain_wakeup()
+                continue
+            obj = self.map.get(fd)
+            if obj is not None:
+                asyncore.readwrite(obj, flags)
+
+
+    def _update_registrations(self):
+        """Register the dispatchers' current interest at the poll object."""
+        registered = self._registered
+        seen = 0
+        for fd, obj in self.map.items():
+            flags = 0
+            if obj.readable():
+                flags = _READ
+            # accepting sockets should not be writable
+            if obj.writable() and not obj.accepting:
+                flags |= _WRITE
+            old = registered.get(fd)
+            if old is not None:
+                if old[0] is obj and old[1] == flags:
+                    seen += 1
+                    continue
+                if not flags:
+                    self._unregister(fd)
+                    continue
+                seen += 1
+            if flags:
+                self._register(fd, obj, flags)
+        if seen < len(registered):
+            # dispatchers were removed from the map
+            for fd in registered.keys():
+                if fd not in self.map:
+                    self._unregister(fd)
+
+
+    def _register(self, fd, obj, flags):
+        mask = flags | _ERROR
+        try:
+            try:
+                if fd in self._registered:
+                    self._pollobj.modify(fd, mask)
+                else:
+                    self._pollobj.register(fd, mask)
+            except (IOError, OSError), e:
+                if e.args[0] == errno.ENOENT:
+                    # the fd was closed and reused, epoll forgot about it
+                    self._pollobj.register(fd, mask)
+                elif e.args[0] == errno.EEXIST:
+                    self._pollobj.modify(fd, mask)
+                else:
+                    raise
+        except (IOError, OSError):
+            # closed by another thread, it will disappear from the map
+            self._registered.pop(fd, None)
+            return
+        self._registered[fd] = (obj, flags)
+
+
+    def _unregister(self, fd):
+        del self._registered[fd]
+        try:
+            self._pollobj.unregister(fd)
+        except (IOError, OSError, KeyError, ValueError):
+            # already closed
+            pass
+
+
+    def _select(self, timeout):
+        """Wait for events using select."""
+        r, w, e = [self._wakeupReader.fileno()], [], []
+        for fd, obj in self.map.items():
+            is_r = obj.readable()
+            is_w = obj.writable()
+            if is_r:
+                r.append(fd)
+            # accepting sockets should not be writable
+            if is_w and not obj.accepting:
+                w.append(fd)
+            if is_r or is_w:
+                e.append(fd)
+        r, w, e = select.select(r, w, e, timeout)
+        for fd in r:
+            if fd == self._wakeupReader.fileno():
+                self._drain_wakeup()
+                continue
+            obj = self.map.get(fd)
+            if obj is not None:
+                asyncore.read(obj)
+        for fd in w:
+            obj = self.map.get(fd)
+            if obj is not None:
+                asyncore.write(obj)
+        for fd in e:
+            obj = self.map.get(fd)
+            if obj is not None:
+                asyncore._exception(obj)
+
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeupReader.recv(4096):
+                pass
+        except socket.error:
+            pass
+
+
+    def _run_timers(self):
+        now = time.time()
+        due = []
+        self._lock.acquire()
+        try:
+            while self._timers and self._timers[0][0] <= now:
+                due.append(heapq.heappop(self._timers)[2])
+        finally:
+            self._lock.release()
+        for timer in due:
+            if not timer.cancelled:
+                self._run(timer.callback, timer.args)
+
+
+    def _run(self, callback, args):
+        try:
+            callback(*args)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except:
+            self.logger.exception("Callback %r raised an exception:" % callback)
@@ -20,12 +20,14 @@ import socket
 import logging
 import sys
 import asyncore
+import time
 
 from lib import bcinetwork
 from lib import bcixml
 from FeedbackBase.Feedback import Feedback
 from lib.feedbackprocesscontroller import FeedbackProcessController
 import ipc
+from eventloop import EventLoop
 
 
 class FeedbackController(object):
@@ -35,9 +37,15 @@ class FeedbackController(object):
     Feedbacks. Can query the Feedback for it's variables and can as well set
     them.
     """
-    def __init__(self, fbpath=None, port=None, protocol='bcixml'):
+    def __init__(self, fbpath=None, port=None, protocol='bcixml', ringbuffer_slots=0,
+                 control_delivery='all', poolsize=0, plugin_index=None,
+                 plugin_rescan=0, eventloop=None):
         # Setup my stuff:
         self.logger = logging.getLogger("FeedbackController")
+        # None means asyncore.loop
+        self.eventloop = None
+        if eventloop != 'asyncore':
+            self.eventloop = EventLoop(poller=eventloop)
         # Set up the socket
         self.ipcchannel = ipc.IPCConnectionHandler(self)
         self.udpconnectionhandler = UDPDispatcher(self, protocol)
@@ -46,21 +54,30 @@ class FeedbackController(object):
         fbdirs = ["Feedbacks"]
         if fbpath:
             fbdirs.extend(fbpath)
-        self.fbProcCtrl = FeedbackProcessController(fbdirs, Feedback, 1)
+        self.fbProcCtrl = FeedbackProcessController(fbdirs, Feedback, 1, ringbuffer_slots,
+                                                    control_delivery, poolsize,
+                                                    plugin_index)
+        if plugin_rescan > 0:
+            self.fbProcCtrl.pluginController.watch(plugin_rescan)
         self.fc_data = {}
 
 
     def start(self):
         """Start the Feedback Controller's activities."""
         self.logger.debug("Started mainloop.")
-        ipc.ipcloop()
+        if self.eventloop:
+            self.eventloop.run()
+        else:
+            ipc.ipcloop('asyncore')
         self.logger.debug("Left mainloop.")
 
 
     def stop(self):
         """Stop the Feedback Controller's activities."""
-        self.fbProcCtrl.stop_feedback()
+        self.fbProcCtrl.close()
         asyncore.close_all()
+        if self.eventloop:
+            self.eventloop.stop()
 
 
     def handle_signal(self, signal):
@@ -86,7 +103,11 @@ class FeedbackController(object):
 
     def _handle_cs(self, signal):
         """Handle Control Signal."""
-        # We don't care about control signals, send it to the feedback
+        # We don't care about control signals, send it to the feedback. Use
+        # the shared memory ring buffer if possible.
+        ringbuffer = self.fbProcCtrl.ringbuffer
+        if ringbuffer is not None and ringbuffer.write_signal(signal.data):
+            return
         self.send_to_feedback(signal)
 
 
@@ -151,13 +172,16 @@ class UDPDispatcher(asyncore.dispatcher):
         if protocol == 'json':
             self.decoder = bcixml.JsonDecoder()
             self.encoder = bcixml.JsonEncoder()
+        elif protocol == 'binary':
+            self.decoder = bcixml.BinaryDecoder()
+            self.encoder = bcixml.BinaryEncoder()
         elif protocol == 'tobixml':
             # tobi and bcixml share the same encoder
             self.decoder = bcixml.TobiXmlDecoder()
-            self.encoder = bcixml.XmlEncoder()
+            self.encoder = bcixml.CachedXmlEncoder()
         else:
-            self.decoder = bcixml.XmlDecoder()
-            self.encoder = bcixml.XmlEncoder()
+            self.decoder = bcixml.StreamingXmlDecoder()
+            self.encoder = bcixml.CachedXmlEncoder()
         self.create_socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.bind((bcinetwork.LOCALHOST, bcinetwork.FC_PORT))
 
@@ -181,6 +205,7 @@ class UDPDispatcher(asyncore.dispatcher):
             data, address = self.recvfrom(bcinetwork.BUFFER_SIZE)
             signal = self.decoder.decode_packet(data)
             signal.peeraddr = address
+            signal.timestamp = time.time()
             self.fc.handle_signal(signal)
         except:
             self.fc.logger.exception("Handling incoming signal caused an exception:")
@@ -19,22 +19,58 @@
 from threading import Thread
 import logging
 import asyncore
-from multiprocessing import Process, Event
+import os
+import time
+from multiprocessing import Process, Event, Pipe
 
 from lib.PluginController import PluginController
 import lib.PluginController
+from lib.RollbackImporter import RollbackImporter
+from lib.eventloop import EventLoop
+from lib.ringbuffer import ControlSignalRingBuffer
 import ipc
 
 
+PRELOAD_MODULES = ["FeedbackBase.Feedback",
+                   "FeedbackBase.MainloopFeedback",
+                   "FeedbackBase.EventDrivenFeedback",
+                   "FeedbackBase.PygameFeedback",
+                   "FeedbackBase.VisionEggFeedback",
+                   "numpy",
+                   "pygame"]
+"""Modules imported by the warm processes of the FeedbackProcessPool."""
+
+
+def preload_modules(modules):
+    """Import the modules, ignoring the ones which cannot be imported.
+
+    :param modules: module names
+    :type modules: list
+    :returns: list of the modules which could be imported
+
+    """
+    loaded = []
+    for modname in modules:
+        try:
+            __import__(modname)
+            loaded.append(modname)
+        except:
+            logging.getLogger("FeedbackProcessPool").debug("Could not preload %s." % modname)
+    return loaded
+
+
 class FeedbackProcess(Process):
     """Process that wrapps the Feedback's activities."""
 
-    def __init__(self, modname, classname, ipcReady, port):
+    def __init__(self, modname, classname, ipcReady, port, ringbuffer=None,
+                 control_delivery='all'):
         Process.__init__(self)
         self.classname = classname
         self.modname = modname
         self.ipcReady = ipcReady
         self.port = port
+        self.ringbuffer = ringbuffer
+        self.control_delivery = control_delivery
         self.loglevel = logging.getLogger().level
         self.fbloglevel = logging.getLogger("FB").level
         self.logformat = logging.getLogger().handlers[0].formatter._fmt
@@ -44,6 +80,9 @@ class FeedbackProcess(Process):
         """Run the FeedbackProcess' activities in the new process."""
         # We're in a new process
         reload(lib.PluginController)
+        # Only used to measure the import times, the modules stay loaded
+        importer = RollbackImporter(lib.PluginController.SHARED_MODULES)
+        starttime = time.time()
         try:
             fbClass = lib.PluginController.import_module_and_get_class(self.modname, self.classname)
         except:
@@ -51,10 +90,15 @@ class FeedbackProcess(Process):
             logging.exception("Loading the module/class failed, this might help to track down the problem:")
             self.ipcReady.set()
             return
+        finally:
+            importer.uninstall(rollback=False)
         # Re-initialize logger for this process
         logging.basicConfig(level=self.loglevel, format=self.logformat)
         logging.getLogger("FB").setLevel(self.fbloglevel)
+        self.log_import_times(importer, time.time() - starttime)
         feedback = fbClass(port_num=self.port)
+        # Set before on_init, so the Feedback can still choose its own policy
+        feedback._control_delivery = self.control_delivery
         feedback.logger.debug("Initialized Feedback.")
 
         # Start the Feedbacks IPC Channel
@@ -62,8 +106,12 @@ class FeedbackProcess(Process):
         conn = ipc.get_feedbackcontroller_connection()
         ipc.FeedbackIPCChannel(conn, feedback)
         feedback.logger.debug("Starting IPC loop.")
-        fbipcthread = Thread(target=ipc.ipcloop)
+        loop = EventLoop()
+        fbipcthread = Thread(target=loop.run)
         fbipcthread.start()
+        if self.ringbuffer:
+            feedback.logger.debug("Attaching control signal ring buffer.")
+            feedback._attach_control_ringbuffer(ControlSignalRingBuffer(self.ringbuffer))
         self.ipcReady.set()
         # Start the Feedbacks Mainloop
         try:
@@ -72,22 +120,167 @@ class FeedbackProcess(Process):
         finally:
             feedback.logger.debug("Closing IPC socket.")
             conn.close()
+            loop.stop()
+
+
+    def log_import_times(self, importer, elapsed):
+        """Log how long importing the Feedback took and which modules were
+        the most expensive ones.
+        """
+        logger = logging.getLogger("FeedbackProcess")
+        logger.info("Imported %s in %.3fs." % (self.classname, elapsed))
+        for modname, seconds in importer.report(10):
+            logger.debug("  %-40s %.3fs" % (modname, seconds))
+            if "." not in modname and importer.is_shared(modname):
+                logger.info("Shared module %s was not preloaded, importing it took %.3fs." % (modname, seconds))
+
+
+class WarmFeedbackProcess(FeedbackProcess):
+    """Feedback process which is started before it knows its Feedback.
+
+    The process imports the preload modules and waits until
+    :func:`start_feedback` tells it which Feedback to run. Then it continues
+    like a :class:`FeedbackProcess`, but only has to import the Feedback's
+    own module.
+
+    """
+
+    def __init__(self, preload=PRELOAD_MODULES):
+        FeedbackProcess.__init__(self, None, None, Event(), None)
+        self.preload = preload
+        self.parent_pid = os.getpid()
+        self._jobReader, self._jobWriter = Pipe(False)
+
+
+    def run(self):
+        """Preload the modules and wait for a Feedback to run."""
+        preload_modules(self.preload)
+        while not self._jobReader.poll(1):
+            # Don't stay around if the Feedback Controller died
+            if os.getppid() != self.parent_pid:
+                return
+        job = self._jobReader.recv()
+        if job is None:
+            return
+        (self.modname, self.classname, self.port, self.ringbuffer,
+         self.control_delivery) = job
+        FeedbackProcess.run(self)
+
+
+    def start_feedback(self, modname, classname, port, ringbuffer=None,
+                       control_delivery='all'):
+        """Run the given Feedback in this process.
+
+        Wait on ``ipcReady`` until the Feedback is ready.
+
+        """
+        self.modname = modname
+        self.classname = classname
+        job = (modname, classname, port, ringbuffer, control_delivery)
+        self._jobWriter.send(job)
+
+
+    def shutdown(self):
+        """Let an idle process exit."""
+        try:
+            self._jobWriter.send(None)
+        except:
+            pass
+
+
+class FeedbackProcessPool(object):
+    """Pool of warm processes for starting Feedbacks quickly.
+
+    Spawning a process and importing the Feedback base classes and their
+    dependencies (pygame, numpy, ...) takes a considerable amount of time.
+    The pool keeps ``size`` processes around which did that already.
+
+    """
+
+    def __init__(self, size, preload=PRELOAD_MODULES):
+        """Create the pool and start the processes.
+
+        :param size: number of warm processes
+        :type size: int
+        :param preload: modules to import in the warm processes
+        :type preload: list
+
+        """
+        self.logger = logging.getLogger("FeedbackProcessPool")
+        self.size = size
+        self.preload = preload
+        self.processes = []
+        self.fill()
+
+
+    def fill(self):
+        """Start new processes until the pool is full again."""
+        self.processes = [p for p in self.processes if p.is_alive()]
+        while len(self.processes) < self.size:
+            proc = WarmFeedbackProcess(self.preload)
+            proc.start()
+            self.processes.append(proc)
+        self.logger.debug("%i warm processes available." % len(self.processes))
+
+
+    def get(self):
+        """Return a warm process and remove it from the pool.
+
+        :returns: WarmFeedbackProcess or None if the pool is empty
+
+        """
+        while self.processes:
+            proc = self.processes.pop(0)
+            if proc.is_alive():
+                return proc
+        return None
+
+
+    def close(self, timeout=1):
+        """Stop all processes of the pool."""
+        for proc in self.processes:
+            proc.shutdown()
+        for proc in self.processes:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+        self.processes = []
 
 
 class FeedbackProcessController(object):
     """Takes care of starting and stopping of Feedback Processes."""
 
-    def __init__(self, plugindirs, baseclass, timeout):
-        """Initialize the Feedback Process Controller."""
+    def __init__(self, plugindirs, baseclass, timeout, ringbuffer_slots=0,
+                 control_delivery='all', poolsize=0, plugin_index=None):
+        """Initialize the Feedback Process Controller.
+
+        :param ringbuffer_slots: if > 0, control signals are passed to the
+            Feedbacks via a shared memory ring buffer with as many slots.
+        :param control_delivery: delivery policy for control signals, one of
+            ``'all'``, ``'latest'`` and ``'batch'``.
+        :param poolsize: if > 0, Feedbacks are started in warm processes of a
+            :class:`FeedbackProcessPool` with as many processes.
+        :param plugin_index: file to store the plugin index in, see
+            :class:`lib.PluginController.PluginController`.
+
+        """
         # Where are we:
         # Proc/Thread: FB/??
         self.logger = logging.getLogger("FeedbackProcessController")
         self.currentProc = None
         self.timeout = timeout
-        self.pluginController = PluginController(plugindirs, baseclass)
+        self.ringbuffer_slots = ringbuffer_slots
+        self.ringbuffer = None
+        self.control_delivery = control_delivery
+        self.pluginController = PluginController(plugindirs, baseclass, plugin_index)
 
         self.pluginController.find_plugins()
         self.pluginController.unload_plugin()
+        # (name, warm, seconds) for every started Feedback
+        self.start_times = []
+        self.pool = None
+        if poolsize > 0:
+            self.pool = FeedbackProcessPool(poolsize)
 
 
     def start_feedback(self, name, port):
@@ -102,14 +295,34 @@ class FeedbackProcessController(object):
         if self.currentProc:
             self.logger.warning("Trying to start feedback but another one is still running. Killing the old one now and proceed.")
             self.stop_feedback()
-        ipcReady = Event()
-        self.currentProc = FeedbackProcess(self.pluginController.availablePlugins[name], name, ipcReady, port)
-        self.currentProc.start()
+        if name not in self.pluginController.availablePlugins:
+            self.logger.error("Unknown Feedback %s, not starting it." % name)
+            return
+        if name in self.pluginController.invalidPlugins:
+            self.logger.warning("Feedback %s will probably fail to load: %s" % (name, self.pluginController.invalidPlugins[name]))
+        starttime = time.time()
+        filename = None
+        if self.ringbuffer_slots > 0:
+            self.ringbuffer = ControlSignalRingBuffer.create(self.ringbuffer_slots)
+            filename = self.ringbuffer.filename
+        modname = self.pluginController.availablePlugins[name]
+        proc = self.pool.get() if self.pool else None
+        warm = proc is not None
+        if warm:
+            self.logger.debug("Using warm process.")
+            proc.start_feedback(modname, name, port, filename, self.control_delivery)
+        else:
+            proc = FeedbackProcess(modname, name, Event(), port, filename, self.control_delivery)
+            proc.start()
+        self.currentProc = proc
         # Wait until the network from the Process is ready, this is necessary
         # since spawning a new process under Windows is very slow.
         self.logger.debug("Waiting for IPC channel to become ready...")
-        ipcReady.wait()
+        proc.ipcReady.wait()
         self.logger.debug("IPC channel ready.")
+        elapsed = time.time() - starttime
+        self.start_times.append((name, warm, elapsed))
+        self.logger.info("Started %s in %.3fs (%s start)." % (name, elapsed, "warm" if warm else "cold"))
         self.logger.debug("Done starting process.")
 
 
@@ -134,9 +347,26 @@ class FeedbackProcessController(object):
 
         del(self.currentProc)
         self.currentProc = None
+        if self.ringbuffer:
+            self.ringbuffer.remove()
+            self.ringbuffer = None
+        # Replace the used process while no Feedback is running
+        if self.pool:
+            self.pool.fill()
         self.logger.debug("Done stopping process.")
 
 
+    def close(self):
+        """Stop the current Feedback, the warm processes and the plugin
+        directory watcher.
+        """
+        self.stop_feedback()
+        self.pluginController.stop_watching()
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+
+
     def get_feedbacks(self):
         """Return a list of available Feedbacks.
 
@@ -0,0 +1,178 @@
+# frametiming.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Per-frame timing of a main loop.
+
+:class:`FrameTiming` records the start time of every frame and the duration
+of its phases into fixed size ring buffers backed by :mod:`array`, so
+recording allocates no memory per frame. If the target frame rate is known,
+frames which took longer than one and a half frame durations are counted as
+dropped.
+
+Usage::
+
+    timing = FrameTiming(("events", "draw"), fps=60)
+    while running:
+        timing.begin()
+        process_events()
+        timing.mark("events")
+        draw()
+        timing.mark("draw")
+    print timing.summary()
+    timing.export("timing.csv")
+
+"""
+
+
+import array
+
+from lib.clock import monotonic
+
+
+class FrameTiming(object):
+    """Ring buffer of frame timings."""
+
+    def __init__(self, phases, size=3600, fps=None):
+        """Initialize the ring buffers.
+
+        :param phases: names of the phases of a frame
+        :type phases: sequence of str
+        :param size: number of frames to keep
+        :type size: int
+        :param fps: target frame rate, used to detect dropped frames
+        :type fps: float
+
+        """
+        self.phases = tuple(phases)
+        self.size = size
+        self.fps = fps
+        self._phaseIndex = dict((phase, i) for i, phase in enumerate(self.phases))
+        self._starts = array.array('d', [0.0]) * size
+        self._durations = [array.array('d', [0.0]) * size for phase in self.phases]
+        # frames dropped before the frame in the same slot
+        self._missed = array.array('i', [0]) * size
+        self.frames = 0
+        """Number of frames recorded, including the ones overwritten."""
+        self.dropped = 0
+        """Number of frames dropped."""
+        self._slot = -1
+        self._last = None
+
+
+    def begin(self, t=None):
+        """Start a new frame.
+
+        :param t: time of the :func:`lib.clock.monotonic` clock, defaults to
+            now
+
+        """
+        now = monotonic() if t is None else t
+        missed = 0
+        if self.fps and self._slot >= 0:
+            frames = (now - self._starts[self._slot]) * self.fps
+            if frames > 1.5:
+                missed = int(round(frames)) - 1
+                self.dropped += missed
+        self._slot = self.frames % self.size
+        self.frames += 1
+        self._starts[self._slot] = now
+        self._missed[self._slot] = missed
+        for durations in self._durations:
+            durations[self._slot] = 0.0
+        self._last = now
+
+
+    def mark(self, phase, t=None):
+        """End a phase of the current frame.
+
+        The duration of the phase is the time since the previous mark or
+        the beginning of the frame. Unknown phases are ignored.
+
+        :param phase: name of the phase
+        :type phase: str
+        :param t: time of the :func:`lib.clock.monotonic` clock, defaults to
+            now
+
+        """
+        now = monotonic() if t is None else t
+        i = self._phaseIndex.get(phase)
+        if i is not None and self._slot >= 0:
+            self._durations[i][self._slot] += now - self._last
+        self._last = now
+
+
+    def rows(self):
+        """Return the frames in the buffer, oldest first.
+
+        :returns: list of tuples (start, interval to the next frame, frames
+            dropped before this frame, duration of each phase...). The
+            interval of the last frame is ``None``.
+
+        """
+        n = min(self.frames, self.size)
+        slots = [(self.frames - n + i) % self.size for i in range(n)]
+        rows = []
+        for i, slot in enumerate(slots):
+            interval = None
+            if i + 1 < n:
+                interval = self._starts[slots[i + 1]] - self._starts[slot]
+            rows.append((self._starts[slot], interval, self._missed[slot]) +
+                        tuple(durations[slot] for durations in self._durations))
+        return rows
+
+
+    def summary(self):
+        """Return statistics of the frames in the buffer.
+
+        :returns: dict with the total number of ``frames`` and ``dropped``
+            frames, the frame rate (``fps``), the mean and maximum frame
+            interval and phase durations in milliseconds
+
+        """
+        rows = self.rows()
+        summary = {'frames' : self.frames, 'dropped' : self.dropped,
+                   'target_fps' : self.fps, 'fps' : 0.0,
+                   'interval_mean' : 0.0, 'interval_max' : 0.0}
+        intervals = [row[1] for row in rows[:-1]]
+        if intervals:
+            summary['fps'] = len(intervals) / sum(intervals) if sum(intervals) > 0 else 0.0
+            summary['interval_mean'] = 1000 * sum(intervals) / len(intervals)
+            summary['interval_max'] = 1000 * max(intervals)
+        for i, phase in enumerate(self.phases):
+            durations = [row[3 + i] for row in rows]
+            summary[phase + '_mean'] = 1000 * sum(durations) / len(durations) if durations else 0.0
+            summary[phase + '_max'] = 1000 * max(durations) if durations else 0.0
+        return summary
+
+
+    def export(self, filename):
+        """Write the frames in the buffer to a CSV file.
+
+        Times are in seconds.
+
+        :param filename: name of the file
+        :type filename: str
+
+        """
+        fh = open(filename, 'w')
+        try:
+            fh.write(",".join(("start", "interval", "dropped") + self.phases) + "\n")
+            for row in self.rows():
+                fh.write(",".join("" if v is None else repr(v) for v in row) + "\n")
+        finally:
+            fh.close()
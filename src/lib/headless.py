@@ -0,0 +1,470 @@
+# headless.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Running Feedbacks without a display and with a virtual clock.
+
+With the ``headless`` variable set, :class:`FeedbackBase.PygameFeedback` and
+:class:`FeedbackBase.VisualP300` open their screen with SDL's dummy video and
+audio drivers, which draw into a surface in memory, and advance time with a
+:class:`VirtualClock`: every tick takes exactly one frame of virtual time and
+returns without waiting, so a run does the same on every machine.
+
+:class:`FeedbackHarness` runs a Feedback this way for a given number of
+frames, passes scripted control signals to it and measures the CPU time of
+every frame. Optionally the screen is saved after the frames. From the src
+directory::
+
+    python -m lib.headless TrivialPong --frames 600 --control-key clout
+    python -m lib.headless --all --no-control --dump /tmp/frames
+
+The control signal is a sine wave in one key, ``cl_output`` by default.
+Feedbacks expect different keys and values, so with ``--all`` the ones that
+do not understand it fail and are reported. Run them on their own with
+their ``--control-key``, or all of them with ``--no-control``.
+
+Or from a test::
+
+    harness = FeedbackHarness(TrivialPong, frames=300, control=sine_control("clout"))
+    stats = harness.run()
+    self.assertTrue(stats['cpu_p95'] < 5.0)
+
+VisionEgg based Feedbacks need an OpenGL context, which SDL's dummy driver
+does not provide. They can run with a virtual X server like Xvfb, but not
+frame by frame in the harness, since they have a mainloop of their own.
+
+"""
+
+
+import logging
+import math
+import os
+import time
+from optparse import OptionParser
+
+import pygame
+
+from lib import trigger
+from lib.clock import monotonic
+from lib.PluginController import PluginController
+from FeedbackBase.Feedback import Feedback
+from FeedbackBase.MainloopFeedback import MainloopFeedback
+
+
+DUMMY_DRIVERS = {'SDL_VIDEODRIVER' : 'dummy', 'SDL_AUDIODRIVER' : 'dummy'}
+"""Environment variables selecting SDL's drivers without display and sound
+card."""
+
+DEPTH = 32
+"""Bits per pixel of headless screens, the dummy driver would open an 8 bit
+screen with a palette."""
+
+
+def set_dummy_drivers():
+    """Let SDL use the dummy drivers when pygame is initialized next.
+
+    :returns: the previous values, for :func:`restore_drivers`
+
+    """
+    previous = dict((name, os.environ.get(name)) for name in DUMMY_DRIVERS)
+    os.environ.update(DUMMY_DRIVERS)
+    return previous
+
+
+def restore_drivers(previous):
+    """Restore the drivers replaced by :func:`set_dummy_drivers`.
+
+    :param previous: the return value of :func:`set_dummy_drivers`
+    :type previous: dict
+
+    """
+    for name, value in previous.iteritems():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+
+class VirtualClock(object):
+    """Replacement of ``pygame.time.Clock`` with a virtual time.
+
+    :func:`tick` advances the time to one frame after the previous tick and
+    returns immediately. :func:`wait` and :func:`delay` advance the time
+    instead of sleeping, a tick after them only advances the time if the
+    frame is not over yet, like with pygame's clock.
+
+    """
+
+    def __init__(self, fps=60):
+        """
+        :param fps: frame rate of ticks without a frame rate
+        :type fps: float
+
+        """
+        self.fps = fps
+        self.reset()
+
+
+    def reset(self):
+        """Set the time back to 0."""
+        self.time = 0.0
+        """Virtual milliseconds since the start."""
+        self._lastTick = 0.0
+        self._frametime = 0
+        self._framerate = 0
+
+
+    def tick(self, framerate=0):
+        """Advance the time by one frame.
+
+        :param framerate: frames per second, :attr:`fps` if 0
+        :type framerate: float
+        :returns: milliseconds since the previous tick
+
+        """
+        self._framerate = framerate if framerate > 0 else self.fps
+        self.time = max(self.time, self._lastTick + 1000.0 / self._framerate)
+        # round the time stamps, not the durations, so they do not drift
+        self._frametime = int(round(self.time)) - int(round(self._lastTick))
+        self._lastTick = self.time
+        return self._frametime
+
+    tick_busy_loop = tick
+
+
+    def get_time(self):
+        """Return the milliseconds between the last two ticks."""
+        return self._frametime
+
+
+    def get_rawtime(self):
+        """Return the milliseconds between the last two ticks without the
+        time spent waiting, which is none."""
+        return self._frametime
+
+
+    def get_fps(self):
+        """Return the frame rate of the last tick."""
+        return float(self._framerate)
+
+
+    def get_ticks(self):
+        """Return the virtual milliseconds, like ``pygame.time.get_ticks``."""
+        return int(self.time)
+
+
+    def wait(self, milliseconds):
+        """Advance the time, like ``pygame.time.wait``.
+
+        :returns: the milliseconds waited
+
+        """
+        milliseconds = max(0, int(milliseconds))
+        self.time += milliseconds
+        return milliseconds
+
+    delay = wait
+
+
+_clock = None
+_saved = None
+_installs = 0
+
+
+def install(clock=None):
+    """Let pygame's time functions use a virtual clock.
+
+    ``pygame.time.Clock()`` returns the clock and ``get_ticks``, ``wait``
+    and ``delay`` use its time, and ``pygame.display.set_mode`` opens
+    screens with :data:`DEPTH` bits per pixel, also for Feedbacks which open
+    their screen themselves, until :func:`uninstall` is called as often
+    as :func:`install`. While installed, further calls return the installed
+    clock, so a Feedback run by the :class:`FeedbackHarness` shares the
+    harness' clock.
+
+    :param clock: the clock, a new :class:`VirtualClock` if ``None``
+    :type clock: :class:`VirtualClock`
+    :returns: the installed clock
+
+    """
+    global _clock, _saved, _installs
+    if _installs == 0:
+        _clock = clock if clock is not None else VirtualClock()
+        t = pygame.time
+        _saved = (t.Clock, t.get_ticks, t.wait, t.delay, pygame.display.set_mode)
+        t.Clock = lambda: _clock
+        t.get_ticks = _clock.get_ticks
+        t.wait = _clock.wait
+        t.delay = _clock.delay
+        pygame.display.set_mode = _set_mode
+    _installs += 1
+    return _clock
+
+
+def uninstall():
+    """Undo :func:`install`."""
+    global _clock, _saved, _installs
+    if _installs == 0:
+        return
+    _installs -= 1
+    if _installs == 0:
+        t = pygame.time
+        t.Clock, t.get_ticks, t.wait, t.delay, pygame.display.set_mode = _saved
+        _clock, _saved = None, None
+
+
+def _set_mode(resolution=(0, 0), flags=0, depth=0):
+    """``pygame.display.set_mode`` with :data:`DEPTH` bits per pixel."""
+    return _saved[4](resolution, flags, DEPTH)
+
+
+def sine_control(key='cl_output', period=120):
+    """Return a control script of a sine wave between -1 and 1.
+
+    :param key: key of the value in the control signal
+    :type key: str
+    :param period: frames per period
+    :type period: int
+    :returns: function for the ``control`` of :class:`FeedbackHarness`
+
+    """
+    def control(frame):
+        return {key : math.sin(2 * math.pi * frame / period)}
+    return control
+
+
+class FeedbackHarness(object):
+    """Runs a :class:`FeedbackBase.MainloopFeedback.MainloopFeedback`
+    headless for a number of frames.
+
+    The Feedback is initialized, its variables are set, ``headless`` if it
+    has one, and it is played until the frames are over or it stops by
+    itself. Triggers are discarded. pygame uses the dummy drivers and a
+    :class:`VirtualClock` during the run and is quit afterwards.
+
+    """
+
+    def __init__(self, feedback, frames=300, control=None, variables=None,
+                 fps=60, dump_dir=None, dump_every=1):
+        """
+        :param feedback: class of the Feedback
+        :param frames: number of frames to run
+        :type frames: int
+        :param control: scripted control signals: a function of the frame
+            number, or a list with an item per frame, returning a dict, a
+            list of dicts or ``None`` for no control signal
+        :param variables: variables to set after ``on_init``
+        :type variables: dict
+        :param fps: frame rate of the virtual clock for ticks without one
+        :type fps: float
+        :param dump_dir: directory to save the screen to, ``None`` for no
+            images
+        :type dump_dir: str
+        :param dump_every: save the screen after every n-th frame
+        :type dump_every: int
+
+        """
+        self.logger = logging.getLogger("FeedbackHarness")
+        self.feedbackClass = feedback
+        self.frames = frames
+        self.control = control
+        self.variables = variables or {}
+        self.fps = fps
+        self.dump_dir = dump_dir
+        self.dump_every = dump_every
+        self.feedback = None
+        """The Feedback of the last run."""
+        self.clock = None
+        self.cpu_times = []
+        """CPU time of every frame in seconds."""
+        self.wall_times = []
+        """Wall clock time of every frame in seconds."""
+
+
+    def run(self):
+        """Run the Feedback.
+
+        :returns: the statistics, see :func:`summary`
+        :raises: the exception raised by the Feedback
+
+        """
+        if not issubclass(self.feedbackClass, MainloopFeedback):
+            raise TypeError("%s is not a MainloopFeedback" % self.feedbackClass.__name__)
+        self.cpu_times = []
+        self.wall_times = []
+        drivers = set_dummy_drivers()
+        self.clock = install(VirtualClock(self.fps))
+        self.clock.reset()
+        try:
+            fb = self.feedback = self.feedbackClass()
+            fb._trigger_backend = trigger.NullBackend()
+            fb._on_init()
+            if hasattr(fb, 'headless'):
+                fb.headless = True
+            for name, value in self.variables.iteritems():
+                setattr(fb, name, value)
+            fb._frame_timing_enabled = True
+            fb._frame_timing_size = self.frames
+            run_frame = fb._run_frame
+            fb._run_frame = lambda timing=None: self._frame(run_frame, timing)
+            try:
+                fb._on_play()
+            except:
+                # on_quit would wait for the mainloop forever
+                fb._running = fb._inMainloop = False
+                raise
+            finally:
+                fb._on_quit()
+        finally:
+            # also closes a screen the Feedback left open
+            pygame.quit()
+            uninstall()
+            restore_drivers(drivers)
+        if not self.cpu_times:
+            self.logger.warning("%s did not run MainloopFeedback's mainloop." % self.feedbackClass.__name__)
+        return self.summary()
+
+
+    def summary(self):
+        """Return statistics of the last run.
+
+        :returns: dict with the number of ``frames``, the virtual time in
+            seconds (``virtual_time``), the mean, median, 95th percentile
+            and maximum CPU and wall clock time of the frames (``cpu_mean``,
+            ``cpu_median``, ``cpu_p95``, ``cpu_max``, ``wall_mean``...) and
+            the mean and maximum wall clock time of the Feedback's frame
+            phases (e.g. ``play_mean``, ``play_max``), all in milliseconds
+
+        """
+        stats = {'frames' : len(self.cpu_times),
+                 'virtual_time' : self.clock.time / 1000 if self.clock else 0.0}
+        for name, times in ('cpu', self.cpu_times), ('wall', self.wall_times):
+            ordered = sorted(times)
+            n = len(ordered)
+            stats[name + '_mean'] = 1000 * sum(ordered) / n if n else 0.0
+            stats[name + '_median'] = 1000 * ordered[n // 2] if n else 0.0
+            stats[name + '_p95'] = 1000 * ordered[min(n - 1, int(0.95 * n))] if n else 0.0
+            stats[name + '_max'] = 1000 * ordered[-1] if n else 0.0
+        timing = self.feedback.get_frame_timing() if self.feedback else None
+        if timing:
+            for phase in self.feedback.FRAME_PHASES:
+                stats[phase + '_mean'] = timing[phase + '_mean']
+                stats[phase + '_max'] = timing[phase + '_max']
+        return stats
+
+
+    def _frame(self, run_frame, timing):
+        """Run one frame of the Feedback's mainloop."""
+        fb = self.feedback
+        frame = len(self.cpu_times)
+        samples = self._control_samples(frame)
+        # delivered outside of the frame, like from the IPC thread
+        if samples:
+            fb._receive_control_signals(samples)
+        cpu, wall = time.clock(), monotonic()
+        run_frame(timing)
+        self.cpu_times.append(time.clock() - cpu)
+        self.wall_times.append(monotonic() - wall)
+        if self.dump_dir and frame % self.dump_every == 0:
+            self._dump(frame)
+        if frame + 1 >= self.frames:
+            fb._running = False
+
+
+    def _control_samples(self, frame):
+        """Return the control signals of a frame as (timestamp, data)."""
+        if self.control is None:
+            return []
+        if callable(self.control):
+            data = self.control(frame)
+        else:
+            data = self.control[frame] if frame < len(self.control) else None
+        if data is None:
+            return []
+        if isinstance(data, dict):
+            data = [data]
+        t = self.clock.time / 1000
+        return [(t, d) for d in data]
+
+
+    def _dump(self, frame):
+        """Save the screen, if the Feedback has one."""
+        if not pygame.display.get_init():
+            return
+        surface = pygame.display.get_surface()
+        if surface is None:
+            return
+        if not os.path.isdir(self.dump_dir):
+            os.makedirs(self.dump_dir)
+        pygame.image.save(surface, os.path.join(self.dump_dir, "frame%05i.png" % frame))
+
+
+def main():
+    parser = OptionParser(usage="%prog [options] [FEEDBACK...]")
+    parser.add_option('-n', '--frames', type='int', default=300,
+                      help="Number of frames to run [default: %default].")
+    parser.add_option('--fps', type='float', default=60,
+                      help="Frame rate of the virtual clock if the Feedback does not set one [default: %default].")
+    parser.add_option('-a', '--all', action='store_true', default=False,
+                      help="Run all available Feedbacks.")
+    parser.add_option('-p', '--additional-feedback-path', dest='fbpath', action='append', default=[],
+                      help="Additional path to search for Feedbacks.")
+    parser.add_option('--control-key', default='cl_output',
+                      help="Key of the control signal, a sine wave. The same key is sent to all Feedbacks, Feedbacks reading another key fail [default: %default].")
+    parser.add_option('--control-period', type='int', default=120,
+                      help="Frames per period of the control signal [default: %default].")
+    parser.add_option('--no-control', dest='control', action='store_false', default=True,
+                      help="Send no control signal.")
+    parser.add_option('--dump', dest='dump_dir',
+                      help="Save the screen to DUMP/FEEDBACK/.")
+    parser.add_option('--dump-every', type='int', default=1,
+                      help="Save the screen after every n-th frame [default: %default].")
+    options, args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(name)-12s %(levelname)-8s %(message)s")
+
+    pc = PluginController(["Feedbacks"] + options.fbpath, Feedback)
+    pc.find_plugins()
+    names = sorted(pc.availablePlugins) if options.all else args
+    if not names:
+        parser.error("no Feedback given")
+    print "%-30s %6s %10s %10s %10s %10s" % ("", "frames", "mean [ms]", "median", "p95", "max")
+    for name in names:
+        try:
+            cls = pc.load_plugin(name)
+            if not issubclass(cls, MainloopFeedback):
+                print "%-30s skipped, not a MainloopFeedback" % name
+                continue
+            dump_dir = os.path.join(options.dump_dir, name) if options.dump_dir else None
+            control = None
+            if options.control:
+                control = sine_control(options.control_key, options.control_period)
+            harness = FeedbackHarness(cls, options.frames, control,
+                                      fps=options.fps, dump_dir=dump_dir,
+                                      dump_every=options.dump_every)
+            stats = harness.run()
+        except Exception, e:
+            logging.getLogger("FeedbackHarness").debug("%s failed:" % name, exc_info=True)
+            print "%-30s failed: %s" % (name, e)
+            continue
+        finally:
+            pc.unload_plugin()
+        print "%-30s %6i %10.3f %10.3f %10.3f %10.3f" % (name, stats['frames'],
+            stats['cpu_mean'], stats['cpu_median'], stats['cpu_p95'], stats['cpu_max'])
+
+
+if __name__ == "__main__":
+    main()
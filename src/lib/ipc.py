@@ -26,23 +26,37 @@ between the Feedback Controller and the Feedbacks
 import asyncore
 import asynchat
 import socket
+import struct
+import errno
 import cPickle as pickle
 import logging
 
 import bcixml
+from eventloop import EventLoop
 
 
-# delimiter for IPC messages.
-TERMINATOR = "\r\n\r\n"
+# header of IPC messages, contains the length of the pickled message.
+HEADER = struct.Struct("!I")
+# initial size of the receive buffer and size of the chunks sent at once
+BUFFER_SIZE = 65536
 # Port for IPC connections
 IPC_PORT = 12347
 LOCALHOST = "127.0.0.1"
 
 import thread
 
-def ipcloop():
-    """Start the IPC loop."""
-    asyncore.loop()
+def ipcloop(poller=None):
+    """Start the IPC loop.
+
+    :param poller: ``'asyncore'`` to use :func:`asyncore.loop`, otherwise
+        the poller of the :class:`lib.eventloop.EventLoop`, defaults to the
+        best one available.
+
+    """
+    if poller == 'asyncore':
+        asyncore.loop()
+    else:
+        EventLoop(poller=poller).run()
 
 
 def get_feedbackcontroller_connection():
@@ -114,33 +128,81 @@ class IPCChannel(asynchat.async_chat):
 
     for sending messages via IPC.
 
-    """
-
-    def __init__(self, conn):
-        """Initialize the Channel, set terminator and clear input buffer."""
-        asynchat.async_chat.__init__(self, conn)
-        self.logger = logging.getLogger("IPCChannel")
-        self.set_terminator(TERMINATOR)
-        # input buffer
-        self.ibuf = ""
+    Each message is preceded by a header containing the length of the
+    pickled message. Incoming data is received directly into a preallocated
+    buffer, so it never has to be scanned for delimiters or concatenated and
+    the pickled data may contain arbitrary bytes.
 
-    def collect_incoming_data(self, data):
-        """Append incoming data to input buffer.
+    """
 
-        :param data: Incoming data
+    ac_out_buffer_size = BUFFER_SIZE
 
+    def __init__(self, conn, map=None):
+        """Initialize the Channel and allocate the input buffer."""
+        asynchat.async_chat.__init__(self, conn, map)
+        self.logger = logging.getLogger("IPCChannel")
+        # input buffer, only the first ilen bytes are valid
+        self.ibuf = bytearray(BUFFER_SIZE)
+        self.iview = memoryview(self.ibuf)
+        self.ilen = 0
+
+    def handle_read(self):
+        """Receive available data into the input buffer and process all
+        complete messages.
         """
-        self.ibuf += data
-
-    def found_terminator(self):
-        """Process message from peer."""
-        dump = self.ibuf
-        self.ibuf = ""
-        ipcmessage = pickle.loads(dump)
+        if self.ilen == len(self.ibuf):
+            self._resize_buffer(2 * len(self.ibuf))
         try:
-            self.handle_message(ipcmessage)
-        except:
-            self.logger.exception("Handling an ICP message caused an exception:")
+            n = self.socket.recv_into(self.iview[self.ilen:])
+        except socket.error, why:
+            if why.args[0] in (errno.EWOULDBLOCK, errno.EAGAIN):
+                return
+            elif why.args[0] in (errno.ECONNRESET, errno.ENOTCONN,
+                                 errno.ESHUTDOWN, errno.ECONNABORTED,
+                                 errno.EPIPE, errno.EBADF):
+                self.handle_close()
+                return
+            raise
+        if n == 0:
+            self.handle_close()
+            return
+        self.ilen += n
+        self._process_input()
+
+    def _process_input(self):
+        """Process all complete messages in the input buffer."""
+        start = 0
+        messages = []
+        while self.ilen - start >= HEADER.size:
+            length, = HEADER.unpack_from(self.ibuf, start)
+            end = start + HEADER.size + length
+            if end > self.ilen:
+                break
+            dump = self.iview[start+HEADER.size:end].tobytes()
+            start = end
+            messages.append(pickle.loads(dump))
+        if start > 0:
+            # move the incomplete rest to the beginning of the buffer
+            rest = self.ilen - start
+            self.ibuf[:rest] = self.iview[start:self.ilen].tobytes()
+            self.ilen = rest
+        if self.ilen >= HEADER.size:
+            # make sure the buffer can hold the next message
+            length, = HEADER.unpack_from(self.ibuf)
+            if HEADER.size + length > len(self.ibuf):
+                self._resize_buffer(HEADER.size + length)
+        elif self.ilen == 0 and len(self.ibuf) > BUFFER_SIZE:
+            # release the memory of a previous large message
+            self._resize_buffer(BUFFER_SIZE)
+        if messages:
+            self.handle_messages(messages)
+
+    def _resize_buffer(self, size):
+        """Resize the input buffer, keeping its content."""
+        ibuf = bytearray(size)
+        ibuf[:self.ilen] = self.ibuf[:self.ilen]
+        self.ibuf = ibuf
+        self.iview = memoryview(self.ibuf)
 
     def send_message(self, message):
         """Send message to peer.
@@ -149,8 +211,7 @@ class IPCChannel(asynchat.async_chat):
 
         """
         dump = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
-        dump += TERMINATOR
-        self.push(dump)
+        self.push(HEADER.pack(len(dump)) + dump)
 
     def handle_close(self):
         """Handle closing of connection."""
@@ -158,6 +219,23 @@ class IPCChannel(asynchat.async_chat):
         asynchat.async_chat.handle_close(self)
 
 
+    def handle_messages(self, messages):
+        """Handle all messages which were received at once.
+
+        Calls :func:`handle_message` for each message. Derived classes can
+        overwrite this method to process several messages together.
+
+        :param messages: Messages in the order of arrival
+        :type messages: list
+
+        """
+        for message in messages:
+            try:
+                self.handle_message(message)
+            except:
+                self.logger.exception("Handling an ICP message caused an exception:")
+
+
     def handle_message(self, message):
         """Do something with the received message.
 
@@ -192,6 +270,37 @@ class FeedbackIPCChannel(IPCChannel):
         self.feedback = feedback
 
 
+    def handle_messages(self, messages):
+        """Handle messages from Feedback Controller.
+
+        Consecutive control signals are passed to the Feedback together, so
+        it can coalesce them according to its delivery policy. Interaction
+        signals are handled one by one, in the order of arrival.
+
+        :param messages: Messages in the order of arrival
+        :type messages: list
+
+        """
+        samples = []
+        for message in messages:
+            if message.type == bcixml.CONTROL_SIGNAL:
+                samples.append((getattr(message, 'timestamp', None), message.data))
+                continue
+            if samples:
+                self._handle_control_signals(samples)
+                samples = []
+            IPCChannel.handle_messages(self, [message])
+        if samples:
+            self._handle_control_signals(samples)
+
+
+    def _handle_control_signals(self, samples):
+        try:
+            self.feedback._receive_control_signals(samples)
+        except:
+            self.logger.exception("Handling an ICP message caused an exception:")
+
+
     def handle_message(self, message):
         """Handle message from Feedback Controller.
 
@@ -201,7 +310,7 @@ class FeedbackIPCChannel(IPCChannel):
         self.feedback.logger.debug("Processing signal")
 
         if message.type == bcixml.CONTROL_SIGNAL:
-            self.feedback._on_control_event(message.data)
+            self.feedback._receive_control_signals([(getattr(message, 'timestamp', None), message.data)])
             return
 
         cmd = message.commands[0][0] if len(message.commands) > 0 else None
@@ -211,6 +320,15 @@ class FeedbackIPCChannel(IPCChannel):
             reply.peeraddr = message.peeraddr
             self.feedback.logger.debug("Sending variables")
             self.send_message(reply)
+        elif cmd == bcixml.CMD_GET_FRAME_TIMING:
+            get_frame_timing = getattr(self.feedback, 'get_frame_timing', None)
+            timing = None
+            if get_frame_timing is not None:
+                timing = get_frame_timing(message.commands[0][1].get('filename'))
+            reply = bcixml.BciSignal({"frametiming" : timing}, None,
+                                     bcixml.REPLY_SIGNAL)
+            reply.peeraddr = message.peeraddr
+            self.send_message(reply)
         self.feedback._on_interaction_event(message.data)
         if cmd == bcixml.CMD_PLAY:
             self.feedback._playEvent.set()
@@ -0,0 +1,167 @@
+# markerstream.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Batched and timestamped UDP marker stream.
+
+:func:`MarkerStream.send` stamps a marker with the wall clock and the
+monotonic clock and appends it to a buffer, it never blocks or makes a system
+call. A thread flushes the buffer every ``flush_interval`` seconds, packing as
+many markers as fit into one datagram. :func:`MarkerStream.close` flushes the
+remaining markers.
+
+Every datagram is plain text, one line per entry::
+
+    #batch <sequence number> <wall clock> <monotonic clock>
+    <wall clock> <monotonic clock> <marker>
+    <wall clock> <monotonic clock> <marker>
+    ...
+
+The header carries the time of the flush, so the recorder can tell how long
+the markers waited in the buffer and, with the arrival time of the datagram,
+correct for the transmission latency. Times are in seconds, markers must not
+contain newlines.
+
+"""
+
+
+import logging
+import socket
+import threading
+import time
+from collections import deque
+
+from lib.clock import monotonic
+
+
+# "#batch <sequence number> <wall clock> <monotonic clock>\n", with room for
+# a 20 digit sequence number and time stamps of 16 digits before the point
+_HEADER_SIZE = 7 + 20 + 2 * (1 + 16 + 7) + 1
+
+
+class MarkerStream(object):
+    """Sends markers in batched, timestamped UDP datagrams."""
+
+    def __init__(self, host='127.0.0.1', port=12344, flush_interval=0.01, max_datagram=1400):
+        """Initialize the marker stream.
+
+        :param host: host of the recorder
+        :type host: str
+        :param port: UDP port of the recorder
+        :type port: int
+        :param flush_interval: time in seconds between two flushes, if 0 every
+            marker is sent right away
+        :type flush_interval: float
+        :param max_datagram: maximum size of a datagram in bytes
+        :type max_datagram: int
+
+        """
+        self.logger = logging.getLogger("MarkerStream")
+        self.address = (host, port)
+        self.flush_interval = flush_interval
+        self.max_datagram = max_datagram
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # deque.append and deque.popleft are atomic, senders need no lock
+        self._buffer = deque()
+        self._flushLock = threading.Lock()
+        self._sequence = 0
+        self._thread = None
+        self._stopped = threading.Event()
+        self._statistics = {'markers' : 0, 'datagrams' : 0}
+
+
+    def start(self):
+        """Start the thread flushing the buffer."""
+        if self.flush_interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._flush_loop, name="MarkerStream")
+            self._thread.setDaemon(True)
+            self._thread.start()
+
+
+    def send(self, marker):
+        """Stamp the marker and add it to the buffer. May be called from any
+        thread.
+
+        :param marker: the marker
+        :type marker: str
+
+        """
+        self._buffer.append((time.time(), monotonic(), marker))
+        if self.flush_interval <= 0:
+            self.flush()
+
+
+    def flush(self):
+        """Send all markers in the buffer."""
+        self._flushLock.acquire()
+        try:
+            if not self._buffer:
+                return
+            datagrams = []
+            lines = []
+            size = 0
+            # the header is added when sending
+            budget = self.max_datagram - _HEADER_SIZE
+            while self._buffer:
+                line = "%.6f %.6f %s\n" % self._buffer.popleft()
+                if lines and size + len(line) > budget:
+                    datagrams.append(lines)
+                    lines, size = [], 0
+                lines.append(line)
+                size += len(line)
+            datagrams.append(lines)
+            for lines in datagrams:
+                header = "#batch %i %.6f %.6f\n" % (self._sequence, time.time(), monotonic())
+                self._sequence += 1
+                try:
+                    self.socket.sendto(header + "".join(lines), self.address)
+                except socket.error, e:
+                    self.logger.error("Unable to send %i markers: %s" % (len(lines), str(e)))
+                    continue
+                self._statistics['markers'] += len(lines)
+                self._statistics['datagrams'] += 1
+        finally:
+            self._flushLock.release()
+
+
+    def close(self):
+        """Stop the thread, flush the remaining markers and close the
+        socket."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self.socket.close()
+
+
+    def get_statistics(self):
+        """Return the number of ``markers`` and ``datagrams`` sent.
+
+        :returns: dict
+
+        """
+        return self._statistics.copy()
+
+
+    def _flush_loop(self):
+        while not self._stopped.isSet():
+            self._stopped.wait(self.flush_interval)
+            try:
+                self.flush()
+            except:
+                self.logger.exception("Flushing the markers failed:")
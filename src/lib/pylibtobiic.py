@@ -475,7 +475,6 @@ class ICSerializer:
 				if initialize:
 					if cptr.classes.Has(klabel):
 						return None
-					print klabel, tvalue
 					kptr = ICClass(klabel, float(tvalue))
 					cptr.classes.Add(kptr)
 				else:
@@ -0,0 +1,248 @@
+# ringbuffer.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Shared memory ring buffer for control signals.
+
+The Feedback Controller writes the classifier output into a memory mapped
+file and the Feedback process reads it from there, so control signals do not
+need to be pickled and sent through the IPC socket.
+
+The buffer has exactly one writer and one reader and uses no locks. Each slot
+holds one sample: an array of floats, a sequence number and a timestamp. The
+sequence number is written before and after the data, the reader only accepts
+a slot if both are equal to the sequence number it expects. If the reader is
+too slow, the oldest samples are overwritten and counted as dropped.
+
+Usage::
+
+    # Feedback Controller
+    rb = ControlSignalRingBuffer.create(slots=256, capacity=16)
+    rb.write_signal(signal.data)
+
+    # Feedback
+    rb = ControlSignalRingBuffer(rb.filename)
+    for seq, timestamp, data in rb.drain():
+        ...
+
+"""
+
+
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+
+MAGIC = "PFRB"
+VERSION = 1
+
+# magic, version, number of slots, capacity (floats per slot), name
+_HEADER = struct.Struct("<4sIII32s")
+# sequence number of the last written sample
+_WRITE_SEQ = struct.Struct("<Q")
+_WRITE_SEQ_OFFSET = _HEADER.size
+_HEADER_SIZE = 64
+
+# sequence number, timestamp, number of values (-1 for a single float)
+_SLOT_HEADER = struct.Struct("<Qdi4x")
+# sequence number again, written after the values
+_SLOT_SEQ = struct.Struct("<Q")
+
+
+class ControlSignalRingBuffer(object):
+    """Single producer, single consumer ring buffer in a memory mapped file.
+
+    Only control signals consisting of one variable (``name``) whose value is
+    a float or a list of at most ``capacity`` floats can be written.
+
+    """
+
+    def __init__(self, filename):
+        """Open an existing ring buffer.
+
+        :param filename: file backing the ring buffer
+        :type filename: str
+
+        """
+        self.filename = filename
+        self._file = open(filename, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        magic, version, self.slots, self.capacity, name = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%s is not a control signal ring buffer" % filename)
+        self.name = unicode(name.rstrip("\0"))
+        self._slotsize = _SLOT_HEADER.size + 8 * self.capacity + _SLOT_SEQ.size
+        self._values = [struct.Struct("<%id" % i) for i in range(self.capacity + 1)]
+        # sequence number of the next sample to read
+        self._read_seq = self._get_write_seq() + 1
+        self.dropped = 0
+        """Number of samples overwritten before the reader got them."""
+
+
+    @classmethod
+    def create(cls, slots=256, capacity=16, name="cl_output", dir=None):
+        """Create a new ring buffer in a temporary file and open it.
+
+        :param slots: number of samples the buffer can hold
+        :type slots: int
+        :param capacity: maximum number of floats per sample
+        :type capacity: int
+        :param name: name of the control signal variable
+        :type name: str
+        :param dir: directory for the temporary file
+        :returns: ControlSignalRingBuffer
+
+        """
+        slotsize = _SLOT_HEADER.size + 8 * capacity + _SLOT_SEQ.size
+        fd, filename = tempfile.mkstemp(prefix="pyff-ringbuffer-", dir=dir)
+        try:
+            header = _HEADER.pack(MAGIC, VERSION, slots, capacity, name)
+            os.write(fd, header.ljust(_HEADER_SIZE, "\0"))
+            os.write(fd, "\0" * (slots * slotsize))
+        finally:
+            os.close(fd)
+        return cls(filename)
+
+
+    def close(self):
+        """Close the ring buffer."""
+        self._mmap.close()
+        self._file.close()
+
+
+    def remove(self):
+        """Close the ring buffer and remove the backing file."""
+        self.close()
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+
+
+    def write(self, values, timestamp=None):
+        """Write a sample.
+
+        :param values: float or list of floats
+        :param timestamp: seconds since the epoch, defaults to now
+        :returns: False if the values cannot be stored in the buffer.
+
+        """
+        if type(values) is float:
+            n = -1
+            values = (values,)
+        else:
+            n = len(values)
+            if n > self.capacity:
+                return False
+        if timestamp is None:
+            timestamp = time.time()
+        seq = self._get_write_seq() + 1
+        offset = _HEADER_SIZE + ((seq - 1) % self.slots) * self._slotsize
+        try:
+            _SLOT_HEADER.pack_into(self._mmap, offset, seq, timestamp, n)
+            self._values[len(values)].pack_into(self._mmap, offset + _SLOT_HEADER.size, *values)
+        except struct.error:
+            return False
+        _SLOT_SEQ.pack_into(self._mmap, offset + self._slotsize - _SLOT_SEQ.size, seq)
+        # publish the sample
+        _WRITE_SEQ.pack_into(self._mmap, _WRITE_SEQ_OFFSET, seq)
+        return True
+
+
+    def write_signal(self, data):
+        """Write the data of a control signal.
+
+        :param data: data of the control signal
+        :type data: dict
+        :returns: False if the data cannot be stored in the buffer.
+
+        """
+        if len(data) != 1 or self.name not in data:
+            return False
+        values = data[self.name]
+        if type(values) is not float:
+            if type(values) is not list:
+                return False
+            for v in values:
+                if type(v) is not float:
+                    return False
+        return self.write(values)
+
+
+    def drain(self):
+        """Return all samples which have not been read yet.
+
+        :returns: list of tuples (sequence number, timestamp, data)
+
+        """
+        write_seq = self._get_write_seq()
+        samples = []
+        if write_seq - self._read_seq >= self.slots:
+            # those have been overwritten already
+            first = write_seq - self.slots + 1
+            self.dropped += first - self._read_seq
+            self._read_seq = first
+        while self._read_seq <= write_seq:
+            sample = self._read(self._read_seq)
+            if sample is None:
+                self.dropped += 1
+            else:
+                samples.append(sample)
+            self._read_seq += 1
+        return samples
+
+
+    def latest(self):
+        """Return the latest sample and mark all samples as read.
+
+        :returns: tuple (sequence number, timestamp, data) or None
+
+        """
+        write_seq = self._get_write_seq()
+        if write_seq == 0:
+            return None
+        self._read_seq = max(self._read_seq, write_seq + 1)
+        return self._read(write_seq)
+
+
+    def _get_write_seq(self):
+        return _WRITE_SEQ.unpack_from(self._mmap, _WRITE_SEQ_OFFSET)[0]
+
+
+    def _read(self, seq):
+        """Read the sample with the given sequence number.
+
+        :returns: tuple (sequence number, timestamp, data) or None if the slot
+            has been overwritten.
+
+        """
+        offset = _HEADER_SIZE + ((seq - 1) % self.slots) * self._slotsize
+        seq_end, = _SLOT_SEQ.unpack_from(self._mmap, offset + self._slotsize - _SLOT_SEQ.size)
+        seq_begin, timestamp, n = _SLOT_HEADER.unpack_from(self._mmap, offset)
+        if seq_begin != seq or seq_end != seq:
+            return None
+        if n == -1:
+            values = self._values[1].unpack_from(self._mmap, offset + _SLOT_HEADER.size)[0]
+        else:
+            values = list(self._values[n].unpack_from(self._mmap, offset + _SLOT_HEADER.size))
+        # the writer changes the first sequence number before it touches the
+        # values, so if it is unchanged the values are consistent
+        if _SLOT_HEADER.unpack_from(self._mmap, offset)[0] != seq:
+            return None
+        return seq, timestamp, {self.name : values}
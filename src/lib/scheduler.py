@@ -0,0 +1,208 @@
+# scheduler.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Frame accurate scheduling of stimulus onsets.
+
+With a swap synchronized to the vertical retrace, a stimulus becomes visible
+at the first retrace after it was drawn. :class:`StimulusScheduler` predicts
+the retraces from the previous onsets and the refresh rate, and starts
+drawing a stimulus ``lead`` seconds before the retrace closest to its
+intended onset, so the onset error stays within a fraction of a frame
+instead of being up to one frame late. Waiting uses
+:func:`lib.clock.sleep_until`, which sleeps and busy-waits only for the last
+fraction of a millisecond.
+
+Usage::
+
+    scheduler = StimulusScheduler(60)
+    scheduler.start()
+    present(first)
+    scheduler.onset()
+    for stimulus, duration in ...:
+        scheduler.wait(duration)
+        present(stimulus)       # returns after the swap
+        scheduler.onset()
+    print scheduler.get_statistics()
+
+"""
+
+
+import logging
+import math
+import time
+
+from lib.clock import monotonic, sleep_until
+
+
+class StimulusScheduler(object):
+    """Waits for the onsets of a sequence of stimuli and measures the onset
+    errors."""
+
+    def __init__(self, refresh_rate=None, lead=0.5, spin=0.0005, poll=0.01):
+        """Initialize the scheduler.
+
+        :param refresh_rate: refresh rate of the monitor in Hz, if ``None``
+            the onsets are not aligned to retraces
+        :type refresh_rate: float
+        :param lead: time in frames to start drawing before the predicted
+            retrace
+        :type lead: float
+        :param spin: time in seconds to busy-wait at most
+        :type spin: float
+        :param poll: interval in seconds to check the ``flag`` of a wait
+        :type poll: float
+
+        """
+        self.logger = logging.getLogger("StimulusScheduler")
+        self.frame_duration = 1.0 / refresh_rate if refresh_rate else None
+        self.lead = lead
+        self.spin = spin
+        self.poll = poll
+        # intended onset of the current stimulus
+        self.target = None
+        # time the current stimulus was shown
+        self.last_onset = None
+        # base of the next wait, see wait
+        self._base = None
+        # a retrace observed after a swap
+        self._vsync = None
+        self.onset_errors = []
+
+
+    def start(self, t=None):
+        """Start a new sequence at time ``t``, defaults to now.
+
+        :param t: time of the :func:`lib.clock.monotonic` clock
+        :type t: float
+
+        """
+        self._base = monotonic() if t is None else t
+        self.target = None
+
+
+    def wait(self, duration, fixed=True, flag=None):
+        """Wait until the next stimulus has to be drawn.
+
+        :param duration: time in seconds from the previous onset to the next
+        :type duration: float
+        :param fixed: measure ``duration`` from the intended previous onset,
+            otherwise from the end of the previous wait
+        :type fixed: bool
+        :param flag: stop waiting as soon as it becomes false, checked every
+            ``poll`` seconds
+        :returns: the intended onset of the next stimulus
+
+        """
+        self.target = self._base + duration
+        now = self._sleep(self.deadline(self.target), flag)
+        self._base = self.target if fixed else now
+        return self.target
+
+
+    def wait_frames(self, frames, flag=None):
+        """Wait until the next stimulus has to be drawn ``frames`` frames
+        after the previous onset.
+
+        :param frames: number of frames
+        :type frames: int
+        :param flag: stop waiting as soon as it becomes false, see :func:`wait`
+        :returns: the intended onset of the next stimulus
+
+        """
+        base = self.last_onset if self.last_onset is not None else self._base
+        self._base = base
+        return self.wait(frames * (self.frame_duration or 0.0), flag=flag)
+
+
+    def _sleep(self, deadline, flag):
+        """Sleep until the deadline or until ``flag`` becomes false."""
+        if flag is None:
+            return sleep_until(deadline, self.spin)
+        now = monotonic()
+        while flag:
+            if deadline - now <= self.poll:
+                return sleep_until(deadline, self.spin)
+            time.sleep(self.poll)
+            now = monotonic()
+        return now
+
+
+    def deadline(self, target):
+        """Return the time to start drawing a stimulus intended for
+        ``target``.
+
+        :param target: intended onset
+        :type target: float
+        :returns: float
+
+        """
+        if self.frame_duration is None or self._vsync is None:
+            return target
+        frames = round((target - self._vsync) / self.frame_duration)
+        vsync = self._vsync + frames * self.frame_duration
+        return vsync - self.lead * self.frame_duration
+
+
+    def onset(self, t=None):
+        """Record the onset of the stimulus drawn after the last
+        :func:`wait`. Call it right after the swap.
+
+        :param t: time of the onset, defaults to now
+        :type t: float
+        :returns: the onset error in seconds, or ``None`` for the first
+            stimulus of a sequence
+
+        """
+        self.last_onset = monotonic() if t is None else t
+        if self.frame_duration is not None:
+            self._vsync = self.last_onset
+        if self.target is None:
+            return None
+        error = self.last_onset - self.target
+        self.onset_errors.append(error)
+        self.logger.debug("Stimulus onset error: %.2fms" % (1000 * error))
+        return error
+
+
+    def frames_since_onset(self):
+        """Return the number of frames since the last onset.
+
+        :returns: int
+
+        """
+        if self.frame_duration is None or self.last_onset is None:
+            return 0
+        return int(round((monotonic() - self.last_onset) / self.frame_duration))
+
+
+    def get_statistics(self):
+        """Return statistics of the onset errors.
+
+        :returns: dict with the number of ``onsets`` and the ``mean``,
+            standard deviation (``std``) and maximum absolute error
+            (``max``) in seconds
+
+        """
+        errors = self.onset_errors
+        n = len(errors)
+        if n == 0:
+            return {'onsets' : 0, 'mean' : 0.0, 'std' : 0.0, 'max' : 0.0}
+        mean = sum(errors) / n
+        std = math.sqrt(sum((e - mean) ** 2 for e in errors) / n)
+        return {'onsets' : n, 'mean' : mean, 'std' : std,
+                'max' : max(abs(e) for e in errors)}
@@ -0,0 +1,313 @@
+# sequence.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Stimulus sequences for ERP paradigms.
+
+The generators build the sequences constructively, they never retry and run
+in time linear in the length of the sequence (up to a logarithmic factor). If
+the constraints cannot be met, they raise a :exc:`ValueError` instead of
+searching forever.
+
+* :func:`flash_sequence` -- rounds in which every element flashes once, with
+  a minimum number of other flashes between two flashes of the same element
+* :func:`random_sequence` -- flashes drawn with repetition, with the same
+  minimum distance
+* :func:`oddball_sequence` -- standards and deviants with a minimum number
+  of standards between two deviants
+* :func:`balanced_targets` -- targets for a run, every element equally often
+
+All generators take a ``random.Random`` instance, seed it to get the same
+sequences again. :class:`SequenceBuffer` generates the sequences of a
+session ahead of time in a background thread::
+
+    buffer = SequenceBuffer(lambda rng: flash_sequence(range(6), 10, 2, rng=rng),
+                            size=100, seed=42)
+    for trial in range(100):
+        flashes = buffer.get()
+        ...
+    buffer.stop()
+
+"""
+
+
+import bisect
+import logging
+import random
+import threading
+import Queue
+
+
+def flash_sequence(elements, repetitions=1, min_dist=0, previous=(), rng=None, length=None):
+    """Return a sequence of rounds in which every element flashes once.
+
+    Between two flashes of the same element are at least ``min_dist`` other
+    flashes, also across the rounds and to the flashes in ``previous``. This
+    is possible if ``min_dist`` is smaller than the number of elements.
+
+    :param elements: the elements, must be distinct
+    :type elements: sequence
+    :param repetitions: number of rounds
+    :type repetitions: int
+    :param min_dist: minimum number of flashes between two flashes of the
+        same element
+    :type min_dist: int
+    :param previous: flashes preceding the sequence, the last one is the
+        most recent
+    :type previous: sequence
+    :param rng: random number generator, defaults to the ``random`` module
+    :type rng: random.Random
+    :param length: number of flashes of the last round, defaults to all
+        elements
+    :type length: int
+    :returns: list of elements
+    :raises ValueError: if the constraints cannot be met
+
+    """
+    rng = random if rng is None else rng
+    elements = list(elements)
+    if length is None:
+        length = len(elements)
+    sequence = list(previous)
+    start = len(sequence)
+    for i in range(repetitions):
+        n = length if i == repetitions - 1 else len(elements)
+        sequence.extend(_round(elements, n, min_dist, sequence, rng))
+    return sequence[start:]
+
+
+def _round(elements, length, min_dist, previous, rng):
+    """Return the first ``length`` flashes of a round.
+
+    Every element gets the earliest position allowed by its last flash in
+    ``previous``. The positions are filled one after the other with a random
+    element among the allowed ones. The allowed elements of a position are
+    also allowed in all later positions, so this only gets stuck if no valid
+    round exists at all.
+
+    """
+    earliest = {}
+    for j in range(min(min_dist, len(previous))):
+        e = previous[-1 - j]
+        if e not in earliest:
+            earliest[e] = min_dist - j
+    pool = []
+    pending = []
+    for e in elements:
+        if e in earliest:
+            pending.append((earliest[e], len(pending), e))
+        else:
+            pool.append(e)
+    pending.sort()
+    keys = [p[0] for p in pending]
+    added = 0
+    flashes = []
+    for q in range(length):
+        allowed = bisect.bisect_right(keys, q)
+        pool.extend(p[2] for p in pending[added:allowed])
+        added = allowed
+        if not pool:
+            raise ValueError("No flash sequence of %d elements with a minimum distance of %d." % (len(elements), min_dist))
+        i = rng.randrange(len(pool))
+        pool[i], pool[-1] = pool[-1], pool[i]
+        flashes.append(pool.pop())
+    return flashes
+
+
+def random_sequence(elements, length, min_dist=0, previous=(), rng=None):
+    """Return a sequence of flashes drawn with repetition.
+
+    Every flash is drawn uniformly among the elements which did not flash
+    in the last ``min_dist`` flashes, including the ones in ``previous``.
+
+    :param elements: the elements, must be distinct
+    :type elements: sequence
+    :param length: number of flashes
+    :type length: int
+    :param min_dist: minimum number of flashes between two flashes of the
+        same element
+    :type min_dist: int
+    :param previous: flashes preceding the sequence, the last one is the
+        most recent
+    :type previous: sequence
+    :param rng: random number generator, defaults to the ``random`` module
+    :type rng: random.Random
+    :returns: list of elements
+    :raises ValueError: if the constraints cannot be met
+
+    """
+    rng = random if rng is None else rng
+    elements = list(elements)
+    if length > 0 and min_dist >= len(elements):
+        raise ValueError("No flash sequence of %d elements with a minimum distance of %d." % (len(elements), min_dist))
+    sequence = list(previous)
+    start = len(sequence)
+    for i in range(length):
+        recent = set(sequence[max(0, len(sequence) - min_dist):]) if min_dist > 0 else ()
+        allowed = [e for e in elements if e not in recent]
+        sequence.append(allowed[rng.randrange(len(allowed))])
+    return sequence[start:]
+
+
+def oddball_sequence(n, deviants, min_standards=0, rng=None):
+    """Return a sequence of standards and deviants.
+
+    Between two deviants are at least ``min_standards`` standards. The
+    sequence is drawn uniformly among all sequences meeting the constraint:
+    the standards not needed to separate the deviants are distributed
+    randomly over the gaps before, between and after the deviants.
+
+    :param n: length of the sequence
+    :type n: int
+    :param deviants: number of deviants
+    :type deviants: int
+    :param min_standards: minimum number of standards between two deviants
+    :type min_standards: int
+    :param rng: random number generator, defaults to the ``random`` module
+    :type rng: random.Random
+    :returns: list with 0 for a standard and 1 for a deviant
+    :raises ValueError: if the constraints cannot be met
+
+    """
+    rng = random if rng is None else rng
+    if deviants <= 0:
+        return [0] * n
+    free = n - deviants - (deviants - 1) * min_standards
+    if free < 0:
+        raise ValueError("No oddball sequence of %d stimuli with %d deviants and at least %d standards between them." % (n, deviants, min_standards))
+    # stars and bars: the positions of the deviants among the free standards
+    bars = sorted(rng.sample(xrange(free + deviants), deviants))
+    sequence = []
+    last = -1
+    for i, bar in enumerate(bars):
+        gap = bar - last - 1
+        if i > 0:
+            gap += min_standards
+        sequence.extend([0] * gap)
+        sequence.append(1)
+        last = bar
+    sequence.extend([0] * (n - len(sequence)))
+    return sequence
+
+
+def balanced_targets(elements, n, rng=None):
+    """Return the targets for a run of trials.
+
+    Every element is the target equally often, up to one if ``n`` is not a
+    multiple of the number of elements, the order is random.
+
+    :param elements: the possible targets
+    :type elements: sequence
+    :param n: number of trials
+    :type n: int
+    :param rng: random number generator, defaults to the ``random`` module
+    :type rng: random.Random
+    :returns: list of elements
+
+    """
+    rng = random if rng is None else rng
+    elements = list(elements)
+    targets = elements * (n // len(elements))
+    targets.extend(rng.sample(elements, n % len(elements)))
+    rng.shuffle(targets)
+    return targets
+
+
+class SequenceBuffer(object):
+    """Generates sequences ahead of time in a background thread.
+
+    The thread keeps up to ``size`` sequences ready. The sequences only
+    depend on the seed, not on the timing of the thread.
+    """
+
+    def __init__(self, generate, size=10, seed=None):
+        """Start the thread.
+
+        :param generate: returns a new sequence, gets the
+            ``random.Random`` instance as argument
+        :type generate: callable
+        :param size: number of sequences to generate ahead, for a whole
+            session use the number of trials
+        :type size: int
+        :param seed: seed of the random number generator, ``None`` for a
+            random seed
+        :type seed: hashable
+
+        """
+        self.logger = logging.getLogger("SequenceBuffer")
+        self.generate = generate
+        self.random = random.Random(seed)
+        self._queue = Queue.Queue(size)
+        self._stopped = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run)
+        self._thread.setDaemon(True)
+        self._thread.start()
+
+
+    def get(self):
+        """Return the next sequence.
+
+        Blocks until the sequence is generated or the buffer is stopped.
+
+        :returns: the sequence
+        :raises: the exception raised while generating the sequence, also
+            in all later calls, or :exc:`RuntimeError` if the buffer is
+            stopped
+
+        """
+        if self._error is not None:
+            raise self._error
+        while True:
+            if self._stopped.isSet():
+                raise RuntimeError("SequenceBuffer is stopped.")
+            try:
+                sequence, self._error = self._queue.get(timeout=0.1)
+                break
+            except Queue.Empty:
+                pass
+        if self._error is not None:
+            raise self._error
+        return sequence
+
+
+    def stop(self):
+        """Stop the thread and discard the remaining sequences."""
+        self._stopped.set()
+        try:
+            while True:
+                self._queue.get_nowait()
+        except Queue.Empty:
+            pass
+        self._thread.join()
+
+
+    def _run(self):
+        while not self._stopped.isSet():
+            try:
+                item = self.generate(self.random), None
+            except Exception, e:
+                self.logger.error("Generating a sequence failed: %s" % str(e))
+                item = None, e
+            while not self._stopped.isSet():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    break
+                except Queue.Full:
+                    pass
+            if item[1] is not None:
+                break
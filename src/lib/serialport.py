@@ -28,7 +28,8 @@
 
 
 import serial
-from threading import Timer
+
+from lib.trigger import SerialBackend, TriggerDispatcher
 
 
 class SerialPort(object):
@@ -44,7 +45,8 @@ class SerialPort(object):
         """
         self.port = serial.Serial(port=port, baudrate=baudrate)
         self.trigger_reset_time = 0.01
-        self.reset_timer = Timer(0, None)
+        # started with the first trigger, see send
+        self.dispatcher = None
 
 
     def send(self, data, reset=True):
@@ -53,17 +55,26 @@ class SerialPort(object):
         Parameters
         ----------
         data : bytevalue
+        reset : bool
+            reset the port to 0 after ``trigger_reset_time``
+
+        The data is written by a :class:`lib.trigger.TriggerDispatcher`
+        thread.
 
         """
-        if reset == True:
-            self.reset_timer.cancel()
-        self.port.write(chr(data))
-        if reset == True:
-            self.reset_timer = Timer(self.trigger_reset_time, self.send, (0, False))
-            self.reset_timer.start()
+        if self.dispatcher is None:
+            self.dispatcher = TriggerDispatcher(SerialBackend(self.port),
+                                                self.trigger_reset_time)
+            self.dispatcher.start()
+        self.dispatcher.send(data, reset)
 
     def close(self):
-        self.port.close()
+        if self.dispatcher is not None:
+            # closes the port, too
+            self.dispatcher.stop()
+            self.dispatcher = None
+        else:
+            self.port.close()
 
 
 def scan():
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+
+# benchmark_bcixml.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Benchmark of the bcixml de- and encoders.
+
+Run from the src directory::
+
+    python -m lib.test.benchmark_bcixml
+
+"""
+
+
+import time
+from xml.dom import minidom
+
+from lib import bcixml
+from lib import pylibtobiic
+
+
+# name -> signal
+SIGNALS = (
+    ("cl_output (1 float)",
+     bcixml.BciSignal({"cl_output" : 0.5}, None, bcixml.CONTROL_SIGNAL)),
+    ("cl_output (6 floats)",
+     bcixml.BciSignal({"cl_output" : [0.1, -0.2, 0.3, -0.4, 0.5, -0.6]},
+                      None, bcixml.CONTROL_SIGNAL)),
+    ("cl_output (64 floats)",
+     bcixml.BciSignal({"cl_output" : [i / 64.0 for i in range(64)]},
+                      None, bcixml.CONTROL_SIGNAL)),
+    ("interaction signal",
+     bcixml.BciSignal({"FPS" : 30, "caption" : "Feedback",
+                       "screenSize" : [800, 600], "fullscreen" : False},
+                      [(bcixml.CMD_PLAY, dict())], bcixml.INTERACTION_SIGNAL)),
+    ("getvariables reply",
+     bcixml.BciSignal({"variables" : dict(("variable%d" % i, v) for i, v in
+                                          enumerate([1, 0.5, "foo", True, [1, 2, 3], None] * 50))},
+                      None, bcixml.REPLY_SIGNAL)),
+)
+
+
+def packets_per_second(func, packet, duration=1.0):
+    """Call func(packet) repeatedly for duration seconds.
+
+    :returns: number of calls per second
+
+    """
+    n = 0
+    start = time.time()
+    end = start + duration
+    while True:
+        for i in xrange(100):
+            func(packet)
+        n += 100
+        now = time.time()
+        if now >= end:
+            return n / (now - start)
+
+
+def compare(title, funcs, packets, duration):
+    """Print packets/second of funcs for all packets.
+
+    :param funcs: tuples (name, function); the first one is the reference.
+    :param packets: tuples (name, packet)
+
+    """
+    print title
+    print "%-25s" % "" + "".join(["%12s" % name for name, f in funcs]) + "%9s" % "speedup"
+    for name, packet in packets:
+        pps = [packets_per_second(f, packet, duration) for n, f in funcs]
+        print "%-25s" % name + "".join(["%12.0f" % p for p in pps]) + "%8.1fx" % (pps[-1] / pps[0])
+    print
+
+
+def benchmark_decoders(duration=1.0):
+    """Compare the DOM and the streaming decoder."""
+    encoder = bcixml.XmlEncoder()
+    packets = [(name, encoder.encode_packet(signal)) for name, signal in SIGNALS]
+    compare("Decoding (packets/second)",
+            (("minidom", bcixml.XmlDecoder().decode_packet),
+             ("streaming", bcixml.StreamingXmlDecoder().decode_packet)),
+            packets, duration)
+
+
+def benchmark_encoders(duration=1.0):
+    """Compare the DOM and the cached encoder."""
+    compare("Encoding (packets/second)",
+            (("minidom", bcixml.XmlEncoder().encode_packet),
+             ("cached", bcixml.CachedXmlEncoder().encode_packet)),
+            SIGNALS, duration)
+
+
+def benchmark_binary(duration=1.0):
+    """Compare the binary protocol with bcixml."""
+    xmlencoder = bcixml.CachedXmlEncoder()
+    xmldecoder = bcixml.StreamingXmlDecoder()
+    binencoder = bcixml.BinaryEncoder()
+    bindecoder = bcixml.BinaryDecoder()
+    print "Binary protocol vs. bcixml"
+    print "%-25s %12s %12s %12s %12s" % ("", "xml bytes", "binary bytes", "xml dec/s", "binary dec/s")
+    for name, signal in SIGNALS:
+        xml = xmlencoder.encode_packet(signal)
+        packet = binencoder.encode_packet(signal)
+        print "%-25s %12i %12i %12.0f %12.0f" % (name, len(xml), len(packet),
+            packets_per_second(xmldecoder.decode_packet, xml, duration),
+            packets_per_second(bindecoder.decode_packet, packet, duration))
+    print
+
+
+def tobiic_packet(nclassifiers, nclasses):
+    """Return a TOBI iC packet with the given number of classifiers and
+    classes per classifier."""
+    icmessage = pylibtobiic.ICMessage()
+    for i in range(nclassifiers):
+        classifier = pylibtobiic.ICClassifier(u"classifier%i" % i, u"benchmark",
+                                              pylibtobiic.ICClassifier.ValueProb,
+                                              pylibtobiic.ICClassifier.LabelClass)
+        for j in range(nclasses):
+            classifier.classes.Add(pylibtobiic.ICClass(u"class%i" % j, 1.0 / (j + 1)))
+        icmessage.classifiers.Add(classifier)
+    return pylibtobiic.ICSerializer(icmessage).Serialize()
+
+
+def legacy_tobiic_decode(packet):
+    """The previous TOBI iC decoding path (without its console output): parse
+    once to find the root element, then deserialize into a new ICMessage."""
+    dom = minidom.parseString(packet)
+    assert dom.documentElement.nodeName == "messagec"
+    icmessage = pylibtobiic.ICMessage()
+    pylibtobiic.ICSerializer(icmessage, True).Deserialize(packet)
+    for classifier_name in icmessage.classifiers.map.keys():
+        classifier_data = icmessage.classifiers.map[classifier_name]
+        values = []
+        for class_name in classifier_data.classes.map.keys():
+            values.append(classifier_data.classes.map[class_name].GetValue())
+        break
+    return bcixml.BciSignal({u'cl_output' : values}, [], bcixml.CONTROL_SIGNAL)
+
+
+def benchmark_tobiic(duration=1.0):
+    """Compare the old and the new TOBI iC decoding path."""
+    packets = [("%i classifier(s) x %i" % (n, m), tobiic_packet(n, m))
+               for n, m in ((1, 2), (4, 8), (16, 16))]
+    compare("TOBI iC decoding (packets/second)",
+            (("legacy", legacy_tobiic_decode),
+             ("streaming", bcixml.TobiXmlDecoder().decode_packet)),
+            packets, duration)
+
+
+def main():
+    benchmark_decoders()
+    benchmark_encoders()
+    benchmark_binary()
+    benchmark_tobiic()
+
+
+if __name__ == "__main__":
+    main()
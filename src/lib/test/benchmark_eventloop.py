@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+# benchmark_eventloop.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Latency benchmark of :func:`asyncore.loop` and :class:`lib.eventloop.EventLoop`.
+
+A UDP echo dispatcher runs in the loop, a client measures the round trip
+time of small datagrams. The loop also services a number of idle IPC
+channels, like a Feedback Controller with several peers. Run from the src
+directory::
+
+    python -m lib.test.benchmark_eventloop
+
+"""
+
+
+import asyncore
+import select
+import socket
+import threading
+import time
+
+from lib import ipc
+from lib.eventloop import EventLoop, POLLERS
+from lib.test.test_ipc import socketpair
+
+
+class Echo(asyncore.dispatcher):
+    """Sends every datagram back."""
+
+    def __init__(self, map):
+        asyncore.dispatcher.__init__(self, map=map)
+        self.create_socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.bind(("127.0.0.1", 0))
+
+    def writable(self):
+        return False
+
+    def handle_read(self):
+        data, address = self.recvfrom(1024)
+        self.socket.sendto(data, address)
+
+
+def round_trip(poller, idle, n=2000):
+    """Return mean and maximum round trip time in milliseconds."""
+    map = dict()
+    echo = Echo(map)
+    channels = []
+    for i in range(idle):
+        a, b = socketpair()
+        channels.append(ipc.IPCChannel(a, map))
+        channels.append(ipc.IPCChannel(b, map))
+    if poller == "asyncore":
+        loop = None
+        thread = threading.Thread(target=asyncore.loop, args=(0.1, False, map))
+    else:
+        loop = EventLoop(map, poller)
+        thread = threading.Thread(target=loop.run)
+    thread.start()
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    times = []
+    for i in xrange(n):
+        start = time.time()
+        client.sendto("ping", echo.getsockname())
+        client.recv(1024)
+        times.append(time.time() - start)
+    client.close()
+    # closing all channels ends both loops
+    for channel in channels + [echo]:
+        channel.close()
+    if loop:
+        loop.stop()
+    thread.join()
+    return 1000 * sum(times) / n, 1000 * max(times)
+
+
+def main():
+    pollers = ["asyncore"] + [p for p in POLLERS if hasattr(select, p)]
+    print "%-10s %8s %15s %15s" % ("", "idle", "rtt mean [ms]", "rtt max [ms]")
+    for idle in 0, 200:
+        for poller in pollers:
+            mean, maximum = round_trip(poller, idle)
+            print "%-10s %8i %15.3f %15.3f" % (poller, 2 * idle, mean, maximum)
+
+
+if __name__ == "__main__":
+    main()
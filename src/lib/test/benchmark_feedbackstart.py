@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+# benchmark_feedbackstart.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Benchmark of cold and warm Feedback starts.
+
+Starts a Feedback several times in new processes and in warm processes of a
+:class:`lib.feedbackprocesscontroller.FeedbackProcessPool`. Must not run
+while a Feedback Controller is running, since it uses the IPC port. Run from
+the src directory::
+
+    python -m lib.test.benchmark_feedbackstart [module.Class]
+
+"""
+
+
+import logging
+import socket
+import sys
+
+from lib import ipc
+from lib.feedbackprocesscontroller import FeedbackProcessController
+from FeedbackBase.Feedback import Feedback
+
+
+def start_times(server, modname, classname, poolsize, n=10):
+    """Return the times in seconds needed to start the Feedback n times."""
+    fpc = FeedbackProcessController([], Feedback, 0.1, poolsize=poolsize)
+    fpc.pluginController.availablePlugins[classname] = modname
+    try:
+        for i in range(n):
+            fpc.start_feedback(classname, None)
+            server.accept()[0].close()
+            fpc.stop_feedback()
+    finally:
+        fpc.close()
+    return [t for name, warm, t in fpc.start_times]
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    modname, classname = "FeedbackBase.Feedback", "Feedback"
+    if len(sys.argv) > 1:
+        modname, classname = sys.argv[1].rsplit(".", 1)
+    # The Feedbacks connect to the Feedback Controller's IPC port
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind((ipc.LOCALHOST, ipc.IPC_PORT))
+    server.listen(1)
+    print "%-10s %15s %15s" % ("", "mean [ms]", "max [ms]")
+    for name, poolsize in ("cold", 0), ("warm", 1):
+        times = start_times(server, modname, classname, poolsize)
+        print "%-10s %15.1f %15.1f" % (name, 1000 * sum(times) / len(times),
+                                       1000 * max(times))
+    server.close()
+
+
+if __name__ == "__main__":
+    main()
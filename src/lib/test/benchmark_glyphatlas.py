@@ -0,0 +1,99 @@
+# benchmark_glyphatlas.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Benchmark of symbol changes in an RSVP sequence.
+
+Shows the symbols of an RSVP speller burst one after the other in the screen
+center, like ``VisionEggView.center_word`` does, once creating a
+``VisionEgg.Text.Text`` per symbol like ``ColorWord`` did and once with the
+glyph atlas of :class:`lib.vision_egg.model.color_word.ColorWord`. Reports
+the latency of a symbol change (setting the text and drawing the first frame
+with it). Needs a display. Run from the src directory::
+
+    python -m lib.test.benchmark_glyphatlas
+
+"""
+
+
+import random
+import time
+
+import VisionEgg
+from VisionEgg.Core import Screen, Viewport
+from VisionEgg.Text import Text
+
+from lib.vision_egg.model.color_word import ColorWord
+from lib.vision_egg.model.text_list import TextList
+
+
+SYMBOLS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ_.,<"
+BURSTS = 20
+SIZE = 72
+COLOR = (1.0, 1.0, 1.0, 1.0)
+
+
+class TextWord(TextList):
+    """The previous ColorWord: new Text objects on every change."""
+
+    def show(self, text):
+        self.clear()
+        for letter in text:
+            self.append(Text(font_size=SIZE, text=letter, anchor='bottom'))
+            self._rearrange()
+        self.set_all(color=COLOR)
+
+
+class AtlasWord(ColorWord):
+
+    def show(self, text):
+        self.set(text=text, colors=[COLOR] * len(text))
+
+
+def sequence():
+    rng = random.Random(42)
+    symbols = []
+    for i in xrange(BURSTS):
+        burst = list(SYMBOLS)
+        rng.shuffle(burst)
+        symbols.extend(burst)
+    return symbols
+
+
+def main():
+    screen = Screen(size=(640, 480), sync_swap=False)
+    center = (320., 240.)
+    symbols = sequence()
+    for name, word in (("text", TextWord(center)),
+                       ("atlas", AtlasWord(center, symbol_size=SIZE))):
+        viewport = Viewport(screen=screen, stimuli=word)
+        latencies = []
+        for symbol in symbols:
+            t = time.time()
+            word.show(symbol)
+            screen.clear()
+            viewport.draw()
+            VisionEgg.Core.swap_buffers()
+            latencies.append(time.time() - t)
+        latencies.sort()
+        print "%-10s %8.3f ms/symbol (median), %8.3f ms (max)" % (
+            name, 1000 * latencies[len(latencies) // 2], 1000 * latencies[-1])
+    screen.close()
+
+
+if __name__ == "__main__":
+    main()
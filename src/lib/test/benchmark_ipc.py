@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+# benchmark_ipc.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Benchmark of the IPC channel between Feedback Controller and Feedback.
+
+Compares the length-prefixed framing of :class:`lib.ipc.IPCChannel` with the
+terminator based framing used before. Run from the src directory::
+
+    python -m lib.test.benchmark_ipc
+
+"""
+
+
+import asyncore
+import asynchat
+import cPickle as pickle
+import time
+
+from lib import ipc
+from lib import bcixml
+from lib.test.test_ipc import socketpair
+
+
+class TerminatorIPCChannel(asynchat.async_chat):
+    """The old IPC channel, framing messages with a terminator."""
+
+    TERMINATOR = "\r\n\r\n"
+
+    def __init__(self, conn):
+        asynchat.async_chat.__init__(self, conn)
+        self.set_terminator(self.TERMINATOR)
+        self.ibuf = ""
+
+    def collect_incoming_data(self, data):
+        self.ibuf += data
+
+    def found_terminator(self):
+        dump = self.ibuf
+        self.ibuf = ""
+        self.handle_message(pickle.loads(dump))
+
+    def send_message(self, message):
+        dump = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+        self.push(dump + self.TERMINATOR)
+
+
+def make_channels(base):
+    """Return a connected (sender, echoing receiver) pair of channels."""
+
+    class Sender(base):
+        def __init__(self, conn):
+            base.__init__(self, conn)
+            self.received = 0
+        def handle_message(self, message):
+            self.received += 1
+
+    class Echo(base):
+        def __init__(self, conn):
+            base.__init__(self, conn)
+            self.received = 0
+        def handle_message(self, message):
+            self.received += 1
+            if message.type == bcixml.REPLY_SIGNAL:
+                self.send_message(message)
+
+    a, b = socketpair()
+    return Sender(a), Echo(b)
+
+
+def wait_until(predicate):
+    while not predicate():
+        asyncore.loop(timeout=0.001, count=1)
+
+
+def round_trip(base, n=2000):
+    """Return mean and maximum round trip time in milliseconds."""
+    sender, echo = make_channels(base)
+    signal = bcixml.BciSignal({"cl_output" : [0.1] * 6}, None, bcixml.REPLY_SIGNAL)
+    times = []
+    for i in xrange(n):
+        start = time.time()
+        sender.send_message(signal)
+        wait_until(lambda: sender.received > i)
+        times.append(time.time() - start)
+    sender.close()
+    echo.close()
+    return 1000 * sum(times) / n, 1000 * max(times)
+
+
+def throughput(base, signal, n):
+    """Return the number of messages per second sent in one direction."""
+    sender, echo = make_channels(base)
+    start = time.time()
+    for i in xrange(n):
+        sender.send_message(signal)
+        # let the loop run from time to time to avoid huge output buffers
+        if i % 100 == 0:
+            asyncore.loop(timeout=0, count=1)
+    wait_until(lambda: echo.received == n)
+    elapsed = time.time() - start
+    sender.close()
+    echo.close()
+    return n / elapsed
+
+
+def main():
+    cs = bcixml.BciSignal({"cl_output" : [0.1] * 6}, None, bcixml.CONTROL_SIGNAL)
+    large = bcixml.BciSignal({"variables" : dict(("v%i" % i, [0.5] * 100) for i in range(100))},
+                             None, bcixml.CONTROL_SIGNAL)
+    channels = (("terminator", TerminatorIPCChannel), ("length-prefixed", ipc.IPCChannel))
+    print "%-20s %15s %15s %15s %15s" % ("", "rtt mean [ms]", "rtt max [ms]",
+                                         "cs [msg/s]", "90kB [msg/s]")
+    for name, base in channels:
+        mean, maximum = round_trip(base)
+        print "%-20s %15.3f %15.3f %15.0f %15.0f" % (name, mean, maximum,
+            throughput(base, cs, 20000), throughput(base, large, 200))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+# benchmark_markerstream.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Benchmark of per-marker UDP datagrams and the batched marker stream.
+
+Sends markers as fast as possible, once with one ``sendto`` per marker like
+``Feedback.send_udp`` and once with a :class:`lib.markerstream.MarkerStream`,
+and counts the time spent in the sending thread and the datagrams received.
+Run from the src directory::
+
+    python -m lib.test.benchmark_markerstream
+
+"""
+
+
+import socket
+import time
+
+from lib.markerstream import MarkerStream
+
+
+def receive(recorder):
+    """Return the number of datagrams waiting at the recorder."""
+    n = 0
+    recorder.settimeout(0.1)
+    try:
+        while True:
+            recorder.recv(65536)
+            n += 1
+    except socket.timeout:
+        pass
+    return n
+
+
+def run(name, recorder, n):
+    address = recorder.getsockname()
+    if name == "sendto":
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        send = lambda marker: s.sendto(marker + '\n', address)
+    else:
+        stream = MarkerStream(address[0], address[1], 0.01)
+        stream.start()
+        send = stream.send
+    start = time.time()
+    for i in xrange(n):
+        send("S%i" % (i % 100))
+        # leave the flush thread a chance to run, like a Feedback does
+        if i % 100 == 0:
+            time.sleep(0.001)
+    elapsed = time.time() - start
+    if name == "sendto":
+        s.close()
+    else:
+        stream.close()
+    return elapsed, receive(recorder)
+
+
+def main():
+    recorder = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    recorder.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    recorder.bind(("127.0.0.1", 0))
+    n = 20000
+    print "%-10s %18s %12s" % ("", "per marker [us]", "datagrams")
+    for name in "sendto", "stream":
+        elapsed, datagrams = run(name, recorder, n)
+        print "%-10s %18.2f %12i" % (name, 1e6 * (elapsed - n / 100 * 0.001) / n, datagrams)
+    recorder.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+# benchmark_scheduler.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Benchmark of stimulus onset timing.
+
+Presents a 10 Hz RSVP sequence on a simulated 60 Hz display whose swaps
+block until the next retrace, once with the busy-waiting loop of the old
+``StimulusPainter._time_wait`` and once with a
+:class:`lib.scheduler.StimulusScheduler`. Reports the onset errors and the
+CPU usage. Run from the src directory::
+
+    python -m lib.test.benchmark_scheduler
+
+"""
+
+
+import os
+from datetime import datetime, timedelta
+
+from lib.clock import monotonic
+from lib.scheduler import StimulusScheduler
+from lib.test.test_scheduler import SimulatedDisplay
+
+
+def legacy(display, durations):
+    """The old StimulusPainter with fixed wait style."""
+    errors = []
+    last_start = datetime.now()
+    display.present()
+    for duration in durations:
+        next_start = last_start + timedelta(seconds=duration)
+        while next_start - datetime.now() > timedelta():
+            pass
+        last_start = next_start
+        target = monotonic() - (datetime.now() - next_start).total_seconds()
+        errors.append(display.present() - target)
+    return errors
+
+
+def scheduled(display, durations):
+    scheduler = StimulusScheduler(60)
+    scheduler.start()
+    scheduler.onset(display.present())
+    for duration in durations:
+        scheduler.wait(duration)
+        scheduler.onset(display.present())
+    return scheduler.onset_errors
+
+
+def main():
+    durations = [0.1] * 50
+    print "%-10s %12s %12s %12s %8s" % ("", "mean [ms]", "std [ms]",
+                                        "max [ms]", "cpu")
+    for name, painter in ("busy-wait", legacy), ("scheduler", scheduled):
+        display = SimulatedDisplay(60, 0.002)
+        t, cpu = monotonic(), sum(os.times()[:2])
+        errors = painter(display, durations)
+        t, cpu = monotonic() - t, sum(os.times()[:2]) - cpu
+        mean = sum(errors) / len(errors)
+        std = (sum((e - mean) ** 2 for e in errors) / len(errors)) ** 0.5
+        print "%-10s %12.2f %12.2f %12.2f %7.0f%%" % (name, 1000 * mean,
+                1000 * std, 1000 * max(abs(e) for e in errors), 100 * cpu / t)
+
+
+if __name__ == "__main__":
+    main()
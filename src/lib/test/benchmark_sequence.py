@@ -0,0 +1,104 @@
+# benchmark_sequence.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Benchmark of the stimulus sequence generators.
+
+Generates the flash sequences of a speller session like
+``VisualSpellerVE`` and the blocks of an oddball run with a tight
+deviant-deviant distance, once with the element by element and rejection
+sampling algorithms the Feedbacks used before and once with
+:mod:`lib.sequence`. Reports the mean and maximum time per trial or block.
+Run from the src directory::
+
+    python -m lib.test.benchmark_sequence
+
+"""
+
+
+import random
+import time
+
+from lib.sequence import flash_sequence, oddball_sequence
+
+
+TRIALS = 200
+ELEMENTS = 6
+REPETITIONS = 10
+MIN_DIST = 4
+BLOCKS = 50
+BLOCK_LENGTH = 60
+DEVIANTS = 15
+DD_DIST = 3
+
+
+def legacy_flash_sequence(rng):
+    """The sequence of a trial as generated by random_flash_sequence."""
+    flashes = []
+    for i in range(REPETITIONS):
+        elements = range(ELEMENTS)
+        for j in range(ELEMENTS):
+            subset = elements[:]
+            for k in range(MIN_DIST):
+                if len(flashes) > k and flashes[-1 - k] in subset:
+                    subset.remove(flashes[-1 - k])
+            if not subset:
+                # the old generator raised here, start the trial over
+                return legacy_flash_sequence(rng)
+            e = rng.sample(subset, 1)[0]
+            flashes.append(e)
+            elements.remove(e)
+    return flashes
+
+
+def legacy_oddball_sequence(rng):
+    """A block as generated by Oddball.contrained_oddball_sequence."""
+    devs = -1
+    while devs != DEVIANTS:
+        sequence = [0] * BLOCK_LENGTH
+        togo_devs = DEVIANTS
+        ptr = 0
+        while ptr < BLOCK_LENGTH:
+            prob = togo_devs / float((BLOCK_LENGTH - ptr) // 2 or 1)
+            if rng.random() < prob:
+                sequence[ptr] = 1
+                togo_devs -= 1
+                ptr += DD_DIST
+            ptr += 1
+        devs = sum(sequence)
+    return sequence
+
+
+def measure(name, generate, n):
+    rng = random.Random(42)
+    times = []
+    for i in xrange(n):
+        t = time.time()
+        generate(rng)
+        times.append(time.time() - t)
+    print "%-20s mean %8.3f ms   max %8.3f ms" % (name, 1000 * sum(times) / n, 1000 * max(times))
+
+
+def main():
+    measure("legacy flashes", legacy_flash_sequence, TRIALS)
+    measure("flash_sequence", lambda rng: flash_sequence(range(ELEMENTS), REPETITIONS, MIN_DIST, rng=rng), TRIALS)
+    measure("legacy oddball", legacy_oddball_sequence, BLOCKS)
+    measure("oddball_sequence", lambda rng: oddball_sequence(BLOCK_LENGTH, DEVIANTS, DD_DIST, rng), BLOCKS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmark_textcache.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Benchmark of text rendering.
+
+Redraws a countdown and feedback screen (a countdown number, a hit/miss
+score and a spelled text) into an offscreen surface, once creating the font
+and rendering the texts on every frame like ``Oddball.do_print`` did and once
+with a :class:`lib.textcache.TextCache`. Reports the time per frame and the
+hit rate of the cache. Run from the src directory::
+
+    python -m lib.test.benchmark_textcache
+
+"""
+
+
+import time
+
+import pygame
+
+from lib.textcache import TextCache
+
+
+FRAMES = 600
+FPS = 60
+COLOR = (255, 255, 255)
+BACKGROUND = (0, 0, 0)
+
+
+def texts(frame):
+    """The texts of a frame, they change once per second."""
+    second = frame // FPS
+    return [(str(10 - second % 10), 120),
+            ("Hits: %i  Misses: %i" % (second, second // 3), 40),
+            ("THE QUICK BROWN FOX"[:second % 20], 40)]
+
+
+def uncached(screen, frame):
+    for i, (text, size) in enumerate(texts(frame)):
+        font = pygame.font.Font(None, size)
+        surface = font.render(text, 1, COLOR, BACKGROUND)
+        screen.blit(surface, surface.get_rect(center=(400, 150 + 150 * i)))
+
+
+def cached(screen, frame, cache=TextCache()):
+    for i, (text, size) in enumerate(texts(frame)):
+        surface = cache.render(text, size, COLOR, BACKGROUND)
+        screen.blit(surface, surface.get_rect(center=(400, 150 + 150 * i)))
+    return cache
+
+
+def main():
+    pygame.font.init()
+    screen = pygame.Surface((800, 600))
+    for name, redraw in ("uncached", uncached), ("cached", cached):
+        t = time.time()
+        for frame in xrange(FRAMES):
+            screen.fill(BACKGROUND)
+            redraw(screen, frame)
+        t = time.time() - t
+        print "%-10s %8.3f ms/frame" % (name, 1000 * t / FRAMES)
+    print "hit rate: %.1f%%" % (100 * cached(screen, 0).get_statistics()['hit_rate'])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmark_transformcache.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Benchmark of rotating stimuli.
+
+Rotates a LibetClock clock hand for a 1920x1080 screen by a different angle
+every frame, once with ``pygame.transform.rotate`` like
+``LibetClock.trial_tick`` did and once with the rotations of a
+:class:`lib.transformcache.RotationCache`. Reports the time per frame, the
+time to render the rotations and their memory. Run from the src directory::
+
+    python -m lib.test.benchmark_transformcache
+
+"""
+
+
+import time
+
+import pygame
+
+from lib.transformcache import RotationCache
+
+
+FRAMES = 600
+DEGREES_PER_FRAME = 2.3
+SIZE = 1080
+BACKGROUND = (0, 0, 0)
+
+
+def clockhand():
+    diameter = int(SIZE / 5) * 2
+    surface = pygame.Surface((diameter, diameter))
+    surface.fill(BACKGROUND)
+    surface.set_colorkey(BACKGROUND)
+    pygame.draw.line(surface, (200, 200, 200), (diameter / 2, 0), (diameter / 2, diameter / 2), 4)
+    return surface
+
+
+def main():
+    screen = pygame.Surface((1920, 1080))
+    center = screen.get_rect().center
+    hand = clockhand()
+
+    t = time.time()
+    for frame in xrange(FRAMES):
+        rotated = pygame.transform.rotate(hand, -frame * DEGREES_PER_FRAME)
+        screen.blit(rotated, rotated.get_rect(center=center))
+    t = time.time() - t
+    print "%-10s %8.3f ms/frame" % ("rotate", 1000 * t / FRAMES)
+
+    t = time.time()
+    rotations = RotationCache(hand, 1.0)
+    rotations.build()
+    print "%-10s %8.3f s, %.1f MB" % ("build", time.time() - t, rotations.get_bytes() / 1024.0 ** 2)
+    t = time.time()
+    for frame in xrange(FRAMES):
+        rotated, (dx, dy) = rotations.get(-frame * DEGREES_PER_FRAME)
+        screen.blit(rotated, (center[0] + dx, center[1] + dy))
+    t = time.time() - t
+    print "%-10s %8.3f ms/frame" % ("cached", 1000 * t / FRAMES)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+# benchmark_trigger.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Benchmark of the trigger output.
+
+Sends rapid-fire triggers, like a P300 speller flashing every few
+milliseconds, once with a :class:`threading.Timer` per reset like the old
+``Feedback.send_parallel`` and once with a
+:class:`lib.trigger.TriggerDispatcher`. Measures the time spent in the
+calling thread, the error of the reset time and the number of threads
+started. Run from the src directory::
+
+    python -m lib.test.benchmark_trigger
+
+"""
+
+
+import datetime
+import logging
+import threading
+import time
+
+from lib import trigger
+from lib.test.test_trigger import RecordingBackend
+
+
+RESET_TIME = 0.01
+
+
+class TimerTrigger(object):
+    """The old trigger output with a Timer thread per reset."""
+
+    def __init__(self, backend):
+        self.logger = logging.getLogger("Trigger")
+        self.backend = backend
+        self.timer = threading.Timer(0, None)
+        self.threads = 0
+
+    def send(self, data, reset=True):
+        self.logger.info("Trigger: %s :%s" % (str(datetime.datetime.now()), str(data)))
+        if reset:
+            self.timer.cancel()
+        self.backend.write(data)
+        if reset:
+            self.timer = threading.Timer(RESET_TIME, self.send, (0, False))
+            self.timer.start()
+            self.threads += 1
+
+    def stop(self):
+        self.timer.join()
+
+
+def run(name, n=500, interval=0.002):
+    """Send n triggers with pauses of ``interval`` seconds, every tenth
+    trigger is followed by a pause long enough for the reset."""
+    backend = RecordingBackend()
+    if name == "timer":
+        sender = TimerTrigger(backend)
+    else:
+        sender = trigger.TriggerDispatcher(backend, RESET_TIME)
+        sender.start()
+    threads = threading.activeCount()
+    maxthreads = threads
+    calls = []
+    for i in xrange(n):
+        start = time.time()
+        sender.send(1 + i % 250)
+        calls.append(time.time() - start)
+        maxthreads = max(maxthreads, threading.activeCount())
+        time.sleep(interval if i % 10 else 2 * RESET_TIME)
+    time.sleep(2 * RESET_TIME)
+    sender.stop()
+    # reset error: time between a reset and the preceding trigger minus the
+    # reset time
+    errors = []
+    for (t1, v1), (t2, v2) in zip(backend.written, backend.written[1:]):
+        if v2 == 0 and v1 != 0:
+            errors.append(t2 - t1 - RESET_TIME)
+    started = sender.threads if name == "timer" else 1
+    return calls, errors, started, maxthreads - threads
+
+
+def main():
+    print "%-12s %14s %14s %14s %14s %9s %9s" % ("", "call [us]",
+            "call max [us]", "reset err [ms]", "err max [ms]", "threads",
+            "parallel")
+    for name in "timer", "dispatcher":
+        calls, errors, started, parallel = run(name)
+        print "%-12s %14.1f %14.1f %14.3f %14.3f %9i %9i" % (name,
+                1e6 * sum(calls) / len(calls), 1e6 * max(calls),
+                1e3 * sum(errors) / len(errors), 1e3 * max(errors), started,
+                parallel)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# test_accumulator.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+import random
+import math
+
+from lib.accumulator import ScoreAccumulator, MarginRule, TTestRule, never_stop, simulate
+
+
+class ScoreAccumulatorTestCase(unittest.TestCase):
+
+    def testStatistics(self):
+        """Should compute the means and variances of the elements."""
+        rng = random.Random(1)
+        scores = [[rng.gauss(i, 1) for j in range(7)] for i in range(4)]
+        acc = ScoreAccumulator(4, 5)
+        for j in range(7):
+            for i in range(4):
+                acc.add(i, scores[i][j])
+        self.assertEqual(acc.total(), 28)
+        self.assertEqual(acc.sequences(), 7)
+        for i in range(4):
+            mean = sum(scores[i]) / 7
+            variance = sum((s - mean) ** 2 for s in scores[i]) / 6
+            self.assertAlmostEqual(acc.means()[i], mean)
+            self.assertAlmostEqual(acc.variances()[i], variance)
+            self.assertEqual(list(acc.scores(i)), scores[i])
+
+    def testDecide(self):
+        """Should select the element with the best mean."""
+        acc = ScoreAccumulator(3, 2)
+        self.assertEqual(acc.decide(), (None, None))
+        for element, score in (0, 1.0), (1, -2.0), (2, 0.5):
+            acc.add(element, score)
+        self.assertEqual(acc.decide(), (1, -2.0))
+        self.assertEqual(list(acc.ranking()), [1, 2, 0])
+        acc = ScoreAccumulator(3, 2, lower_is_better=False)
+        acc.add(0, 1.0)
+        self.assertEqual(acc.decide(), (0, 1.0))
+        # elements without scores come last
+        self.assertEqual(acc.ranking()[0], 0)
+        self.assertTrue(math.isnan(acc.means()[1]))
+
+    def testReset(self):
+        """Should remove all scores."""
+        acc = ScoreAccumulator(2, 2)
+        acc.add(0, 1.0)
+        acc.add(1, 2.0)
+        acc.reset()
+        self.assertEqual(acc.total(), 0)
+        self.assertEqual(acc.sequences(), 0)
+        acc.add(1, 3.0)
+        self.assertEqual(acc.decide(), (1, 3.0))
+
+
+class StoppingRuleTestCase(unittest.TestCase):
+
+    def stream(self, target, separation, sequences, seed):
+        """Scores of a trial with 6 elements, the target is lower."""
+        rng = random.Random(seed)
+        for j in range(sequences):
+            for i in range(6):
+                yield i, rng.gauss(-separation if i == target else 0, 1)
+
+    def testNeverStop(self):
+        """Should use all sequences."""
+        self.assertEqual(simulate(self.stream(2, 5, 10, 1), 6, 10, never_stop), (2, 10))
+
+    def testTTestRule(self):
+        """Should stop early for well separated scores only."""
+        element, sequences = simulate(self.stream(2, 5, 10, 2), 6, 10, TTestRule(3))
+        self.assertEqual(element, 2)
+        self.assertTrue(2 <= sequences < 10)
+        element, sequences = simulate(self.stream(2, 0, 10, 3), 6, 10, TTestRule(10))
+        self.assertEqual(sequences, 10)
+
+    def testMarginRule(self):
+        """Should stop as soon as the margin is reached."""
+        stream = [(0, -1.0), (1, 0.0), (0, -1.0), (1, 1.0)]
+        self.assertEqual(simulate(stream, 2, 2, MarginRule(1.0)), (0, 1))
+        self.assertEqual(simulate(stream, 2, 2, MarginRule(1.5)), (0, 2))
+        self.assertEqual(simulate(stream, 2, 2, MarginRule(1.0, min_sequences=2)), (0, 2))
+
+
+def suite():
+    testSuite = unittest.makeSuite(ScoreAccumulatorTestCase)
+    testSuite.addTest(unittest.makeSuite(StoppingRuleTestCase))
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# test_binaryprotocol.py -
+# encoding: utf8
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+
+from lib import bcixml
+
+
+class BinaryProtocolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.encoder = bcixml.BinaryEncoder()
+        self.decoder = bcixml.BinaryDecoder()
+
+    def testValues(self):
+        """Should correctly en/decode all supported types."""
+        values = [True, False, 1, -2**62, 1.5, long(1), 2**100, 1+2j, "foo",
+                  u"ß", None, [], [1], [1, 2, 3], [0.5, -1.25], [1, 2.0],
+                  [True, False], (), (1,), (1, 2, 3), set([1, 2, 3]),
+                  frozenset([1, 2, 3]), {"foo" : 1, 2 : "bar"},
+                  [[], [1], [1, [1, 2]]], ((), (1), (1, (1, 2))),
+                  {"foo" : 1, "bratwurst" : {"bar" : 2, "baz" : 3}}]
+        for value in values:
+            self.__convert_and_compare("somename", value)
+
+    def testUnicodeName(self):
+        """Should correctly en/decode unicode names."""
+        self.__convert_and_compare(u"ß", 1)
+
+    def testUnsupported(self):
+        """Should ignore unsupported Datatypes."""
+        class Foo(object):
+            pass
+        signal = bcixml.BciSignal({"foo" : Foo(), "bar" : [Foo()], "baz" : 1},
+                                  None, bcixml.INTERACTION_SIGNAL)
+        signal2 = self.decoder.decode_packet(self.encoder.encode_packet(signal))
+        self.assertEqual(signal2.data, {"baz" : 1})
+
+    def testSignalTypes(self):
+        """Should support all signal types."""
+        for type in bcixml.CONTROL_SIGNAL, bcixml.INTERACTION_SIGNAL, bcixml.REPLY_SIGNAL:
+            signal = bcixml.BciSignal({"foo" : "bar"}, None, type)
+            signal2 = self.decoder.decode_packet(self.encoder.encode_packet(signal))
+            self.assertEqual(signal2.type, type)
+            self.assertEqual(signal2.data, signal.data)
+
+    def testCommands(self):
+        """Should support Commands with arguments."""
+        signal = bcixml.BciSignal(None, [(bcixml.CMD_PLAY, dict()),
+                                         (bcixml.CMD_SAVE_VARIABLES, {"filename" : "foo"})],
+                                  bcixml.INTERACTION_SIGNAL)
+        signal2 = self.decoder.decode_packet(self.encoder.encode_packet(signal))
+        self.assertEqual(signal2.commands, signal.commands)
+
+    def testPackedArray(self):
+        """Should write lists of floats as packed array."""
+        signal = bcixml.BciSignal({"cl_output" : [0.1] * 100}, None,
+                                  bcixml.CONTROL_SIGNAL)
+        packet = self.encoder.encode_packet(signal)
+        self.assertTrue(len(packet) < 100 * 8 + 50)
+
+    def testNumpy(self):
+        """Should write numpy scalars and arrays as their Python types."""
+        try:
+            import numpy
+        except ImportError:
+            return
+        data = {"cl_output" : numpy.float64(0.5),
+                "l" : [numpy.float64(1.0), 2.0],
+                "i" : [numpy.int32(1), 2],
+                "a" : numpy.array([0.25, -1.0]),
+                "n" : numpy.int16(-3),
+                "b" : numpy.bool_(True)}
+        signal = bcixml.BciSignal(data, None, bcixml.CONTROL_SIGNAL)
+        signal2 = self.decoder.decode_packet(self.encoder.encode_packet(signal))
+        expected = {"cl_output" : 0.5, "l" : [1.0, 2.0], "i" : [1, 2],
+                    "a" : [0.25, -1.0], "n" : -3, "b" : True}
+        self.assertEqual(signal2.data, expected)
+        for name, value in expected.iteritems():
+            self.assertEqual(type(signal2.data[name]), type(value))
+
+    def testEncodeUnsupportedSignalType(self):
+        """Should throw an Exception on encoding an unknown signal type."""
+        signal = bcixml.BciSignal(None, None, "foo")
+        self.assertRaises(bcixml.EncodingError, self.encoder.encode_packet, signal)
+
+    def testDecodeMalformed(self):
+        """Should throw an Exception on decoding malformed packets."""
+        signal = bcixml.BciSignal({"cl_output" : [0.1, 0.2], "foo" : "bar"},
+                                  None, bcixml.CONTROL_SIGNAL)
+        packet = self.encoder.encode_packet(signal)
+        self.assertRaises(bcixml.DecodingError, self.decoder.decode_packet, "")
+        self.assertRaises(bcixml.DecodingError, self.decoder.decode_packet, "<bci-signal/>")
+        self.assertRaises(bcixml.DecodingError, self.decoder.decode_packet, packet[:-1])
+        self.assertRaises(bcixml.DecodingError, self.decoder.decode_packet, packet + "x")
+        # wrong version
+        self.assertRaises(bcixml.DecodingError, self.decoder.decode_packet,
+                          packet[:2] + chr(bcixml.BINARY_VERSION + 1) + packet[3:])
+        # truncated body with matching length in header
+        body = packet[8:-1]
+        packet2 = packet[:4] + chr(len(body)) + "\0\0\0" + body
+        self.assertRaises(bcixml.DecodingError, self.decoder.decode_packet, packet2)
+
+    def __convert_and_compare(self, name, value):
+        signal = bcixml.BciSignal({name : value}, None, bcixml.INTERACTION_SIGNAL)
+        packet = self.encoder.encode_packet(signal)
+        signal2 = self.decoder.decode_packet(packet)
+        self.assertTrue(signal2.data.has_key(name))
+        self.assertEqual(signal2.data[name], value)
+        self.assertEqual(type(signal2.data[name]), type(value))
+        if isinstance(value, (list, tuple)):
+            self.assertEqual(map(type, signal2.data[name]), map(type, value))
+
+
+def suite():
+    testSuite = unittest.makeSuite(BinaryProtocolTestCase)
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
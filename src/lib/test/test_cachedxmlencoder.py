@@ -0,0 +1,109 @@
+# test_cachedxmlencoder.py -
+# encoding: utf8
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+
+from lib import bcixml
+
+
+class CachedXmlEncoderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.domencoder = bcixml.XmlEncoder()
+        self.encoder = bcixml.CachedXmlEncoder()
+
+    def testValues(self):
+        """Should write the same XML as the DOM encoder."""
+        values = [True, False, 1, 1.0, long(1), 1+0j, "foo", u"ß", None,
+                  "<&\"'>", [], [1], [1, 2, 3], (), (1,), (1, 2, 3),
+                  set([1, 2, 3]), frozenset([1, 2, 3]), {"foo" : 1, "bar" : 2},
+                  {}, [[], [1], [1, [1, 2]]], ((), (1), (1, (1, 2))),
+                  {"foo" : 1, "bratwurst" : {"bar" : 2, "baz" : 3}},
+                  [0.5, -1.25, 3e-12], [1.0, None, True]]
+        for value in values:
+            for type in bcixml.CONTROL_SIGNAL, bcixml.INTERACTION_SIGNAL:
+                self.__compare(bcixml.BciSignal({"somename" : value}, None, type))
+
+    def testNames(self):
+        """Should escape names like the DOM encoder."""
+        self.__compare(bcixml.BciSignal({"a%s&b" : 1.0, "" : 2}, None,
+                                        bcixml.CONTROL_SIGNAL))
+
+    def testCommands(self):
+        """Should write the same commands as the DOM encoder."""
+        self.__compare(bcixml.BciSignal({"foo" : 1},
+                                        [("start", {"foo" : 1}), ("init", dict())],
+                                        bcixml.INTERACTION_SIGNAL))
+
+    def testEmptySignal(self):
+        """Should write empty signals like the DOM encoder."""
+        self.__compare(bcixml.BciSignal(None, None, bcixml.REPLY_SIGNAL))
+
+    def testUnsupported(self):
+        """Should write unsupported values like the DOM encoder."""
+        class Foo(object):
+            pass
+        self.__compare(bcixml.BciSignal({"foo" : {"bar" : Foo(), "baz" : 1}},
+                                        None, bcixml.INTERACTION_SIGNAL))
+        self.__compare(bcixml.BciSignal({"foo" : [Foo()]}, None,
+                                        bcixml.INTERACTION_SIGNAL))
+
+    def testSubclasses(self):
+        """Should write subclasses of supported types like the DOM encoder."""
+        class MyFloat(float):
+            pass
+        self.__compare(bcixml.BciSignal({"foo" : MyFloat(1.5)}, None,
+                                        bcixml.CONTROL_SIGNAL))
+
+    def testTemplateCache(self):
+        """Should reuse the template for signals of the same shape."""
+        for i in range(10):
+            self.__compare(bcixml.BciSignal({"cl_output" : [i * 0.1, -i]},
+                                            None, bcixml.CONTROL_SIGNAL))
+        self.assertEqual(len(self.encoder.templates), 1)
+
+    def testTemplateCacheSize(self):
+        """Should not cache more templates than cachesize."""
+        self.encoder = bcixml.CachedXmlEncoder(cachesize=2)
+        for i in range(10):
+            self.__compare(bcixml.BciSignal({"cl_output" : [0.1] * i},
+                                            None, bcixml.CONTROL_SIGNAL))
+        self.assertTrue(len(self.encoder.templates) <= 2)
+
+    def testEncodeUnsupportedSignalType(self):
+        """Should throw an Exception on encoding an unknown signal type."""
+        signal = bcixml.BciSignal(None, None, "foo")
+        self.assertRaises(bcixml.EncodingError, self.encoder.encode_packet, signal)
+
+    def __compare(self, signal):
+        xml = self.domencoder.encode_packet(signal)
+        xml2 = self.encoder.encode_packet(signal)
+        self.assertEqual(xml, xml2)
+
+
+def suite():
+    testSuite = unittest.makeSuite(CachedXmlEncoderTestCase)
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# test_datalog.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from lib.datalog import DataLog, latest, read
+
+
+class DataLogTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.logdir = os.path.join(self.directory, "logs")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testWriteRead(self):
+        """Should write the records and read them back with their types."""
+        log = DataLog(self.logdir, "fb", flush_interval=0.01)
+        log.start()
+        log.write(1, 0.5, "NaN")
+        log.write(2, -1.25, "a, b")
+        log.write_rows([[3], [4, 5]])
+        log.close()
+        filename = os.path.join(self.logdir, "fb1.csv")
+        self.assertEqual(log.filenames, [filename])
+        rows = read(filename)
+        self.assertEqual(rows[0][:2], [1, 0.5])
+        self.assertTrue(rows[0][2] != rows[0][2])
+        self.assertEqual(rows[1:], [[2, -1.25, "a, b"], [3], [4, 5]])
+        stats = log.get_statistics()
+        self.assertEqual(stats['records'], 4)
+        self.assertEqual(stats['files'], 1)
+
+    def testNoBlocking(self):
+        """Should not write before the flush."""
+        log = DataLog(self.logdir, "fb", flush_interval=10)
+        log.start()
+        log.write(1)
+        self.assertFalse(os.path.exists(self.logdir))
+        log.close()
+        self.assertEqual(read(log.get_filename()), [[1]])
+
+    def testBackgroundFlush(self):
+        """Should flush in the thread."""
+        log = DataLog(self.logdir, "fb", flush_interval=0.01)
+        log.start()
+        log.write(1)
+        for i in range(100):
+            if log.get_statistics()['records'] == 1:
+                break
+            time.sleep(0.01)
+        self.assertEqual(read(log.get_filename()), [[1]])
+        log.close()
+
+    def testNumbering(self):
+        """Should not overwrite existing files."""
+        for i in range(3):
+            log = DataLog(self.logdir, "train", suffix=".txt", flush_interval=0)
+            log.write(i)
+            log.close()
+        self.assertEqual(sorted(os.listdir(self.logdir)), ["train1.txt", "train2.txt", "train3.txt"])
+        self.assertEqual(latest(self.logdir, "train", ".txt"), os.path.join(self.logdir, "train3.txt"))
+        self.assertEqual(read(latest(self.logdir, "train", ".txt")), [[2]])
+        self.assertEqual(latest(self.logdir, "fb"), None)
+        self.assertEqual(latest(os.path.join(self.directory, "missing"), "fb"), None)
+
+    def testRotation(self):
+        """Should continue in a new file when the file is too large."""
+        log = DataLog(self.logdir, "fb", flush_interval=0, max_bytes=10, header=("a", "b"))
+        for i in range(5):
+            log.write(i, 1000 + i)
+        log.close()
+        self.assertTrue(len(log.filenames) > 1)
+        rows = []
+        for filename in log.filenames:
+            rows.extend(read(filename, header=True))
+        self.assertEqual(rows, [[i, 1000 + i] for i in range(5)])
+
+    def testIdle(self):
+        """Should not create a file without records."""
+        log = DataLog(self.logdir, "fb", flush_interval=0.01)
+        log.start()
+        time.sleep(0.05)
+        log.close()
+        self.assertEqual(log.get_filename(), None)
+        self.assertFalse(os.path.exists(self.logdir))
+
+    def testFloatFormat(self):
+        """Should format floats with str."""
+        log = DataLog(self.logdir, "fb", flush_interval=0)
+        log.write(1 / 3.0, 2)
+        log.close()
+        f = open(log.get_filename())
+        try:
+            self.assertEqual(f.read(), "%s,2\n" % str(1 / 3.0))
+        finally:
+            f.close()
+
+    def testCloseWithoutWaiting(self):
+        """Should close the file in the thread."""
+        log = DataLog(self.logdir, "fb", flush_interval=10)
+        log.start()
+        log.write(1)
+        log.close(wait=False)
+        log.close()
+        self.assertEqual(read(log.get_filename()), [[1]])
+
+
+def suite():
+    return unittest.makeSuite(DataLogTestCase)
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# test_eventloop.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+import select
+import threading
+import time
+
+from lib import ipc
+from lib.eventloop import EventLoop, POLLERS
+from lib.test.test_ipc import socketpair, ReceivingChannel
+
+
+class EventLoopTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.map = dict()
+        a, b = socketpair()
+        self.sender = ipc.IPCChannel(a, self.map)
+        self.receiver = ReceivingChannel(b, self.map)
+
+    def tearDown(self):
+        self.sender.close()
+        self.receiver.close()
+
+    def testChannels(self):
+        """Should service asyncore channels with every poller."""
+        for poller in POLLERS:
+            if not hasattr(select, poller):
+                continue
+            loop = EventLoop(self.map, poller)
+            self.receiver.messages = []
+            for i in range(100):
+                self.sender.send_message(i)
+            self.__run_until(loop, lambda: len(self.receiver.messages) == 100)
+            self.assertEqual(self.receiver.messages, range(100), poller)
+            loop.close()
+
+    def testCallLater(self):
+        """Should run timers in the right order."""
+        loop = EventLoop(self.map)
+        calls = []
+        loop.call_later(0.02, calls.append, 2)
+        loop.call_later(0.01, calls.append, 1)
+        loop.call_later(0.01, calls.append, 3).cancel()
+        loop.call_later(0.03, loop.stop)
+        loop.run()
+        self.assertEqual(calls, [1, 2])
+        loop.close()
+
+    def testWakeup(self):
+        """Should be woken up immediately from other threads."""
+        loop = EventLoop(self.map, timeout=10)
+        calls = []
+        thread = threading.Thread(target=loop.run)
+        thread.start()
+        time.sleep(0.05)
+        start = time.time()
+        loop.call_soon_threadsafe(calls.append, 1)
+        loop.stop()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(calls, [1])
+        self.assertTrue(time.time() - start < 1)
+        loop.close()
+
+    def testEmptyMap(self):
+        """Should stop if no channels are left."""
+        loop = EventLoop(self.map)
+        self.sender.close()
+        self.receiver.close()
+        loop.run()
+        loop.close()
+
+    def __run_until(self, loop, predicate, timeout=5):
+        end = time.time() + timeout
+        while not predicate() and time.time() < end:
+            loop._run_once()
+
+
+def suite():
+    testSuite = unittest.makeSuite(EventLoopTestCase)
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# test_feedbackprocesscontroller.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+import logging
+import socket
+import StringIO
+
+from lib import ipc
+from lib.feedbackprocesscontroller import FeedbackProcessController, FeedbackProcessPool
+from FeedbackBase.Feedback import Feedback
+
+
+class FeedbackProcessPoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # FeedbackProcess copies the format of the first log handler
+        self.handler = logging.StreamHandler(StringIO.StringIO())
+        self.handler.setFormatter(logging.Formatter("%(message)s"))
+        logging.getLogger().addHandler(self.handler)
+        # The Feedbacks connect to the Feedback Controller's IPC port
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((ipc.LOCALHOST, ipc.IPC_PORT))
+        self.server.listen(5)
+        self.fpc = FeedbackProcessController([], Feedback, 0.1, poolsize=1)
+        self.fpc.pluginController.availablePlugins["Feedback"] = "FeedbackBase.Feedback"
+
+    def tearDown(self):
+        self.fpc.close()
+        self.server.close()
+        logging.getLogger().removeHandler(self.handler)
+
+    def testWarmStart(self):
+        """Should start the Feedback in a warm process and refill the pool."""
+        warm = self.fpc.pool.processes[0]
+        self.fpc.start_feedback("Feedback", None)
+        self.assertTrue(self.fpc.currentProc is warm)
+        self.assertTrue(warm.is_alive())
+        self.assertEqual(self.fpc.pool.processes, [])
+        self.fpc.stop_feedback()
+        self.assertEqual(len(self.fpc.pool.processes), 1)
+        self.assertFalse(self.fpc.pool.processes[0] is warm)
+        self.assertEqual([(n, w) for n, w, t in self.fpc.start_times],
+                         [("Feedback", True)])
+
+    def testColdStart(self):
+        """Should start the Feedback in a new process if the pool is empty."""
+        self.fpc.pool.close()
+        self.fpc.start_feedback("Feedback", None)
+        self.assertTrue(self.fpc.currentProc.is_alive())
+        self.fpc.stop_feedback()
+        self.assertEqual([(n, w) for n, w, t in self.fpc.start_times],
+                         [("Feedback", False)])
+
+    def testClose(self):
+        """Should stop idle processes."""
+        pool = FeedbackProcessPool(2, [])
+        processes = pool.processes[:]
+        pool.close()
+        for proc in processes:
+            self.assertFalse(proc.is_alive())
+
+
+def suite():
+    testSuite = unittest.makeSuite(FeedbackProcessPoolTestCase)
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
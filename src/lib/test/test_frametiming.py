@@ -0,0 +1,99 @@
+# test_frametiming.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+import os
+import tempfile
+
+from lib.frametiming import FrameTiming
+
+
+class FrameTimingTestCase(unittest.TestCase):
+
+    def record(self, timing, starts):
+        """Record frames starting at the given times, the phases "a" and "b"
+        take 1ms and 2ms."""
+        for t in starts:
+            timing.begin(t)
+            timing.mark("a", t + 0.001)
+            timing.mark("b", t + 0.003)
+
+    def testPhases(self):
+        """Should record the duration of every phase."""
+        timing = FrameTiming(("a", "b"), 10)
+        self.record(timing, [0.0, 0.01, 0.02])
+        rows = timing.rows()
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0][:3], (0.0, 0.01, 0))
+        self.assertAlmostEqual(rows[0][3], 0.001)
+        self.assertAlmostEqual(rows[0][4], 0.002)
+        self.assertEqual(rows[-1][1], None)
+        summary = timing.summary()
+        self.assertEqual(summary['frames'], 3)
+        self.assertAlmostEqual(summary['fps'], 100)
+        self.assertAlmostEqual(summary['a_mean'], 1)
+        self.assertAlmostEqual(summary['b_max'], 2)
+
+    def testRingBuffer(self):
+        """Should keep only the last frames."""
+        timing = FrameTiming(("a", "b"), 4)
+        self.record(timing, [0.01 * i for i in range(10)])
+        self.assertEqual(timing.frames, 10)
+        self.assertEqual([row[0] for row in timing.rows()], [0.06, 0.07, 0.08, 0.09])
+
+    def testDroppedFrames(self):
+        """Should count frames which took too long."""
+        timing = FrameTiming(("a", "b"), 10, fps=100)
+        self.record(timing, [0.0, 0.01, 0.031, 0.041, 0.057, 0.067])
+        self.assertEqual(timing.dropped, 2)
+        self.assertEqual([row[2] for row in timing.rows()], [0, 0, 1, 0, 1, 0])
+
+    def testUnknownPhase(self):
+        """Should ignore unknown phases."""
+        timing = FrameTiming(("a", "b"), 10)
+        timing.begin(0.0)
+        timing.mark("foo", 0.001)
+        timing.mark("a", 0.003)
+        self.assertAlmostEqual(timing.rows()[0][3], 0.002)
+
+    def testExport(self):
+        """Should write a CSV file."""
+        timing = FrameTiming(("a", "b"), 10)
+        self.record(timing, [0.0, 0.01])
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            timing.export(filename)
+            lines = open(filename).read().splitlines()
+        finally:
+            os.remove(filename)
+        self.assertEqual(lines[0], "start,interval,dropped,a,b")
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[2].split(",")[1], "")
+
+
+def suite():
+    testSuite = unittest.makeSuite(FrameTimingTestCase)
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# test_glyphatlas.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+
+import pygame
+
+from lib.vision_egg.model.glyph_atlas import GlyphAtlas, AtlasText
+from lib.vision_egg.model.color_word import ColorWord
+
+
+class GlyphAtlasTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pygame.font.init()
+        self.atlas = GlyphAtlas(page_size=128)
+
+    def testGet(self):
+        """Should rasterize every symbol only once."""
+        glyph = self.atlas.get("A", 30)
+        self.assertTrue(self.atlas.get("A", 30) is glyph)
+        self.assertFalse(self.atlas.get("A", 40) is glyph)
+        self.assertFalse(self.atlas.get("B", 30) is glyph)
+        self.assertEqual(self.atlas.get_statistics()['glyphs'], 3)
+
+    def testPacking(self):
+        """Should place the glyphs without overlap and add pages."""
+        glyphs = [self.atlas.get(chr(c), 40) for c in range(ord("A"), ord("Z") + 1)]
+        self.assertTrue(self.atlas.get_statistics()['pages'] > 1)
+        for i, a in enumerate(glyphs):
+            left, bottom, right, top = a.texcoords
+            self.assertTrue(0 <= left < right <= 1 and 0 <= bottom < top <= 1)
+            for b in glyphs[i + 1:]:
+                if a.page != b.page:
+                    continue
+                l, bo, r, t = b.texcoords
+                self.assertTrue(r <= left or right <= l or t <= bottom or top <= bo)
+
+    def testLargeGlyph(self):
+        """Should use a larger page for glyphs larger than a page."""
+        glyph = self.atlas.get("W", 300)
+        self.assertEqual(glyph.size, pygame.font.Font(None, 300).size("W"))
+        self.assertTrue(self.atlas.get_statistics()['bytes'] > 4 * 128 ** 2)
+
+
+class AtlasTextTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pygame.font.init()
+
+    def testSize(self):
+        """Should take the size of the text."""
+        text = AtlasText(atlas=GlyphAtlas(), text="A", font_size=30)
+        self.assertEqual(tuple(text.parameters.size), pygame.font.Font(None, 30).size("A"))
+        text.set(text="W", font_size=50)
+        self.assertEqual(tuple(text.parameters.size), pygame.font.Font(None, 50).size("W"))
+
+    def testColorWord(self):
+        """Should reuse the stimuli when the text changes."""
+        word = ColorWord(position=(100, 100), text="ABC", symbol_size=30)
+        stimuli = list(word)
+        word.set(text="X")
+        self.assertEqual(len(word), 1)
+        self.assertTrue(word[0] is stimuli[0])
+        word.set(text="WXYZ")
+        self.assertEqual(len(word), 4)
+        self.assertEqual(word[:3], stimuli)
+        self.assertEqual([s.parameters.text for s in word], list("WXYZ"))
+        # the symbols are next to each other, centered at the position
+        right = [s.parameters.position[0] + s.parameters.size[0] / 2. for s in word]
+        left = [s.parameters.position[0] - s.parameters.size[0] / 2. for s in word]
+        for a, b in zip(right, left[1:]):
+            self.assertAlmostEqual(a, b)
+        self.assertAlmostEqual(left[0] + right[-1], 200)
+
+
+def suite():
+    testSuite = unittest.makeSuite(GlyphAtlasTestCase)
+    testSuite.addTest(unittest.makeSuite(AtlasTextTestCase))
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
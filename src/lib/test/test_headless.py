@@ -0,0 +1,200 @@
+# test_headless.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pygame
+
+from lib import headless
+from lib.headless import VirtualClock, FeedbackHarness, sine_control
+from FeedbackBase.Feedback import Feedback
+from FeedbackBase.MainloopFeedback import MainloopFeedback
+from FeedbackBase.PygameFeedback import PygameFeedback
+
+
+class CountingFeedback(MainloopFeedback):
+    """Records the control signals and the time of its ticks."""
+
+    def init(self):
+        self.stopAfter = None
+        self.values = []
+        self.ticks = []
+
+    def pre_mainloop(self):
+        self.clock = pygame.time.Clock()
+
+    def on_control_event(self, data):
+        self.values.append(data["cl_output"])
+
+    def tick(self):
+        self.clock.tick(50)
+        self.ticks.append(pygame.time.get_ticks())
+
+    def play_tick(self):
+        if len(self.ticks) == self.stopAfter:
+            self.on_stop()
+
+
+class FailingFeedback(CountingFeedback):
+    """Fails in the third frame."""
+
+    def play_tick(self):
+        if len(self.ticks) == 3:
+            raise ValueError("failed")
+
+
+class MovingFeedback(PygameFeedback):
+    """Moves a square a pixel per frame."""
+
+    def init_graphics(self):
+        self.square = pygame.sprite.DirtySprite()
+        self.square.image = pygame.Surface((10, 10))
+        self.square.image.fill((255, 255, 255))
+        self.square.rect = self.square.image.get_rect()
+        self.sprites.add(self.square)
+
+    def play_tick(self):
+        self.square.rect.x += 1
+        self.square.dirty = 1
+        self.draw_sprites()
+
+
+class VirtualClockTestCase(unittest.TestCase):
+
+    def testTick(self):
+        """Should advance by one frame per tick without drifting."""
+        clock = VirtualClock()
+        times = [clock.tick(30) for i in range(30)]
+        self.assertEqual(sorted(set(times)), [33, 34])
+        self.assertEqual(sum(times), 1000)
+        self.assertEqual(clock.get_ticks(), 1000)
+        self.assertEqual(clock.get_fps(), 30)
+        self.assertEqual(clock.tick(), 17)
+
+    def testWait(self):
+        """Should count waiting towards the frame."""
+        clock = VirtualClock()
+        self.assertEqual(clock.wait(10), 10)
+        self.assertEqual(clock.tick(50), 20)
+        self.assertEqual(clock.wait(50), 50)
+        self.assertEqual(clock.tick(50), 50)
+        self.assertEqual(clock.get_ticks(), 70)
+
+    def testInstall(self):
+        """Should replace and restore pygame's time functions."""
+        get_ticks = pygame.time.get_ticks
+        clock = headless.install()
+        self.assertTrue(headless.install(VirtualClock()) is clock)
+        self.assertTrue(pygame.time.Clock() is clock)
+        pygame.time.wait(25)
+        self.assertEqual(pygame.time.get_ticks(), 25)
+        headless.uninstall()
+        self.assertTrue(pygame.time.Clock() is clock)
+        headless.uninstall()
+        self.assertTrue(pygame.time.get_ticks is get_ticks)
+
+    def testDepth(self):
+        """Should open screens with DEPTH bits per pixel while installed."""
+        set_mode = pygame.display.set_mode
+        drivers = headless.set_dummy_drivers()
+        headless.install()
+        try:
+            pygame.display.init()
+            screen = pygame.display.set_mode((20, 10))
+            self.assertEqual(screen.get_bitsize(), headless.DEPTH)
+        finally:
+            pygame.quit()
+            headless.uninstall()
+            headless.restore_drivers(drivers)
+        self.assertTrue(pygame.display.set_mode is set_mode)
+
+
+class FeedbackHarnessTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testRun(self):
+        """Should run the frames with the virtual clock and control signals."""
+        harness = FeedbackHarness(CountingFeedback, frames=100, control=sine_control(period=4))
+        stats = harness.run()
+        fb = harness.feedback
+        self.assertEqual(stats['frames'], 100)
+        self.assertEqual(fb.ticks, range(20, 2001, 20))
+        self.assertEqual(stats['virtual_time'], 2.0)
+        self.assertEqual([round(v, 6) for v in fb.values[:5]], [0, 1, 0, -1, 0])
+        self.assertEqual(len(harness.cpu_times), 100)
+        self.assertTrue(stats['cpu_p95'] <= stats['cpu_max'])
+        self.assertTrue('play_mean' in stats)
+        self.assertFalse(fb._running)
+
+    def testStop(self):
+        """Should end when the Feedback stops."""
+        harness = FeedbackHarness(CountingFeedback, frames=100, variables={'stopAfter' : 10})
+        self.assertEqual(harness.run()['frames'], 10)
+
+    def testControlList(self):
+        """Should deliver a list of control signals frame by frame."""
+        control = [None, {'cl_output' : 1}, [{'cl_output' : 2}, {'cl_output' : 3}]]
+        harness = FeedbackHarness(CountingFeedback, frames=5, control=control)
+        harness.run()
+        self.assertEqual(harness.feedback.values, [1, 2, 3])
+
+    def testFailure(self):
+        """Should quit the Feedback and raise its exception."""
+        harness = FeedbackHarness(FailingFeedback, frames=10)
+        self.assertRaises(ValueError, harness.run)
+        self.assertFalse(harness.feedback._inMainloop)
+        self.assertFalse(pygame.display.get_init())
+        self.assertEqual(pygame.time.Clock().__class__.__name__, "Clock")
+
+    def testNoMainloopFeedback(self):
+        """Should refuse Feedbacks without a mainloop."""
+        self.assertRaises(TypeError, FeedbackHarness(Feedback).run)
+
+    def testPygameFeedback(self):
+        """Should render PygameFeedbacks without a display."""
+        dump = os.path.join(self.directory, "frames")
+        harness = FeedbackHarness(MovingFeedback, frames=10, dump_dir=dump, dump_every=5)
+        harness.run()
+        self.assertTrue(harness.feedback.headless)
+        self.assertEqual(sorted(os.listdir(dump)), ["frame00000.png", "frame00005.png"])
+        image = pygame.image.load(os.path.join(dump, "frame00005.png"))
+        # moved by 6 pixels after the sixth frame
+        self.assertEqual(image.get_at((10, 5))[:3], (255, 255, 255))
+        self.assertEqual(image.get_at((3, 5))[:3], (0, 0, 0))
+        self.assertEqual(pygame.time.Clock().__class__.__name__, "Clock")
+
+
+def suite():
+    testSuite = unittest.makeSuite(VirtualClockTestCase)
+    testSuite.addTest(unittest.makeSuite(FeedbackHarnessTestCase))
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# test_ipc.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+import asyncore
+import socket
+import threading
+import time
+
+from lib import ipc
+from lib import bcixml
+from FeedbackBase import Feedback
+
+
+def socketpair():
+    """Return a pair of connected TCP sockets on localhost."""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind((ipc.LOCALHOST, 0))
+    server.listen(1)
+    client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    client.connect(server.getsockname())
+    conn, addr = server.accept()
+    server.close()
+    return client, conn
+
+
+class ReceivingChannel(ipc.IPCChannel):
+
+    def __init__(self, conn, map=None):
+        ipc.IPCChannel.__init__(self, conn, map)
+        self.messages = []
+
+    def handle_message(self, message):
+        self.messages.append(message)
+
+
+class IPCChannelTestCase(unittest.TestCase):
+
+    def setUp(self):
+        a, b = socketpair()
+        self.sender = ipc.IPCChannel(a)
+        self.receiver = ReceivingChannel(b)
+
+    def tearDown(self):
+        self.sender.close()
+        self.receiver.close()
+
+    def testSignal(self):
+        """Should transfer BciSignals."""
+        signal = bcixml.BciSignal({"cl_output" : [0.1, 0.2]}, None,
+                                  bcixml.CONTROL_SIGNAL)
+        self.sender.send_message(signal)
+        self.__receive(1)
+        self.assertEqual(self.receiver.messages[0].data, signal.data)
+        self.assertEqual(self.receiver.messages[0].type, signal.type)
+
+    def testTerminatorInPayload(self):
+        """Should transfer messages containing the old terminator."""
+        self.sender.send_message("foo\r\n\r\nbar")
+        self.sender.send_message("\r\n\r\n")
+        self.__receive(2)
+        self.assertEqual(self.receiver.messages, ["foo\r\n\r\nbar", "\r\n\r\n"])
+
+    def testManyMessages(self):
+        """Should transfer many messages in the right order."""
+        for i in range(1000):
+            self.sender.send_message(i)
+        self.__receive(1000)
+        self.assertEqual(self.receiver.messages, range(1000))
+
+    def testLargeMessage(self):
+        """Should transfer messages larger than the receive buffer."""
+        message = "x" * (ipc.BUFFER_SIZE * 10)
+        self.sender.send_message(message)
+        self.sender.send_message("foo")
+        self.__receive(2)
+        self.assertEqual(self.receiver.messages, [message, "foo"])
+        self.assertEqual(len(self.receiver.ibuf), ipc.BUFFER_SIZE)
+
+    def testPartialMessages(self):
+        """Should reassemble messages arriving in small pieces."""
+        for message in "foo", ["bar"] * 10, "baz":
+            self.sender.send_message(message)
+        # Steal the pending data and deliver it byte by byte
+        self.__send_pending()
+        data = self.receiver.socket.recv(65536)
+        for byte in data:
+            self.receiver.ibuf[self.receiver.ilen] = byte
+            self.receiver.ilen += 1
+            self.receiver._process_input()
+        self.assertEqual(self.receiver.messages, ["foo", ["bar"] * 10, "baz"])
+
+    def __send_pending(self):
+        while self.sender.writable():
+            self.sender.initiate_send()
+        time.sleep(0.1)
+
+    def __receive(self, n, timeout=5):
+        end = time.time() + timeout
+        while len(self.receiver.messages) < n and time.time() < end:
+            asyncore.loop(timeout=0.01, count=1)
+
+
+class SlowFeedback(Feedback.Feedback):
+    """Feedback which needs some time for every control signal."""
+
+    def on_init(self):
+        self.latencies = []
+
+    def on_control_event(self, data):
+        self.latencies.append(time.time() - data["timestamp"])
+        time.sleep(0.005)
+
+
+def flood(sock, duration):
+    """Send timestamped control signals on the socket as fast as possible."""
+    end = time.time() + duration
+    while time.time() < end:
+        signal = bcixml.BciSignal({"cl_output" : [0.1, 0.2], "timestamp" : time.time()},
+                                  None, bcixml.CONTROL_SIGNAL)
+        dump = ipc.pickle.dumps(signal, protocol=ipc.pickle.HIGHEST_PROTOCOL)
+        sock.sendall(ipc.HEADER.pack(len(dump)) + dump)
+        time.sleep(0.0001)
+
+
+class ControlDeliveryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.sock, conn = socketpair()
+        self.feedback = SlowFeedback()
+        self.feedback.on_init()
+        self.receiver = ipc.FeedbackIPCChannel(conn, self.feedback)
+
+    def tearDown(self):
+        self.sock.close()
+        self.receiver.close()
+
+    def testLatestUnderFlood(self):
+        """Should keep the latency bounded if the Feedback is too slow."""
+        self.feedback._control_delivery = Feedback.CONTROL_DELIVERY_LATEST
+        sender = threading.Thread(target=flood, args=(self.sock, 1.0))
+        sender.start()
+        end = time.time() + 1.5
+        while time.time() < end:
+            asyncore.loop(timeout=0.01, count=1)
+        sender.join()
+        stats = self.feedback.get_control_statistics()
+        self.assertTrue(stats["coalesced"] > 0)
+        self.assertEqual(stats["received"], stats["delivered"] + stats["coalesced"])
+        self.assertTrue(max(self.feedback.latencies) < 0.25)
+
+
+def suite():
+    testSuite = unittest.makeSuite(IPCChannelTestCase)
+    testSuite.addTest(unittest.makeSuite(ControlDeliveryTestCase))
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
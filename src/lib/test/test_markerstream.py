@@ -0,0 +1,113 @@
+# test_markerstream.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+import socket
+
+from lib.markerstream import MarkerStream, monotonic
+
+
+class MarkerStreamTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.recorder = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.recorder.bind(("127.0.0.1", 0))
+        self.recorder.settimeout(1)
+        self.host, self.port = self.recorder.getsockname()
+
+    def tearDown(self):
+        self.recorder.close()
+
+    def receive(self):
+        """Return the received datagrams as lists of lines."""
+        datagrams = []
+        self.recorder.settimeout(0.1)
+        try:
+            while True:
+                datagrams.append(self.recorder.recv(65536).splitlines())
+        except socket.timeout:
+            pass
+        return datagrams
+
+    def testBatches(self):
+        """Should send the markers in order in few datagrams."""
+        stream = MarkerStream(self.host, self.port, 10)
+        stream.start()
+        for i in range(100):
+            stream.send("S%i" % i)
+        stream.close()
+        datagrams = self.receive()
+        self.assertTrue(1 < len(datagrams) < 10)
+        markers = []
+        for i, lines in enumerate(datagrams):
+            header = lines[0].split()
+            self.assertEqual(header[:2], ["#batch", str(i)])
+            for line in lines[1:]:
+                wallclock, mono, marker = line.split(" ", 2)
+                markers.append(marker)
+                self.assertTrue(float(wallclock) <= float(header[2]))
+                self.assertTrue(float(mono) <= float(header[3]))
+        self.assertEqual(markers, ["S%i" % i for i in range(100)])
+        self.assertEqual(stream.get_statistics(), {'markers' : 100, 'datagrams' : len(datagrams)})
+
+    def testDatagramSize(self):
+        """Should not exceed the maximum datagram size."""
+        stream = MarkerStream(self.host, self.port, 10, max_datagram=200)
+        for i in range(20):
+            stream.send("x" * 50)
+        stream.close()
+        datagrams = self.receive()
+        self.assertEqual(sum(len(lines) - 1 for lines in datagrams), 20)
+        for lines in datagrams:
+            # with the header and the newline at the end
+            self.assertTrue(len("\n".join(lines)) + 1 <= 200)
+
+    def testFlushInterval(self):
+        """Should flush the markers periodically."""
+        stream = MarkerStream(self.host, self.port, 0.01)
+        stream.start()
+        stream.send("foo")
+        lines = self.recorder.recv(65536).splitlines()
+        self.assertEqual(lines[1].split()[2], "foo")
+        stream.close()
+
+    def testWithoutInterval(self):
+        """Should send every marker right away without flush interval."""
+        stream = MarkerStream(self.host, self.port, 0)
+        stream.start()
+        stream.send("foo")
+        stream.send("bar")
+        self.assertEqual(len(self.receive()), 2)
+        stream.close()
+
+    def testMonotonic(self):
+        """Should never go back in time."""
+        times = [monotonic() for i in range(1000)]
+        self.assertEqual(times, sorted(times))
+
+
+def suite():
+    testSuite = unittest.makeSuite(MarkerStreamTestCase)
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# test_plugincontroller.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+from lib.PluginController import PluginController
+from FeedbackBase.Feedback import Feedback
+
+
+def write(filename, content):
+    fh = open(filename, "w")
+    fh.write(content)
+    fh.close()
+
+
+class PluginControllerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.plugindir = os.path.join(self.dir, "Feedbacks")
+        self.indexfile = os.path.join(self.dir, "index.json")
+        self.fbdir = os.path.join(self.plugindir, "Foo")
+        os.makedirs(self.fbdir)
+        write(os.path.join(self.fbdir, "feedbacks.list"), "# comment\nFoo.Foo\nBar.Bar\n")
+        write(os.path.join(self.fbdir, "Foo.py"), "import Helper\nclass Foo(object):\n    pass\n")
+        write(os.path.join(self.fbdir, "Helper.py"), "import lib.test.mod_wo_imports\n")
+        write(os.path.join(self.fbdir, "Bar.py"), "class Baz(object):\n    pass\n")
+        write(os.path.join(self.fbdir, "__init__.py"), "")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        if self.plugindir in sys.path:
+            sys.path.remove(self.plugindir)
+
+    def testFindPlugins(self):
+        """Should find the Feedbacks and report the broken ones."""
+        pc = PluginController([self.plugindir], Feedback)
+        pc.find_plugins()
+        self.assertEqual(pc.availablePlugins, {"Foo" : "Foo.Foo", "Bar" : "Foo.Bar"})
+        self.assertEqual(pc.invalidPlugins.keys(), ["Bar"])
+
+    def testIndex(self):
+        """Should use the index for unchanged files only."""
+        pc = PluginController([self.plugindir], Feedback, self.indexfile)
+        pc.find_plugins()
+        self.assertTrue(os.path.exists(self.indexfile))
+        # Make the index lie about a file which did not change
+        listfile = os.path.join(self.fbdir, "feedbacks.list")
+        pc.index["lists"][listfile]["feedbacks"] = {"Cached" : "Foo.Cached"}
+        pc.save_index()
+        pc = PluginController([self.plugindir], Feedback, self.indexfile)
+        pc.find_plugins()
+        self.assertEqual(pc.availablePlugins.keys(), ["Cached"])
+        self.assertEqual(type(pc.availablePlugins["Cached"]), str)
+        # Changed files are read again
+        write(listfile, "Foo.Foo\n")
+        st = os.stat(listfile)
+        os.utime(listfile, (st.st_atime, st.st_mtime + 10))
+        pc.find_plugins()
+        self.assertEqual(pc.availablePlugins, {"Foo" : "Foo.Foo"})
+
+    def testNewDirectory(self):
+        """Should find Feedbacks in new directories."""
+        pc = PluginController([self.plugindir], Feedback, self.indexfile)
+        pc.find_plugins()
+        newdir = os.path.join(self.plugindir, "New")
+        os.mkdir(newdir)
+        write(os.path.join(newdir, "feedbacks.list"), "New.New\n")
+        write(os.path.join(newdir, "New.py"), "class New(Feedback):\n    pass\n")
+        st = os.stat(self.plugindir)
+        os.utime(self.plugindir, (st.st_atime, st.st_mtime + 10))
+        pc.find_plugins()
+        self.assertEqual(pc.availablePlugins["New"], "New.New")
+        self.assertFalse("New" in pc.invalidPlugins)
+
+    def testLoadPlugin(self):
+        """Should unload the Feedback's modules but keep shared ones."""
+        if "lib.test.mod_wo_imports" in sys.modules:
+            del sys.modules["lib.test.mod_wo_imports"]
+        pc = PluginController([self.plugindir], Feedback, shared=["lib"])
+        pc.find_plugins()
+        cls = pc.load_plugin("Foo")
+        self.assertEqual(cls.__name__, "Foo")
+        self.assertTrue("Foo.Foo" in sys.modules)
+        self.assertTrue("Foo.Foo" in [name for name, t in pc.rollbackImporter.report()])
+        pc.unload_plugin()
+        self.assertFalse("Foo.Foo" in sys.modules)
+        self.assertFalse("Foo.Helper" in sys.modules)
+        self.assertTrue("lib.test.mod_wo_imports" in sys.modules)
+
+    def testBrokenIndex(self):
+        """Should ignore a broken index file."""
+        write(self.indexfile, "{broken")
+        pc = PluginController([self.plugindir], Feedback, self.indexfile)
+        pc.find_plugins()
+        self.assertEqual(len(pc.availablePlugins), 2)
+
+
+def suite():
+    testSuite = unittest.makeSuite(PluginControllerTestCase)
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
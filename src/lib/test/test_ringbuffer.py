@@ -0,0 +1,113 @@
+# test_ringbuffer.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+import os
+from multiprocessing import Process
+
+from lib.ringbuffer import ControlSignalRingBuffer
+
+
+def write_samples(filename, n):
+    rb = ControlSignalRingBuffer(filename)
+    for i in range(n):
+        rb.write([float(i), -float(i)])
+    rb.close()
+
+
+class RingBufferTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.writer = ControlSignalRingBuffer.create(slots=8, capacity=4)
+        self.reader = ControlSignalRingBuffer(self.writer.filename)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.remove()
+
+    def testEmpty(self):
+        """Should return nothing if nothing was written."""
+        self.assertEqual(self.reader.drain(), [])
+        self.assertEqual(self.reader.latest(), None)
+
+    def testDrain(self):
+        """Should return all samples in the right order."""
+        self.writer.write(0.5, 1.0)
+        self.writer.write([1.0, 2.0], 2.0)
+        self.writer.write([], 3.0)
+        self.assertEqual(self.reader.drain(),
+                         [(1, 1.0, {"cl_output" : 0.5}),
+                          (2, 2.0, {"cl_output" : [1.0, 2.0]}),
+                          (3, 3.0, {"cl_output" : []})])
+        self.assertEqual(self.reader.drain(), [])
+        self.assertEqual(self.reader.dropped, 0)
+
+    def testOverflow(self):
+        """Should drop the oldest samples if the reader is too slow."""
+        for i in range(20):
+            self.writer.write([float(i)])
+        samples = self.reader.drain()
+        self.assertEqual([data["cl_output"][0] for s, t, data in samples],
+                         [float(i) for i in range(12, 20)])
+        self.assertEqual(self.reader.dropped, 12)
+
+    def testLatest(self):
+        """Should return the latest sample and skip the older ones."""
+        for i in range(5):
+            self.writer.write(float(i))
+        self.assertEqual(self.reader.latest()[2], {"cl_output" : 4.0})
+        self.assertEqual(self.reader.drain(), [])
+        self.writer.write(5.0)
+        self.assertEqual(self.reader.drain()[0][2], {"cl_output" : 5.0})
+
+    def testWriteSignal(self):
+        """Should accept only flat cl_output signals."""
+        self.assertTrue(self.writer.write_signal({u"cl_output" : [1.0, 2.0]}))
+        self.assertTrue(self.writer.write_signal({"cl_output" : 1.0}))
+        self.assertFalse(self.writer.write_signal({"cl_output" : [1.0] * 5}))
+        self.assertFalse(self.writer.write_signal({"cl_output" : [1, 2]}))
+        self.assertFalse(self.writer.write_signal({"foo" : 1.0}))
+        self.assertFalse(self.writer.write_signal({"cl_output" : 1.0, "foo" : 1.0}))
+        self.assertEqual(len(self.reader.drain()), 2)
+
+    def testOtherProcess(self):
+        """Should transfer samples from another process."""
+        p = Process(target=write_samples, args=(self.writer.filename, 5))
+        p.start()
+        p.join()
+        samples = self.reader.drain()
+        self.assertEqual([data["cl_output"] for s, t, data in samples],
+                         [[float(i), -float(i)] for i in range(5)])
+
+    def testRemove(self):
+        """Should remove the file."""
+        rb = ControlSignalRingBuffer.create()
+        rb.remove()
+        self.assertFalse(os.path.exists(rb.filename))
+
+
+def suite():
+    testSuite = unittest.makeSuite(RingBufferTestCase)
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
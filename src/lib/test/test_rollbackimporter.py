@@ -64,6 +64,37 @@ class RollbackImporterTestCase(unittest.TestCase):
         rbi.uninstall()
         self.assertEqual(before, sys.modules)
         
+    def testSharedModules(self):
+        """Should keep shared modules loaded."""
+        modname1 = "lib.test.mod_w_imports"
+        modname2 = "lib.test.mod_wo_imports"
+        self._del_if_existent(modname1)
+        self._del_if_existent(modname2)
+        rbi = RollbackImporter([modname2])
+        import lib.test.mod_w_imports
+        rbi.uninstall()
+        self.assertFalse(sys.modules.has_key(modname1))
+        self.assertTrue(sys.modules.has_key(modname2))
+
+    def testImportTimes(self):
+        """Should record the import times of new modules."""
+        modname = "lib.test.mod_wo_imports"
+        self._del_if_existent(modname)
+        rbi = RollbackImporter()
+        import lib.test.mod_wo_imports
+        import sys
+        rbi.uninstall()
+        self.assertEqual([name for name, t in rbi.report()], [modname])
+
+    def testNoRollback(self):
+        """Should keep all modules if asked to."""
+        modname = "lib.test.mod_wo_imports"
+        self._del_if_existent(modname)
+        rbi = RollbackImporter()
+        import lib.test.mod_wo_imports
+        rbi.uninstall(rollback=False)
+        self.assertTrue(sys.modules.has_key(modname))
+
     def _del_if_existent(self, modname):
         if sys.modules.has_key(modname):
             del(sys.modules[modname])
@@ -0,0 +1,140 @@
+# test_scheduler.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+import math
+
+from lib.clock import monotonic, sleep_until
+from lib.scheduler import StimulusScheduler
+
+
+class SimulatedDisplay(object):
+    """A display whose swaps block until the next retrace."""
+
+    def __init__(self, refresh_rate=60, render_time=0.002):
+        self.frame_duration = 1.0 / refresh_rate
+        self.render_time = render_time
+        self.start = monotonic()
+
+    def present(self):
+        """Draw and swap, return the time of the retrace."""
+        sleep_until(monotonic() + self.render_time)
+        frames = math.ceil((monotonic() - self.start) / self.frame_duration)
+        vsync = self.start + frames * self.frame_duration
+        sleep_until(vsync)
+        return vsync
+
+
+class ClockTestCase(unittest.TestCase):
+
+    def testSleepUntil(self):
+        """Should wake up at the deadline."""
+        for delay in 0.0001, 0.002, 0.02:
+            deadline = monotonic() + delay
+            t = sleep_until(deadline)
+            self.assertTrue(deadline <= t < deadline + 0.002, delay)
+
+
+class StimulusSchedulerTestCase(unittest.TestCase):
+
+    def testWithoutVsync(self):
+        """Should wait for the intended onsets."""
+        scheduler = StimulusScheduler()
+        scheduler.start()
+        start = scheduler._base
+        self.assertEqual(scheduler.onset(), None)
+        targets = [scheduler.wait(0.01) for i in range(5)]
+        for i, target in enumerate(targets):
+            self.assertAlmostEqual(target, start + 0.01 * (i + 1))
+        self.assertTrue(monotonic() >= targets[-1])
+        self.assertTrue(abs(scheduler.onset()) < 0.005)
+        self.assertEqual(scheduler.get_statistics()['onsets'], 1)
+
+    def testVsync(self):
+        """Should show the stimuli at the retrace closest to the intended
+        onset."""
+        display = SimulatedDisplay()
+        scheduler = StimulusScheduler(60)
+        scheduler.start()
+        scheduler.onset(display.present())
+        for i in range(10):
+            # durations which are no multiple of the frame duration
+            scheduler.wait(0.026)
+            scheduler.onset(display.present())
+        self.assertEqual(scheduler.get_statistics()['onsets'], 10)
+        # at most half a frame off, the machine may miss a frame now and then
+        good = [e for e in scheduler.onset_errors if abs(e) <= 0.5 / 60 + 0.001]
+        self.assertTrue(len(good) >= 8, scheduler.onset_errors)
+
+    def testWaitFrames(self):
+        """Should wait a number of frames after the last onset."""
+        display = SimulatedDisplay()
+        scheduler = StimulusScheduler(60)
+        scheduler.start()
+        scheduler.onset(display.present())
+        frames = []
+        for i in range(10):
+            last = scheduler.last_onset
+            scheduler.wait_frames(3)
+            scheduler.onset(display.present())
+            frames.append(int(round((scheduler.last_onset - last) * 60)))
+        # the machine may miss a frame now and then
+        self.assertTrue(frames.count(3) >= 8, frames)
+
+    def testFixedWaitStyle(self):
+        """Should catch up after a late stimulus with fixed wait style only."""
+        for fixed in True, False:
+            scheduler = StimulusScheduler()
+            scheduler.start()
+            first = scheduler.wait(0.005, fixed)
+            # the stimulus takes too long
+            sleep_until(monotonic() + 0.01)
+            second = monotonic()
+            scheduler.wait(0.005, fixed)
+            third = scheduler.wait(0.005, fixed)
+            if fixed:
+                self.assertAlmostEqual(third, first + 0.01)
+            else:
+                self.assertTrue(third >= second + 0.005)
+
+    def testFlag(self):
+        """Should stop waiting when the flag is cleared."""
+        flag = []
+        scheduler = StimulusScheduler(60)
+        scheduler.start()
+        start = monotonic()
+        scheduler.wait_frames(60, flag)
+        self.assertTrue(monotonic() - start < 0.1)
+        flag.append(True)
+        scheduler.start()
+        start = monotonic()
+        scheduler.wait(0.05, flag=flag)
+        self.assertTrue(monotonic() - start >= 0.05)
+
+
+def suite():
+    testSuite = unittest.makeSuite(ClockTestCase)
+    testSuite.addTest(unittest.makeSuite(StimulusSchedulerTestCase))
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
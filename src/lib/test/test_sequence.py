@@ -0,0 +1,184 @@
+# test_sequence.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+import random
+import threading
+import time
+
+from lib.sequence import flash_sequence, random_sequence, oddball_sequence, balanced_targets, SequenceBuffer
+
+
+def min_distance(sequence):
+    """Return the minimum number of flashes between two flashes of the same
+    element."""
+    last = {}
+    distance = len(sequence)
+    for i, e in enumerate(sequence):
+        if e in last:
+            distance = min(distance, i - last[e] - 1)
+        last[e] = i
+    return distance
+
+
+class FlashSequenceTestCase(unittest.TestCase):
+
+    def testRounds(self):
+        """Should flash every element once per round."""
+        rng = random.Random(1)
+        for n in 2, 6, 36:
+            for min_dist in range(n):
+                seq = flash_sequence(range(n), 5, min_dist, rng=rng)
+                self.assertEqual(len(seq), 5 * n)
+                for i in range(5):
+                    self.assertEqual(sorted(seq[i * n:(i + 1) * n]), range(n))
+                self.assertTrue(min_distance(seq) >= min_dist)
+
+    def testPrevious(self):
+        """Should keep the distance to the previous flashes."""
+        rng = random.Random(2)
+        for i in range(100):
+            previous = [2, 0, 1]
+            seq = flash_sequence(range(3), 2, 2, previous, rng)
+            self.assertTrue(min_distance(previous + seq) >= 2)
+
+    def testLength(self):
+        """Should shorten the last round."""
+        seq = flash_sequence(range(6), 2, 3, length=4)
+        self.assertEqual(len(seq), 10)
+        self.assertEqual(len(set(seq[6:])), 4)
+
+    def testImpossible(self):
+        """Should raise ValueError if the constraints cannot be met."""
+        self.assertRaises(ValueError, flash_sequence, range(4), 2, 4)
+        self.assertRaises(ValueError, random_sequence, range(4), 10, 4)
+
+    def testRandomSequence(self):
+        """Should draw with repetition and keep the distance."""
+        rng = random.Random(3)
+        previous = [0, 1]
+        seq = random_sequence(range(4), 1000, 2, previous, rng)
+        self.assertEqual(len(seq), 1000)
+        self.assertEqual(set(seq), set(range(4)))
+        self.assertTrue(min_distance(previous + seq) >= 2)
+
+    def testSeed(self):
+        """Should return the same sequence for the same seed."""
+        a = flash_sequence(range(6), 10, 2, rng=random.Random(42))
+        b = flash_sequence(range(6), 10, 2, rng=random.Random(42))
+        self.assertEqual(a, b)
+
+
+class OddballSequenceTestCase(unittest.TestCase):
+
+    def testConstraints(self):
+        """Should place the deviants with the minimum distance."""
+        rng = random.Random(4)
+        for n, deviants, min_standards in (10, 1, 2), (20, 5, 3), (16, 4, 4), (100, 10, 0):
+            for i in range(50):
+                seq = oddball_sequence(n, deviants, min_standards, rng)
+                self.assertEqual(len(seq), n)
+                self.assertEqual(sum(seq), deviants)
+                positions = [j for j, s in enumerate(seq) if s == 1]
+                for a, b in zip(positions, positions[1:]):
+                    self.assertTrue(b - a - 1 >= min_standards)
+
+    def testTight(self):
+        """Should find the only possible sequence."""
+        self.assertEqual(oddball_sequence(7, 3, 2), [1, 0, 0, 1, 0, 0, 1])
+        self.assertEqual(oddball_sequence(5, 0, 2), [0] * 5)
+        self.assertRaises(ValueError, oddball_sequence, 6, 3, 2)
+
+    def testUniform(self):
+        """Should draw all possible sequences."""
+        rng = random.Random(5)
+        # 3 stimuli, 2 deviants, no constraint: 3 sequences
+        counts = {}
+        for i in range(3000):
+            seq = tuple(oddball_sequence(3, 2, 0, rng))
+            counts[seq] = counts.get(seq, 0) + 1
+        self.assertEqual(len(counts), 3)
+        self.assertTrue(min(counts.values()) > 800, counts)
+
+
+class BalancedTargetsTestCase(unittest.TestCase):
+
+    def testBalanced(self):
+        """Should choose every element equally often."""
+        targets = balanced_targets("abc", 10, random.Random(6))
+        self.assertEqual(len(targets), 10)
+        for e in "abc":
+            self.assertTrue(targets.count(e) in (3, 4))
+
+
+class SequenceBufferTestCase(unittest.TestCase):
+
+    def testReproducible(self):
+        """Should generate the same sequences as without the thread."""
+        generate = lambda rng: flash_sequence(range(6), 3, 2, rng=rng)
+        buffer = SequenceBuffer(generate, 5, seed=7)
+        sequences = [buffer.get() for i in range(12)]
+        buffer.stop()
+        rng = random.Random(7)
+        self.assertEqual(sequences, [generate(rng) for i in range(12)])
+
+    def testError(self):
+        """Should raise the error of the generator in get."""
+        buffer = SequenceBuffer(lambda rng: flash_sequence(range(3), 2, 5, rng=rng))
+        self.assertRaises(ValueError, buffer.get)
+        self.assertRaises(ValueError, buffer.get)
+        buffer.stop()
+
+    def testStop(self):
+        """Should not return sequences after stop."""
+        buffer = SequenceBuffer(lambda rng: rng.random(), 2)
+        buffer.get()
+        buffer.stop()
+        self.assertRaises(RuntimeError, buffer.get)
+
+    def testStopWhileWaiting(self):
+        """Should wake up a waiting get on stop."""
+        buffer = SequenceBuffer(lambda rng: time.sleep(0.5), 2)
+        errors = []
+        def get():
+            try:
+                buffer.get()
+            except RuntimeError, e:
+                errors.append(e)
+        waiting = threading.Thread(target=get)
+        waiting.start()
+        time.sleep(0.1)
+        buffer.stop()
+        waiting.join(1)
+        self.assertFalse(waiting.isAlive())
+        self.assertEqual(len(errors), 1)
+
+
+def suite():
+    testSuite = unittest.makeSuite(FlashSequenceTestCase)
+    testSuite.addTest(unittest.makeSuite(OddballSequenceTestCase))
+    testSuite.addTest(unittest.makeSuite(BalancedTargetsTestCase))
+    testSuite.addTest(unittest.makeSuite(SequenceBufferTestCase))
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
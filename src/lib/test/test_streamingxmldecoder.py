@@ -0,0 +1,135 @@
+# test_streamingxmldecoder.py -
+# encoding: utf8
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+
+from lib import bcixml
+
+
+class StreamingXmlDecoderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.encoder = bcixml.XmlEncoder()
+        self.domdecoder = bcixml.XmlDecoder()
+        self.decoder = bcixml.StreamingXmlDecoder()
+
+    def testValues(self):
+        """Should decode the same values as the DOM decoder."""
+        values = [True, False, 1, 1.0, long(1), 1+0j, "foo", u"ß", None,
+                  [], [1], [1, 2, 3], (), (1,), (1, 2, 3), set([1, 2, 3]),
+                  frozenset([1, 2, 3]), {"foo" : 1, "bar" : 2},
+                  [[], [1], [1, [1, 2]]], ((), (1), (1, (1, 2))),
+                  {"foo" : 1, "bratwurst" : {"bar" : 2, "baz" : 3}},
+                  [0.5, -1.25, 3e-12], [1.0, "foo"]]
+        for value in values:
+            for type in bcixml.CONTROL_SIGNAL, bcixml.INTERACTION_SIGNAL:
+                signal = bcixml.BciSignal({"somename" : value}, None, type)
+                self.__compare(self.encoder.encode_packet(signal))
+
+    def testCommands(self):
+        """Should decode the same commands as the DOM decoder."""
+        signal = bcixml.BciSignal({"foo" : 1},
+                                  [("start", {"foo" : 1}), ("init", dict())],
+                                  bcixml.INTERACTION_SIGNAL)
+        self.__compare(self.encoder.encode_packet(signal))
+
+    def testReplySignal(self):
+        """Should decode the same reply signal as the DOM decoder."""
+        signal = bcixml.BciSignal(None, None, bcixml.REPLY_SIGNAL)
+        self.__compare(self.encoder.encode_packet(signal))
+
+    def testChildElements(self):
+        """Should read names and values from child elements."""
+        xml = """<?xml version="1.0" ?>
+        <bci-signal version="1.0">
+          <interaction-signal>
+            <i><name>foo</name><value>42</value></i>
+            <s name="bar"><value>baz &amp; qux</value></s>
+          </interaction-signal>
+        </bci-signal>"""
+        signal = self.__compare(xml)
+        self.assertEqual(signal.data, {u"foo" : 42, u"bar" : "baz & qux"})
+
+    def testFlatControlSignal(self):
+        """Should decode flat control signals via the fast path."""
+        xml = """<?xml version="1.0" encoding="utf-8"?><bci-signal version="1.0"><control-signal><f name="cl_output" value="0.25"/></control-signal></bci-signal>"""
+        self.assertNotEqual(self.decoder.decode_flat_control_signal(xml), None)
+        signal = self.__compare(xml)
+        self.assertEqual(signal.data, {u"cl_output" : 0.25})
+        xml = """<bci-signal version="1.0">
+          <control-signal>
+            <list name="cl_output">
+              <f value="1.0"/>
+              <float value="-2.5e-3" />
+            </list>
+          </control-signal>
+        </bci-signal>"""
+        self.assertNotEqual(self.decoder.decode_flat_control_signal(xml), None)
+        signal = self.__compare(xml)
+        self.assertEqual(signal.data, {u"cl_output" : [1.0, -2.5e-3]})
+
+    def testFlatControlSignalFallback(self):
+        """Should leave other shapes to the full parser."""
+        signal = bcixml.BciSignal({"cl_output" : [1.0, 2]}, None,
+                                  bcixml.CONTROL_SIGNAL)
+        xml = self.encoder.encode_packet(signal)
+        self.assertEqual(self.decoder.decode_flat_control_signal(xml), None)
+        signal = bcixml.BciSignal({"cl_output" : 1.0}, None,
+                                  bcixml.INTERACTION_SIGNAL)
+        xml = self.encoder.encode_packet(signal)
+        self.assertEqual(self.decoder.decode_flat_control_signal(xml), None)
+
+    def testDecodeUnsupportedSignalType(self):
+        """Should throw an Exception on decoding an unknown signal type."""
+        xml = """<?xml version="1.0" ?><bci-signal version="1.0"><foo/></bci-signal>"""
+        self.assertRaises(bcixml.DecodingError, self.decoder.decode_packet, xml)
+
+    def testDecodeUnknownType(self):
+        """Should throw an Exception on decoding an unknown value type."""
+        xml = """<?xml version="1.0" ?><bci-signal version="1.0"><control-signal><foo name="bar"/></control-signal></bci-signal>"""
+        self.assertRaises(bcixml.DecodingError, self.decoder.decode_packet, xml)
+
+    def testDecodeMalformed(self):
+        """Should throw an Exception on decoding malformed XML."""
+        xml = """<?xml version="1.0" ?><bci-signal version="1.0"><control-signal>"""
+        self.assertRaises(bcixml.DecodingError, self.decoder.decode_packet, xml)
+
+    def __compare(self, xml):
+        signal = self.domdecoder.decode_packet(xml)
+        signal2 = self.decoder.decode_packet(xml)
+        self.assertEqual(signal.type, signal2.type)
+        self.assertEqual(signal.commands, signal2.commands)
+        self.assertEqual(signal.data, signal2.data)
+        for key in signal.data:
+            self.assertEqual(type(signal.data[key]), type(signal2.data[key]))
+        self.assertEqual(map(type, signal.data.keys()),
+                         map(type, signal2.data.keys()))
+        return signal2
+
+
+def suite():
+    testSuite = unittest.makeSuite(StreamingXmlDecoderTestCase)
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# test_textcache.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+
+import pygame
+
+from lib.textcache import TextCache
+
+
+class TextCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pygame.font.init()
+        self.cache = TextCache()
+
+    def tearDown(self):
+        self.cache.clear()
+
+    def testFonts(self):
+        """Should load every font only once."""
+        font = self.cache.get_font(30)
+        self.assertTrue(self.cache.get_font(30) is font)
+        self.assertFalse(self.cache.get_font(20) is font)
+        self.assertEqual(self.cache.get_statistics()['fonts'], 2)
+
+    def testRender(self):
+        """Should render every text only once."""
+        surface = self.cache.render("foo", 30, (255, 255, 255))
+        self.assertTrue(self.cache.render("foo", 30, [255, 255, 255]) is surface)
+        self.assertFalse(self.cache.render("foo", 30, (255, 0, 0)) is surface)
+        self.assertFalse(self.cache.render("foo", 30, (255, 255, 255), (0, 0, 0)) is surface)
+        self.assertFalse(self.cache.render("foo", 30, (255, 255, 255), antialias=False) is surface)
+        stats = self.cache.get_statistics()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 4)
+        self.assertEqual(stats['surfaces'], 4)
+        self.assertAlmostEqual(stats['hit_rate'], 0.2)
+
+    def testEviction(self):
+        """Should evict the least recently used surfaces."""
+        surface = self.cache.render("foo", 30, (255, 255, 255))
+        # wider than foo, so evicting it makes room for another foo
+        other = self.cache.render("foobar", 30, (255, 255, 255))
+        size = lambda s: s.get_pitch() * s.get_height()
+        self.cache.max_bytes = size(surface) + size(other)
+        # foo is used more recently than foobar now
+        self.cache.render("foo", 30, (255, 255, 255))
+        self.cache.render("foo", 30, (255, 0, 0))
+        stats = self.cache.get_statistics()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['surfaces'], 2)
+        self.assertTrue(stats['bytes'] <= self.cache.max_bytes)
+        self.assertTrue(self.cache.render("foo", 30, (255, 255, 255)) is surface)
+        self.assertEqual(self.cache.get_statistics()['evictions'], 1)
+
+    def testPygameQuit(self):
+        """Should forget the fonts when pygame quits."""
+        self.cache.render("foo", 30, (255, 255, 255))
+        pygame.quit()
+        stats = self.cache.get_statistics()
+        self.assertEqual(stats['fonts'], 0)
+        self.assertEqual(stats['surfaces'], 0)
+        self.cache.render("foo", 30, (255, 255, 255))
+        pygame.quit()
+        self.assertEqual(self.cache.get_statistics()['fonts'], 0)
+
+
+def suite():
+    testSuite = unittest.makeSuite(TextCacheTestCase)
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
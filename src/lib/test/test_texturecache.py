@@ -0,0 +1,100 @@
+# test_texturecache.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from lib.vision_egg.model.texture_cache import TextureCache, Image
+
+
+class TextureCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.files = []
+        for i, size in enumerate([(16, 16), (30, 20), (64, 64)]):
+            filename = os.path.join(self.directory, "image%i.png" % i)
+            Image.new("RGB", size).save(filename)
+            self.files.append(filename)
+        # RGB pixels plus the RGBA texture padded to powers of 2
+        self.bytes = [16 * 16 * 3 + 16 * 16 * 4,
+                      30 * 20 * 3 + 32 * 32 * 4,
+                      64 * 64 * 3 + 64 * 64 * 4]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testPreload(self):
+        """Should read preloaded images only once."""
+        cache = TextureCache()
+        cache.preload(self.files, wait=True)
+        os.remove(self.files[0])
+        texture = cache.get(self.files[0])
+        self.assertTrue(cache.get(self.files[0]) is texture)
+        stats = cache.get_statistics()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 0)
+        self.assertEqual(stats['images'], 3)
+        self.assertEqual(stats['bytes'], sum(self.bytes))
+
+    def testMiss(self):
+        """Should read images which were not preloaded."""
+        cache = TextureCache()
+        texture = cache.get(self.files[1])
+        self.assertTrue(cache.get(self.files[1]) is texture)
+        stats = cache.get_statistics()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertRaises(IOError, cache.get, os.path.join(self.directory, "missing.png"))
+
+    def testEviction(self):
+        """Should drop the least recently used images."""
+        cache = TextureCache(max_bytes=self.bytes[0] + self.bytes[1])
+        cache.get(self.files[0])
+        cache.get(self.files[1])
+        # image0 is used more recently than image1 now
+        cache.get(self.files[0])
+        cache.get(self.files[2])
+        stats = cache.get_statistics()
+        self.assertEqual(stats['evictions'], 2)
+        self.assertEqual(stats['images'], 1)
+        self.assertEqual(stats['bytes'], self.bytes[2])
+
+    def testTextureObjects(self):
+        """Should keep the texture objects of cached textures."""
+        cache = TextureCache()
+        texture = cache.get(self.files[0])
+        cache.add_texture_object(texture, 1, True, "object")
+        self.assertEqual(cache.texture_object(texture, 1, True), "object")
+        self.assertEqual(cache.texture_object(texture, 2, True), None)
+        cache.add_texture_object(object(), 1, True, "other")
+        cache.reset()
+        self.assertEqual(cache.texture_object(texture, 1, True), None)
+
+
+def suite():
+    return unittest.makeSuite(TextureCacheTestCase)
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
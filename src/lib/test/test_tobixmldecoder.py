@@ -0,0 +1,122 @@
+# test_tobixmldecoder.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+import sys
+from StringIO import StringIO
+
+from lib import bcixml
+from lib import pylibtobiic
+
+
+def tobiic_packet(classifiers):
+    """Return a TOBI iC packet.
+
+    :param classifiers: list of (name, [(label, value), ...]) tuples
+
+    """
+    icmessage = pylibtobiic.ICMessage()
+    for name, classes in classifiers:
+        classifier = pylibtobiic.ICClassifier(name, u"test",
+                                              pylibtobiic.ICClassifier.ValueProb,
+                                              pylibtobiic.ICClassifier.LabelClass)
+        for label, value in classes:
+            classifier.classes.Add(pylibtobiic.ICClass(label, value))
+        icmessage.classifiers.Add(classifier)
+    return pylibtobiic.ICSerializer(icmessage).Serialize()
+
+
+class TobiXmlDecoderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.decoder = bcixml.TobiXmlDecoder()
+
+    def testControlSignal(self):
+        """Should return the values of the first classifier in packet order."""
+        packet = ('<?xml version="1.0" ?><messagec version="%s">'
+                  '<classifier description="" ltype="class" name="cl1" vtype="prob">'
+                  '<class label="a">0.25</class><class label="c">1.0</class>'
+                  '<class label="b">0.75</class></classifier>'
+                  '<classifier description="" ltype="class" name="cl2" vtype="prob">'
+                  '<class label="x">0.5</class></classifier></messagec>'
+                  % pylibtobiic.ICMESSAGE_VERSION)
+        signal = self.decoder.decode_packet(packet)
+        self.assertEqual(signal.type, bcixml.CONTROL_SIGNAL)
+        self.assertEqual(signal.data, {u"cl_output" : [0.25, 1.0, 0.75]})
+        self.assertEqual(signal.commands, [])
+
+    def testUpdateInPlace(self):
+        """Should update the existing classes of the ICMessage."""
+        self.decoder.decode_packet(tobiic_packet([(u"cl1", [(u"a", 0.25), (u"b", 0.75)])]))
+        iclass = self.decoder.icmessage.GetClass(u"cl1", u"b")
+        signal = self.decoder.decode_packet(tobiic_packet([(u"cl1", [(u"a", 0.5), (u"b", 0.5)])]))
+        self.assertEqual(signal.data[u"cl_output"], [0.5, 0.5])
+        self.assertTrue(self.decoder.icmessage.GetClass(u"cl1", u"b") is iclass)
+        self.assertEqual(iclass.GetValue(), 0.5)
+
+    def testStructureChange(self):
+        """Should rebuild the ICMessage when the classifiers change."""
+        self.decoder.decode_packet(tobiic_packet([(u"cl1", [(u"a", 0.25)])]))
+        signal = self.decoder.decode_packet(tobiic_packet([(u"cl2", [(u"x", 0.5), (u"y", 0.5)])]))
+        self.assertEqual(signal.data[u"cl_output"], [0.5, 0.5])
+        self.assertFalse(self.decoder.icmessage.classifiers.Has(u"cl1"))
+        self.assertTrue(self.decoder.icmessage.classifiers.Has(u"cl2"))
+
+    def testInvalidPackets(self):
+        """Should raise a DecodingError on invalid packets."""
+        packet = tobiic_packet([(u"cl1", [(u"a", 0.25)])])
+        packets = ["foo",
+                   packet[:-5],
+                   packet.replace(pylibtobiic.ICMESSAGE_VERSION, "0.0.1.0"),
+                   packet.replace("0.25", "foo"),
+                   tobiic_packet([(u"cl1", [(u"a", 0.25)])]).replace(
+                       "</classifier>", '<class label="a">0.5</class></classifier>')]
+        for p in packets:
+            self.assertRaises(bcixml.DecodingError, bcixml.TobiXmlDecoder().decode_packet, p)
+
+    def testBcixml(self):
+        """Should decode bcixml packets."""
+        signal = bcixml.BciSignal({"foo" : 1}, [("play", {})], bcixml.INTERACTION_SIGNAL)
+        packet = bcixml.XmlEncoder().encode_packet(signal)
+        decoded = self.decoder.decode_packet(packet)
+        self.assertEqual(decoded.type, bcixml.INTERACTION_SIGNAL)
+        self.assertEqual(decoded.data, {"foo" : 1})
+        self.assertEqual(decoded.commands, [("play", {})])
+
+    def testNoOutput(self):
+        """Should not print anything."""
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            self.decoder.decode_packet(tobiic_packet([(u"cl1", [(u"a", 0.25)])]))
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+        self.assertEqual(output, "")
+
+
+def suite():
+    testSuite = unittest.makeSuite(TobiXmlDecoderTestCase)
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
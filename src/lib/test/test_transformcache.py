@@ -0,0 +1,132 @@
+# test_transformcache.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+
+import pygame
+
+from lib.transformcache import RotationCache, TransformCache
+
+
+def bar():
+    """A 40x10 surface with a visible 20x6 bar."""
+    surface = pygame.Surface((40, 10))
+    surface.set_colorkey((0, 0, 0))
+    surface.fill((255, 255, 255), (10, 2, 20, 6))
+    return surface
+
+
+class RotationCacheTestCase(unittest.TestCase):
+
+    def testCrop(self):
+        """Should crop the rotations to the visible pixels."""
+        cache = RotationCache(bar(), 10)
+        surface, offset = cache.get(0)
+        self.assertEqual(surface.get_size(), (20, 6))
+        self.assertEqual(offset, (-10, -3))
+        surface, offset = cache.get(90)
+        self.assertEqual(surface.get_size(), (6, 20))
+        self.assertEqual(offset, (-3, -10))
+
+    def testQuantization(self):
+        """Should return the closest rotation."""
+        cache = RotationCache(bar(), 10)
+        cache.build()
+        self.assertEqual(cache.steps, 36)
+        self.assertTrue(cache.get(4) is cache.get(0))
+        self.assertTrue(cache.get(6) is cache.get(10))
+        self.assertTrue(cache.get(-90) is cache.get(270))
+        self.assertTrue(cache.get(359) is cache.get(0))
+
+    def testScales(self):
+        """Should render the rotations at the closest scale."""
+        cache = RotationCache(bar(), 90, scales=(1.0, 2.0))
+        self.assertEqual(cache.get(0, 1.9)[0].get_size(), (40, 12))
+        self.assertEqual(cache.get(0, 1.2)[0].get_size(), (20, 6))
+
+    def testMemoryBudget(self):
+        """Should reduce the resolution to stay below max_bytes."""
+        surface, offset = RotationCache(bar(), 45).get(45)
+        size = surface.get_pitch() * surface.get_height()
+        cache = RotationCache(bar(), 1, max_bytes=10 * size)
+        self.assertTrue(cache.resolution > 1)
+        self.assertTrue(cache.steps <= 10)
+
+    def testBackground(self):
+        """Should render the rotations in a background thread."""
+        cache = RotationCache(bar(), 5)
+        # nothing is rendered before the thread starts
+        self.assertTrue(cache._frames is None)
+        cache.build(background=True)
+        cache.get(45)
+        cache.wait()
+        self.assertTrue(None not in cache._frames[0])
+
+
+class TransformCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = TransformCache()
+        self.surface = bar()
+
+    def tearDown(self):
+        self.cache.clear()
+
+    def testScale(self):
+        """Should scale every surface only once."""
+        scaled = self.cache.scale(self.surface, (20, 5))
+        self.assertEqual(scaled.get_size(), (20, 5))
+        self.assertTrue(self.cache.scale(self.surface, (20, 5)) is scaled)
+        self.assertFalse(self.cache.scale(bar(), (20, 5)) is scaled)
+        self.assertFalse(self.cache.rotate(self.surface, 90) is scaled)
+        stats = self.cache.get_statistics()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 3)
+
+    def testEviction(self):
+        """Should evict the least recently used surfaces."""
+        scaled = self.cache.scale(self.surface, (20, 5))
+        self.cache.max_bytes = scaled.get_pitch() * scaled.get_height()
+        self.cache.scale(self.surface, (20, 4))
+        self.assertEqual(self.cache.get_statistics()['evictions'], 1)
+        self.assertFalse(self.cache.scale(self.surface, (20, 5)) is scaled)
+
+    def testPygameQuit(self):
+        """Should forget the surfaces when pygame quits."""
+        self.cache.scale(self.surface, (20, 5))
+        rotations = self.cache.rotations(self.surface, 10)
+        self.assertEqual(self.cache.get_statistics()['rotations'], 1)
+        pygame.quit()
+        stats = self.cache.get_statistics()
+        self.assertEqual(stats['surfaces'], 0)
+        self.assertEqual(stats['rotation_bytes'], 0)
+        del rotations
+        self.assertEqual(self.cache.get_statistics()['rotations'], 0)
+
+
+def suite():
+    testSuite = unittest.makeSuite(RotationCacheTestCase)
+    testSuite.addTest(unittest.makeSuite(TransformCacheTestCase))
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# test_trigger.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import unittest
+import socket
+import threading
+import time
+from StringIO import StringIO
+
+from lib import trigger
+
+
+class RecordingBackend(trigger.TriggerBackend):
+    """Records the written values and their times."""
+
+    def __init__(self):
+        self.written = []
+        self.closed = False
+
+    def write(self, value):
+        self.written.append((time.time(), value))
+
+    def close(self):
+        self.closed = True
+
+    def values(self):
+        return [value for t, value in self.written]
+
+
+class BlockingBackend(RecordingBackend):
+    """Blocks until the event is set."""
+
+    def __init__(self):
+        RecordingBackend.__init__(self)
+        self.event = threading.Event()
+
+    def write(self, value):
+        self.event.wait()
+        RecordingBackend.write(self, value)
+
+
+class TriggerDispatcherTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = RecordingBackend()
+        self.dispatcher = trigger.TriggerDispatcher(self.backend, 0.02, priority=False)
+        self.dispatcher.start()
+
+    def tearDown(self):
+        self.dispatcher.stop()
+
+    def testReset(self):
+        """Should reset the trigger after the reset time."""
+        start = time.time()
+        self.dispatcher.send(1)
+        time.sleep(0.1)
+        self.assertEqual(self.backend.values(), [1, 0])
+        (t1, v1), (t2, v2) = self.backend.written
+        self.assertTrue(t1 - start < 0.01)
+        self.assertTrue(0.015 < t2 - t1 < 0.05)
+
+    def testNextTriggerCancelsReset(self):
+        """Should reset only after the last of several quick triggers."""
+        for i in 1, 2, 3:
+            self.dispatcher.send(i)
+            time.sleep(0.002)
+        time.sleep(0.1)
+        self.assertEqual(self.backend.values(), [1, 2, 3, 0])
+
+    def testWithoutReset(self):
+        """Should not reset triggers sent with reset=False."""
+        self.dispatcher.send(1, False)
+        time.sleep(0.1)
+        self.assertEqual(self.backend.values(), [1])
+
+    def testStop(self):
+        """Should write pending triggers and the reset when stopped."""
+        self.dispatcher.send(1)
+        self.dispatcher.send(2)
+        self.dispatcher.stop()
+        self.assertFalse(self.dispatcher.isAlive())
+        self.assertEqual(self.backend.values(), [1, 2, 0])
+        self.assertTrue(self.backend.closed)
+
+    def testStatistics(self):
+        """Should count the triggers and measure their latency."""
+        for i in range(10):
+            self.dispatcher.send(i)
+        self.dispatcher.stop()
+        stats = self.dispatcher.get_statistics()
+        self.assertEqual(stats['sent'], 10)
+        self.assertEqual(stats['resets'], 1)
+        self.assertEqual(stats['dropped'], 0)
+        self.assertTrue(0 <= stats['latency_mean'] <= stats['latency_max'] < 1)
+        self.assertTrue(stats['latency_std'] >= 0)
+
+    def testSingleThread(self):
+        """Should not start a thread per trigger."""
+        threads = threading.activeCount()
+        for i in range(100):
+            self.dispatcher.send(i)
+            time.sleep(0.0005)
+        self.assertEqual(threading.activeCount(), threads)
+
+
+class TriggerQueueTestCase(unittest.TestCase):
+
+    def testDropped(self):
+        """Should drop triggers if the queue is full."""
+        backend = BlockingBackend()
+        dispatcher = trigger.TriggerDispatcher(backend, queue_size=2, priority=False)
+        dispatcher.start()
+        dispatcher.send(1)
+        time.sleep(0.05)
+        # 1 is being written
+        self.assertTrue(dispatcher.send(2))
+        self.assertTrue(dispatcher.send(3))
+        self.assertFalse(dispatcher.send(4))
+        backend.event.set()
+        dispatcher.stop()
+        self.assertEqual(backend.values(), [1, 2, 3, 0])
+        self.assertEqual(dispatcher.get_statistics()['dropped'], 1)
+
+
+class TriggerBackendTestCase(unittest.TestCase):
+
+    def testUDPBackend(self):
+        """Should send the trigger values via UDP."""
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.bind(("127.0.0.1", 0))
+        s.settimeout(1)
+        backend = trigger.UDPBackend(*s.getsockname())
+        backend.write(42)
+        self.assertEqual(s.recv(1024), "42\n")
+        backend.close()
+        s.close()
+
+    def testFileBackend(self):
+        """Should write time stamps and trigger values."""
+        f = StringIO()
+        backend = trigger.FileBackend(f)
+        backend.write(42)
+        backend.write(0)
+        backend.close()
+        lines = f.getvalue().splitlines()
+        self.assertEqual([line.split()[1] for line in lines], ["42", "0"])
+        float(lines[0].split()[0])
+
+    def testDefaultBackend(self):
+        """Should always return a backend."""
+        self.assertTrue(isinstance(trigger.default_backend(), trigger.TriggerBackend))
+
+
+def suite():
+    testSuite = unittest.makeSuite(TriggerDispatcherTestCase)
+    testSuite.addTest(unittest.makeSuite(TriggerQueueTestCase))
+    testSuite.addTest(unittest.makeSuite(TriggerBackendTestCase))
+    return testSuite
+
+def main():
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# textcache.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Cache for pygame fonts and rendered text.
+
+Loading a font and rendering a string are expensive compared to blitting the
+result, yet many Feedbacks do both on every frame for the same few strings.
+:class:`TextCache` keeps the fonts by name and size and the rendered
+surfaces by text, size, color, background and antialiasing, and evicts the
+least recently used surfaces when the surfaces take more than ``max_bytes``
+bytes.
+
+The surfaces are shared, callers must not draw onto them. The cache is
+cleared when pygame quits, since the fonts are invalid afterwards.
+
+Most code uses the shared cache via the module functions::
+
+    from lib import textcache
+    surface = textcache.render("Hello", 30, (255, 255, 255))
+    screen.blit(surface, surface.get_rect(center=center))
+
+"""
+
+
+import logging
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache(object):
+    """LRU cache of fonts and rendered text surfaces."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        """Initialize the cache.
+
+        :param max_bytes: maximum size of the cached surfaces in bytes
+        :type max_bytes: int
+
+        """
+        self.logger = logging.getLogger("TextCache")
+        self.max_bytes = max_bytes
+        self._fonts = {}
+        self._surfaces = OrderedDict()
+        self._bytes = 0
+        self._quitRegistered = False
+        self._statistics = {'hits' : 0, 'misses' : 0, 'evictions' : 0}
+
+
+    def get_font(self, size, name=None):
+        """Return the font.
+
+        :param size: font size
+        :type size: int
+        :param name: file name of the font, ``None`` for the default font
+        :type name: str
+        :returns: pygame.font.Font
+
+        """
+        key = (name, size)
+        font = self._fonts.get(key)
+        if font is None:
+            if not self._quitRegistered:
+                pygame.register_quit(self._on_pygame_quit)
+                self._quitRegistered = True
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = pygame.font.Font(name, size)
+            self._fonts[key] = font
+        return font
+
+
+    def render(self, text, size, color, background=None, antialias=True, name=None):
+        """Return the rendered text.
+
+        The arguments are the same as for ``pygame.font.Font.render``. The
+        returned surface must not be modified.
+
+        :param text: the text
+        :type text: str or unicode
+        :param size: font size
+        :type size: int
+        :param color: text color
+        :param background: background color, ``None`` for a transparent
+            background
+        :param antialias: render antialiased text
+        :type antialias: bool
+        :param name: file name of the font, ``None`` for the default font
+        :type name: str
+        :returns: pygame.Surface
+
+        """
+        key = (text, size, tuple(color),
+               tuple(background) if background is not None else None,
+               bool(antialias), name)
+        surface = self._surfaces.pop(key, None)
+        if surface is not None:
+            self._statistics['hits'] += 1
+        else:
+            self._statistics['misses'] += 1
+            font = self.get_font(size, name)
+            if background is None:
+                surface = font.render(text, antialias, color)
+            else:
+                surface = font.render(text, antialias, color, background)
+            self._bytes += _size(surface)
+        # (re)insert as most recently used
+        self._surfaces[key] = surface
+        while self._bytes > self.max_bytes and len(self._surfaces) > 1:
+            old = self._surfaces.popitem(last=False)[1]
+            self._bytes -= _size(old)
+            self._statistics['evictions'] += 1
+        return surface
+
+
+    def clear(self):
+        """Remove all fonts and surfaces."""
+        self._fonts.clear()
+        self._surfaces.clear()
+        self._bytes = 0
+
+
+    def get_statistics(self):
+        """Return the statistics of the cache.
+
+        :returns: dict with the number of ``hits``, ``misses`` and
+            ``evictions``, the ``hit_rate``, the number of cached
+            ``surfaces`` and ``fonts`` and the ``bytes`` of the surfaces
+
+        """
+        stats = self._statistics.copy()
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / float(lookups) if lookups else 0.0
+        stats['surfaces'] = len(self._surfaces)
+        stats['fonts'] = len(self._fonts)
+        stats['bytes'] = self._bytes
+        return stats
+
+
+    def _on_pygame_quit(self):
+        # pygame forgets the quit functions after calling them
+        self._quitRegistered = False
+        self.logger.debug("Text cache statistics: %s" % str(self.get_statistics()))
+        self.clear()
+
+
+def _size(surface):
+    """Return the size of the pixel data of a surface in bytes."""
+    return surface.get_pitch() * surface.get_height()
+
+
+_cache = None
+
+def get_cache():
+    """Return the shared :class:`TextCache`.
+
+    :returns: TextCache
+
+    """
+    global _cache
+    if _cache is None:
+        _cache = TextCache()
+    return _cache
+
+
+def get_font(size, name=None):
+    """Return the font from the shared cache, see
+    :func:`TextCache.get_font`."""
+    return get_cache().get_font(size, name)
+
+
+def render(text, size, color, background=None, antialias=True, name=None):
+    """Return the rendered text from the shared cache, see
+    :func:`TextCache.render`."""
+    return get_cache().render(text, size, color, background, antialias, name)
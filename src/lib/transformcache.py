@@ -0,0 +1,352 @@
+# transformcache.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Cache for rotated and scaled pygame surfaces.
+
+Rotating or scaling a surface allocates and fills a new surface, which is
+too expensive to do every frame for large stimuli. :class:`RotationCache`
+renders the rotations of a surface at a fixed angular resolution (and at
+some scales) once, optionally in a background thread, and returns the one
+closest to the requested angle. Every rotation is cropped to its visible
+pixels, so a thin clock hand does not cost a full screen sized surface per
+angle. If the rotations would take more than ``max_bytes`` bytes, the
+resolution is reduced; the test for that renders a rotation as well, so it
+runs in the background thread, too.
+
+:class:`TransformCache` keeps scaled and rotated versions of surfaces in an
+LRU cache with a memory cap, for transformations which are needed again and
+again, and creates the :class:`RotationCache` instances. ``PygameFeedback``
+has one as ``_transforms``::
+
+    hand = self._transforms.rotations(self.clockhand, resolution=0.5)
+    ...
+    surface, (dx, dy) = hand.get(angle)
+    self.screen.blit(surface, (center[0] + dx, center[1] + dy))
+
+The surfaces are shared, callers must not draw onto them. The caches are
+cleared when pygame quits.
+
+"""
+
+
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+
+import pygame
+
+
+class RotationCache(object):
+    """Pre-rendered rotations of a surface."""
+
+    def __init__(self, surface, resolution=1.0, scales=(1.0,), max_bytes=32 * 1024 * 1024):
+        """Initialize the cache, the rotations are rendered by :func:`build`
+        or on demand. The resolution is fitted to ``max_bytes`` before the
+        first rotation is rendered.
+
+        :param surface: the surface to rotate around its center
+        :type surface: pygame.Surface
+        :param resolution: angle between two rotations in degrees
+        :type resolution: float
+        :param scales: scale factors to render the rotations at
+        :type scales: sequence of float
+        :param max_bytes: maximum size of the rotations in bytes
+        :type max_bytes: int
+
+        """
+        self.logger = logging.getLogger("RotationCache")
+        self.surface = surface
+        self.scales = tuple(scales)
+        self.max_bytes = max_bytes
+        self._requested = resolution
+        self._resolution = None
+        self._steps = None
+        self._frames = None
+        self._fitLock = threading.Lock()
+        self._thread = None
+
+
+    @property
+    def resolution(self):
+        """Angle between two rotations in degrees."""
+        self._fit()
+        return self._resolution
+
+
+    @property
+    def steps(self):
+        """Number of rotations per scale."""
+        self._fit()
+        return self._steps
+
+
+    def _fit(self):
+        """Fit the resolution and allocate the rotations, once."""
+        if self._frames is not None:
+            return
+        self._fitLock.acquire()
+        try:
+            if self._frames is None:
+                self._resolution = self._fit_resolution(self._requested)
+                self._steps = int(round(360.0 / self._resolution))
+                self._frames = [[None] * self._steps for scale in self.scales]
+        finally:
+            self._fitLock.release()
+
+
+    def _fit_resolution(self, resolution):
+        """Return the finest resolution not finer than ``resolution`` whose
+        rotations fit into ``max_bytes``."""
+        # the bounding box of a rotation is largest at 45 degrees
+        size = sum(_size(self._render(45, scale)[0]) for scale in self.scales)
+        steps = int(round(360.0 / resolution))
+        while steps > 4 and steps * size > self.max_bytes:
+            steps //= 2
+        if 360.0 / steps != resolution:
+            self.logger.warning("Reduced the resolution from %g to %g degrees to stay below %d bytes." % (resolution, 360.0 / steps, self.max_bytes))
+        return 360.0 / steps
+
+
+    def _render(self, angle, scale):
+        """Return the cropped rotation and the offset of its top left corner
+        to the center of rotation."""
+        surface = self.surface
+        if scale != 1.0:
+            w, h = surface.get_size()
+            surface = pygame.transform.scale(surface, (max(1, int(round(w * scale))), max(1, int(round(h * scale)))))
+        rotated = pygame.transform.rotate(surface, angle)
+        w, h = rotated.get_size()
+        rect = rotated.get_bounding_rect()
+        if rect.width == 0 or rect.height == 0:
+            rect = pygame.Rect(w // 2, h // 2, 1, 1)
+        if rect.size != (w, h):
+            rotated = rotated.subsurface(rect).copy()
+        return rotated, (rect.left - w // 2, rect.top - h // 2)
+
+
+    def build(self, background=False):
+        """Render all rotations.
+
+        :param background: render in a background thread, rotations which
+            are not rendered yet are rendered on demand by :func:`get`
+        :type background: bool
+
+        """
+        if background:
+            self._thread = threading.Thread(target=self._build)
+            self._thread.setDaemon(True)
+            self._thread.start()
+        else:
+            self._build()
+
+
+    def _build(self):
+        self._fit()
+        for i, frames in enumerate(self._frames):
+            for step in xrange(self._steps):
+                if frames[step] is None:
+                    frames[step] = self._render(step * self._resolution, self.scales[i])
+
+
+    def wait(self):
+        """Wait until the background thread rendered all rotations."""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+    def get(self, angle, scale=1.0):
+        """Return the rotation closest to an angle.
+
+        :param angle: counterclockwise angle in degrees, as for
+            ``pygame.transform.rotate``
+        :type angle: float
+        :param scale: scale factor, the closest one of :attr:`scales` is
+            used
+        :type scale: float
+        :returns: tuple (surface, (dx, dy)), blit the surface at the center
+            of rotation plus (dx, dy)
+
+        """
+        self._fit()
+        i = 0
+        if len(self.scales) > 1:
+            for j in xrange(1, len(self.scales)):
+                if abs(self.scales[j] - scale) < abs(self.scales[i] - scale):
+                    i = j
+        step = int(round(angle / self._resolution)) % self._steps
+        frame = self._frames[i][step]
+        if frame is None:
+            frame = self._render(step * self._resolution, self.scales[i])
+            self._frames[i][step] = frame
+        return frame
+
+
+    def get_bytes(self):
+        """Return the size of the rendered rotations in bytes."""
+        if self._frames is None:
+            return 0
+        return sum(_size(frame[0]) for frames in self._frames for frame in frames if frame is not None)
+
+
+    def clear(self):
+        """Remove the rendered rotations."""
+        self.wait()
+        if self._frames is not None:
+            self._frames = [[None] * self._steps for scale in self.scales]
+
+
+class TransformCache(object):
+    """LRU cache of scaled and rotated surfaces."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        """Initialize the cache.
+
+        :param max_bytes: maximum size of the cached surfaces in bytes, not
+            counting the :class:`RotationCache` instances
+        :type max_bytes: int
+
+        """
+        self.logger = logging.getLogger("TransformCache")
+        self.max_bytes = max_bytes
+        self._surfaces = OrderedDict()
+        self._bytes = 0
+        # rotations are dropped with the last reference of the Feedback
+        self._rotations = weakref.WeakSet()
+        self._quitRegistered = False
+        self._statistics = {'hits' : 0, 'misses' : 0, 'evictions' : 0}
+
+
+    def scale(self, surface, size):
+        """Return the surface scaled to a size.
+
+        :param surface: the surface
+        :type surface: pygame.Surface
+        :param size: width and height
+        :type size: (int, int)
+        :returns: pygame.Surface
+
+        """
+        size = (int(size[0]), int(size[1]))
+        return self._get(surface, ('scale', size), pygame.transform.scale, size)
+
+
+    def rotate(self, surface, angle):
+        """Return the surface rotated by an angle.
+
+        :param surface: the surface
+        :type surface: pygame.Surface
+        :param angle: counterclockwise angle in degrees
+        :type angle: float
+        :returns: pygame.Surface
+
+        """
+        return self._get(surface, ('rotate', angle), pygame.transform.rotate, angle)
+
+
+    def rotations(self, surface, resolution=1.0, scales=(1.0,), background=False, max_bytes=None):
+        """Return a :class:`RotationCache` of the surface with all rotations
+        rendered.
+
+        :param surface: the surface to rotate around its center
+        :type surface: pygame.Surface
+        :param resolution: angle between two rotations in degrees
+        :type resolution: float
+        :param scales: scale factors to render the rotations at
+        :type scales: sequence of float
+        :param background: render the rotations in a background thread
+        :type background: bool
+        :param max_bytes: maximum size of the rotations in bytes, defaults
+            to :attr:`max_bytes`
+        :returns: RotationCache
+
+        """
+        self._register_quit()
+        rotations = RotationCache(surface, resolution, scales,
+                                  self.max_bytes if max_bytes is None else max_bytes)
+        rotations.build(background)
+        self._rotations.add(rotations)
+        return rotations
+
+
+    def _get(self, surface, transformation, function, argument):
+        # the source is kept in the entry, so its id cannot be reused
+        key = (id(surface), transformation)
+        entry = self._surfaces.pop(key, None)
+        if entry is not None and entry[0] is surface:
+            self._statistics['hits'] += 1
+        else:
+            self._register_quit()
+            self._statistics['misses'] += 1
+            if entry is not None:
+                self._bytes -= _size(entry[1])
+            entry = surface, function(surface, argument)
+            self._bytes += _size(entry[1])
+        # (re)insert as most recently used
+        self._surfaces[key] = entry
+        while self._bytes > self.max_bytes and len(self._surfaces) > 1:
+            old = self._surfaces.popitem(last=False)[1]
+            self._bytes -= _size(old[1])
+            self._statistics['evictions'] += 1
+        return entry[1]
+
+
+    def clear(self):
+        """Remove all surfaces and rotations."""
+        self._surfaces.clear()
+        self._bytes = 0
+        for rotations in list(self._rotations):
+            rotations.clear()
+
+
+    def get_statistics(self):
+        """Return the statistics of the cache.
+
+        :returns: dict with the number of ``hits``, ``misses`` and
+            ``evictions``, the ``hit_rate``, the number of cached
+            ``surfaces`` and their ``bytes``, and the number of
+            ``rotations`` caches and their ``rotation_bytes``
+
+        """
+        stats = self._statistics.copy()
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / float(lookups) if lookups else 0.0
+        stats['surfaces'] = len(self._surfaces)
+        stats['bytes'] = self._bytes
+        stats['rotations'] = len(self._rotations)
+        stats['rotation_bytes'] = sum(r.get_bytes() for r in self._rotations)
+        return stats
+
+
+    def _register_quit(self):
+        if not self._quitRegistered:
+            pygame.register_quit(self._on_pygame_quit)
+            self._quitRegistered = True
+
+
+    def _on_pygame_quit(self):
+        # pygame forgets the quit functions after calling them
+        self._quitRegistered = False
+        self.logger.debug("Transform cache statistics: %s" % str(self.get_statistics()))
+        self.clear()
+
+
+def _size(surface):
+    """Return the size of the pixel data of a surface in bytes."""
+    return surface.get_pitch() * surface.get_height()
@@ -0,0 +1,379 @@
+# trigger.py -
+# Copyright (C) 2014  Bastian Venthur
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+"""Trigger output.
+
+Triggers are written by one long-lived :class:`TriggerDispatcher` thread.
+Sending a trigger only puts it into the dispatcher's queue and wakes the
+thread up, the reset to zero after a short time is a deadline of the
+dispatcher instead of a new :class:`threading.Timer` thread per trigger.
+
+The hardware is hidden behind a :class:`TriggerBackend`:
+
+* :class:`ParallelBackend` -- parallel port via pyparallel
+* :class:`InpOutBackend` -- parallel port via inpout32.dll on Windows
+* :class:`SerialBackend` -- serial port via pySerial
+* :class:`UDPBackend` -- trigger values as text via UDP
+* :class:`FileBackend` -- time stamps and trigger values written to a file
+* :class:`NullBackend` -- discards the triggers
+
+Usage::
+
+    dispatcher = TriggerDispatcher(ParallelBackend())
+    dispatcher.start()
+    dispatcher.send(marker.TRIAL_START)
+    ...
+    dispatcher.stop()
+    print dispatcher.get_statistics()
+
+"""
+
+
+import ctypes
+import ctypes.util
+import datetime
+import logging
+import math
+import select
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+from lib.clock import monotonic
+from lib.eventloop import _wakeup_pair
+
+
+class TriggerBackend(object):
+    """Base class for the trigger backends."""
+
+    def write(self, value):
+        """Write the trigger value to the hardware.
+
+        :param value: trigger value
+        :type value: int
+
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release the hardware."""
+        pass
+
+
+class ParallelBackend(TriggerBackend):
+    """Parallel port via pyparallel."""
+
+    def __init__(self, port=0):
+        import parallel
+        self.port = parallel.Parallel(port)
+
+    def write(self, value):
+        self.port.setData(value)
+
+
+class InpOutBackend(TriggerBackend):
+    """Parallel port via inpout32.dll on Windows."""
+
+    def __init__(self, port_num=0x378):
+        from ctypes import windll
+        self.dll = windll.inpout32
+        self.port_num = port_num
+
+    def write(self, value):
+        self.dll.Out32(self.port_num, value)
+
+
+class SerialBackend(TriggerBackend):
+    """Serial port via pySerial.
+
+    :param port: port name or number, or an open :class:`serial.Serial`
+    :param baudrate: baud rate, if the port is opened by the backend
+
+    """
+
+    def __init__(self, port, baudrate=57600):
+        if isinstance(port, (basestring, int)):
+            import serial
+            port = serial.Serial(port=port, baudrate=baudrate)
+        self.port = port
+
+    def write(self, value):
+        self.port.write(chr(value))
+
+    def close(self):
+        self.port.close()
+
+
+class UDPBackend(TriggerBackend):
+    """Sends the trigger values as text with a trailing ``'\\n'`` via UDP."""
+
+    def __init__(self, host='127.0.0.1', port=12344):
+        self.address = (host, port)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def write(self, value):
+        self.socket.sendto(str(value) + '\n', self.address)
+
+    def close(self):
+        self.socket.close()
+
+
+class FileBackend(TriggerBackend):
+    """Writes one line with time stamp and trigger value per trigger.
+
+    :param file: file name or file like object
+
+    """
+
+    def __init__(self, file):
+        self.owner = isinstance(file, basestring)
+        self.file = open(file, 'a') if self.owner else file
+
+    def write(self, value):
+        self.file.write("%.6f %s\n" % (time.time(), value))
+
+    def close(self):
+        if self.owner:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+class NullBackend(TriggerBackend):
+    """Discards the triggers."""
+
+    def write(self, value):
+        pass
+
+
+def default_backend(port_num=0x378):
+    """Return the parallel port backend of this platform.
+
+    Falls back to a :class:`NullBackend` if the parallel port is not
+    available.
+
+    :param port_num: address of the parallel port, used on Windows only
+    :returns: :class:`TriggerBackend`
+
+    """
+    logger = logging.getLogger("Trigger")
+    if sys.platform == 'win32':
+        try:
+            return InpOutBackend(port_num)
+        except:
+            logger.warning("Could not load inpout32.dll. Please make sure it is located in the system32 directory")
+    else:
+        try:
+            return ParallelBackend()
+        except:
+            logger.warning("Unable to open parallel port! Please install pyparallel to use it.")
+    return NullBackend()
+
+
+class TriggerDispatcher(threading.Thread):
+    """Thread writing the triggers to a :class:`TriggerBackend`.
+
+    Triggers are stamped when they are sent and written in that order. A
+    trigger sent with ``reset=True`` is followed by a zero after
+    ``reset_time`` seconds, unless the next trigger comes first. The time
+    between sending and writing a trigger is recorded, see
+    :func:`get_statistics`.
+
+    """
+
+    def __init__(self, backend, reset_time=0.01, queue_size=1024, priority=True):
+        """Initialize the dispatcher.
+
+        :param backend: the trigger backend
+        :type backend: TriggerBackend
+        :param reset_time: time in seconds after which a trigger is reset to 0
+        :type reset_time: float
+        :param queue_size: maximum number of pending triggers, further
+            triggers are dropped
+        :type queue_size: int
+        :param priority: try to raise the priority of the thread
+        :type priority: bool
+
+        """
+        threading.Thread.__init__(self, name="TriggerDispatcher")
+        self.setDaemon(True)
+        self.logger = logging.getLogger("Trigger")
+        self.backend = backend
+        self.reset_time = reset_time
+        self.queue_size = queue_size
+        self.priority = priority
+        self._queue = deque()
+        self._stopped = False
+        self._wakeupReader, self._wakeupWriter = _wakeup_pair()
+        self._wakeupReader.setblocking(False)
+        self._wakeupWriter.setblocking(False)
+        self._statistics = {'sent' : 0, 'resets' : 0, 'dropped' : 0}
+        self._latencySum = 0.0
+        self._latencySumSq = 0.0
+        self._latencyMax = 0.0
+
+
+    def send(self, value, reset=True):
+        """Queue a trigger. May be called from any thread.
+
+        :param value: trigger value
+        :type value: int
+        :param reset: reset the trigger to 0 after ``reset_time``
+        :type reset: bool
+        :returns: False if the queue was full and the trigger was dropped
+
+        """
+        t = monotonic()
+        if len(self._queue) >= self.queue_size:
+            self._statistics['dropped'] += 1
+            return False
+        # the wall clock time is only logged
+        self._queue.append((t, time.time(), value, reset))
+        self._wakeup()
+        return True
+
+
+    def stop(self, timeout=1.0):
+        """Write the pending triggers and a pending reset, then stop the
+        thread and close the backend.
+
+        :param timeout: maximum time in seconds to wait for the thread
+        :type timeout: float
+
+        """
+        self._stopped = True
+        self._wakeup()
+        if self.isAlive():
+            self.join(timeout)
+        self.backend.close()
+        self._wakeupReader.close()
+        self._wakeupWriter.close()
+
+
+    def get_statistics(self):
+        """Return the trigger statistics.
+
+        :returns: dict with the number of ``sent``, ``dropped`` triggers and
+            ``resets``, and the mean, standard deviation and maximum of the
+            time between sending and writing a trigger in seconds
+            (``latency_mean``, ``latency_std``, ``latency_max``)
+
+        """
+        stats = self._statistics.copy()
+        n = stats['sent']
+        mean = self._latencySum / n if n else 0.0
+        variance = self._latencySumSq / n - mean * mean if n else 0.0
+        stats['latency_mean'] = mean
+        stats['latency_std'] = math.sqrt(max(variance, 0.0))
+        stats['latency_max'] = self._latencyMax
+        return stats
+
+
+    def run(self):
+        if self.priority:
+            self._raise_priority()
+        deadline = None
+        while True:
+            if not self._queue:
+                if self._stopped:
+                    # leave the port at 0
+                    if deadline is not None:
+                        self._reset()
+                    break
+                timeout = None
+                if deadline is not None:
+                    timeout = max(0.0, deadline - monotonic())
+                try:
+                    select.select([self._wakeupReader], [], [], timeout)
+                except select.error:
+                    pass
+                self._drain_wakeup()
+            while self._queue:
+                t, wall, value, reset = self._queue.popleft()
+                if self._write(value):
+                    self._record(t, wall, value)
+                if reset:
+                    deadline = monotonic() + self.reset_time
+            if deadline is not None and monotonic() >= deadline:
+                deadline = None
+                self._reset()
+
+
+    def _reset(self):
+        if self._write(0):
+            self._statistics['resets'] += 1
+
+
+    def _write(self, value):
+        try:
+            self.backend.write(value)
+        except:
+            self.logger.exception("Unable to write trigger %s:" % str(value))
+            return False
+        return True
+
+
+    def _record(self, t, wall, value):
+        latency = monotonic() - t
+        self._statistics['sent'] += 1
+        self._latencySum += latency
+        self._latencySumSq += latency * latency
+        if latency > self._latencyMax:
+            self._latencyMax = latency
+        self.logger.info("Trigger: %s :%s", datetime.datetime.fromtimestamp(wall), value)
+
+
+    def _wakeup(self):
+        try:
+            self._wakeupWriter.send("x")
+        except socket.error:
+            # the buffer is full or the dispatcher is stopped
+            pass
+
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeupReader.recv(4096):
+                pass
+        except socket.error:
+            pass
+
+
+    def _raise_priority(self):
+        """Raise the priority of the calling thread, if permitted."""
+        try:
+            if sys.platform == 'win32':
+                kernel32 = ctypes.windll.kernel32
+                THREAD_PRIORITY_TIME_CRITICAL = 15
+                ok = kernel32.SetThreadPriority(kernel32.GetCurrentThread(),
+                                                THREAD_PRIORITY_TIME_CRITICAL)
+            elif sys.platform.startswith('linux'):
+                libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+                SCHED_FIFO = 1
+                param = ctypes.c_int(libc.sched_get_priority_min(SCHED_FIFO))
+                # pid 0 is the calling thread
+                ok = libc.sched_setscheduler(0, SCHED_FIFO, ctypes.byref(param)) == 0
+            else:
+                ok = False
+        except Exception, e:
+            self.logger.debug("Unable to raise the priority: %s" % str(e))
+            return
+        if not ok:
+            self.logger.debug("Not permitted to raise the priority of the trigger thread.")
@@ -13,10 +13,11 @@ program; if not, see <http://www.gnu.org/licenses/>.
 
 """
 
-from itertools import izip
+from itertools import chain, izip, repeat
 from random import uniform
 import logging
 
+from glyph_atlas import AtlasText
 from text_list import TextList
 
 class ColorWord(TextList):
@@ -38,12 +39,10 @@ class ColorWord(TextList):
         self.rebuild(target)
 
     def rebuild(self, target=None):
-        self.clear()
         sizes = [self._symbol_size] * len(self.text)
         if self._target_index is not None:
             sizes[self._target_index] = self._target_size
-        for letter, size in izip(self.text, sizes):
-            self.add(letter, size)
+        self.set_texts(self.text, sizes)
         self._set_colors()
 
     def set_text(self, text):
@@ -70,5 +69,8 @@ class ColorWord(TextList):
         self.set_colors(colors)
 
     def _set_colors(self):
-        for color, symbol in izip(self._colors, self):
+        # reused symbols without a color of their own get the default one
+        default = AtlasText.parameters_and_defaults['color'][0]
+        colors = chain(self._colors, repeat(default))
+        for color, symbol in izip(colors, self):
             symbol.set(color=color)
@@ -0,0 +1,263 @@
+__copyright__ = """ Copyright (c) 2014 Bastian Venthur
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+""" Text stimuli drawn from a shared glyph texture.
+
+A VisionEgg.Text.Text renders its text into a new texture whenever the
+text changes, which is too slow for RSVP symbols shown every 50 ms.
+L{GlyphAtlas} rasterizes every (font, size, symbol) once into a shared
+texture page and L{AtlasText} draws one textured quad from it, in any
+color. Changing the text of an L{AtlasText} only changes its texture
+coordinates.
+"""
+
+import logging
+
+import pygame
+
+import VisionEgg
+import VisionEgg.ParameterTypes as ve_types
+import VisionEgg.GL as gl
+from VisionEgg.Core import Stimulus
+
+from lib import textcache
+
+class Glyph(object):
+    """ The place of a rasterized symbol in the atlas. """
+    __slots__ = ('page', 'size', 'texcoords')
+
+    def __init__(self, page, size, texcoords):
+        self.page = page
+        self.size = size
+        self.texcoords = texcoords
+
+class _Page(object):
+    """ A square texture, filled with glyphs in rows (shelves). """
+    padding = 1
+
+    def __init__(self, size):
+        self.size = size
+        self.surface = pygame.Surface((size, size), pygame.SRCALPHA, 32)
+        self.surface.fill((255, 255, 255, 0))
+        self.texture = None
+        self.dirty = []
+        self._x = 0
+        self._y = 0
+        self._shelf = 0
+
+    def insert(self, surface):
+        """ Copy the surface into a free place and return its rect, or
+        None if the page is full.
+        """
+        w, h = surface.get_size()
+        pw, ph = w + 2 * self.padding, h + 2 * self.padding
+        if self._x + pw > self.size:
+            self._x = 0
+            self._y += self._shelf
+            self._shelf = 0
+        if self._x + pw > self.size or self._y + ph > self.size:
+            return None
+        rect = pygame.Rect(self._x + self.padding, self._y + self.padding, w, h)
+        self.surface.blit(surface, rect.topleft)
+        self._x += pw
+        self._shelf = max(self._shelf, ph)
+        self.dirty.append(rect)
+        return rect
+
+    def texcoords(self, rect):
+        """ Texture coordinates (left, bottom, right, top) of a rect,
+        the surface is uploaded bottom row first.
+        """
+        s = float(self.size)
+        return (rect.left / s, (s - rect.bottom) / s, rect.right / s,
+                (s - rect.top) / s)
+
+class GlyphAtlas(object):
+    """ Shared texture pages with the glyphs of all fonts and sizes. The
+    textures are uploaded when a page is bound the first time, and new
+    glyphs of a page are uploaded with the next bind, so glyphs can be
+    added without an OpenGL context.
+    """
+    def __init__(self, page_size=1024):
+        self._logger = logging.getLogger('GlyphAtlas')
+        self._page_size = page_size
+        self._glyphs = {}
+        self._pages = []
+        self._quit_registered = False
+
+    def get(self, text, size, name=None):
+        """ Return the L{Glyph} of a symbol, rasterizing it on first use.
+        """
+        key = (name, size, text)
+        glyph = self._glyphs.get(key)
+        if glyph is None:
+            glyph = self._glyphs[key] = self._add(text, size, name)
+        return glyph
+
+    def _add(self, text, size, name):
+        if not self._quit_registered:
+            pygame.register_quit(self._on_pygame_quit)
+            self._quit_registered = True
+        font = textcache.get_font(size, name)
+        surface = font.render(text, True, (255, 255, 255))
+        rect = None
+        if self._pages:
+            rect = self._pages[-1].insert(surface)
+        if rect is None:
+            w, h = surface.get_size()
+            page_size = self._page_size
+            while page_size < max(w, h) + 2 * _Page.padding:
+                page_size *= 2
+            self._pages.append(_Page(page_size))
+            rect = self._pages[-1].insert(surface)
+        page = len(self._pages) - 1
+        return Glyph(page, rect.size, self._pages[page].texcoords(rect))
+
+    def bind(self, index):
+        """ Bind the texture of a page, uploading new glyphs. Requires
+        an OpenGL context.
+        """
+        page = self._pages[index]
+        if page.texture is None:
+            page.texture = gl.glGenTextures(1)
+            gl.glBindTexture(gl.GL_TEXTURE_2D, page.texture)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER,
+                               gl.GL_NEAREST)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER,
+                               gl.GL_NEAREST)
+            data = pygame.image.tostring(page.surface, 'RGBA', True)
+            gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGBA, page.size,
+                            page.size, 0, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, data)
+        else:
+            gl.glBindTexture(gl.GL_TEXTURE_2D, page.texture)
+            for rect in page.dirty:
+                data = pygame.image.tostring(page.surface.subsurface(rect),
+                                             'RGBA', True)
+                gl.glTexSubImage2D(gl.GL_TEXTURE_2D, 0, rect.left,
+                                   page.size - rect.bottom, rect.width,
+                                   rect.height, gl.GL_RGBA,
+                                   gl.GL_UNSIGNED_BYTE, data)
+        page.dirty = []
+
+    def reset(self):
+        """ Forget the textures, e.g. after the screen was closed. The
+        glyphs are uploaded again on the next bind.
+        """
+        for page in self._pages:
+            page.texture = None
+            page.dirty = []
+
+    def clear(self):
+        """ Remove all glyphs and pages. """
+        self._glyphs.clear()
+        self._pages = []
+
+    def get_statistics(self):
+        """ Return the number of glyphs and pages and the bytes of the
+        pages.
+        """
+        return { 'glyphs': len(self._glyphs), 'pages': len(self._pages),
+                 'bytes': sum(4 * p.size ** 2 for p in self._pages) }
+
+    def _on_pygame_quit(self):
+        # the OpenGL context is gone with the display
+        self._quit_registered = False
+        self._logger.debug('Glyph atlas statistics: %s' %
+                           str(self.get_statistics()))
+        self.reset()
+
+_atlas = None
+
+def get_atlas():
+    """ Return the shared L{GlyphAtlas}. """
+    global _atlas
+    if _atlas is None:
+        _atlas = GlyphAtlas()
+    return _atlas
+
+class AtlasText(Stimulus):
+    """ A single line of text drawn from the shared L{GlyphAtlas}, with
+    the parameters of VisionEgg.Text.Text used by L{TextList}. The size
+    parameter is set from the text.
+    """
+    parameters_and_defaults = VisionEgg.ParameterDefinition({
+        'on': (True, ve_types.Boolean, 'draw?'),
+        'text': ('', ve_types.AnyOf(ve_types.String, ve_types.Unicode),
+                 'text to draw'),
+        'font_size': (30, ve_types.UnsignedInteger),
+        'font_name': (None, ve_types.AnyOf(ve_types.String,
+                                           ve_types.Unicode),
+                      'font file, pygame default font if None'),
+        'color': ((1.0, 1.0, 1.0),
+                  ve_types.AnyOf(ve_types.Sequence3(ve_types.Real),
+                                 ve_types.Sequence4(ve_types.Real))),
+        'position': ((320.0, 240.0),
+                     ve_types.AnyOf(ve_types.Sequence2(ve_types.Real),
+                                    ve_types.Sequence3(ve_types.Real),
+                                    ve_types.Sequence4(ve_types.Real)),
+                     'position in eye coordinates'),
+        'anchor': ('lowerleft', ve_types.String,
+                   'how position parameter is used'),
+        'size': ((0, 0), ve_types.Sequence2(ve_types.Real),
+                 'size of the text, set from the text'),
+        })
+
+    def __init__(self, atlas=None, **kw):
+        Stimulus.__init__(self, **kw)
+        self._atlas = atlas or get_atlas()
+        self._update_glyph()
+
+    def set(self, **kw):
+        Stimulus.set(self, **kw)
+        if 'text' in kw or 'font_size' in kw or 'font_name' in kw:
+            self._update_glyph()
+
+    def _update_glyph(self):
+        p = self.parameters
+        self._glyph = self._atlas.get(p.text, p.font_size, p.font_name)
+        p.size = self._glyph.size
+
+    def draw(self):
+        p = self.parameters
+        if not p.on:
+            return
+        glyph = self._glyph
+        gl.glEnable(gl.GL_TEXTURE_2D)
+        self._atlas.bind(glyph.page)
+        gl.glTexEnvi(gl.GL_TEXTURE_ENV, gl.GL_TEXTURE_ENV_MODE,
+                     gl.GL_MODULATE)
+        gl.glDisable(gl.GL_DEPTH_TEST)
+        gl.glEnable(gl.GL_BLEND)
+        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+        if len(p.color) == 3:
+            gl.glColor3f(*p.color)
+        else:
+            gl.glColor4f(*p.color)
+        w, h = glyph.size
+        x, y = VisionEgg._get_lowerleft(p.position, p.anchor, (w, h))
+        left, bottom, right, top = glyph.texcoords
+        gl.glBegin(gl.GL_QUADS)
+        gl.glTexCoord2f(left, bottom)
+        gl.glVertex2f(x, y)
+        gl.glTexCoord2f(right, bottom)
+        gl.glVertex2f(x + w, y)
+        gl.glTexCoord2f(right, top)
+        gl.glVertex2f(x + w, y + h)
+        gl.glTexCoord2f(left, top)
+        gl.glVertex2f(x, y + h)
+        gl.glEnd()
+        gl.glDisable(gl.GL_TEXTURE_2D)
@@ -20,6 +20,8 @@ import VisionEgg
 import VisionEgg.ParameterTypes as ve_types
 import VisionEgg.GL as gl
 
+from texture_cache import get_cache
+
 class Stimulus(object):
     parameters_and_defaults = {}
 
@@ -31,9 +33,30 @@ class Stimulus(object):
 
 class TextureStimulus(Stimulus, VisionEgg.Textures.TextureStimulus):
     def set_file(self, name):
-        texture = VisionEgg.Textures.Texture(name)
+        """ Show an image file. The texture comes from the shared
+        L{TextureCache}, so images preloaded with
+        L{VisionEggView.preload_images} are not read again.
+        """
+        texture = get_cache().get(name)
         VisionEgg.Textures.TextureStimulus.set(self, texture=texture)
 
+    def _reload_texture(self):
+        """ Use the texture object of a cached texture if it was already
+        uploaded in this format, instead of uploading it again.
+        """
+        p = self.parameters
+        mipmaps = self.constant_parameters.mipmaps_enabled
+        cache = get_cache()
+        texture_object = cache.texture_object(p.texture, p.internal_format,
+                                              mipmaps)
+        if texture_object is None:
+            VisionEgg.Textures.TextureStimulus._reload_texture(self)
+            cache.add_texture_object(p.texture, p.internal_format, mipmaps,
+                                     self.texture_object)
+        else:
+            self._using_texture = p.texture
+            self.texture_object = texture_object
+
     def set_height(self, height):
         width, old = self.parameters.texture.size
         self.set(size=(height * width / old, height))
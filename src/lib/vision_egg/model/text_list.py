@@ -14,20 +14,39 @@ program; if not, see <http://www.gnu.org/licenses/>.
 """
 
 from copy import copy
+from itertools import izip
 
-from VisionEgg.Text import Text
+from glyph_atlas import AtlasText
 
 class TextList(list):
     def __init__(self, position, spacing=0.):
         list.__init__([])
         self._position = position
         self._spacing = spacing
+        self._glyphs = []
 
     def add(self, text, size):
-        new = Text(font_size=size, text=text, anchor='bottom')
+        new = AtlasText(font_size=size, text=text, anchor='bottom')
         self.append(new)
         self._rearrange()
 
+    def set_texts(self, texts, sizes):
+        """ Replace the contents by one stimulus per text. The stimuli
+        of previous calls are reused, so only their texture coordinates
+        change, and the positions are computed once.
+        """
+        glyphs = self._glyphs
+        n = 0
+        for text, size in izip(texts, sizes):
+            if n < len(glyphs):
+                glyphs[n].set(text=text, font_size=size)
+            else:
+                glyphs.append(AtlasText(font_size=size, text=text,
+                                        anchor='bottom'))
+            n += 1
+        self[:] = glyphs[:n]
+        self._rearrange()
+
     def _rearrange(self):
         height = self._max_height
         width = self._width
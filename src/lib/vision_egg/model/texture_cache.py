@@ -0,0 +1,256 @@
+__copyright__ = """ Copyright (c) 2014 Bastian Venthur
+
+This program is free software; you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+""" Shared cache of image textures.
+
+L{TextureStimulus.set_file} used to read and decode the image and upload
+it to OpenGL on every call. L{TextureCache} decodes the images of a
+session in a background thread ahead of time, uploads each one once and
+keeps them in memory, so switching images during a stimulus sequence
+doesn't touch the disk. The least recently used images are dropped if
+the images take more than max_bytes of RAM and VRAM together.
+"""
+
+import logging, threading, Queue
+from collections import OrderedDict
+
+import VisionEgg.Textures
+import VisionEgg.GL as gl
+
+# the PIL module VisionEgg accepts texels from
+Image = VisionEgg.Textures.Image
+
+class _Entry(object):
+    def __init__(self, filename):
+        self.filename = filename
+        self.decoded = threading.Event()
+        self.image = None
+        self.error = None
+        self.texture = None
+        self.texture_objects = {}
+        self.bytes = 0
+
+class TextureCache(object):
+    """ LRU cache of decoded images, their VisionEgg textures and the
+    OpenGL texture objects.
+    """
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self._logger = logging.getLogger('TextureCache')
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._textures = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._queue = Queue.Queue()
+        self._thread = None
+        self._statistics = { 'hits': 0, 'misses': 0, 'evictions': 0 }
+
+    def preload(self, filenames, wait=False):
+        """ Decode the images in the background thread.
+        @param wait: Return when all images are decoded.
+        """
+        entries = []
+        self._lock.acquire()
+        try:
+            for name in filenames:
+                entry = self._entries.get(name)
+                if entry is None:
+                    entry = self._entries[name] = _Entry(name)
+                    self._queue.put(entry)
+                entries.append(entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._decode_loop,
+                                                name='TextureCache')
+                self._thread.setDaemon(True)
+                self._thread.start()
+        finally:
+            self._lock.release()
+        if wait:
+            for entry in entries:
+                entry.decoded.wait()
+
+    def upload(self, filenames, internal_format=gl.GL_RGB, mipmaps=True):
+        """ Preload the images and upload them to OpenGL, with the
+        defaults of VisionEgg's TextureStimulus. Requires an OpenGL
+        context.
+        """
+        filenames = list(filenames)
+        self.preload(filenames, wait=True)
+        for name in filenames:
+            texture = self.get(name)
+            if self.texture_object(texture, internal_format,
+                                   mipmaps) is None:
+                texture_object = VisionEgg.Textures.TextureObject(dimensions=2)
+                texture.load(texture_object, internal_format=internal_format,
+                             build_mipmaps=mipmaps)
+                self.add_texture_object(texture, internal_format, mipmaps,
+                                        texture_object)
+        if self._bytes > self.max_bytes:
+            self._logger.warning('The preloaded images need %i bytes, more '
+                                 'than the %i bytes of the cache.' %
+                                 (self._bytes, self.max_bytes))
+
+    def get(self, filename):
+        """ Return the VisionEgg.Textures.Texture of an image file. Images
+        which weren't preloaded are read now.
+        """
+        self._lock.acquire()
+        try:
+            entry = self._entries.pop(filename, None)
+            miss = entry is None
+            if miss:
+                entry = _Entry(filename)
+                self._statistics['misses'] += 1
+            else:
+                self._statistics['hits'] += 1
+            # (re)insert as most recently used
+            self._entries[filename] = entry
+        finally:
+            self._lock.release()
+        if miss:
+            self._logger.warning('Image %s was not preloaded.' % filename)
+            self._decode(entry)
+        else:
+            entry.decoded.wait()
+        if entry.error is not None:
+            raise entry.error
+        self._lock.acquire()
+        try:
+            if entry.texture is None:
+                entry.texture = VisionEgg.Textures.Texture(entry.image)
+                self._textures[id(entry.texture)] = entry
+            # only evict here, the texture objects must be deleted in the
+            # thread with the OpenGL context
+            self._evict(entry)
+        finally:
+            self._lock.release()
+        return entry.texture
+
+    def texture_object(self, texture, internal_format, mipmaps):
+        """ Return the uploaded texture object of a texture from L{get},
+        None if the texture wasn't uploaded in this format.
+        """
+        entry = self._textures.get(id(texture))
+        if entry is None or entry.texture is not texture:
+            return None
+        return entry.texture_objects.get((internal_format, mipmaps))
+
+    def add_texture_object(self, texture, internal_format, mipmaps,
+                           texture_object):
+        """ Remember the texture object a texture from L{get} was
+        uploaded to. Other textures are ignored.
+        """
+        entry = self._textures.get(id(texture))
+        if entry is not None and entry.texture is texture:
+            entry.texture_objects[(internal_format, mipmaps)] = texture_object
+
+    def reset(self):
+        """ Forget the texture objects, e.g. after the screen was closed.
+        The decoded images are kept.
+        """
+        self._lock.acquire()
+        try:
+            for entry in self._entries.itervalues():
+                entry.texture_objects.clear()
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        """ Remove all images. """
+        self._lock.acquire()
+        try:
+            self._entries.clear()
+            self._textures.clear()
+            self._bytes = 0
+        finally:
+            self._lock.release()
+
+    def get_statistics(self):
+        """ Return the number of hits, misses and evictions, the number of
+        cached images and their estimated bytes.
+        """
+        stats = self._statistics.copy()
+        stats['images'] = len(self._entries)
+        stats['bytes'] = self._bytes
+        return stats
+
+    def _decode_loop(self):
+        while True:
+            entry = self._queue.get()
+            if not entry.decoded.isSet():
+                self._decode(entry)
+
+    def _decode(self, entry):
+        try:
+            image = Image.open(entry.filename)
+            image.load()
+        except Exception, e:
+            self._logger.error('Unable to read image %s: %s' %
+                               (entry.filename, e))
+            entry.error = e
+            entry.decoded.set()
+            return
+        self._lock.acquire()
+        try:
+            if entry.decoded.isSet():
+                return
+            entry.image = image
+            entry.bytes = _size(image)
+            if self._entries.get(entry.filename) is entry:
+                self._bytes += entry.bytes
+            entry.decoded.set()
+        finally:
+            self._lock.release()
+
+    def _evict(self, keep):
+        """ Drop the least recently used decoded images until the cache
+        fits into max_bytes. Called with the lock held.
+        """
+        if self._bytes <= self.max_bytes:
+            return
+        for name, entry in self._entries.items():
+            if self._bytes <= self.max_bytes:
+                break
+            if entry is keep or not entry.decoded.isSet():
+                continue
+            del self._entries[name]
+            self._textures.pop(id(entry.texture), None)
+            self._bytes -= entry.bytes
+            self._statistics['evictions'] += 1
+
+def _next_power_of_2(n):
+    p = 1
+    while p < n:
+        p *= 2
+    return p
+
+def _size(image):
+    """ Estimated bytes of the decoded image and its OpenGL texture,
+    which VisionEgg pads to powers of 2.
+    """
+    w, h = image.size
+    texture = _next_power_of_2(w) * _next_power_of_2(h) * 4
+    return w * h * len(image.getbands()) + texture
+
+_cache = None
+
+def get_cache():
+    """ Return the shared L{TextureCache}. """
+    global _cache
+    if _cache is None:
+        _cache = TextureCache()
+    return _cache
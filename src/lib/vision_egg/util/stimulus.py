@@ -15,13 +15,13 @@ along with this program; if not, see <http://www.gnu.org/licenses/>.
 
 """
 
-from time import sleep
-from datetime import datetime, timedelta
+from datetime import timedelta
 import collections, logging, itertools, random
 
 import VisionEgg
 
-from lib.vision_egg.util.frame_counter import FrameCounter
+from lib.clock import monotonic
+from lib.scheduler import StimulusScheduler
 
 _refresh_rate = VisionEgg.config.VISIONEGG_MONITOR_REFRESH_HZ
 _frame_duration = 1. / _refresh_rate
@@ -92,7 +92,10 @@ def _stimulus_time(time, vsync):
     return typ(time)(time, vsync=vsync)
 
 class StimulusPainter(object):
-    """ Painter for a series of stimuli. """
+    """ Painter for a series of stimuli.
+    The onsets are timed by a StimulusScheduler, which aligns them to the
+    predicted vsync of the monitor and logs the onset errors.
+    """
     def __init__(self, prepare, wait, view, flag, wait_style_fixed=False,
                  print_frames=False, suspendable=True, pre_stimulus=None,
                  frame_transition=False, vsync=True):
@@ -107,61 +110,58 @@ class StimulusPainter(object):
         self._frame_transition = frame_transition
         self._vsync = vsync
         self._logger = logging.getLogger('StimulusPainter')
-        self._frame_counter = FrameCounter(self._flag)
-        self._suspended_time = timedelta()
+        self._scheduler = StimulusScheduler(_refresh_rate)
+        self._suspended_time = 0.
         self._wait = self._frame_wait if frame_transition else self._time_wait
         self._online_times = []
 
     def run(self):
-        if self._print_frames or self._frame_transition:
-            self._frame_counter.start()
         if self._prepare():
-            self._last_start = datetime.now()
-            self._frame_counter.lock()
+            self._scheduler.start()
+            start = monotonic()
             self._present()
             while self._prepare():
                 self._wait()
                 self._present()
             if self._flag:
                 self._wait()
-        if self._print_frames:
-            self._logger.debug('Frames rendered during last sequence: %d' %
-                               self._frame_counter.frame)
+            if self._print_frames:
+                self._logger.debug('Frames rendered during last sequence: %d' %
+                                   round((monotonic() - start) * _refresh_rate))
+            stats = self._scheduler.get_statistics()
+            if stats['onsets']:
+                self._logger.debug('Stimulus onset error: mean %.2fms, std '
+                                   '%.2fms, max %.2fms' %
+                                   (1000 * stats['mean'], 1000 * stats['std'],
+                                    1000 * stats['max']))
 
     def _frame_wait(self):
-        next_interval = self._next_duration
-        while self._flag and self._frame_counter.last_interval < next_interval:
-            self._frame_counter.sync()
-        if self._print_frames:
-            self._logger.debug('Frames after waiting: %d' %
-                               self._frame_counter.last_interval)
+        self._scheduler.wait_frames(self._next_duration, self._flag)
+        self._debug_frames('Frames after waiting: %d')
 
     def _time_wait(self):
-        next_start = self._last_start + self._next_duration
-        while next_start - datetime.now() > timedelta():
-            pass
-        self._last_start = (next_start if self._wait_style_fixed else
-                            datetime.now())
+        self._scheduler.wait(self._next_duration.total_seconds(),
+                             self._wait_style_fixed, self._flag)
+        self._debug_frames('Frames after waiting: %d')
+
+    def _debug_frames(self, text):
         if self._print_frames:
-            self._logger.debug('Frames after waiting: %d' %
-                               self._frame_counter.last_interval)
+            self._logger.debug(text % self._scheduler.frames_since_onset())
 
     def _prepare(self):
         if self._flag:
             if self._suspendable and self._flag.suspended:
-                suspend_start = datetime.now()
+                suspend_start = monotonic()
                 self._flag.wait()
-                self._suspended_time = datetime.now() - suspend_start
+                self._suspended_time = monotonic() - suspend_start
             return self._do_prepare()
 
     def _present(self):
-        if self._print_frames:
-            self._logger.debug('Frames before stimulus change: %d' %
-                               self._frame_counter.last_interval)
+        self._debug_frames('Frames before stimulus change: %d')
         if self._pre_stimulus is not None:
             self._pre_stimulus()
-        self._frame_counter.lock()
         self._view.update()
+        self._scheduler.onset()
 
     @property
     def _next_duration(self):
@@ -174,8 +174,8 @@ class StimulusPainter(object):
     @property
     def _suspended(self):
         t = self._suspended_time
-        self._suspended_time = timedelta()
-        return _frames(t.total_seconds()) if self._frame_transition else t
+        self._suspended_time = 0.
+        return _frames(t) if self._frame_transition else timedelta(seconds=t)
 
 class StimulusSequence(StimulusPainter):
     def _do_prepare(self):
@@ -27,6 +27,8 @@ from lib import marker
 
 from model.color_word import ColorWord
 from model.color_word import TextList
+from model.glyph_atlas import get_atlas
+from model import texture_cache
 from model.stimulus import TextureStimulus
 from util.switcherator import Switcherator
 
@@ -76,6 +78,8 @@ class VisionEggView(object):
     def reinit(self):
         """ Initialize VisionEgg objects. """
         self.__init_screen()
+        texture_cache.get_cache().max_bytes = (self._texture_cache_size *
+                                               1024 * 1024)
         self.__init_presentation()
         self.__init_viewports()
         self.init()
@@ -137,9 +141,9 @@ class VisionEggView(object):
     def add_stimuli(self, *stimuli):
         """ Add additional custom stimulus objects to the list of
         stimuli. TextList instances need their own Viewport, as they
-        consist of multiple stimulus objects that are deleted everytime
-        they change, and so the Viewport needs to have a reference to
-        the containing TextList, otherwise they get lost.
+        consist of multiple stimulus objects that are added and removed
+        when their text changes, and so the Viewport needs to have a
+        reference to the containing TextList, otherwise they get lost.
         """
         text_lists = filter(lambda s: isinstance(s, TextList), stimuli)
         if text_lists:
@@ -175,6 +179,16 @@ class VisionEggView(object):
         self.add_stimuli(img)
         return img
 
+    def preload_images(self, filenames, upload=True):
+        """ Decode image files for L{TextureStimulus.set_file} in a
+        background thread. If upload is True, wait for them and upload
+        them to OpenGL, which requires the screen.
+        """
+        if upload:
+            texture_cache.get_cache().upload(filenames)
+        else:
+            texture_cache.get_cache().preload(filenames)
+
     def _create_color(self, name):
         try:
             if isinstance(name, tuple):
@@ -280,6 +294,8 @@ class VisionEggView(object):
         """ Shut down the screen. """
         self._screen_acquired = False
         self.screen.close()
+        get_atlas().reset()
+        texture_cache.get_cache().reset()
 
     def quit(self):
         """ Stop the presentation. """